@@ -6,6 +6,8 @@ This package provides chunking and retrieval utilities for document processing.
 Modules:
     chunker: Document chunking with overlapping windows
     retriever: SBERT-based semantic retrieval
+    vector_index: Exact and approximate (HNSW / IVF) nearest-neighbour indexes
+    bm25: BM25 lexical retrieval with a precomputed inverted index
     config: Configuration settings
     evaluator: Evaluation metrics
     reasoner: LLM reasoning module
@@ -21,6 +23,8 @@ Usage:
 __all__ = [
     'chunker',
     'retriever',
+    'vector_index',
+    'bm25',
     'config',
     'evaluator',
     'reasoner',
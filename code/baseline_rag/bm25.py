@@ -0,0 +1,185 @@
+"""
+BM25 lexical retrieval with a precomputed inverted index.
+
+Dense MiniLM embeddings blur rare, decisive terms ("Confidential
+Information", "return or destroy"); BM25 scores them by term rarity. The index
+is built once per document or KB: for every term it stores the chunks that
+contain it and the term frequencies, so a query only touches the postings of
+its own terms.
+
+Lexical and dense rankings are combined with reciprocal rank fusion (see
+retriever.retrieve_hybrid), which needs no score calibration between the two.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+
+# Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Function words that carry no retrieval signal
+STOPWORDS = frozenset("""
+a an and are as at be been by for from has have in into is it its of on or
+such that the their then there these this to was were will with
+""".split())
+
+
+def tokenize(text):
+    """
+    Lowercased alphanumeric tokens of a text, without stopwords.
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of tokens
+    """
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def texts_hash(texts):
+    """SHA-256 of a list of texts (identifies the corpus an index was built from)."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode('utf-8'))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of texts, with an inverted index."""
+
+    def __init__(self, texts, k1=BM25_K1, b=BM25_B):
+        """
+        Build the index.
+
+        Args:
+            texts: Texts to index (e.g. chunk or proposition texts)
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(texts)
+        self.source_hash = texts_hash(texts)
+
+        postings = {}
+        doc_lengths = np.zeros(self.num_docs, dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(doc_id)
+                postings[term][1].append(tf)
+        self._set_postings(postings, doc_lengths)
+
+    def _set_postings(self, postings, doc_lengths):
+        """Store postings as arrays and precompute IDF and length norms."""
+        self.doc_lengths = doc_lengths
+        self.postings = {
+            term: (np.asarray(doc_ids, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            for term, (doc_ids, tfs) in postings.items()
+        }
+        avg_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+        self._length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / (avg_length or 1.0))
+        self.idf = {
+            term: float(np.log(1 + (self.num_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5)))
+            for term, (doc_ids, _) in self.postings.items()
+        }
+
+    def __len__(self):
+        return self.num_docs
+
+    def scores(self, query):
+        """
+        BM25 score of every indexed text for a query.
+
+        Args:
+            query: Query text
+
+        Returns:
+            Numpy array of shape (num_texts,); 0 for texts sharing no term with the query
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            doc_ids, tfs = posting
+            scores[doc_ids] += self.idf[term] * tfs * (self.k1 + 1) / (tfs + self._length_norm[doc_ids])
+        return scores
+
+    def save(self, path):
+        """Write the index as JSON."""
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "source_hash": self.source_hash,
+            "doc_lengths": self.doc_lengths.tolist(),
+            "postings": {term: [ids.tolist(), tfs.tolist()] for term, (ids, tfs) in self.postings.items()}
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls.__new__(cls)
+        index.k1 = data["k1"]
+        index.b = data["b"]
+        index.source_hash = data["source_hash"]
+        doc_lengths = np.asarray(data["doc_lengths"], dtype=np.float32)
+        index.num_docs = len(doc_lengths)
+        index._set_postings(data["postings"], doc_lengths)
+        return index
+
+
+def bm25_path_for(json_path):
+    """
+    Path of the persisted BM25 index of a logified JSON file.
+
+    Args:
+        json_path: Path of the logified JSON file
+
+    Returns:
+        Path with the `.json` suffix replaced by `.bm25.json`
+    """
+    base, _ = os.path.splitext(json_path)
+    return base + ".bm25.json"
+
+
+def load_or_build_bm25(json_path, texts):
+    """
+    Load the persisted BM25 index of a logified JSON file, building it if needed.
+
+    Args:
+        json_path: Path of the logified JSON file
+        texts: Texts to index; the stored index is rebuilt if they changed
+
+    Returns:
+        BM25Index
+    """
+    path = bm25_path_for(json_path)
+    if os.path.exists(path):
+        try:
+            index = BM25Index.load(path)
+            if index.source_hash == texts_hash(texts):
+                return index
+        except (ValueError, KeyError):
+            pass
+
+    index = BM25Index(texts)
+    index.save(path)
+    return index
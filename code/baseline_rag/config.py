@@ -20,6 +20,8 @@ SBERT_MODEL = "all-MiniLM-L6-v2"
 
 # Retrieval Configuration
 TOP_K = 5
+RETRIEVAL_MODE = "dense"  # "dense" (SBERT) or "hybrid" (SBERT + BM25, reciprocal rank fusion)
+RRF_K = 60
 
 # Chunking Configuration
 CHUNK_SIZE = 400
@@ -9,7 +9,6 @@ The retrieval is deterministic given fixed embeddings and query, ensuring
 reproducibility across runs.
 """
 
-from sentence_transformers import SentenceTransformer
 import numpy as np
 
 
@@ -23,6 +22,9 @@ def load_sbert_model(model_name):
     Returns:
         Loaded SBERT model object
     """
+    # Imported here: sentence_transformers pulls in torch, which takes seconds
+    from sentence_transformers import SentenceTransformer
+
     return SentenceTransformer(model_name)
 
 
@@ -72,13 +74,103 @@ def retrieve(query_embedding, chunk_embeddings, chunks, k=5):
     """
     similarities = compute_cosine_similarity(query_embedding, chunk_embeddings)
 
-    top_k_indices = np.argsort(similarities)[::-1][:k]
-
-    retrieved_chunks = [chunks[i] for i in top_k_indices]
+    retrieved_chunks = [chunks[i] for i in top_k_indices(similarities, k)]
 
     return retrieved_chunks
 
 
+def top_k_indices(similarities, k):
+    """
+    Indices of the k highest similarities, in decreasing order.
+
+    Uses argpartition, so only the k selected scores are sorted (linear time
+    in the number of chunks instead of a full sort).
+
+    Args:
+        similarities: Similarity scores (num_chunks,)
+        k: Number of indices to return
+
+    Returns:
+        Numpy array of at most k indices
+    """
+    similarities = np.asarray(similarities)
+    k = min(k, len(similarities))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(similarities):
+        candidates = np.argpartition(-similarities, k - 1)[:k]
+    else:
+        candidates = np.arange(len(similarities))
+    # Decreasing similarity, ties by index
+    return candidates[np.lexsort((candidates, -similarities[candidates]))]
+
+
+def reciprocal_rank_fusion(rankings, k, rrf_k=60):
+    """
+    Fuse several rankings by reciprocal rank fusion.
+
+    Each item scores sum(1 / (rrf_k + rank)) over the rankings it appears in
+    (rank starting at 1), so no calibration between the rankers' scores is needed.
+
+    Args:
+        rankings: Lists of item indices, best first
+        k: Number of fused items to return
+        rrf_k: Rank offset dampening the weight of the top ranks (default: 60)
+
+    Returns:
+        Tuple of (indices, fused_scores), ordered by decreasing fused score
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking, start=1):
+            fused[int(idx)] = fused.get(int(idx), 0.0) + 1.0 / (rrf_k + rank)
+    ordered = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+    indices = np.array([idx for idx, _ in ordered], dtype=np.int64)
+    scores = np.array([score for _, score in ordered], dtype=np.float64)
+    return indices, scores
+
+
+def hybrid_top_k(similarities, lexical_scores, k, rrf_k=60, depth=None):
+    """
+    Top-k indices by fusing a dense and a lexical ranking (see reciprocal_rank_fusion).
+
+    Args:
+        similarities: Dense (cosine) similarity scores (num_chunks,)
+        lexical_scores: Lexical (BM25) scores (num_chunks,); chunks scoring 0 are not ranked
+        k: Number of indices to return
+        rrf_k: Rank offset of the fusion (default: 60)
+        depth: Number of candidates taken from each ranking (default: max(50, 4 * k))
+
+    Returns:
+        Tuple of (indices, fused_scores), ordered by decreasing fused score
+    """
+    depth = depth or max(50, 4 * k)
+    dense_ranking = top_k_indices(similarities, depth)
+    lexical_ranking = [idx for idx in top_k_indices(lexical_scores, depth) if lexical_scores[idx] > 0]
+    return reciprocal_rank_fusion([dense_ranking, lexical_ranking], k, rrf_k=rrf_k)
+
+
+def retrieve_hybrid(query, query_embedding, chunk_embeddings, chunks, bm25_index, k=5, rrf_k=60):
+    """
+    Retrieve top-k chunks by fusing SBERT similarity with BM25.
+
+    Args:
+        query: Query string (for BM25)
+        query_embedding: Query embedding vector
+        chunk_embeddings: Matrix of chunk embeddings (num_chunks x embedding_dim)
+        chunks: Original list of chunk dictionaries
+        bm25_index: BM25 index over the chunk texts (see bm25.BM25Index)
+        k: Number of chunks to retrieve
+        rrf_k: Rank offset of the fusion (default: 60)
+
+    Returns:
+        List of k chunk dictionaries, ordered by decreasing fused score
+    """
+    similarities = compute_cosine_similarity(query_embedding, chunk_embeddings)
+    indices, _ = hybrid_top_k(similarities, bm25_index.scores(query), k, rrf_k=rrf_k)
+    return [chunks[i] for i in indices]
+
+
 def compute_cosine_similarity(query_embedding, chunk_embeddings):
     """
     Compute cosine similarity between query and all chunks.
@@ -19,7 +19,8 @@ from load_logicbench import load_logicbench
 
 import config
 from chunker import chunk_document
-from retriever import load_sbert_model, encode_chunks, encode_query, retrieve
+from retriever import load_sbert_model, encode_chunks, encode_query, retrieve, retrieve_hybrid
+from bm25 import BM25Index
 from reasoner import reason_with_cot
 from evaluator import evaluate, format_results, normalize_label
 
@@ -131,7 +132,12 @@ def run_logicbench_experiment(logic_type, reasoning_patterns=None, max_examples_
         chunk_embeddings = encode_chunks(chunks, sbert_model)
         query_embedding = encode_query(query, sbert_model)
 
-        retrieved_chunks = retrieve(query_embedding, chunk_embeddings, chunks, k=config.TOP_K)
+        if config.RETRIEVAL_MODE == "hybrid":
+            bm25_index = BM25Index([c['text'] for c in chunks])
+            retrieved_chunks = retrieve_hybrid(query, query_embedding, chunk_embeddings, chunks, bm25_index,
+                                               k=config.TOP_K, rrf_k=config.RRF_K)
+        else:
+            retrieved_chunks = retrieve(query_embedding, chunk_embeddings, chunks, k=config.TOP_K)
 
         result = reason_with_cot(query, retrieved_chunks, model_name, LOGICBENCH_PROMPT_TEMPLATE, config.TEMPERATURE)
         pred = normalize_label(result['answer'])
@@ -3,6 +3,14 @@ Test script for baseline RAG code validation.
 Tests each module independently to verify correctness.
 """
 
+import json
+import os
+import tempfile
+from pathlib import Path
+
+ARTIFACTS_DIR = Path(__file__).resolve().parent.parent.parent / "artifacts" / "code"
+
+
 def test_chunker():
     """Test chunking functionality."""
     from chunker import chunk_document
@@ -88,6 +96,101 @@ def test_parse_response():
     print("✓ Response parsing tests passed")
 
 
+def test_vector_index():
+    """Test top-k selection and the persisted nearest-neighbour index."""
+    import numpy as np
+    from retriever import top_k_indices
+    from vector_index import (
+        build_index, load_or_build_index, index_path_for, synthetic_embeddings
+    )
+
+
+    rng = np.random.default_rng(0)
+    scores = rng.random(1000)
+    assert list(top_k_indices(scores, 10)) == list(np.argsort(scores)[::-1][:10])
+    assert len(top_k_indices(scores[:5], 10)) == 5
+
+    embeddings = synthetic_embeddings(2000, dim=32, seed=1)
+    query = embeddings[7] + 0.01
+    index = build_index(embeddings, "exact")
+    indices, similarities = index.search(query, 5)
+    assert indices[0] == 7 and list(similarities) == sorted(similarities, reverse=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "doc_weighted.json")
+        load_or_build_index(json_path, embeddings, "exact", embedding_model="m")
+        mtime = os.path.getmtime(index_path_for(json_path, "exact"))
+        reloaded = load_or_build_index(json_path, embeddings, "exact", embedding_model="m")
+        assert os.path.getmtime(index_path_for(json_path, "exact")) == mtime  # Reused, not rebuilt
+        assert list(reloaded.search(query, 5)[0]) == list(indices)
+
+        # Different embeddings: rebuilt
+        rebuilt = load_or_build_index(json_path, embeddings[:100], "exact", embedding_model="m")
+        assert len(rebuilt) == 100
+
+        # Validated by source hash: embeddings are only computed to (re)build
+        calls = []
+
+        def embed():
+            calls.append(1)
+            return embeddings
+
+        load_or_build_index(json_path, embed, "exact", embedding_model="m", source_hash="a")
+        reloaded = load_or_build_index(json_path, embed, "exact", embedding_model="m", source_hash="a")
+        assert len(calls) == 1 and len(reloaded) == len(embeddings)
+        load_or_build_index(json_path, embed, "exact", embedding_model="m", source_hash="b")
+        assert len(calls) == 2
+
+    try:
+        build_index(embeddings, "unknown")
+        assert False, "Unknown index kind should raise ValueError"
+    except ValueError:
+        pass
+    print("✓ Vector index tests passed")
+
+
+def test_hybrid_retrieval():
+    """Test BM25 scoring, its persistence and reciprocal rank fusion."""
+    import numpy as np
+    from bm25 import BM25Index, load_or_build_bm25, bm25_path_for
+    from retriever import reciprocal_rank_fusion, hybrid_top_k
+
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+    texts = [f"{p['translation']} {p.get('evidence', '')}" for p in logified['primitive_props']]
+    index = BM25Index(texts)
+
+    # A proposition's rarest word ranks it first
+    target = max(range(len(texts)), key=lambda i: len(texts[i]))
+    word = min(set(w for w in index.postings if target in index.postings[w][0]),
+               key=lambda w: (len(index.postings[w][0]), w))
+    scores = index.scores(word)
+    assert scores[target] == scores.max() > 0
+    assert not index.scores("the of and").any()  # Stopwords only
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "doc_weighted.json")
+        load_or_build_bm25(json_path, texts)
+        reloaded = load_or_build_bm25(json_path, texts)
+        assert os.path.exists(bm25_path_for(json_path))
+        assert np.allclose(reloaded.scores(word), scores)
+        assert len(load_or_build_bm25(json_path, texts[:3])) == 3  # Rebuilt for new texts
+
+    # Items ranked well by both rankers win; items from one ranker still appear
+    indices, fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=4)
+    assert list(indices) == [1, 3, 2, 4] and list(fused) == sorted(fused, reverse=True)
+
+    # A lexical-only hit makes it into the top k
+    similarities = np.linspace(1, 0, 100)
+    lexical = np.zeros(100)
+    lexical[80] = 5.0
+    top, _ = hybrid_top_k(similarities, lexical, k=5)
+    assert 80 in top and 0 in top
+    print("✓ Hybrid retrieval tests passed")
+
+
 if __name__ == "__main__":
     print("Running baseline RAG tests...\n")
 
@@ -97,6 +200,8 @@ if __name__ == "__main__":
         test_main_functions()
         test_parse_response()
         test_retriever()
+        test_vector_index()
+        test_hybrid_retrieval()
 
         print("\n" + "="*50)
         print("All tests passed successfully!")
@@ -0,0 +1,425 @@
+"""
+Nearest-neighbour indexes over chunk / proposition embeddings.
+
+retrieve() and translate.retrieve_top_k_propositions compare the query with
+every embedding. That is fine for a document's few dozen propositions, but
+corpus-level KBs have hundreds of thousands. This module puts retrieval behind
+a small index interface:
+
+    exact - brute-force cosine similarity with argpartition (no dependencies)
+    hnsw  - HNSW graph (requires hnswlib)
+    ivf   - inverted-file index with flat lists (requires faiss-cpu)
+
+Indexes are built once per set of embeddings and persisted next to the
+logified JSON file (see load_or_build_index); they are rebuilt automatically
+when the embeddings change.
+
+Benchmark recall@k and latency of the approximate indexes against the exact
+one on synthetic embeddings:
+
+    python -m baseline_rag.vector_index --num-items 200000 --kinds exact,hnsw,ivf
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from baseline_rag.retriever import top_k_indices
+
+
+INDEX_KINDS = ("exact", "hnsw", "ivf")
+
+
+def _normalize(embeddings):
+    """Row-normalized float32 copy of the embeddings (cosine = dot product)."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings[None, :]
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / (norms + 1e-9)
+
+
+def embeddings_hash(embeddings):
+    """
+    SHA-256 of an embedding matrix (identifies the data an index was built from).
+
+    Args:
+        embeddings: Matrix of embeddings (num_items x dim)
+
+    Returns:
+        Hex digest
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    digest = hashlib.sha256(str(embeddings.shape).encode())
+    digest.update(embeddings.tobytes())
+    return digest.hexdigest()
+
+
+class ExactIndex:
+    """Brute-force cosine similarity over all embeddings."""
+
+    kind = "exact"
+
+    def __init__(self, embeddings):
+        """
+        Build the index.
+
+        Args:
+            embeddings: Matrix of embeddings (num_items x dim)
+        """
+        self.embeddings = _normalize(embeddings)
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    def search(self, query_embedding, k):
+        """
+        Find the k most similar items.
+
+        Args:
+            query_embedding: Query vector (dim,)
+            k: Number of items to return
+
+        Returns:
+            (indices, similarities), ordered by decreasing cosine similarity
+        """
+        similarities = self.embeddings @ _normalize(query_embedding)[0]
+        indices = top_k_indices(similarities, k)
+        return indices, similarities[indices]
+
+    def save(self, path):
+        """Write the index to path."""
+        with open(path, 'wb') as f:
+            np.save(f, self.embeddings)
+
+    @classmethod
+    def load(cls, path, dim=None):
+        """Read an index written by save()."""
+        index = cls.__new__(cls)
+        index.embeddings = np.load(path, mmap_mode='r')
+        return index
+
+
+class HNSWIndex:
+    """Approximate search with an HNSW graph (hnswlib)."""
+
+    kind = "hnsw"
+
+    def __init__(self, embeddings, m=16, ef_construction=200, ef_search=64):
+        """
+        Build the index.
+
+        Args:
+            embeddings: Matrix of embeddings (num_items x dim)
+            m: Graph degree (higher: better recall, more memory)
+            ef_construction: Candidate list size while building
+            ef_search: Candidate list size while searching (at least k is used)
+        """
+        import hnswlib
+
+        embeddings = _normalize(embeddings)
+        self.ef_search = ef_search
+        self.index = hnswlib.Index(space='cosine', dim=embeddings.shape[1])
+        self.index.init_index(max_elements=len(embeddings), M=m, ef_construction=ef_construction)
+        self.index.add_items(embeddings, np.arange(len(embeddings)))
+
+    def __len__(self):
+        return self.index.get_current_count()
+
+    def search(self, query_embedding, k):
+        """
+        Find (approximately) the k most similar items.
+
+        Args:
+            query_embedding: Query vector (dim,)
+            k: Number of items to return
+
+        Returns:
+            (indices, similarities), ordered by decreasing cosine similarity
+        """
+        k = min(k, len(self))
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(_normalize(query_embedding), k=k)
+        return labels[0].astype(np.int64), 1.0 - distances[0]
+
+    def save(self, path):
+        """Write the index to path."""
+        self.index.save_index(path)
+
+    @classmethod
+    def load(cls, path, dim, ef_search=64):
+        """Read an index written by save()."""
+        import hnswlib
+
+        index = cls.__new__(cls)
+        index.ef_search = ef_search
+        index.index = hnswlib.Index(space='cosine', dim=dim)
+        index.index.load_index(path)
+        return index
+
+
+class IVFIndex:
+    """Approximate search with an inverted-file index (faiss)."""
+
+    kind = "ivf"
+
+    def __init__(self, embeddings, nlist=None, nprobe=16):
+        """
+        Build the index.
+
+        Args:
+            embeddings: Matrix of embeddings (num_items x dim)
+            nlist: Number of clusters (default: about 4 * sqrt(num_items))
+            nprobe: Clusters scanned per query (higher: better recall, slower)
+        """
+        import faiss
+
+        embeddings = _normalize(embeddings)
+        if nlist is None:
+            nlist = int(4 * np.sqrt(len(embeddings)))
+        nlist = max(1, min(nlist, len(embeddings) // 39 or 1))  # faiss wants ~39 points per cluster
+        quantizer = faiss.IndexFlatIP(embeddings.shape[1])
+        self.index = faiss.IndexIVFFlat(quantizer, embeddings.shape[1], nlist, faiss.METRIC_INNER_PRODUCT)
+        self.index.train(embeddings)
+        self.index.add(embeddings)
+        self.index.nprobe = min(nprobe, nlist)
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def search(self, query_embedding, k):
+        """
+        Find (approximately) the k most similar items.
+
+        Args:
+            query_embedding: Query vector (dim,)
+            k: Number of items to return
+
+        Returns:
+            (indices, similarities), ordered by decreasing cosine similarity
+        """
+        similarities, labels = self.index.search(_normalize(query_embedding), min(k, len(self)))
+        found = labels[0] >= 0  # Fewer than k items in the probed clusters
+        return labels[0][found].astype(np.int64), similarities[0][found]
+
+    def save(self, path):
+        """Write the index to path."""
+        import faiss
+
+        faiss.write_index(self.index, path)
+
+    @classmethod
+    def load(cls, path, dim=None, nprobe=None):
+        """Read an index written by save()."""
+        import faiss
+
+        index = cls.__new__(cls)
+        index.index = faiss.read_index(path)
+        if nprobe is not None:
+            index.index.nprobe = nprobe
+        return index
+
+
+_INDEX_CLASSES = {"exact": ExactIndex, "hnsw": HNSWIndex, "ivf": IVFIndex}
+
+
+def build_index(embeddings, kind="exact", **params):
+    """
+    Build a nearest-neighbour index.
+
+    Args:
+        embeddings: Matrix of embeddings (num_items x dim)
+        kind: One of INDEX_KINDS
+        **params: Index parameters (see the index classes)
+
+    Returns:
+        Index with search(query_embedding, k) -> (indices, similarities)
+
+    Raises:
+        ValueError: If the kind is unknown
+        ImportError: If the library of an approximate index is not installed
+    """
+    if kind not in _INDEX_CLASSES:
+        raise ValueError(f"Unknown index kind: {kind}. Available: {', '.join(INDEX_KINDS)}")
+    return _INDEX_CLASSES[kind](embeddings, **params)
+
+
+def index_path_for(json_path, kind):
+    """
+    Path of the persisted index of a logified JSON file.
+
+    Args:
+        json_path: Path of the logified JSON file
+        kind: Index kind
+
+    Returns:
+        Path with the `.json` suffix replaced by `.<kind>.index`
+    """
+    return str(Path(json_path).with_suffix(f".{kind}.index"))
+
+
+def load_or_build_index(json_path, embeddings, kind="exact", embedding_model=None, source_hash=None, **params):
+    """
+    Load the persisted index of a logified JSON file, building it if needed.
+
+    The index is stored next to the JSON file together with a small metadata
+    file (`.index.json`) recording the hash of the embeddings and the model
+    that produced them; a mismatch triggers a rebuild.
+
+    If source_hash (e.g. bm25.texts_hash of the embedded texts) is given, the
+    stored index is validated against it instead, and embeddings may be a
+    callable returning the matrix: it is only called when the index has to be
+    (re)built, so a valid index is loaded without encoding anything.
+
+    Args:
+        json_path: Path of the logified JSON file
+        embeddings: Matrix of proposition embeddings (num_props x dim), or a
+            callable returning it
+        kind: One of INDEX_KINDS
+        embedding_model: Name of the model that produced the embeddings
+        source_hash: Hash of the data the embeddings were computed from
+        **params: Index parameters used when building (see the index classes)
+
+    Returns:
+        Index
+    """
+    path = index_path_for(json_path, kind)
+    meta_path = path + ".json"
+    expected = {"kind": kind, "embedding_model": embedding_model}
+    if source_hash is not None:
+        expected["source_hash"] = source_hash
+    else:
+        if callable(embeddings):
+            embeddings = embeddings()
+        expected["embeddings_hash"] = embeddings_hash(embeddings)
+
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        if all(stored.get(key) == value for key, value in expected.items()):
+            return _INDEX_CLASSES[kind].load(path, dim=stored["dim"])
+
+    if callable(embeddings):
+        embeddings = embeddings()
+    meta = dict(
+        expected,
+        embeddings_hash=embeddings_hash(embeddings),
+        num_items=int(len(embeddings)),
+        dim=int(np.shape(embeddings)[1])
+    )
+
+    index = build_index(embeddings, kind, **params)
+    index.save(path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(meta, params=params), f, indent=2)
+    return index
+
+
+def synthetic_embeddings(num_items, dim=384, num_clusters=None, seed=0):
+    """
+    Clustered random unit vectors resembling sentence embeddings.
+
+    Args:
+        num_items: Number of vectors
+        dim: Dimension (default: 384, as all-MiniLM-L6-v2)
+        num_clusters: Number of topic clusters (default: about sqrt(num_items))
+        seed: Random seed
+
+    Returns:
+        float32 matrix (num_items x dim)
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = num_clusters or max(1, int(np.sqrt(num_items)))
+    centers = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, num_clusters, size=num_items)
+    embeddings = centers[assignment] + 0.8 * rng.standard_normal((num_items, dim)).astype(np.float32)
+    return _normalize(embeddings)
+
+
+def benchmark_indexes(embeddings, queries, kinds=INDEX_KINDS, k=20, verbose=True):
+    """
+    Recall@k and latency of each index kind against the exact baseline.
+
+    Args:
+        embeddings: Matrix of embeddings (num_items x dim)
+        queries: Matrix of query embeddings (num_queries x dim)
+        kinds: Index kinds to measure (kinds whose library is missing are skipped)
+        k: Number of neighbours
+        verbose: Print one line per kind
+
+    Returns:
+        Dict mapping kind to build_sec, query_ms_mean, query_ms_p95 and
+        recall_at_k (or to {"skipped": reason})
+    """
+    exact = ExactIndex(embeddings)
+    truth = [set(exact.search(query, k)[0].tolist()) for query in queries]
+
+    report = {}
+    for kind in kinds:
+        start = time.perf_counter()
+        try:
+            index = build_index(embeddings, kind)
+        except ImportError as e:
+            report[kind] = {"skipped": f"{e}"}
+            if verbose:
+                print(f"  {kind:6s} skipped ({e})")
+            continue
+        build_sec = time.perf_counter() - start
+
+        latencies = []
+        recalls = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            indices, _ = index.search(query, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(len(expected & set(indices.tolist())) / len(expected))
+
+        report[kind] = {
+            "build_sec": build_sec,
+            "query_ms_mean": float(np.mean(latencies)),
+            "query_ms_p95": float(np.percentile(latencies, 95)),
+            "recall_at_k": float(np.mean(recalls))
+        }
+        if verbose:
+            stats = report[kind]
+            print(f"  {kind:6s} build {stats['build_sec']:8.2f}s  query {stats['query_ms_mean']:8.3f} ms "
+                  f"(p95 {stats['query_ms_p95']:.3f})  recall@{k} {stats['recall_at_k']:.3f}")
+    return report
+
+
+def main():
+    """Command-line interface for the index benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark nearest-neighbour indexes on synthetic embeddings")
+    parser.add_argument("--num-items", type=int, default=100000, help="Number of embeddings (default: 100000)")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (default: 384)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries (default: 200)")
+    parser.add_argument("--k", type=int, default=20, help="Neighbours per query (default: 20)")
+    parser.add_argument("--kinds", default=",".join(INDEX_KINDS),
+                        help=f"Comma-separated index kinds (default: {','.join(INDEX_KINDS)})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    data = synthetic_embeddings(args.num_items + args.queries, dim=args.dim, seed=args.seed)
+    embeddings, queries = data[:args.num_items], data[args.num_items:]
+    print(f"{args.num_items} embeddings (dim {args.dim}), {args.queries} queries, k={args.k}")
+    report = benchmark_indexes(embeddings, queries, kinds=args.kinds.split(","), k=args.k)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"config": vars(args), "results": report}, f, indent=2)
+        print(f"Report saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -36,8 +36,11 @@ if str(_code_dir) not in sys.path:
 
 from from_text_to_logic.logify import LogifyConverter
 from from_text_to_logic.weights import assign_weights
-from interface_with_user.translate import translate_query
-from logic_solver import LogicSolver
+from interface_with_user.translate import translate_query, PROMPT_LAYOUTS
+from interface_with_user.query_pipeline import QueryPipeline
+from interface_with_user.translation_memo import TranslationMemo
+from logic_solver import LogicSolver, artifact_path_for, RESULT_CACHE
+from instrumentation import TRACER, merge_summaries, format_summary
 
 
 # Paths
@@ -165,6 +168,42 @@ def logify_premise(
     }
 
 
+def translate_hypothesis(
+    hypothesis_text: str,
+    json_path: str,
+    api_key: str,
+    model: str,
+    temperature: float,
+    reasoning_effort: str,
+    max_tokens: int,
+    k_query: int,
+    prompt_layout: str = "default",
+    memo: Optional[TranslationMemo] = None
+) -> Dict[str, Any]:
+    """
+    Translate a hypothesis to a formula (the LLM step of query_hypothesis).
+
+    Args:
+        memo: Persistent translation memo (default: None)
+
+    Returns:
+        translate_query result dict
+    """
+    return translate_query(
+        query=hypothesis_text,
+        json_path=json_path,
+        api_key=api_key,
+        model=model,
+        temperature=temperature,
+        reasoning_effort=reasoning_effort,
+        max_tokens=max_tokens,
+        k=k_query,
+        verbose=False,
+        prompt_layout=prompt_layout,
+        memo=memo
+    )
+
+
 def query_hypothesis(
     hypothesis_text: str,
     logified_structure: Dict[str, Any],
@@ -174,29 +213,41 @@ def query_hypothesis(
     temperature: float,
     reasoning_effort: str,
     max_tokens: int,
-    k_query: int
+    k_query: int,
+    prompt_layout: str = "default",
+    translation_result: Optional[Dict[str, Any]] = None,
+    translation_latency: float = 0.0,
+    memo: Optional[TranslationMemo] = None
 ) -> Dict[str, Any]:
     """
     Query a hypothesis against a logified structure.
 
+    Args:
+        translation_result: Translation already computed (e.g. by the query
+            pipeline); skips the LLM call
+        translation_latency: Time the translation took, added to the latency
+        memo: Persistent translation memo (default: None)
+
     Returns:
         Dict with prediction, confidence, formula, latency, and any error.
     """
-    start_time = time.time()
+    start_time = time.time() - translation_latency
 
     try:
         # Translate hypothesis to formula
-        translation_result = translate_query(
-            query=hypothesis_text,
-            json_path=json_path,
-            api_key=api_key,
-            model=model,
-            temperature=temperature,
-            reasoning_effort=reasoning_effort,
-            max_tokens=max_tokens,
-            k=k_query,
-            verbose=False
-        )
+        if translation_result is None:
+            translation_result = translate_hypothesis(
+                hypothesis_text=hypothesis_text,
+                json_path=json_path,
+                api_key=api_key,
+                model=model,
+                temperature=temperature,
+                reasoning_effort=reasoning_effort,
+                max_tokens=max_tokens,
+                k_query=k_query,
+                prompt_layout=prompt_layout,
+                memo=memo
+            )
 
         formula = translation_result.get('formula')
         if not formula:
@@ -207,14 +258,24 @@ def query_hypothesis(
                 "error": "Failed to translate hypothesis to formula"
             }
 
-        # Solve
-        solver = LogicSolver(logified_structure)
+        # Solve (from the compiled KB artifact when it is present and up to date)
+        solver = None
+        kb_path = artifact_path_for(json_path)
+        if os.path.exists(kb_path):
+            try:
+                solver = LogicSolver.from_compiled(kb_path, source_path=json_path, result_cache=RESULT_CACHE)
+            except ValueError:
+                solver = None
+        if solver is None:
+            solver = LogicSolver(logified_structure, result_cache=RESULT_CACHE)
         solver_result = solver.query(formula)
 
         return {
             "prediction": solver_result.answer,
             "confidence": solver_result.confidence,
             "formula": formula,
+            "llm_usage": translation_result.get("usage"),
+            "memo_hit": translation_result.get("memo_hit", False),
             "query_latency_sec": time.time() - start_time,
             "error": None
         }
@@ -239,6 +300,9 @@ def run_experiment(
     query_max_tokens: int = 64000,
     k_weights: int = 10,
     k_query: int = 20,
+    prompt_layout: str = "default",
+    concurrency: int = 1,
+    translation_memo: Optional[str] = None,
     limit: Optional[int] = None
 ) -> Dict[str, Any]:
     """
@@ -255,6 +319,13 @@ def run_experiment(
         query_max_tokens: Max tokens for query translation
         k_weights: Top-k chunks for weight assignment
         k_query: Top-k propositions for query translation
+        prompt_layout: Query translation prompt layout (see translate.build_prompt;
+            "prefix_stable" lets the provider cache the per-document prompt prefix)
+        concurrency: Hypotheses translated concurrently per premise, with solving
+            overlapped (see interface_with_user.query_pipeline); 1 is sequential
+        translation_memo: Translation memo file; hypotheses already translated for
+            an unchanged premise in an earlier run are not sent to the LLM again
+            (default: None, no memo)
 
     Returns:
         Experiment results dict
@@ -263,6 +334,11 @@ def run_experiment(
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
+    # Solver results are only shared within this run
+    RESULT_CACHE.clear()
+
+    memo = TranslationMemo(translation_memo) if translation_memo else None
+
     # Load sample data
     print(f"Loading sample data from {data_path}...")
     data = load_sample_data(data_path)
@@ -297,6 +373,9 @@ def run_experiment(
             "query_max_tokens": query_max_tokens,
             "k_weights": k_weights,
             "k_query": k_query,
+            "prompt_layout": prompt_layout,
+            "concurrency": concurrency,
+            "translation_memo": translation_memo,
             "num_premises": len(premises),
             "num_examples": len(examples),
             "data_source": str(data_path),
@@ -309,6 +388,8 @@ def run_experiment(
     # Output file (with timestamp)
     timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = RESULTS_DIR / f"experiment_{timestamp_str}.json"
+    traces_path = RESULTS_DIR / f"experiment_{timestamp_str}_traces.json"
+    traces = {}
 
     # Process premises
     total_evaluated = 0
@@ -327,6 +408,9 @@ def run_experiment(
             print(f"  [SKIP] Empty premise text")
             continue
 
+        # Per-premise trace of pipeline stages (see code/instrumentation.py)
+        TRACER.reset()
+
         # Logify premise (once for all hypotheses)
         try:
             logify_result = logify_premise(
@@ -355,6 +439,30 @@ def run_experiment(
         premise_total = 0
         query_latency_total = 0.0
 
+        # Translate several hypotheses at a time, solving each as its translation arrives
+        pipeline_results = []
+        if concurrency > 1 and logified_structure is not None:
+            query_kwargs = dict(
+                json_path=str(get_cached_logified_path(premise_id)),
+                api_key=api_key,
+                model=query_model,
+                temperature=temperature,
+                reasoning_effort=reasoning_effort,
+                max_tokens=query_max_tokens,
+                k_query=k_query,
+                prompt_layout=prompt_layout,
+                memo=memo
+            )
+            pipeline = QueryPipeline(
+                translate=lambda text: translate_hypothesis(text, **query_kwargs),
+                solve=lambda text, translation: query_hypothesis(
+                    text, logified_structure, translation_result=translation,
+                    translation_latency=translation.get("latency_sec", 0.0), **query_kwargs
+                ),
+                max_concurrency=concurrency
+            )
+            pipeline_results = pipeline.run([hyp.get("hypothesis", "") for hyp in hypotheses])
+
         # Query each hypothesis
         for hyp_idx, hyp in enumerate(hypotheses):
             original_idx = hyp.get("original_idx")
@@ -362,29 +470,36 @@ def run_experiment(
             ground_truth = hyp.get("label")  # "entailment" or "not_entailment"
 
             if logified_structure is not None:
-                json_path = str(get_cached_logified_path(premise_id))
-                query_result = query_hypothesis(
-                    hypothesis_text=hypothesis_text,
-                    logified_structure=logified_structure,
-                    json_path=json_path,
-                    api_key=api_key,
-                    model=query_model,
-                    temperature=temperature,
-                    reasoning_effort=reasoning_effort,
-                    max_tokens=query_max_tokens,
-                    k_query=k_query
-                )
+                if pipeline_results:
+                    query_result = pipeline_results[hyp_idx]
+                else:
+                    json_path = str(get_cached_logified_path(premise_id))
+                    query_result = query_hypothesis(
+                        hypothesis_text=hypothesis_text,
+                        logified_structure=logified_structure,
+                        json_path=json_path,
+                        api_key=api_key,
+                        model=query_model,
+                        temperature=temperature,
+                        reasoning_effort=reasoning_effort,
+                        max_tokens=query_max_tokens,
+                        k_query=k_query,
+                        prompt_layout=prompt_layout,
+                        memo=memo
+                    )
                 prediction = query_result.get("prediction")
                 confidence = query_result.get("confidence")
                 query_latency = query_result.get("query_latency_sec", 0.0)
                 query_error = query_result.get("error")
                 formula = query_result.get("formula")
+                llm_usage = query_result.get("llm_usage")
             else:
                 prediction = None
                 confidence = None
                 query_latency = 0.0
                 query_error = logify_error
                 formula = None
+                llm_usage = None
 
             query_latency_total += query_latency
 
@@ -410,6 +525,7 @@ def run_experiment(
                 "confidence": confidence,
                 "ground_truth": ground_truth,
                 "formula": formula,
+                "llm_usage": llm_usage,
                 "error": query_error
             }
             results["results"].append(result_entry)
@@ -431,9 +547,11 @@ def run_experiment(
             "query_latency_total_sec": query_latency_total,
             "premise_correct": premise_correct,
             "premise_total": premise_total,
-            "premise_accuracy": premise_accuracy
+            "premise_accuracy": premise_accuracy,
+            "stage_summary": TRACER.summary()
         }
         results["premise_metrics"].append(premise_metrics)
+        traces[str(premise_id)] = TRACER.to_dict()
 
         print(f"  Premise accuracy: {premise_correct}/{premise_total} = {premise_accuracy:.2%}")
         print(f"  Logify: {logify_latency:.2f}s (cached: {logify_cached}), Query total: {query_latency_total:.2f}s")
@@ -441,12 +559,18 @@ def run_experiment(
         # Save intermediate results
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=2, ensure_ascii=False)
+        with open(traces_path, 'w', encoding='utf-8') as f:
+            json.dump(traces, f, indent=2)
 
     # Final summary
     overall_accuracy = total_correct / total_evaluated if total_evaluated > 0 else 0.0
     results["metadata"]["total_correct"] = total_correct
     results["metadata"]["total_evaluated"] = total_evaluated
     results["metadata"]["overall_accuracy"] = overall_accuracy
+    results["metadata"]["solver_cache"] = RESULT_CACHE.stats()
+    if memo is not None:
+        results["metadata"]["translation_memo_stats"] = memo.stats()
+    results["metadata"]["stage_summary"] = merge_summaries(m["stage_summary"] for m in results["premise_metrics"])
 
     print(f"\n{'='*60}")
     print(f"EXPERIMENT COMPLETE")
@@ -455,7 +579,17 @@ def run_experiment(
     print(f"Hypotheses evaluated: {total_evaluated}")
     print(f"Correct predictions: {total_correct}")
     print(f"Overall accuracy: {overall_accuracy:.2%}")
+    cache_stats = results["metadata"]["solver_cache"]
+    print(f"Solver cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+          f"({cache_stats['hit_rate']:.1%})")
+    if memo is not None:
+        memo_stats = results["metadata"]["translation_memo_stats"]
+        print(f"Translation memo: {memo_stats['hits']} hits / {memo_stats['misses']} misses "
+              f"({memo_stats['hit_rate']:.1%})")
+    print("Pipeline stages:")
+    print(format_summary(results["metadata"]["stage_summary"]))
     print(f"Results saved to: {output_path}")
+    print(f"Per-premise traces saved to: {traces_path}")
 
     # Final save
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -526,12 +660,32 @@ def main():
         default=20,
         help="Top-k propositions for query (default: 20)"
     )
+    parser.add_argument(
+        "--prompt-layout",
+        default="default",
+        choices=list(PROMPT_LAYOUTS),
+        help="Query prompt layout; prefix_stable enables provider prompt caching per document (default: default)"
+    )
     parser.add_argument(
         "--limit",
         type=int,
         default=None,
         help="Limit number of examples to process (default: all)"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Hypotheses translated concurrently per premise, solving overlapped (default: 1, sequential)"
+    )
+    parser.add_argument(
+        "--translation-memo",
+        nargs="?",
+        const=str(CACHE_DIR / "translation_memo.jsonl"),
+        default=None,
+        help="Reuse translations of unchanged (premise, hypothesis) pairs from earlier runs, stored in "
+             "this file (default path if no value: cache/translation_memo.jsonl)"
+    )
 
     args = parser.parse_args()
 
@@ -558,6 +712,9 @@ def main():
             query_max_tokens=args.query_max_tokens,
             k_weights=args.k_weights,
             k_query=args.k_query,
+            prompt_layout=args.prompt_layout,
+            concurrency=args.concurrency,
+            translation_memo=args.translation_memo,
             limit=args.limit
         )
         return 0
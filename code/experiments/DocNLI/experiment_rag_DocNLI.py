@@ -48,8 +48,10 @@ from baseline_rag.retriever import (
     load_sbert_model,
     encode_chunks,
     encode_query,
-    retrieve
+    retrieve,
+    retrieve_hybrid
 )
+from baseline_rag.bm25 import BM25Index
 from baseline_rag import config as rag_config
 
 # Paths
@@ -275,7 +277,8 @@ def process_single_hypothesis(
     chunks: List[Dict],
     sbert_model,
     model_name: str,
-    temperature: float
+    temperature: float,
+    bm25_index: Optional[BM25Index] = None
 ) -> Dict[str, Any]:
     """
     Process a single hypothesis against pre-computed premise chunks.
@@ -294,6 +297,8 @@ def process_single_hypothesis(
         sbert_model: Loaded SBERT model
         model_name: LLM model name
         temperature: Sampling temperature
+        bm25_index: BM25 index over the chunks; if given, retrieval fuses SBERT
+            and BM25 rankings (hybrid retrieval)
 
     Returns:
         Dictionary with 'prediction', 'confidence', 'latency_sec', 'error'
@@ -305,12 +310,23 @@ def process_single_hypothesis(
         query_embedding = encode_query(hypothesis_text, sbert_model)
 
         # Step 2: Retrieve top-k relevant chunks
-        retrieved_chunks = retrieve(
-            query_embedding,
-            chunk_embeddings,
-            chunks,
-            k=rag_config.TOP_K
-        )
+        if bm25_index is not None:
+            retrieved_chunks = retrieve_hybrid(
+                hypothesis_text,
+                query_embedding,
+                chunk_embeddings,
+                chunks,
+                bm25_index,
+                k=rag_config.TOP_K,
+                rrf_k=rag_config.RRF_K
+            )
+        else:
+            retrieved_chunks = retrieve(
+                query_embedding,
+                chunk_embeddings,
+                chunks,
+                k=rag_config.TOP_K
+            )
 
         # Step 3: Construct prompt with retrieved context
         prompt = construct_prompt(hypothesis_text, retrieved_chunks)
@@ -376,7 +392,8 @@ def run_experiment(
     data_path: Path = SAMPLE_DATA_PATH,
     model_name: str = None,
     temperature: float = 0,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    retrieval_mode: str = rag_config.RETRIEVAL_MODE
 ) -> Dict[str, Any]:
     """
     Run the DocNLI RAG baseline experiment.
@@ -386,6 +403,7 @@ def run_experiment(
         model_name: LLM model name (default: from rag_config)
         temperature: Sampling temperature (default: 0)
         limit: Limit number of premises to process (default: all)
+        retrieval_mode: "dense" (SBERT) or "hybrid" (SBERT + BM25)
 
     Returns:
         Experiment results dictionary matching Logify output format
@@ -431,6 +449,7 @@ def run_experiment(
             "chunk_size": rag_config.CHUNK_SIZE,
             "overlap": rag_config.OVERLAP,
             "top_k": rag_config.TOP_K,
+            "retrieval_mode": retrieval_mode,
             "sbert_model": rag_config.SBERT_MODEL,
             "num_premises": len(premises),
             "num_examples": len(examples),
@@ -466,6 +485,7 @@ def run_experiment(
         premise_start_time = time.time()
         try:
             chunks, chunk_embeddings = process_premise(premise_text, sbert_model)
+            bm25_index = BM25Index([c['text'] for c in chunks]) if retrieval_mode == "hybrid" else None
             premise_process_latency = time.time() - premise_start_time
             premise_process_error = None
             print(f"  Created {len(chunks)} chunks in {premise_process_latency:.2f}s")
@@ -473,6 +493,7 @@ def run_experiment(
             print(f"  [ERROR] Premise processing failed: {e}")
             chunks = None
             chunk_embeddings = None
+            bm25_index = None
             premise_process_latency = time.time() - premise_start_time
             premise_process_error = str(e)
 
@@ -494,7 +515,8 @@ def run_experiment(
                     chunks=chunks,
                     sbert_model=sbert_model,
                     model_name=model_name,
-                    temperature=temperature
+                    temperature=temperature,
+                    bm25_index=bm25_index
                 )
                 prediction = query_result.get("prediction")
                 confidence = query_result.get("confidence")
@@ -620,6 +642,12 @@ def main():
         default=None,
         help="Limit number of premises to process (default: all)"
     )
+    parser.add_argument(
+        "--retrieval-mode",
+        default=rag_config.RETRIEVAL_MODE,
+        choices=["dense", "hybrid"],
+        help=f"Chunk retrieval: SBERT only or SBERT + BM25 fused by rank (default: {rag_config.RETRIEVAL_MODE})"
+    )
 
     args = parser.parse_args()
 
@@ -639,7 +667,8 @@ def main():
             data_path=args.data_path,
             model_name=args.model,
             temperature=args.temperature,
-            limit=args.limit
+            limit=args.limit,
+            retrieval_mode=args.retrieval_mode
         )
         return 0
     except Exception as e:
@@ -31,8 +31,12 @@ if str(_code_dir) not in sys.path:
 
 from from_text_to_logic.logify import LogifyConverter
 from from_text_to_logic.weights import assign_weights
-from interface_with_user.translate import translate_query
-from logic_solver import LogicSolver
+from interface_with_user.translate import translate_query, translate_queries_batch, PROMPT_LAYOUTS, RETRIEVAL_MODES
+from interface_with_user.query_pipeline import QueryPipeline
+from interface_with_user.translation_memo import TranslationMemo
+from interface_with_user.hypothesis_templates import TemplateStore, translate_with_template
+from logic_solver import LogicSolver, artifact_path_for, RESULT_CACHE
+from instrumentation import TRACER, merge_summaries, format_summary
 
 
 # Paths
@@ -154,28 +158,37 @@ def logify_document(
     }
 
 
-def query_hypothesis(
+def translate_hypothesis(
     hypothesis_text: str,
-    logified_structure: Dict[str, Any],
     json_path: str,
     api_key: str,
     model: str,
     temperature: float,
     reasoning_effort: str,
     max_tokens: int,
-    k_query: int
+    k_query: int,
+    prompt_layout: str = "default",
+    retrieval_mode: str = "dense",
+    constraint_hops: Optional[int] = None,
+    memo: Optional[TranslationMemo] = None,
+    template_store: Optional[TemplateStore] = None,
+    structured_output: bool = True
 ) -> Dict[str, Any]:
     """
-    Query a hypothesis against a logified structure.
+    Translate a hypothesis to a formula (the LLM step of query_hypothesis).
+
+    Args:
+        memo: Persistent translation memo (default: None)
+        template_store: Hypothesis templates shared across documents; if given,
+            the hypothesis' template is grounded to the document's propositions
+            and only low-confidence groundings call the LLM (default: None)
+        structured_output: Request JSON schema responses (default: True)
 
     Returns:
-        Dict with prediction, confidence, latency, and any error.
+        translate_query result dict
     """
-    start_time = time.time()
-
-    try:
-        # Translate hypothesis to formula
-        translation_result = translate_query(
+    if template_store is not None:
+        return translate_with_template(
             query=hypothesis_text,
             json_path=json_path,
             api_key=api_key,
@@ -184,8 +197,90 @@ def query_hypothesis(
             reasoning_effort=reasoning_effort,
             max_tokens=max_tokens,
             k=k_query,
-            verbose=False
+            verbose=False,
+            store=template_store,
+            structured_output=structured_output,
+            prompt_layout=prompt_layout,
+            retrieval_mode=retrieval_mode,
+            constraint_hops=constraint_hops,
+            memo=memo
         )
+    return translate_query(
+        query=hypothesis_text,
+        json_path=json_path,
+        api_key=api_key,
+        model=model,
+        temperature=temperature,
+        reasoning_effort=reasoning_effort,
+        max_tokens=max_tokens,
+        k=k_query,
+        verbose=False,
+        prompt_layout=prompt_layout,
+        retrieval_mode=retrieval_mode,
+        constraint_hops=constraint_hops,
+        structured_output=structured_output,
+        memo=memo
+    )
+
+
+def query_hypothesis(
+    hypothesis_text: str,
+    logified_structure: Dict[str, Any],
+    json_path: str,
+    api_key: str,
+    model: str,
+    temperature: float,
+    reasoning_effort: str,
+    max_tokens: int,
+    k_query: int,
+    prompt_layout: str = "default",
+    retrieval_mode: str = "dense",
+    constraint_hops: Optional[int] = None,
+    translation_result: Optional[Dict[str, Any]] = None,
+    translation_latency: float = 0.0,
+    memo: Optional[TranslationMemo] = None,
+    template_store: Optional[TemplateStore] = None,
+    structured_output: bool = True
+) -> Dict[str, Any]:
+    """
+    Query a hypothesis against a logified structure.
+
+    Args:
+        retrieval_mode: Proposition retrieval, "dense" or "hybrid" (SBERT + BM25)
+        constraint_hops: Constraint neighbourhood in the translation prompt
+            (None: all constraints)
+        translation_result: Translation already computed (e.g. by
+            translate_queries_batch); skips the per-hypothesis LLM call
+        translation_latency: Share of the batch translation time charged to
+            this hypothesis
+        memo: Persistent translation memo (default: None)
+        template_store: Hypothesis templates (see translate_hypothesis)
+        structured_output: Request JSON schema responses (see translate_hypothesis)
+
+    Returns:
+        Dict with prediction, confidence, latency, and any error.
+    """
+    start_time = time.time() - translation_latency
+
+    try:
+        # Translate hypothesis to formula
+        if translation_result is None:
+            translation_result = translate_hypothesis(
+                hypothesis_text=hypothesis_text,
+                json_path=json_path,
+                api_key=api_key,
+                model=model,
+                temperature=temperature,
+                reasoning_effort=reasoning_effort,
+                max_tokens=max_tokens,
+                k_query=k_query,
+                prompt_layout=prompt_layout,
+                retrieval_mode=retrieval_mode,
+                constraint_hops=constraint_hops,
+                memo=memo,
+                template_store=template_store,
+                structured_output=structured_output
+            )
 
         formula = translation_result.get('formula')
         if not formula:
@@ -196,14 +291,25 @@ def query_hypothesis(
                 "error": "Failed to translate hypothesis to formula"
             }
 
-        # Solve
-        solver = LogicSolver(logified_structure)
+        # Solve (from the compiled KB artifact when it is present and up to date)
+        solver = None
+        kb_path = artifact_path_for(json_path)
+        if os.path.exists(kb_path):
+            try:
+                solver = LogicSolver.from_compiled(kb_path, source_path=json_path, result_cache=RESULT_CACHE)
+            except ValueError:
+                solver = None
+        if solver is None:
+            solver = LogicSolver(logified_structure, result_cache=RESULT_CACHE)
         solver_result = solver.query(formula)
 
         return {
             "prediction": solver_result.answer,
             "confidence": solver_result.confidence,
             "formula": formula,
+            "llm_usage": translation_result.get("usage"),
+            "memo_hit": translation_result.get("memo_hit", False),
+            "template_grounded": translation_result.get("template_grounded"),
             "query_latency_sec": time.time() - start_time,
             "error": None
         }
@@ -228,6 +334,14 @@ def run_experiment(
     query_max_tokens: int = 64000,
     k_weights: int = 10,
     k_query: int = 20,
+    prompt_layout: str = "default",
+    batch_translate: bool = False,
+    retrieval_mode: str = "dense",
+    constraint_hops: Optional[int] = None,
+    concurrency: int = 1,
+    translation_memo: Optional[str] = None,
+    hypothesis_templates: Optional[str] = None,
+    structured_output: bool = True,
     doc_ids: List[int] = None
 ) -> Dict[str, Any]:
     """
@@ -244,6 +358,27 @@ def run_experiment(
         query_max_tokens: Max tokens for query translation
         k_weights: Top-k chunks for weight assignment
         k_query: Top-k propositions for query translation
+        prompt_layout: Query translation prompt layout (see translate.build_prompt;
+            "prefix_stable" lets the provider cache the per-document prompt prefix)
+        batch_translate: Translate all hypotheses of a document in one LLM call
+            (see translate.translate_queries_batch; prompt_layout and
+            structured_output apply to the batch prompt)
+        retrieval_mode: Proposition retrieval for query translation, "dense" or
+            "hybrid" (SBERT + BM25)
+        constraint_hops: Only include the constraints around the retrieved
+            propositions in translation prompts (None: all constraints)
+        concurrency: Hypotheses translated concurrently per document, with solving
+            overlapped (see interface_with_user.query_pipeline); 1 is sequential
+        translation_memo: Translation memo file; hypotheses already translated for
+            an unchanged document in an earlier run are not sent to the LLM again
+            (default: None, no memo)
+        hypothesis_templates: Template file; each hypothesis is abstracted once
+            and grounded to every document by embedding similarity, with the
+            per-hypothesis LLM translation only for low-confidence groundings
+            (default: None, translate every pair; with batch_translate only the
+            low-confidence hypotheses are sent in the batch)
+        structured_output: Request JSON schema responses for query translation,
+            so that answers are parsed without guessing (default: True)
         doc_ids: List of document IDs to process (default: DEFAULT_DOC_IDS)
 
     Returns:
@@ -253,6 +388,12 @@ def run_experiment(
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
+    # Solver results are only shared within this run
+    RESULT_CACHE.clear()
+
+    memo = TranslationMemo(translation_memo) if translation_memo else None
+    template_store = TemplateStore(hypothesis_templates) if hypothesis_templates else None
+
     # Load dataset
     print(f"Loading dataset from {dataset_path}...")
     dataset = load_contractnli_dataset(dataset_path)
@@ -284,6 +425,14 @@ def run_experiment(
             "query_max_tokens": query_max_tokens,
             "k_weights": k_weights,
             "k_query": k_query,
+            "prompt_layout": prompt_layout,
+            "batch_translate": batch_translate,
+            "retrieval_mode": retrieval_mode,
+            "constraint_hops": constraint_hops,
+            "concurrency": concurrency,
+            "translation_memo": translation_memo,
+            "hypothesis_templates": hypothesis_templates,
+            "structured_output": structured_output,
             "doc_ids": doc_ids,
             "num_documents": len(documents),
             "num_hypotheses": len(labels),
@@ -296,6 +445,8 @@ def run_experiment(
     # Output file (with timestamp)
     timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = RESULTS_DIR / f"experiment_{timestamp_str}.json"
+    traces_path = RESULTS_DIR / f"experiment_{timestamp_str}_traces.json"
+    traces = {}
 
     # Process documents
     total_pairs = 0
@@ -314,6 +465,9 @@ def run_experiment(
             print(f"  [SKIP] Empty document text")
             continue
 
+        # Per-document trace of pipeline stages (see code/instrumentation.py)
+        TRACER.reset()
+
         # Logify document
         try:
             logify_result = logify_document(
@@ -337,6 +491,92 @@ def run_experiment(
             logify_cached = False
             logify_error = str(e)
 
+        # Translate all hypotheses of the document at once
+        batch_translations = {}
+        batch_latency_share = 0.0
+        if batch_translate and logified_structure is not None:
+            batch_start = time.time()
+            hyp_keys = list(labels.keys())
+            try:
+                # Hypotheses with a trusted template grounding need no LLM call
+                escalations = {}
+                if template_store is not None:
+                    for key in hyp_keys:
+                        grounded = translate_with_template(
+                            query=labels[key].get("hypothesis", ""),
+                            json_path=str(get_cached_logified_path(doc_id)),
+                            api_key=api_key,
+                            model=query_model,
+                            temperature=temperature,
+                            reasoning_effort=reasoning_effort,
+                            max_tokens=query_max_tokens,
+                            k=k_query,
+                            verbose=False,
+                            store=template_store,
+                            structured_output=structured_output,
+                            escalate=False
+                        )
+                        if grounded['formula']:
+                            batch_translations[key] = grounded
+                        else:
+                            escalations[key] = grounded['escalation_reason']
+                pending_keys = [key for key in hyp_keys if key not in batch_translations]
+
+                translations = translate_queries_batch(
+                    queries=[labels[key].get("hypothesis", "") for key in pending_keys],
+                    json_path=str(get_cached_logified_path(doc_id)),
+                    api_key=api_key,
+                    model=query_model,
+                    temperature=temperature,
+                    reasoning_effort=reasoning_effort,
+                    max_tokens=query_max_tokens,
+                    k=k_query,
+                    verbose=False,
+                    retrieval_mode=retrieval_mode,
+                    constraint_hops=constraint_hops,
+                    memo=memo,
+                    prompt_layout=prompt_layout,
+                    structured_output=structured_output
+                )
+                for key, translation in zip(pending_keys, translations):
+                    if key in escalations:
+                        translation['template_grounded'] = False
+                        translation['escalation_reason'] = escalations[key]
+                    batch_translations[key] = translation
+            except Exception as e:
+                print(f"  [ERROR] Batch translation failed, translating one by one: {e}")
+            batch_latency_share = (time.time() - batch_start) / max(len(hyp_keys), 1)
+
+        # Or translate several hypotheses at a time, solving each as its translation arrives
+        pipeline_results = {}
+        if concurrency > 1 and not batch_translate and logified_structure is not None:
+            query_kwargs = dict(
+                json_path=str(get_cached_logified_path(doc_id)),
+                api_key=api_key,
+                model=query_model,
+                temperature=temperature,
+                reasoning_effort=reasoning_effort,
+                max_tokens=query_max_tokens,
+                k_query=k_query,
+                prompt_layout=prompt_layout,
+                retrieval_mode=retrieval_mode,
+                constraint_hops=constraint_hops,
+                memo=memo,
+                template_store=template_store,
+                structured_output=structured_output
+            )
+            pipeline = QueryPipeline(
+                translate=lambda text: translate_hypothesis(text, **query_kwargs),
+                solve=lambda text, translation: query_hypothesis(
+                    text, logified_structure, translation_result=translation,
+                    translation_latency=translation.get("latency_sec", 0.0), **query_kwargs
+                ),
+                max_concurrency=concurrency
+            )
+            hyp_keys = list(labels.keys())
+            results_in_order = pipeline.run([labels[key].get("hypothesis", "") for key in hyp_keys])
+            pipeline_results = dict(zip(hyp_keys, results_in_order))
+
         # Process hypotheses
         query_latency_total = 0.0
         doc_correct = 0
@@ -355,29 +595,44 @@ def run_experiment(
 
             # Query (uses query_model)
             if logified_structure is not None:
-                json_path = str(get_cached_logified_path(doc_id))
-                query_result = query_hypothesis(
-                    hypothesis_text=hypothesis_text,
-                    logified_structure=logified_structure,
-                    json_path=json_path,
-                    api_key=api_key,
-                    model=query_model,
-                    temperature=temperature,
-                    reasoning_effort=reasoning_effort,
-                    max_tokens=query_max_tokens,
-                    k_query=k_query
-                )
+                if hyp_key in pipeline_results:
+                    query_result = pipeline_results[hyp_key]
+                else:
+                    json_path = str(get_cached_logified_path(doc_id))
+                    query_result = query_hypothesis(
+                        hypothesis_text=hypothesis_text,
+                        logified_structure=logified_structure,
+                        json_path=json_path,
+                        api_key=api_key,
+                        model=query_model,
+                        temperature=temperature,
+                        reasoning_effort=reasoning_effort,
+                        max_tokens=query_max_tokens,
+                        k_query=k_query,
+                        prompt_layout=prompt_layout,
+                        retrieval_mode=retrieval_mode,
+                        constraint_hops=constraint_hops,
+                        translation_result=batch_translations.get(hyp_key),
+                        translation_latency=batch_latency_share if hyp_key in batch_translations else 0.0,
+                        memo=memo,
+                        template_store=template_store,
+                        structured_output=structured_output
+                    )
                 prediction = query_result.get("prediction")
                 confidence = query_result.get("confidence")
                 query_latency = query_result.get("query_latency_sec", 0.0)
                 query_error = query_result.get("error")
                 formula = query_result.get("formula")
+                llm_usage = query_result.get("llm_usage")
+                template_grounded = query_result.get("template_grounded")
             else:
                 prediction = None
                 confidence = None
                 query_latency = 0.0
                 query_error = logify_error
                 formula = None
+                llm_usage = None
+                template_grounded = None
 
             query_latency_total += query_latency
 
@@ -400,6 +655,8 @@ def run_experiment(
                 "ground_truth": ground_truth,
                 "amount_evidence": amount_evidence,
                 "formula": formula,
+                "llm_usage": llm_usage,
+                "template_grounded": template_grounded,
                 "error": query_error
             }
             results["results"].append(result_entry)
@@ -424,19 +681,27 @@ def run_experiment(
             "query_latency_total_sec": query_latency_total,
             "doc_correct": doc_correct,
             "doc_total": doc_total,
-            "doc_accuracy": doc_accuracy
+            "doc_accuracy": doc_accuracy,
+            "stage_summary": TRACER.summary()
         }
         results["document_metrics"].append(doc_metrics)
+        traces[str(doc_id)] = TRACER.to_dict()
 
         # Save intermediate results
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=2, ensure_ascii=False)
+        with open(traces_path, 'w', encoding='utf-8') as f:
+            json.dump(traces, f, indent=2)
 
     # Final summary
     overall_accuracy = total_correct / total_pairs if total_pairs > 0 else 0.0
     results["metadata"]["total_correct"] = total_correct
     results["metadata"]["total_evaluated"] = total_pairs
     results["metadata"]["overall_accuracy"] = overall_accuracy
+    results["metadata"]["solver_cache"] = RESULT_CACHE.stats()
+    if memo is not None:
+        results["metadata"]["translation_memo_stats"] = memo.stats()
+    results["metadata"]["stage_summary"] = merge_summaries(m["stage_summary"] for m in results["document_metrics"])
 
     print(f"\n{'='*60}")
     print(f"EXPERIMENT COMPLETE")
@@ -445,7 +710,17 @@ def run_experiment(
     print(f"Pairs evaluated: {total_pairs}")
     print(f"Correct predictions: {total_correct}")
     print(f"Overall accuracy: {overall_accuracy:.2%}")
+    cache_stats = results["metadata"]["solver_cache"]
+    print(f"Solver cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+          f"({cache_stats['hit_rate']:.1%})")
+    if memo is not None:
+        memo_stats = results["metadata"]["translation_memo_stats"]
+        print(f"Translation memo: {memo_stats['hits']} hits / {memo_stats['misses']} misses "
+              f"({memo_stats['hit_rate']:.1%})")
+    print("Pipeline stages:")
+    print(format_summary(results["metadata"]["stage_summary"]))
     print(f"Results saved to: {output_path}")
+    print(f"Per-document traces saved to: {traces_path}")
 
     # Final save
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -516,6 +791,60 @@ def main():
         default=20,
         help="Top-k propositions for query (default: 20)"
     )
+    parser.add_argument(
+        "--prompt-layout",
+        default="default",
+        choices=list(PROMPT_LAYOUTS),
+        help="Query prompt layout; prefix_stable enables provider prompt caching per document (default: default)"
+    )
+    parser.add_argument(
+        "--retrieval-mode",
+        default="dense",
+        choices=list(RETRIEVAL_MODES),
+        help="Proposition retrieval for query translation; hybrid fuses SBERT with BM25 (default: dense)"
+    )
+    parser.add_argument(
+        "--constraint-hops",
+        type=int,
+        default=None,
+        help="Only include constraints touching the retrieved propositions, expanded by this many hops "
+             "(default: all constraints)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Hypotheses translated concurrently per document, solving overlapped (default: 1, sequential)"
+    )
+    parser.add_argument(
+        "--batch-translate",
+        action="store_true",
+        help="Translate all hypotheses of a document in one LLM call"
+    )
+    parser.add_argument(
+        "--translation-memo",
+        nargs="?",
+        const=str(CACHE_DIR / "translation_memo.jsonl"),
+        default=None,
+        help="Reuse translations of unchanged (document, hypothesis) pairs from earlier runs, stored in "
+             "this file (default path if no value: cache/translation_memo.jsonl)"
+    )
+    parser.add_argument(
+        "--hypothesis-templates",
+        nargs="?",
+        const=str(CACHE_DIR / "hypothesis_templates.json"),
+        default=None,
+        help="Translate each hypothesis once into a document-independent template, stored in this file, and "
+             "ground it to each document by embedding similarity (default path if no value: "
+             "cache/hypothesis_templates.json)"
+    )
+    parser.add_argument(
+        "--no-structured-output",
+        dest="structured_output",
+        action="store_false",
+        help="Parse free-text translation answers instead of requesting a JSON schema response "
+             "(for providers or models without structured output support)"
+    )
     parser.add_argument(
         "--doc-ids",
         type=str,
@@ -552,6 +881,14 @@ def main():
             query_max_tokens=args.query_max_tokens,
             k_weights=args.k_weights,
             k_query=args.k_query,
+            prompt_layout=args.prompt_layout,
+            batch_translate=args.batch_translate,
+            retrieval_mode=args.retrieval_mode,
+            constraint_hops=args.constraint_hops,
+            concurrency=args.concurrency,
+            translation_memo=args.translation_memo,
+            hypothesis_templates=args.hypothesis_templates,
+            structured_output=args.structured_output,
             doc_ids=doc_ids
         )
         return 0
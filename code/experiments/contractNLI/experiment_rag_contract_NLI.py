@@ -47,8 +47,10 @@ from baseline_rag.retriever import (
     load_sbert_model,
     encode_chunks,
     encode_query,
-    retrieve
+    retrieve,
+    retrieve_hybrid
 )
+from baseline_rag.bm25 import BM25Index
 from baseline_rag import config as rag_config
 
 # Results directory
@@ -270,7 +272,8 @@ def process_single_hypothesis(
     chunks: List[Dict],
     sbert_model,
     model_name: str,
-    temperature: float
+    temperature: float,
+    bm25_index: Optional[BM25Index] = None
 ) -> Dict[str, Any]:
     """
     Process a single hypothesis against pre-computed document chunks.
@@ -289,6 +292,8 @@ def process_single_hypothesis(
         sbert_model: Loaded SBERT model
         model_name: LLM model name
         temperature: Sampling temperature
+        bm25_index: BM25 index over the chunks; if given, retrieval fuses SBERT
+            and BM25 rankings (hybrid retrieval)
 
     Returns:
         Dictionary with 'prediction', 'confidence', 'latency_sec', 'error'
@@ -300,12 +305,23 @@ def process_single_hypothesis(
         query_embedding = encode_query(hypothesis_text, sbert_model)
 
         # Step 2: Retrieve top-k relevant chunks
-        retrieved_chunks = retrieve(
-            query_embedding,
-            chunk_embeddings,
-            chunks,
-            k=rag_config.TOP_K
-        )
+        if bm25_index is not None:
+            retrieved_chunks = retrieve_hybrid(
+                hypothesis_text,
+                query_embedding,
+                chunk_embeddings,
+                chunks,
+                bm25_index,
+                k=rag_config.TOP_K,
+                rrf_k=rag_config.RRF_K
+            )
+        else:
+            retrieved_chunks = retrieve(
+                query_embedding,
+                chunk_embeddings,
+                chunks,
+                k=rag_config.TOP_K
+            )
 
         # Step 3: Construct prompt with retrieved context
         prompt = construct_prompt(hypothesis_text, retrieved_chunks)
@@ -371,7 +387,8 @@ def run_experiment(
     dataset_path: str,
     model_name: str = None,
     temperature: float = 0,
-    num_docs: int = 20
+    num_docs: int = 20,
+    retrieval_mode: str = rag_config.RETRIEVAL_MODE
 ) -> Dict[str, Any]:
     """
     Run the ContractNLI RAG baseline experiment.
@@ -381,6 +398,7 @@ def run_experiment(
         model_name: LLM model name (default: from rag_config)
         temperature: Sampling temperature (default: 0)
         num_docs: Number of documents to process (default: 20)
+        retrieval_mode: "dense" (SBERT) or "hybrid" (SBERT + BM25)
 
     Returns:
         Experiment results dictionary matching Logify output format
@@ -420,6 +438,7 @@ def run_experiment(
             "chunk_size": rag_config.CHUNK_SIZE,
             "overlap": rag_config.OVERLAP,
             "top_k": rag_config.TOP_K,
+            "retrieval_mode": retrieval_mode,
             "sbert_model": rag_config.SBERT_MODEL,
             "num_documents": len(documents),
             "num_hypotheses": len(labels),
@@ -454,6 +473,7 @@ def run_experiment(
         doc_start_time = time.time()
         try:
             chunks, chunk_embeddings = process_document(doc_text, sbert_model)
+            bm25_index = BM25Index([c['text'] for c in chunks]) if retrieval_mode == "hybrid" else None
             doc_process_latency = time.time() - doc_start_time
             doc_process_error = None
             print(f"  Created {len(chunks)} chunks in {doc_process_latency:.2f}s")
@@ -461,6 +481,7 @@ def run_experiment(
             print(f"  [ERROR] Document processing failed: {e}")
             chunks = None
             chunk_embeddings = None
+            bm25_index = None
             doc_process_latency = time.time() - doc_start_time
             doc_process_error = str(e)
 
@@ -488,7 +509,8 @@ def run_experiment(
                     chunks=chunks,
                     sbert_model=sbert_model,
                     model_name=model_name,
-                    temperature=temperature
+                    temperature=temperature,
+                    bm25_index=bm25_index
                 )
                 prediction = query_result.get("prediction")
                 confidence = query_result.get("confidence")
@@ -610,6 +632,12 @@ def main():
         default=20,
         help="Number of documents to process (default: 20)"
     )
+    parser.add_argument(
+        "--retrieval-mode",
+        default=rag_config.RETRIEVAL_MODE,
+        choices=["dense", "hybrid"],
+        help=f"Chunk retrieval: SBERT only or SBERT + BM25 fused by rank (default: {rag_config.RETRIEVAL_MODE})"
+    )
 
     args = parser.parse_args()
 
@@ -628,7 +656,8 @@ def main():
             dataset_path=args.dataset_path,
             model_name=args.model,
             temperature=args.temperature,
-            num_docs=args.num_docs
+            num_docs=args.num_docs,
+            retrieval_mode=args.retrieval_mode
         )
         return 0
     except Exception as e:
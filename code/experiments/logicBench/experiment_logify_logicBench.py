@@ -34,8 +34,10 @@ if str(_code_dir) not in sys.path:
 # Import Logify components
 from from_text_to_logic.logify import LogifyConverter
 from from_text_to_logic.weights import assign_weights
+from interface_with_user.query_pipeline import QueryPipeline
 from interface_with_user.translate import translate_query
-from logic_solver import LogicSolver
+from logic_solver import LogicSolver, RESULT_CACHE
+from instrumentation import TRACER, merge_summaries, format_summary
 
 # Import PATTERNS from LogicBench loader
 from fol_vs_boolean.updated_load_logicbench import PATTERNS
@@ -233,11 +235,43 @@ def run_logify(text: str, sample_id: str, api_key: str,
         return None, latency, False, error_msg
 
 
+def translate_sample_query(query: str, json_path: str, api_key: str,
+                           model: str = "gpt-4o") -> Dict:
+    """
+    Translate a query to a formula (the LLM step of run_query).
+
+    Args:
+        query: Natural language question
+        json_path: Path of the logified structure JSON
+        api_key: API key
+        model: LLM model
+
+    Returns:
+        translate_query result dict
+    """
+    return translate_query(
+        query=query,
+        json_path=json_path,
+        api_key=api_key,
+        model=model,
+        temperature=0.1,
+        reasoning_effort="medium",
+        max_tokens=4000,  # Reduced - formula output is small
+        k=20,
+        verbose=False
+    )
+
+
 def run_query(query: str, logified_structure: Dict, api_key: str,
-              model: str = "gpt-4o", verbose: bool = True) -> Tuple[str, float, float, Optional[str], Optional[str]]:
+              model: str = "gpt-4o", verbose: bool = True,
+              translation_result: Optional[Dict] = None) -> Tuple[str, float, float, Optional[str], Optional[str]]:
     """
     Run query translation and solving.
 
+    Args:
+        translation_result: Translation already computed (e.g. by the query
+            pipeline); skips the LLM call, its 'latency_sec' counts in the latency
+
     Returns:
         (predicted_answer, confidence, latency_sec, error, formula)
     """
@@ -245,52 +279,43 @@ def run_query(query: str, logified_structure: Dict, api_key: str,
     formula = None
 
     try:
-        # Save structure to temp file for translate_query
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
-            json.dump(logified_structure, f)
-            temp_json_path = f.name
-
-        try:
-            # Translate query to formula
-            if verbose:
-                print(f"      Translating query...")
-
-            translation_result = translate_query(
-                query=query,
-                json_path=temp_json_path,
-                api_key=api_key,
-                model=model,
-                temperature=0.1,
-                reasoning_effort="medium",
-                max_tokens=4000,  # Reduced - formula output is small
-                k=20,
-                verbose=False
-            )
+        if translation_result is None:
+            # Save structure to temp file for translate_query
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
+                json.dump(logified_structure, f)
+                temp_json_path = f.name
 
-            formula = translation_result.get('formula')
-            if not formula:
-                raise ValueError("Failed to translate query to formula")
+            try:
+                # Translate query to formula
+                if verbose:
+                    print(f"      Translating query...")
+                translation_result = translate_sample_query(query, temp_json_path, api_key, model)
+            finally:
+                if os.path.exists(temp_json_path):
+                    os.remove(temp_json_path)
+        else:
+            start_time -= translation_result.get('latency_sec', 0.0)
 
-            if verbose:
-                print(f"      Formula: {formula}")
+        formula = translation_result.get('formula')
+        if not formula:
+            raise ValueError("Failed to translate query to formula")
 
-            # Solve
-            if verbose:
-                print(f"      Solving...")
+        if verbose:
+            print(f"      Formula: {formula}")
 
-            solver = LogicSolver(logified_structure)
-            solver_result = solver.query(formula)
+        # Solve
+        if verbose:
+            print(f"      Solving...")
 
-            latency = time.time() - start_time
+        solver = LogicSolver(logified_structure, result_cache=RESULT_CACHE)
+        solver_result = solver.query(formula)
 
-            if verbose:
-                print(f"      Result: {solver_result.answer} (confidence={solver_result.confidence:.3f})")
+        latency = time.time() - start_time
 
-            return solver_result.answer, solver_result.confidence, latency, None, formula
+        if verbose:
+            print(f"      Result: {solver_result.answer} (confidence={solver_result.confidence:.3f})")
 
-        finally:
-            if os.path.exists(temp_json_path):
-                os.remove(temp_json_path)
+        return solver_result.answer, solver_result.confidence, latency, None, formula
 
     except Exception as e:
         latency = time.time() - start_time
@@ -306,11 +331,16 @@ def run_experiment(
     max_samples_per_pattern: Optional[int] = None,
     api_key: str = None,
     model: str = "gpt-4o",
-    verbose: bool = True
+    verbose: bool = True,
+    concurrency: int = 1
 ) -> List[Dict]:
     """
     Run the full experiment on LogicBench.
 
+    Args:
+        concurrency: Questions translated concurrently per sample, with solving
+            overlapped (see interface_with_user.query_pipeline); 1 is sequential
+
     Returns:
         List of result dicts
     """
@@ -318,6 +348,9 @@ def run_experiment(
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
+    # Solver results are only shared within this run
+    RESULT_CACHE.clear()
+
     # Load samples
     print(f"\n{'='*60}")
     print("Loading LogicBench samples...")
@@ -341,8 +374,11 @@ def run_experiment(
     print(f"{'='*60}")
 
     results = []
+    traces = {}
 
     for i, sample in enumerate(samples):
+        # Per-sample trace of pipeline stages (see code/instrumentation.py)
+        TRACER.reset()
         print(f"\n[{i+1}/{len(samples)}] Sample: {sample['id']}")
         print(f"  Pattern: {sample['pattern']}")
         print(f"  Logic type: {sample['logic_type']}")
@@ -371,16 +407,42 @@ def run_experiment(
 
         # Process questions if logify succeeded
         if logified_structure is not None:
+            # Translate several questions at a time, solving each as its translation arrives
+            pipeline_results = []
+            if concurrency > 1:
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
+                    json.dump(logified_structure, f)
+                    temp_json_path = f.name
+                try:
+                    pipeline = QueryPipeline(
+                        translate=lambda query: translate_sample_query(query, temp_json_path, api_key, model),
+                        solve=lambda query, translation: run_query(
+                            query, logified_structure, api_key, model,
+                            verbose=False, translation_result=translation
+                        ),
+                        max_concurrency=concurrency
+                    )
+                    pipeline_results = pipeline.run([qa['query'] for qa in sample['qa_pairs']])
+                finally:
+                    os.remove(temp_json_path)
+
             for j, qa in enumerate(sample['qa_pairs']):
                 print(f"  Question {j+1}/{len(sample['qa_pairs'])}: {qa['query'][:60]}...")
 
-                predicted_answer, confidence, query_latency, query_error, formula = run_query(
-                    query=qa['query'],
-                    logified_structure=logified_structure,
-                    api_key=api_key,
-                    model=model,
-                    verbose=verbose
-                )
+                if pipeline_results:
+                    query_outcome = pipeline_results[j]
+                    if isinstance(query_outcome, dict):  # translation failed
+                        query_outcome = ("UNCERTAIN", 0.5, query_outcome.get('query_latency_sec', 0.0),
+                                         query_outcome['error'], None)
+                    predicted_answer, confidence, query_latency, query_error, formula = query_outcome
+                else:
+                    predicted_answer, confidence, query_latency, query_error, formula = run_query(
+                        query=qa['query'],
+                        logified_structure=logified_structure,
+                        api_key=api_key,
+                        model=model,
+                        verbose=verbose
+                    )
 
                 result['questions'].append({
                     'query': qa['query'],
@@ -404,18 +466,29 @@ def run_experiment(
                     'query_error': f"Logify failed: {logify_error}"
                 })
 
+        result['stage_summary'] = TRACER.summary()
+        traces[sample['id']] = TRACER.to_dict()
         results.append(result)
 
     # Save results
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = RESULTS_DIR / f"experiment_{timestamp}.json"
+    traces_path = RESULTS_DIR / f"experiment_{timestamp}_traces.json"
 
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
+    with open(traces_path, 'w', encoding='utf-8') as f:
+        json.dump(traces, f, indent=2)
 
     print(f"\n{'='*60}")
     print(f"Experiment completed!")
+    cache_stats = RESULT_CACHE.stats()
+    print(f"Solver cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+          f"({cache_stats['hit_rate']:.1%})")
+    print("Pipeline stages:")
+    print(format_summary(merge_summaries(r['stage_summary'] for r in results)))
     print(f"Results saved to: {output_path}")
+    print(f"Per-sample traces saved to: {traces_path}")
     print(f"{'='*60}")
 
     # Print summary
@@ -500,6 +573,12 @@ def main():
         action="store_true",
         help="Suppress verbose output"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Questions translated concurrently per sample, solving overlapped (default: 1, sequential)"
+    )
 
     args = parser.parse_args()
 
@@ -518,7 +597,8 @@ def main():
         max_samples_per_pattern=args.max_samples,
         api_key=api_key,
         model=args.model,
-        verbose=not args.quiet
+        verbose=not args.quiet,
+        concurrency=args.concurrency
     )
 
 
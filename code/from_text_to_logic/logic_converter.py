@@ -9,7 +9,8 @@ structured propositional logic using an LLM.
 
 import json
 from typing import Dict, Any
-from openai import OpenAI
+
+from instrumentation import span, count_llm_usage
 
 
 class LogicConverter:
@@ -26,6 +27,8 @@ class LogicConverter:
             max_tokens (int): Maximum tokens in response (default: 64000)
             reasoning_effort (str): Reasoning effort level for GPT-5.2/o3 models (none, low, medium, high, xhigh). Default: medium
         """
+        from openai import OpenAI
+
         # Detect OpenRouter keys and use appropriate base URL
         # OpenRouter keys start with 'sk-or-v1-'
         if api_key.startswith('sk-or-v1-') or api_key.startswith('sk-or-'):
@@ -134,7 +137,9 @@ RELATION TRIPLES:
                 }
 
             # Send to LLM with the enhanced prompt
-            response = self.client.chat.completions.create(**api_params)
+            with span("logify.llm", model=self.model):
+                response = self.client.chat.completions.create(**api_params)
+            count_llm_usage("logify.llm", response)
 
             # Debug: print the raw response
             print(f"  Response received. Parsing...")
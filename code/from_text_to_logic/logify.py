@@ -32,6 +32,7 @@ if str(_script_dir) not in sys.path:
 
 from from_text_to_logic.openie_extractor import OpenIEExtractor
 from from_text_to_logic.logic_converter import LogicConverter
+from instrumentation import span
 
 
 def extract_text_from_document(file_path: str) -> str:
@@ -129,11 +130,13 @@ class LogifyConverter:
             Dict[str, Any]: JSON structure with primitive props, hard/soft constraints
         """
         # Stage 1: Extract OpenIE triples
-        openie_triples = self.extractor.extract_triples(text)
-        formatted_triples = self.extractor.format_triples_json(openie_triples, indent=-1)
+        with span("logify.openie"):
+            openie_triples = self.extractor.extract_triples(text)
+            formatted_triples = self.extractor.format_triples_json(openie_triples, indent=-1)
 
         # Stage 2: Convert to logic using LLM
-        logic_structure = self.converter.convert(text, formatted_triples)
+        with span("logify.convert"):
+            logic_structure = self.converter.convert(text, formatted_triples)
 
         return logic_structure
 
@@ -16,10 +16,14 @@ Key features:
 """
 
 import os
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, TYPE_CHECKING
 
-import stanza
-from stanza.server import CoreNLPClient
+from instrumentation import span, count
+
+if TYPE_CHECKING:
+    # Stanza (and torch) are only imported when an extractor is created
+    import stanza
+    from stanza.server import CoreNLPClient
 
 
 class OpenIEExtractor:
@@ -55,6 +59,8 @@ class OpenIEExtractor:
             language: Language code for Stanza models (default: 'en')
             download_models: Whether to download Stanza models if not present (default: False)
         """
+        import stanza
+
         print("Initializing OpenIE Extractor with native Stanza...")
 
         self.coref_enabled = enable_coref
@@ -67,7 +73,7 @@ class OpenIEExtractor:
         # Initialize native Stanza pipelines
         self.coref_pipeline: Optional[stanza.Pipeline] = None
         self.depparse_pipeline: Optional[stanza.Pipeline] = None
-        self.client: Optional[CoreNLPClient] = None
+        self.client: Optional["CoreNLPClient"] = None
 
         # Download models if requested
         if download_models:
@@ -132,6 +138,8 @@ class OpenIEExtractor:
 
     def _start_client(self):
         """Start the CoreNLP client for OpenIE."""
+        from stanza.server import CoreNLPClient
+
         self.client = CoreNLPClient(
             annotators=self.openie_annotators,
             timeout=self.timeout,
@@ -375,13 +383,15 @@ class OpenIEExtractor:
 
         try:
             # Step 1: Resolve coreferences with native Stanza
-            resolved_text, coref_chains = self._resolve_coreferences(text)
+            with span("openie.coref", chars=len(text)):
+                resolved_text, coref_chains = self._resolve_coreferences(text)
 
             if self.coref_enabled and coref_chains:
                 print(f"  ✓ Resolved {len(coref_chains)} coreference chains")
 
             # Step 2: Extract OpenIE triples from resolved text
-            annotation = self.client.annotate(resolved_text)
+            with span("openie.corenlp", chars=len(resolved_text)):
+                annotation = self.client.annotate(resolved_text)
 
             triples = []
             sentence_texts = []
@@ -417,11 +427,13 @@ class OpenIEExtractor:
 
                 # Step 3: Use Stanza dependency parse fallback if no triples extracted
                 if self.use_depparse_fallback and not sentence_triples:
-                    fallback_triples = self._extract_stanza_depparse_triples(
-                        sentence_texts[sent_idx], sent_idx, existing_subjects
-                    )
+                    with span("openie.depparse_fallback"):
+                        fallback_triples = self._extract_stanza_depparse_triples(
+                            sentence_texts[sent_idx], sent_idx, existing_subjects
+                        )
                     triples.extend(fallback_triples)
 
+            count("openie.triples", len(triples))
             print(f"  ✓ Extracted {len(triples)} relation triples")
             print(f"    - OpenIE: {sum(1 for t in triples if t.get('source') == 'openie')}")
             print(f"    - Stanza fallback: {sum(1 for t in triples if 'stanza' in t.get('source', ''))}")
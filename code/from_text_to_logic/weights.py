@@ -21,7 +21,7 @@ Usage (Python):
         json_path="logified.json",
         api_key="sk-..."
     )
-    # Outputs: logified_weighted.json
+    # Outputs: logified_weighted.json (and its compiled KB, logified_weighted.kb)
 """
 
 import sys
@@ -29,7 +29,7 @@ import json
 import math
 import argparse
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, TYPE_CHECKING
 
 # Add code directory to Python path (for imports to work from any location)
 _script_dir = Path(__file__).resolve().parent
@@ -40,7 +40,6 @@ if str(_script_dir) not in sys.path:
     sys.path.insert(0, str(_script_dir))
 
 import numpy as np
-from openai import OpenAI
 
 # Reuse existing RAG infrastructure
 from baseline_rag.chunker import chunk_document
@@ -48,8 +47,15 @@ from baseline_rag.retriever import (
     load_sbert_model,
     encode_chunks,
     encode_query,
-    compute_cosine_similarity
+    compute_cosine_similarity,
+    top_k_indices
 )
+from logic_solver import write_kb_artifact, artifact_path_for
+from instrumentation import span, count, count_llm_usage, traced
+
+if TYPE_CHECKING:
+    # openai is only imported when weights are actually assigned
+    from openai import OpenAI
 
 
 def extract_text_from_document(file_path: str) -> str:
@@ -130,13 +136,9 @@ def retrieve_top_k_chunks(
     query_embedding = encode_query(constraint, sbert_model)
     similarities = compute_cosine_similarity(query_embedding, chunk_embeddings)
 
-    # Get top-k indices
-    k = min(k, len(chunks))
-    top_k_indices = np.argsort(similarities)[::-1][:k]
-
-    # Return chunks with similarity scores
+    # Return top-k chunks with similarity scores
     retrieved = []
-    for idx in top_k_indices:
+    for idx in top_k_indices(similarities, k):
         chunk = chunks[idx].copy()
         chunk['similarity'] = float(similarities[idx])
         retrieved.append(chunk)
@@ -229,7 +231,7 @@ def verify_single_constraint(
     chunks: List[Dict],
     chunk_embeddings: np.ndarray,
     sbert_model,
-    client: OpenAI,
+    client: "OpenAI",
     model: str = "gpt-4o",
     temperature: float = 0.0,
     max_tokens: int = 5,
@@ -253,9 +255,10 @@ def verify_single_constraint(
         Dict with logit_yes, logit_no, prob_yes, prob_no
     """
     # Retrieve top-k chunks for this constraint
-    retrieved_chunks = retrieve_top_k_chunks(
-        constraint_text, chunks, chunk_embeddings, sbert_model, k=k
-    )
+    with span("weights.retrieve"):
+        retrieved_chunks = retrieve_top_k_chunks(
+            constraint_text, chunks, chunk_embeddings, sbert_model, k=k
+        )
 
     # Build prompt
     prompt = build_verification_prompt(retrieved_chunks, constraint_text)
@@ -274,19 +277,22 @@ def verify_single_constraint(
     print("=" * 60 + "\n")
 
     # Call LLM with logprobs
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature,
-        max_tokens=max_tokens,
-        logprobs=True,
-        top_logprobs=20
-    )
+    with span("weights.llm", model=model):
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            logprobs=True,
+            top_logprobs=20
+        )
+    count_llm_usage("weights.llm", response)
 
     # Extract logprobs
     return extract_logprobs_for_yes_no(response)
 
 
+@traced("weights")
 def assign_weights(
     pathfile: str,
     json_path: str,
@@ -300,7 +306,8 @@ def assign_weights(
     chunk_overlap: int = 50,
     sbert_model_name: str = "all-MiniLM-L6-v2",
     verbose: bool = True,
-    weight_hard_constraints: bool = True
+    weight_hard_constraints: bool = True,
+    write_artifact: bool = True
 ) -> Dict[str, Any]:
     """
     Assign weights to all constraints in a logified JSON file.
@@ -319,6 +326,8 @@ def assign_weights(
         sbert_model_name: SBERT model for retrieval (default: all-MiniLM-L6-v2)
         verbose: Print progress messages (default: True)
         weight_hard_constraints: Also assign weights to hard constraints (default: True)
+        write_artifact: Also write the compiled KB artifact (`*_weighted.kb`) with
+            the proposition embeddings (default: True)
 
     Returns:
         The logified structure with weights added to constraints
@@ -350,7 +359,8 @@ def assign_weights(
     if verbose:
         print(f"Extracting text from: {pathfile}")
 
-    document_text = extract_text_from_document(pathfile)
+    with span("weights.extract_text"):
+        document_text = extract_text_from_document(pathfile)
 
     if verbose:
         print(f"  Extracted {len(document_text)} characters")
@@ -359,7 +369,8 @@ def assign_weights(
     if verbose:
         print(f"Chunking document (size={chunk_size}, overlap={chunk_overlap})...")
 
-    chunks = chunk_document(document_text, chunk_size=chunk_size, overlap=chunk_overlap)
+    with span("weights.chunking"):
+        chunks = chunk_document(document_text, chunk_size=chunk_size, overlap=chunk_overlap)
 
     if verbose:
         print(f"  Created {len(chunks)} chunks")
@@ -368,17 +379,21 @@ def assign_weights(
     if verbose:
         print(f"Loading SBERT model: {sbert_model_name}")
 
-    sbert_model = load_sbert_model(sbert_model_name)
+    with span("weights.sbert_load"):
+        sbert_model = load_sbert_model(sbert_model_name)
 
     if verbose:
         print("Pre-computing chunk embeddings...")
 
-    chunk_embeddings = encode_chunks(chunks, sbert_model)
+    with span("weights.chunk_embeddings", chunks=len(chunks)):
+        chunk_embeddings = encode_chunks(chunks, sbert_model)
 
     if verbose:
         print(f"  Computed embeddings for {len(chunks)} chunks")
 
     # Step 5: Initialize OpenAI client (with OpenRouter support)
+    from openai import OpenAI
+
     is_openrouter = api_key.startswith('sk-or-v1-') or api_key.startswith('sk-or-')
 
     if is_openrouter:
@@ -464,6 +479,7 @@ def assign_weights(
 
         if verbose:
             print(f"      → confidence (binary softmax) = {confidence:.4f}")
+        count("weights.constraints")
 
         # Add weight field to constraint (3 values: prob_yes original, prob_yes negated, confidence)
         constraint['weight'] = [
@@ -501,6 +517,24 @@ def assign_weights(
     if verbose:
         print(f"\n✓ Weights assigned! Output saved to: {output_path}")
 
+    # Step 8: Write the compiled KB artifact (encoded clauses + proposition embeddings)
+    if write_artifact:
+        with span("weights.artifact"):
+            props = logified.get('primitive_props', [])
+            prop_embeddings = None
+            if props and all('translation' in prop for prop in props):
+                prop_embeddings = encode_chunks([{'text': prop['translation']} for prop in props], sbert_model)
+
+            artifact_path = write_kb_artifact(
+                logified,
+                artifact_path_for(str(output_path)),
+                source_path=str(output_path),
+                prop_embeddings=prop_embeddings,
+                embedding_model=sbert_model_name
+            )
+        if verbose:
+            print(f"✓ Compiled KB saved to: {artifact_path}")
+
     return logified
 
 
@@ -574,6 +608,11 @@ def main():
         action="store_true",
         help="Skip weighting hard constraints (only weight soft constraints)"
     )
+    parser.add_argument(
+        "--no-artifact",
+        action="store_true",
+        help="Do not write the compiled KB artifact (*_weighted.kb)"
+    )
 
     args = parser.parse_args()
 
@@ -599,7 +638,8 @@ def main():
             chunk_size=args.chunk_size,
             chunk_overlap=args.chunk_overlap,
             verbose=not args.quiet,
-            weight_hard_constraints=not args.no_weight_hard
+            weight_hard_constraints=not args.no_weight_hard,
+            write_artifact=not args.no_artifact
         )
         return 0
 
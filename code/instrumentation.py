@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+instrumentation.py - Per-stage timing spans and counters for the pipeline
+
+The experiment drivers only measured end-to-end logify / query latency. This
+module records where the time goes (coreference, CoreNLP, LLM calls, SBERT,
+weights, solver) and counts events (LLM tokens, solver calls, clauses, cache
+hits) with very little overhead, so it is always on:
+
+    from instrumentation import TRACER, span, count
+
+    with span("openie.corenlp", chars=len(text)):
+        annotation = client.annotate(text)
+    count("openie.triples", len(triples))
+
+    TRACER.save("trace_doc_3.json")   # spans, per-stage summary, counters
+    TRACER.reset()
+
+Nested spans record their parent (tracked with contextvars, so nesting is
+correct across threads and asyncio tasks). Per-stage statistics are kept for
+every span; the individual span records are capped at max_spans.
+
+The module sits at the top level because every stage uses it
+(from_text_to_logic, interface_with_user, logic_solver, the experiment
+drivers).
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+
+
+DEFAULT_MAX_SPANS = 10000
+
+# ID of the innermost open span in the current thread / task
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Collects timing spans and counters."""
+
+    def __init__(self, max_spans: int = DEFAULT_MAX_SPANS):
+        """
+        Initialize an empty tracer.
+
+        Args:
+            max_spans: Maximum number of individual span records kept (per-stage
+                statistics and counters are always complete)
+        """
+        self.max_spans = max_spans
+        self.enabled = True
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all spans, statistics and counters (e.g. between documents)."""
+        with self._lock:
+            self._epoch = time.perf_counter()
+            self._next_id = 0
+            self.spans = []
+            self.dropped_spans = 0
+            self._stages: Dict[str, list] = {}  # name -> [count, total, max]
+            self.counters: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time a block of code.
+
+        Args:
+            name: Stage name (dotted, e.g. "weights.llm")
+            **attrs: JSON-serializable attributes stored with the span
+
+        Yields:
+            Dict of attributes; values set on it inside the block are recorded too
+        """
+        if not self.enabled:
+            yield attrs
+            return
+
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+        token = _current_span.set(span_id)
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            duration = time.perf_counter() - start
+            _current_span.reset(token)
+            self.record(name, duration, start=start, span_id=span_id, **attrs)
+
+    def record(self, name: str, duration: float, start: Optional[float] = None,
+               span_id: Optional[int] = None, **attrs):
+        """
+        Record a span timed by the caller.
+
+        Args:
+            name: Stage name
+            duration: Duration in seconds
+            start: perf_counter() value at the start (default: now - duration)
+            span_id: ID reserved by span() (default: a new one)
+            **attrs: JSON-serializable attributes stored with the span
+        """
+        if not self.enabled:
+            return
+        if start is None:
+            start = time.perf_counter() - duration
+
+        with self._lock:
+            if span_id is None:
+                span_id = self._next_id
+                self._next_id += 1
+            stage = self._stages.get(name)
+            if stage is None:
+                self._stages[name] = [1, duration, duration]
+            else:
+                stage[0] += 1
+                stage[1] += duration
+                if duration > stage[2]:
+                    stage[2] = duration
+
+            if len(self.spans) < self.max_spans:
+                entry = {
+                    "id": span_id,
+                    "parent": _current_span.get(),
+                    "name": name,
+                    "start": start - self._epoch,
+                    "duration": duration
+                }
+                if attrs:
+                    entry["attrs"] = attrs
+                self.spans.append(entry)
+            else:
+                self.dropped_spans += 1
+
+    def count(self, name: str, value: float = 1):
+        """
+        Increment a counter.
+
+        Args:
+            name: Counter name (dotted, e.g. "solver.sat_calls")
+            value: Increment (default: 1)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Aggregated statistics.
+
+        Returns:
+            Dict with "stages" (name -> count, total_sec, mean_sec, max_sec) and "counters"
+        """
+        with self._lock:
+            stages = {
+                name: {
+                    "count": stat[0],
+                    "total_sec": stat[1],
+                    "mean_sec": stat[1] / stat[0],
+                    "max_sec": stat[2]
+                }
+                for name, stat in sorted(self._stages.items())
+            }
+            return {"stages": stages, "counters": dict(sorted(self.counters.items()))}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Full trace: individual spans plus the summary.
+
+        Returns:
+            JSON-serializable dict
+        """
+        trace = self.summary()
+        with self._lock:
+            trace["spans"] = list(self.spans)
+            trace["dropped_spans"] = self.dropped_spans
+        return trace
+
+    def save(self, path: str):
+        """
+        Write the full trace as JSON.
+
+        Args:
+            path: Output file path
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def merge_summaries(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate summaries (e.g. one per document) into one.
+
+    Args:
+        summaries: Dicts returned by Tracer.summary()
+
+    Returns:
+        Summary in the same format
+    """
+    stages: Dict[str, Dict[str, float]] = {}
+    counters: Dict[str, float] = {}
+    for summary in summaries:
+        for name, stat in summary.get("stages", {}).items():
+            merged = stages.setdefault(name, {"count": 0, "total_sec": 0.0, "max_sec": 0.0})
+            merged["count"] += stat["count"]
+            merged["total_sec"] += stat["total_sec"]
+            merged["max_sec"] = max(merged["max_sec"], stat["max_sec"])
+        for name, value in summary.get("counters", {}).items():
+            counters[name] = counters.get(name, 0) + value
+
+    for stat in stages.values():
+        stat["mean_sec"] = stat["total_sec"] / stat["count"] if stat["count"] else 0.0
+    return {"stages": dict(sorted(stages.items())), "counters": dict(sorted(counters.items()))}
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """
+    Human-readable table of a summary.
+
+    Args:
+        summary: Dict returned by Tracer.summary() or merge_summaries()
+
+    Returns:
+        Multi-line string
+    """
+    lines = [f"  {'stage':32s} {'count':>7s} {'total (s)':>10s} {'mean (ms)':>10s} {'max (ms)':>10s}"]
+    for name, stat in summary["stages"].items():
+        lines.append(f"  {name:32s} {stat['count']:7d} {stat['total_sec']:10.3f} "
+                     f"{stat['mean_sec'] * 1000:10.2f} {stat['max_sec'] * 1000:10.2f}")
+    for name, value in summary["counters"].items():
+        lines.append(f"  {name:32s} {value:g}")
+    return "\n".join(lines)
+
+
+# Process-wide tracer used by the pipeline stages
+TRACER = Tracer()
+
+
+def span(name: str, **attrs):
+    """Time a block of code with the process-wide tracer (see Tracer.span)."""
+    return TRACER.span(name, **attrs)
+
+
+def count(name: str, value: float = 1):
+    """Increment a counter of the process-wide tracer (see Tracer.count)."""
+    TRACER.count(name, value)
+
+
+def llm_usage(response: Any) -> Dict[str, int]:
+    """
+    Token usage of an OpenAI-compatible chat completion response.
+
+    Args:
+        response: Chat completion response
+
+    Returns:
+        Dict with prompt_tokens, completion_tokens and cached_tokens (prompt
+        tokens served from the provider's prompt cache); empty if the response
+        has no usage
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        cached = details.get("cached_tokens")
+    else:
+        cached = getattr(details, "cached_tokens", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+        "cached_tokens": cached or 0
+    }
+
+
+def count_llm_usage(stage: str, response: Any) -> Dict[str, int]:
+    """
+    Count an LLM call and its token usage (see llm_usage).
+
+    Args:
+        stage: Counter prefix, e.g. "translate.llm"
+        response: Chat completion response (responses without usage only count the call)
+
+    Returns:
+        The usage dict
+    """
+    count(f"{stage}.calls")
+    usage = llm_usage(response)
+    for field, value in usage.items():
+        if value:
+            count(f"{stage}.{field}", value)
+    return usage
+
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator timing every call of a function as a span.
+
+    Args:
+        name: Stage name (default: the function's qualified name)
+    """
+    def decorator(func):
+        stage = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
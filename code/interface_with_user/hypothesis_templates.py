@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+hypothesis_templates.py - Document-independent hypothesis templates, grounded per document
+
+ContractNLI asks the same 17 hypotheses about every document. Most of the
+translation work ("disclosure to employees is permitted" is an atom, "all"
+is a conjunction, ...) does not depend on the document; only the mapping to
+the document's P_i does. Translation is therefore split in two stages:
+
+1. Abstraction (one LLM call per hypothesis, cached in a TemplateStore): the
+   hypothesis becomes a template, a formula over abstract atoms P_1..P_n, each
+   atom described by the sentence a contract would use to state it. A
+   hypothesis the LLM could not abstract is recorded as failed, so the other
+   documents escalate it without asking again.
+2. Grounding (per document, no LLM): each atom is mapped to the document
+   proposition whose SBERT embedding is most similar, and the template's atoms
+   are replaced by the document's proposition IDs.
+
+Grounding is trusted only when every atom matches a distinct proposition with
+similarity >= threshold and the same polarity (a negation in only one of the
+two texts is a mismatch). Otherwise the hypothesis is escalated to the regular
+translate_query call.
+
+    from interface_with_user.hypothesis_templates import TemplateStore, translate_with_template
+
+    store = TemplateStore("cache/hypothesis_templates.json")
+    result = translate_with_template(hypothesis, json_path, api_key, store=store)
+    result['template_grounded']   # False if escalated to translate_query
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from baseline_rag.retriever import load_sbert_model, encode_chunks, encode_query, compute_cosine_similarity
+from interface_with_user.translate import (
+    call_llm,
+    extract_proposition_chunks,
+    load_artifact_embeddings,
+    translate_query,
+    validate_formula
+)
+from interface_with_user.translation_memo import normalize_query
+from instrumentation import span, count
+
+
+TEMPLATE_VERSION = 1
+
+# Abstract atoms a template may use (P_1..P_MAX_TEMPLATE_ATOMS)
+MAX_TEMPLATE_ATOMS = 6
+
+# Minimum cosine similarity between an atom and its proposition
+GROUNDING_THRESHOLD = 0.6
+
+_PROP_ID_PATTERN = re.compile(r'P_\d+')
+_NEGATION_PATTERN = re.compile(r"\b(?:not|no|never|nor|neither|without|none)\b|n't\b", re.IGNORECASE)
+
+TEMPLATE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "hypothesis_template",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "formula": {"type": "string"},
+                "atoms": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"id": {"type": "string"}, "text": {"type": "string"}},
+                        "required": ["id", "text"],
+                        "additionalProperties": False
+                    }
+                },
+                "translation": {"type": "string"},
+                "reasoning": {"type": "string"},
+                "statement": {"type": "string"}
+            },
+            "required": ["formula", "atoms", "translation", "reasoning", "statement"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+def build_template_prompt(hypothesis: str) -> str:
+    """
+    Prompt asking for the document-independent template of a hypothesis.
+
+    Args:
+        hypothesis: Hypothesis (or Yes/No question) in natural language
+
+    Returns:
+        Prompt text
+    """
+    return f"""You are a logic translator for Natural Language Inference (NLI) over legal contracts. The same hypothesis will be checked against many contracts, so translate it WITHOUT seeing any contract: write a propositional formula over abstract atoms P_1, P_2, ... (at most {MAX_TEMPLATE_ATOMS}).
+
+Describe each atom by ONE sentence phrased the way a contract clause would state it (e.g. "The Receiving Party may disclose Confidential Information to its employees"). Each atom is later matched to a contract's propositions by sentence similarity, so keep atoms atomic and concrete. Put negations in the formula (¬P_i) unless a contract would itself state the prohibition ("The Receiving Party shall not reverse engineer ...").
+
+If the hypothesis is a Yes/No question, translate the corresponding declarative statement and return it as "statement"; otherwise return the hypothesis unchanged as "statement".
+
+Use only the operators ∧ ∨ ¬ ⟹ ⟺ and parentheses. Choose the SIMPLEST formula: a single atom if one sentence captures the hypothesis.
+
+HYPOTHESIS: "{hypothesis}"
+
+Respond with JSON only:
+{{"formula": "<formula over P_1..P_n>", "atoms": [{{"id": "P_1", "text": "<contract sentence>"}}], "translation": "<formula in words>", "reasoning": "<1-2 sentences>", "statement": "<declarative statement>"}}"""
+
+
+class TemplateStore:
+    """Persistent templates (and failed abstractions) keyed by (normalized hypothesis, model)."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the store, loading the templates saved at path.
+
+        Args:
+            path: JSON file (written on every new template or failure); None
+                keeps the templates in memory only
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._templates: Dict[str, Dict[str, Any]] = {}
+        self._failures: Dict[str, str] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == TEMPLATE_VERSION:
+                self._templates = data.get("templates", {})
+                self._failures = data.get("failures", {})
+
+    @staticmethod
+    def make_key(hypothesis: str, model: str) -> str:
+        """Store key of a hypothesis (an "openai/" model prefix is ignored)."""
+        model = model[len("openai/"):] if model.startswith("openai/") else model
+        return json.dumps([normalize_query(hypothesis), model])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored template, or None."""
+        with self._lock:
+            return self._templates.get(key)
+
+    def put(self, key: str, template: Dict[str, Any]):
+        """Store a template (and save the file)."""
+        with self._lock:
+            self._templates[key] = template
+            self._failures.pop(key, None)
+            self._save()
+
+    def get_failure(self, key: str) -> Optional[str]:
+        """Why the hypothesis could not be abstracted, or None."""
+        with self._lock:
+            return self._failures.get(key)
+
+    def put_failure(self, key: str, reason: str):
+        """Record a hypothesis the LLM could not abstract (and save the file)."""
+        with self._lock:
+            self._failures[key] = reason
+            self._save()
+
+    def _save(self):
+        """Write the file (called with the lock held)."""
+        if not self.path:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": TEMPLATE_VERSION, "templates": self._templates, "failures": self._failures},
+                      f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+
+def abstract_hypothesis(
+    hypothesis: str,
+    api_key: str,
+    model: str = "gpt-5.2",
+    temperature: float = 0.1,
+    reasoning_effort: str = "medium",
+    max_tokens: int = 64000,
+    store: Optional[TemplateStore] = None,
+    structured_output: bool = False
+) -> Dict[str, Any]:
+    """
+    Document-independent template of a hypothesis (LLM call unless stored).
+
+    Args:
+        hypothesis: Hypothesis in natural language
+        api_key: OpenRouter API key
+        model: LLM model (default: gpt-5.2)
+        temperature: Sampling temperature (default: 0.1)
+        reasoning_effort: For reasoning models (default: medium)
+        max_tokens: Max response tokens (default: 64000)
+        store: Template store; new templates and failed abstractions are added
+            to it (default: None)
+        structured_output: Request TEMPLATE_RESPONSE_FORMAT (default: False)
+
+    Returns:
+        Dict with formula (over P_1..P_n), atoms ({id: contract sentence}),
+        translation, reasoning and statement
+
+    Raises:
+        ValueError: If the LLM returns no valid template, now or in an earlier
+            call with the same store (request errors are not recorded)
+    """
+    key = TemplateStore.make_key(hypothesis, model)
+    if store is not None:
+        template = store.get(key)
+        if template is not None:
+            count("translate.template_store_hits")
+            return template
+        failure = store.get_failure(key)
+        if failure is not None:
+            count("translate.template_store_failures")
+            raise ValueError(f"{failure} (recorded)")
+
+    with span("translate.template_llm", model=model):
+        result = call_llm(
+            prompt=build_template_prompt(hypothesis),
+            api_key=api_key,
+            model=model,
+            temperature=temperature,
+            reasoning_effort=reasoning_effort,
+            max_tokens=max_tokens,
+            response_format=TEMPLATE_RESPONSE_FORMAT if structured_output else None,
+            valid_prop_ids=[f"P_{i}" for i in range(1, MAX_TEMPLATE_ATOMS + 1)]
+        )
+    failure = None
+    atoms = {}
+    if result.get('validation_error'):
+        failure = f"Invalid template: {result['validation_error']}"
+    else:
+        for atom in result.get('atoms') or []:
+            if isinstance(atom, dict) and atom.get('id') and str(atom.get('text', '')).strip():
+                atoms[atom['id'].strip()] = atom['text'].strip()
+        missing = set(_PROP_ID_PATTERN.findall(result['formula'])) - set(atoms)
+        if not atoms or missing:
+            failure = f"Template atoms without a description: {sorted(missing) or 'all'}"
+    if failure is not None:
+        if store is not None:
+            store.put_failure(key, failure)
+        raise ValueError(failure)
+
+    template = {
+        "formula": result['formula'],
+        "atoms": atoms,
+        "translation": result.get('translation', ''),
+        "reasoning": result.get('reasoning', ''),
+        "statement": (result.get('statement') or '').strip() or hypothesis
+    }
+    if store is not None:
+        store.put(key, template)
+    return template
+
+
+def atom_similarities(template: Dict[str, Any], chunks: List[Dict], sbert_model,
+                      chunk_embeddings: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Cosine similarity of every template atom to every document proposition.
+
+    Args:
+        template: Template from abstract_hypothesis
+        chunks: Proposition chunks of the document (see extract_proposition_chunks)
+        sbert_model: Loaded SBERT model
+        chunk_embeddings: Precomputed proposition embeddings (default: encode now)
+
+    Returns:
+        Dict atom ID -> (num_props,) similarities
+    """
+    if chunk_embeddings is None:
+        chunk_embeddings = encode_chunks(chunks, sbert_model)
+    return {
+        atom_id: compute_cosine_similarity(encode_query(text, sbert_model), chunk_embeddings)
+        for atom_id, text in template['atoms'].items()
+    }
+
+
+def ground_template(template: Dict[str, Any], chunks: List[Dict], similarities: Dict[str, np.ndarray],
+                    threshold: float = GROUNDING_THRESHOLD) -> Dict[str, Any]:
+    """
+    Map a template's atoms to a document's propositions.
+
+    Args:
+        template: Template from abstract_hypothesis
+        chunks: Proposition chunks of the document
+        similarities: Output of atom_similarities
+        threshold: Minimum similarity of a trusted match (default: GROUNDING_THRESHOLD)
+
+    Returns:
+        Dict with formula (over the document's P_i, None if grounding is not
+        trusted), grounding (atom, prop, similarity per atom), confidence (lowest
+        atom similarity) and problems (why grounding is not trusted)
+    """
+    grounding = []
+    problems = []
+    mapping = {}
+    for atom_id, text in template['atoms'].items():
+        best = int(np.argmax(similarities[atom_id]))
+        similarity = float(similarities[atom_id][best])
+        prop = chunks[best]
+        grounding.append({"atom": atom_id, "prop": prop['id'], "similarity": similarity})
+        mapping[atom_id] = prop['id']
+
+        if similarity < threshold:
+            problems.append(f"{atom_id} matches {prop['id']} with similarity {similarity:.2f}")
+        elif bool(_NEGATION_PATTERN.search(text)) != bool(_NEGATION_PATTERN.search(prop['translation'])):
+            problems.append(f"{atom_id} and {prop['id']} differ in negation")
+
+    used = [entry['prop'] for entry in grounding]
+    for prop_id in sorted({prop_id for prop_id in used if used.count(prop_id) > 1}):
+        problems.append(f"several atoms match {prop_id}")
+
+    formula = None
+    if not problems:
+        formula = _PROP_ID_PATTERN.sub(lambda match: mapping.get(match.group(), match.group()), template['formula'])
+        error = validate_formula(formula, [chunk['id'] for chunk in chunks])
+        if error:
+            problems.append(error)
+            formula = None
+
+    return {
+        "formula": formula,
+        "grounding": grounding,
+        "confidence": min((entry['similarity'] for entry in grounding), default=0.0),
+        "problems": problems
+    }
+
+
+def translate_with_template(
+    query: str,
+    json_path: str,
+    api_key: str,
+    model: str = "gpt-5.2",
+    temperature: float = 0.1,
+    reasoning_effort: str = "medium",
+    max_tokens: int = 64000,
+    k: int = 20,
+    sbert_model_name: str = "all-MiniLM-L6-v2",
+    verbose: bool = True,
+    store: Optional[TemplateStore] = None,
+    threshold: float = GROUNDING_THRESHOLD,
+    structured_output: bool = False,
+    escalate: bool = True,
+    **translate_kwargs
+) -> Dict[str, Any]:
+    """
+    Translate a query by grounding its cached template, escalating to
+    translate_query when the grounding is not trusted.
+
+    Args:
+        query: Hypothesis in natural language
+        json_path: Path to logified JSON file with primitive_props
+        api_key: OpenRouter API key
+        model: LLM model, for the template and the escalation (default: gpt-5.2)
+        temperature: Sampling temperature (default: 0.1)
+        reasoning_effort: For reasoning models (default: medium)
+        max_tokens: Max response tokens (default: 64000)
+        k: Propositions retrieved on escalation (default: 20)
+        sbert_model_name: SBERT model for grounding and retrieval (default: all-MiniLM-L6-v2)
+        verbose: Print progress messages (default: True)
+        store: Template store shared across documents (default: None, a template
+            per call)
+        threshold: Minimum atom similarity (default: GROUNDING_THRESHOLD)
+        structured_output: Request JSON schema responses (default: False)
+        escalate: Call translate_query when the grounding is not trusted; if
+            False, such queries are returned with formula None so that the
+            caller can translate them otherwise (e.g. translate_queries_batch)
+            (default: True)
+        **translate_kwargs: Passed to translate_query on escalation (e.g.
+            prompt_layout, retrieval_mode, constraint_hops, memo)
+
+    Returns:
+        Dict as returned by translate_query, plus template_grounded; grounded
+        results also have template, grounding and grounding_confidence,
+        escalated ones escalation_reason
+    """
+    escalation_reason = None
+    try:
+        template = abstract_hypothesis(query, api_key, model=model, temperature=temperature,
+                                       reasoning_effort=reasoning_effort, max_tokens=max_tokens,
+                                       store=store, structured_output=structured_output)
+    except Exception as e:
+        template = None
+        escalation_reason = f"no template: {e}"
+
+    if template is not None:
+        with span("translate.template_ground", atoms=len(template['atoms'])):
+            with open(json_path, 'r', encoding='utf-8') as f:
+                chunks = extract_proposition_chunks(json.load(f))
+            sbert_model = load_sbert_model(sbert_model_name)
+            chunk_embeddings = load_artifact_embeddings(json_path, sbert_model_name, len(chunks))
+            grounded = ground_template(template, chunks,
+                                       atom_similarities(template, chunks, sbert_model, chunk_embeddings),
+                                       threshold=threshold)
+
+        if grounded['formula'] is not None:
+            count("translate.template_grounded")
+            result = {
+                "formula": grounded['formula'],
+                "translation": template['translation'],
+                "query": template['statement'],
+                "reasoning": template['reasoning'],
+                "template": template['formula'],
+                "grounding": grounded['grounding'],
+                "grounding_confidence": grounded['confidence'],
+                "template_grounded": True
+            }
+            if template['statement'] != query:
+                result['original_query'] = query
+            if verbose:
+                print(f"Grounded template {template['formula']} → {grounded['formula']} "
+                      f"(confidence {grounded['confidence']:.2f})")
+            return result
+        escalation_reason = "; ".join(grounded['problems'])
+
+    count("translate.template_escalated")
+    if not escalate:
+        return {"formula": None, "query": query, "template_grounded": False,
+                "escalation_reason": escalation_reason}
+    if verbose:
+        print(f"Escalating to the LLM translation: {escalation_reason}")
+    result = translate_query(query, json_path, api_key, model=model, temperature=temperature,
+                             reasoning_effort=reasoning_effort, max_tokens=max_tokens, k=k,
+                             sbert_model_name=sbert_model_name, verbose=verbose,
+                             structured_output=structured_output, **translate_kwargs)
+    result['template_grounded'] = False
+    result['escalation_reason'] = escalation_reason
+    return result
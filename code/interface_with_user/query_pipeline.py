@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+query_pipeline.py - Overlapped translate → solve pipeline for many hypotheses
+
+The experiment drivers query hypotheses one after the other: each waits for
+its LLM translation (network I/O, seconds) before being solved (CPU,
+milliseconds), and the next translation only starts afterwards. QueryPipeline
+runs up to max_concurrency translations at a time and solves each hypothesis
+as soon as its translation arrives, in a separate executor, while the other
+translations are still in flight. Results are emitted in input order.
+
+    from functools import partial
+    from interface_with_user.translate import translate_query
+    from interface_with_user.query_pipeline import QueryPipeline
+
+    pipeline = QueryPipeline(
+        translate=partial(translate_query, json_path=json_path, api_key=api_key, verbose=False),
+        solve=lambda query, translation: LogicSolver(structure).query(translation['formula']),
+        max_concurrency=8
+    )
+    results = pipeline.run(hypotheses)        # from synchronous code
+
+    async for index, result in pipeline.stream(hypotheses):   # from async code
+        ...
+
+The translate and solve callables are ordinary blocking functions; they run in
+thread pools, so translate_query and LogicSolver are used unchanged.
+"""
+
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Sequence, Tuple
+
+
+DEFAULT_CONCURRENCY = 8
+
+
+class QueryPipeline:
+    """Concurrent LLM translation with solving overlapped, results in input order."""
+
+    def __init__(self, translate: Callable[[Any], Any], solve: Callable[[Any, Any], Any],
+                 max_concurrency: int = DEFAULT_CONCURRENCY, solver_workers: int = 1):
+        """
+        Initialize the pipeline.
+
+        Args:
+            translate: translate(item) -> translation (e.g. translate_query);
+                if it returns a dict, its wall time is stored under 'latency_sec'
+            solve: solve(item, translation) -> result
+            max_concurrency: Maximum number of translations in flight
+            solver_workers: Threads solving (default: 1; the solvers share the
+                process-wide result cache)
+        """
+        if max_concurrency < 1 or solver_workers < 1:
+            raise ValueError("max_concurrency and solver_workers must be at least 1")
+        self.translate = translate
+        self.solve = solve
+        self.max_concurrency = max_concurrency
+        self.solver_workers = solver_workers
+
+    @staticmethod
+    def _call(loop, executor, func, *args):
+        """Run func in the executor, keeping the caller's context (e.g. the open trace span)."""
+        context = contextvars.copy_context()
+        return loop.run_in_executor(executor, functools.partial(context.run, func, *args))
+
+    async def _process(self, item: Any, loop, semaphore: asyncio.Semaphore,
+                       translate_pool: ThreadPoolExecutor, solve_pool: ThreadPoolExecutor) -> Any:
+        """Translate then solve one item; exceptions become {"error": message} results."""
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                translation = await self._call(loop, translate_pool, self.translate, item)
+            except Exception as e:
+                return {"error": f"Translation failed: {e}", "query_latency_sec": time.perf_counter() - start}
+            if isinstance(translation, dict):
+                translation.setdefault("latency_sec", time.perf_counter() - start)
+
+        # The translation slot is released: the next translation overlaps this solve
+        try:
+            return await self._call(loop, solve_pool, self.solve, item, translation)
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def stream(self, items: Sequence[Any]) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Process items, yielding results in input order as soon as they are ready.
+
+        Args:
+            items: Items to process (e.g. hypothesis texts)
+
+        Yields:
+            (index, result) pairs, index 0, 1, 2, ...
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        with ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="translate") as translate_pool, \
+                ThreadPoolExecutor(self.solver_workers, thread_name_prefix="solve") as solve_pool:
+            tasks = [
+                asyncio.ensure_future(self._process(item, loop, semaphore, translate_pool, solve_pool))
+                for item in items
+            ]
+            try:
+                for index, task in enumerate(tasks):
+                    yield index, await task
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def run_async(self, items: Sequence[Any]) -> List[Any]:
+        """
+        Process all items.
+
+        Args:
+            items: Items to process
+
+        Returns:
+            Results in input order
+        """
+        return [result async for _, result in self.stream(items)]
+
+    def run(self, items: Sequence[Any]) -> List[Any]:
+        """
+        Process all items from synchronous code (starts an event loop).
+
+        Args:
+            items: Items to process
+
+        Returns:
+            Results in input order
+
+        Raises:
+            RuntimeError: If called from a running event loop (use run_async or stream)
+        """
+        return asyncio.run(self.run_async(items))
+
+
+def run_query_pipeline(items: Sequence[Any], translate: Callable[[Any], Any],
+                       solve: Callable[[Any, Any], Any],
+                       max_concurrency: int = DEFAULT_CONCURRENCY) -> List[Any]:
+    """
+    Translate and solve items with QueryPipeline (synchronous convenience wrapper).
+
+    Args:
+        items: Items to process
+        translate: translate(item) -> translation
+        solve: solve(item, translation) -> result
+        max_concurrency: Maximum number of translations in flight
+
+    Returns:
+        Results in input order
+    """
+    return QueryPipeline(translate, solve, max_concurrency=max_concurrency).run(items)
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Test script for the interface_with_user module.
+
+Tests the query translation prompts, response parsing, the query pipeline,
+the translation memo and hypothesis templates (no LLM calls).
+"""
+
+import json
+import os
+import tempfile
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import interface_with_user as a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Compute paths relative to script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+CODE_DIR = SCRIPT_DIR.parent
+REPO_DIR = CODE_DIR.parent
+ARTIFACTS_DIR = REPO_DIR / "artifacts" / "code"
+
+from logic_solver import LogicSolver
+
+
+def test_prompt_prefix_layout():
+    """Test that the prefix-stable prompt layout shares its prefix across queries."""
+    from types import SimpleNamespace
+    from interface_with_user.translate import build_prompt, extract_proposition_chunks
+    from instrumentation import llm_usage
+
+    print("=" * 80)
+    print("PROMPT PREFIX LAYOUT TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+    chunks = extract_proposition_chunks(logified)
+
+    first = build_prompt("Alice passes the exam", chunks[:4], logified, layout="prefix_stable")
+    second = build_prompt("The library is quiet", chunks[6:9], logified, layout="prefix_stable")
+    prefix = os.path.commonprefix([first, second])
+    print(f"  Shared prefix: {len(prefix)} of {len(first)} / {len(second)} characters")
+    assert "Evidence:" not in prefix  # Query-specific part comes last
+    assert all(prop['translation'] in prefix for prop in logified['primitive_props'])
+    assert all(c['formula'] in prefix for c in logified['hard_constraints'])
+    assert '"Alice passes the exam"' in first and '"Alice passes the exam"' not in prefix
+
+    # The default layout starts with the query-specific propositions
+    default = build_prompt("Alice passes the exam", chunks[:4], logified)
+    assert default.index("=== AVAILABLE PROPOSITIONS ===") < default.index("=== EXAMPLES ===")
+    try:
+        build_prompt("q", chunks, logified, layout="unknown")
+        assert False, "Unknown layout should raise ValueError"
+    except ValueError:
+        pass
+
+    # Cached-token reporting from API usage
+    response = SimpleNamespace(usage=SimpleNamespace(
+        prompt_tokens=1500, completion_tokens=40,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1280)))
+    assert llm_usage(response) == {"prompt_tokens": 1500, "completion_tokens": 40, "cached_tokens": 1280}
+    assert llm_usage(SimpleNamespace()) == {}
+
+    print()
+
+
+def test_batch_translation_prompt():
+    """Test the multi-hypothesis translation prompt, response parsing and formula validation."""
+    from interface_with_user.translate import (
+        build_batch_prompt, extract_proposition_chunks, split_usage, validate_formula, _parse_batch_response
+    )
+
+    print("=" * 80)
+    print("BATCH TRANSLATION TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+    chunks = extract_proposition_chunks(logified)
+    prop_ids = [chunk['id'] for chunk in chunks]
+
+    queries = {1: "Alice passes the exam", 2: "Is the library quiet?"}
+    retrieved = {1: chunks[:4], 2: chunks[6:9]}
+    prompt = build_batch_prompt(queries, retrieved, logified, previous_errors={2: "empty formula"})
+    print(f"  Batch prompt: {len(prompt)} characters for {len(queries)} hypotheses")
+    first_prop = logified['primitive_props'][0]
+    assert prompt.count(f"{first_prop['id']}: {first_prop['translation']}") == 1  # Catalogue sent once
+    assert '[1] "Alice passes the exam"' in prompt and '[2] "Is the library quiet?"' in prompt
+    assert "rejected: empty formula" in prompt
+    assert all(chunk['id'] in prompt for chunk in chunks[:4] + chunks[6:9])
+
+    # The default layout puts the hypotheses before the instructions
+    default_prompt = build_batch_prompt(queries, retrieved, logified, layout="default")
+    assert default_prompt.index("=== HYPOTHESES TO TRANSLATE ===") < default_prompt.index("=== OUTPUT FORMAT ===")
+    assert prompt.index("=== OUTPUT FORMAT ===") < prompt.index("=== HYPOTHESES TO TRANSLATE ===")
+    try:
+        build_batch_prompt(queries, retrieved, logified, layout="unknown")
+        assert False, "unknown layout accepted"
+    except ValueError:
+        pass
+    print("  Batch prompt follows the prompt layout")
+
+    # One call's usage is charged to the hypotheses it translated
+    shares = split_usage({"prompt_tokens": 1000, "completion_tokens": 7, "cached_tokens": 0}, 3)
+    assert [share["completion_tokens"] for share in shares] == [3, 2, 2]
+    assert sum(share["prompt_tokens"] for share in shares) == 1000
+    print(f"  Usage split: {shares}")
+
+    response = 'Here you go: {"translations": [{"id": 1, "statement": "Alice passes the exam", ' \
+               '"formula": "P_1 ∧ P_2", "translation": "t", "reasoning": "r"}, {"id": "2", "formula": ""}]}'
+    parsed = _parse_batch_response(response)
+    assert sorted(parsed) == [1, 2]
+
+    assert validate_formula("P_1 ∧ ¬P_2", prop_ids) is None
+    assert validate_formula("", prop_ids) == "empty formula"
+    assert "invalid" in validate_formula("P_1 ∧ P_999", prop_ids)
+    assert "invalid" in validate_formula("P_1 ∧ (P_2", prop_ids)
+    print("  Invalid formulas detected; only those hypotheses are retried")
+
+    print()
+
+
+def test_yes_no_folding():
+    """Test the rule-based question rewrite and the folded Yes/No translation prompt."""
+    from interface_with_user.translate import (
+        build_prompt, extract_proposition_chunks, rewrite_question_as_statement
+    )
+
+    print("=" * 80)
+    print("YES/NO FOLDING TEST")
+    print("=" * 80)
+    print()
+
+    cases = {
+        "Is Alice a student?": "Alice is a student",
+        "Does the Agreement allow disclosure?": "the Agreement allows disclosure",
+        "Did Bob pass the exam?": "Bob did pass the exam",
+        "Can the receiving party share information?": "the receiving party share information",
+        "Alice is a student": "Alice is a student"
+    }
+    for question, statement in cases.items():
+        rewritten = rewrite_question_as_statement(question)
+        print(f"  {question!r} -> {rewritten!r}")
+        assert rewritten == statement
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+    chunks = extract_proposition_chunks(logified)
+
+    for layout in ("default", "prefix_stable"):
+        plain = build_prompt("Is Alice a student?", chunks[:4], logified, layout=layout)
+        folded = build_prompt("Is Alice a student?", chunks[:4], logified, layout=layout, question=True)
+        assert '"statement"' in folded and '"statement"' not in plain
+    # The question instruction does not change the cacheable prefix
+    other = build_prompt("Is the library quiet?", chunks[6:9], logified, layout="prefix_stable", question=True)
+    assert os.path.commonprefix([folded, other]) == os.path.commonprefix([plain, other])
+
+    print()
+
+
+def test_constraint_pruning():
+    """Test the proposition-to-constraint index and the constraint neighbourhood in prompts."""
+    from interface_with_user.translate import (
+        build_prompt, build_constraint_index, extract_proposition_chunks, select_constraints
+    )
+
+    print("=" * 80)
+    print("CONSTRAINT PRUNING TEST")
+    print("=" * 80)
+    print()
+
+    structure = {
+        "primitive_props": [{"id": f"P_{i}", "translation": f"fact {i}"} for i in range(1, 7)],
+        "hard_constraints": [{"id": "H_1", "formula": "P_1 ⟹ P_2"}, {"id": "H_2", "formula": "P_5 ∨ P_6"}],
+        "soft_constraints": [{"id": "S_1", "formula": "P_2 ⟹ P_3", "weight": 0.8},
+                             {"id": "S_2", "formula": "P_3 ∧ P_4", "weight": 0.6}]
+    }
+    index = build_constraint_index(structure)
+    assert index["P_2"] == [("hard_constraints", 0), ("soft_constraints", 0)]
+
+    def ids(selected):
+        return [c["id"] for c in selected["hard_constraints"] + selected["soft_constraints"]]
+
+    assert ids(select_constraints(structure, ["P_1"], hops=0)) == ["H_1"]
+    assert ids(select_constraints(structure, ["P_1"], hops=1, constraint_index=index)) == ["H_1", "S_1"]
+    assert ids(select_constraints(structure, ["P_1"], hops=2)) == ["H_1", "S_1", "S_2"]
+    assert ids(select_constraints(structure, ["P_9"], hops=1)) == []
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+    chunks = extract_proposition_chunks(logified)
+    full = build_prompt("Alice passes the exam", chunks[:2], logified)
+    pruned = build_prompt("Alice passes the exam", chunks[:2], logified, constraint_hops=0)
+    print(f"  Prompt: {len(full)} characters with all constraints, {len(pruned)} pruned")
+    assert len(pruned) <= len(full)
+    kept = select_constraints(logified, [c['id'] for c in chunks[:2]])
+    for constraint in logified["hard_constraints"]:
+        assert (f"- {constraint['formula']}" in pruned) == (constraint in kept["hard_constraints"])
+
+    # prefix_stable: pruned constraints move out of the shared prefix
+    first = build_prompt("q1", chunks[:2], logified, layout="prefix_stable", constraint_hops=0)
+    second = build_prompt("q2", chunks[5:7], logified, layout="prefix_stable", constraint_hops=0)
+    assert "ESTABLISHED CONSTRAINTS" not in os.path.commonprefix([first, second])
+
+    print()
+
+
+def test_translation_response_parsing():
+    """Test translation response parsing, the structured-output schema and formula validation."""
+    from interface_with_user.translate import (
+        _parse_translation_response, translation_response_format, validate_formula
+    )
+
+    print("=" * 80)
+    print("TRANSLATION RESPONSE TEST")
+    print("=" * 80)
+    print()
+
+    result, error = _parse_translation_response('{"formula": "P_1 ∧ P_2", "translation": "t", "reasoning": "r"}')
+    assert result["formula"] == "P_1 ∧ P_2" and error is None
+    result, _ = _parse_translation_response('Sure! {"formula": "¬P_3"} Hope this helps.')
+    assert result["formula"] == "¬P_3"
+    result, _ = _parse_translation_response('The answer is P_4 ⟹ P_5.')
+    assert result["formula"] == "P_4 ⟹ P_5"
+    # Structured / validated calls: no regex guess, the error goes to the repair message
+    result, error = _parse_translation_response('The answer is P_4 ⟹ P_5.', allow_regex=False)
+    assert result is None and "JSON" in error
+    result, error = _parse_translation_response('{"translation": "no formula"}')
+    assert result is None and "formula" in error
+
+    schema = translation_response_format(with_statement=True)["json_schema"]["schema"]
+    assert schema["required"] == ["formula", "translation", "reasoning", "statement"]
+    assert "statement" not in translation_response_format()["json_schema"]["schema"]["properties"]
+
+    # Errors returned to the model in the repair message
+    prop_ids = ["P_1", "P_2", "P_3"]
+    print(f"  {validate_formula('P_1 ∧ P_7', prop_ids)}")
+    assert "P_7" in validate_formula("P_1 ∧ P_7", prop_ids)
+    assert validate_formula("(P_1 ∨ P_2) ⟹ ¬P_3", prop_ids) is None
+
+    print()
+
+
+def test_query_pipeline():
+    """Test the overlapped translate/solve pipeline: input order, concurrency bound, errors."""
+    import threading
+    import time
+    from interface_with_user.query_pipeline import QueryPipeline
+
+    print("=" * 80)
+    print("QUERY PIPELINE TEST")
+    print("=" * 80)
+    print()
+
+    solver = LogicSolver(json.loads((ARTIFACTS_DIR / "logify2_full_demo.json").read_text()))
+    in_flight = [0, 0]  # current, peak
+    lock = threading.Lock()
+
+    def translate(formula):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        # Later items translate faster, so they finish out of order
+        time.sleep(0.05 if formula == "P_1" else 0.02)
+        with lock:
+            in_flight[0] -= 1
+        if formula == "bad":
+            raise ValueError("no formula")
+        return {"formula": formula}
+
+    def solve(formula, translation):
+        return solver.query(translation["formula"]).answer
+
+    queries = ["P_1", "P_2", "bad", "P_3", "¬P_1", "P_2 ∨ P_3"]
+    start = time.perf_counter()
+    results = QueryPipeline(translate, solve, max_concurrency=3).run(queries)
+    elapsed = time.perf_counter() - start
+    print(f"  {len(queries)} queries in {elapsed:.3f}s (peak {in_flight[1]} translations in flight)")
+
+    assert results[0] == solver.query("P_1").answer
+    assert results[4] == solver.query("¬P_1").answer
+    assert "no formula" in results[2]["error"]
+    assert in_flight[1] == 3
+    assert elapsed < 0.05 + 5 * 0.02  # sequential translation time
+
+    print()
+
+
+def test_translation_memo():
+    """Test the persistent translation memo: hits, normalization, invalidation and reload."""
+    from interface_with_user.translate import translate_query
+    from interface_with_user.translation_memo import TranslationMemo, structure_hash
+
+    print("=" * 80)
+    print("TRANSLATION MEMO TEST")
+    print("=" * 80)
+    print()
+
+    structure = json.loads((ARTIFACTS_DIR / "logify2_full_demo.json").read_text())
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "doc_weighted.json")
+        memo_path = os.path.join(tmp_dir, "memo.jsonl")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(structure, f)
+
+        memo = TranslationMemo(memo_path)
+        digest = structure_hash(structure)
+        key = memo.make_key(digest, "Is Alice a student?", "gpt-5.2", 20, translation="single",
+                            prompt_layout="default", yes_no_mode="fold", structured_output=False,
+                            sbert_model="all-MiniLM-L6-v2", retrieval_mode="dense",
+                            retrieval_index="exact", constraint_hops=None)
+        memo.put(key, {"formula": "P_1", "query": "Alice is a student", "usage": {"prompt_tokens": 900}},
+                 digest, source=json_path)
+
+        # A hit skips the Yes/No conversion, retrieval and the LLM (no API key needed)
+        result = translate_query("  is alice a STUDENT? ", json_path, api_key="unused", verbose=False, memo=memo)
+        print(f"  Hit: {result}")
+        assert result["formula"] == "P_1" and result["memo_hit"] and "usage" not in result
+        assert memo.make_key(digest, "Is Alice a student?", "openai/gpt-5.2", 20) != key  # options differ
+
+        # Another prompt layout is a different prompt: no hit
+        misses = memo.misses
+        try:
+            translate_query("Is Alice a student?", json_path, api_key="unused", verbose=False, memo=memo,
+                            prompt_layout="prefix_stable")
+        except Exception:
+            pass  # Goes on to retrieval and the LLM
+        assert memo.misses == misses + 1
+
+        # A new structure for the same file replaces the old entries
+        changed = dict(structure, primitive_props=structure["primitive_props"][:-1])
+        new_key = memo.make_key(structure_hash(changed), "Is Alice a student?", "gpt-5.2", 20)
+        memo.put(new_key, {"formula": "P_2"}, structure_hash(changed), source=json_path)
+        assert memo.get(key) is None and len(memo) == 1
+
+        # Reloading keeps the latest structure only and compacts the file
+        reloaded = TranslationMemo(memo_path)
+        assert reloaded.get(new_key)["formula"] == "P_2" and len(reloaded) == 1
+        with open(memo_path, encoding='utf-8') as f:
+            assert len(f.readlines()) == 1
+        print(f"  Stats: {memo.stats()}")
+
+    print()
+
+
+def test_hypothesis_templates():
+    """Test template grounding, escalation conditions and the template store."""
+    import numpy as np
+    from interface_with_user.hypothesis_templates import TemplateStore, abstract_hypothesis, ground_template
+    from interface_with_user.translate import extract_proposition_chunks
+
+    print("=" * 80)
+    print("HYPOTHESIS TEMPLATE TEST")
+    print("=" * 80)
+    print()
+
+    chunks = extract_proposition_chunks(json.loads((ARTIFACTS_DIR / "logify2_full_demo.json").read_text()))
+    template = {
+        "formula": "P_1 ⟹ (P_2 ∧ ¬P_12)",
+        "atoms": {"P_1": "The person studies hard", "P_2": "The person passes the exam",
+                  "P_12": "The person gets distracted"},
+        "translation": "t", "reasoning": "r", "statement": "Studying hard leads to passing"
+    }
+
+    def one_hot(index, value=0.9):
+        similarities = np.full(len(chunks), 0.1)
+        similarities[index] = value
+        return similarities
+
+    # Atoms replaced simultaneously (P_1 → P_3 must not touch P_12)
+    grounded = ground_template(template, chunks, {"P_1": one_hot(2), "P_2": one_hot(3), "P_12": one_hot(4)})
+    print(f"  {template['formula']} → {grounded['formula']}")
+    assert grounded["formula"] == "P_3 ⟹ (P_4 ∧ ¬P_5)" and not grounded["problems"]
+    assert grounded["confidence"] == 0.9
+
+    # Low similarity, a shared proposition or opposite polarity escalate
+    weak = ground_template(template, chunks, {"P_1": one_hot(2, 0.4), "P_2": one_hot(3), "P_12": one_hot(4)})
+    shared = ground_template(template, chunks, {"P_1": one_hot(2), "P_2": one_hot(2), "P_12": one_hot(4)})
+    negated = ground_template(dict(template, atoms=dict(template["atoms"], P_1="The person does not study")),
+                              chunks, {"P_1": one_hot(2), "P_2": one_hot(3), "P_12": one_hot(4)})
+    for name, result in (("weak", weak), ("shared", shared), ("negated", negated)):
+        print(f"  {name}: {result['problems']}")
+        assert result["formula"] is None and result["problems"]
+
+    # Stored templates are reused without an LLM call (no API key needed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "templates.json")
+        TemplateStore(path).put(TemplateStore.make_key("Studying hard leads to passing.", "gpt-5.2"), template)
+        store = TemplateStore(path)
+        assert abstract_hypothesis(" studying hard leads to PASSING", "unused", model="openai/gpt-5.2",
+                                   store=store) == template
+
+        # So are failed abstractions: the hypothesis escalates without an LLM call
+        failed_key = TemplateStore.make_key("The party may do anything.", "gpt-5.2")
+        store.put_failure(failed_key, "Template atoms without a description: ['P_2']")
+        store = TemplateStore(path)
+        try:
+            abstract_hypothesis("The party may do anything.", "unused", store=store)
+            assert False, "recorded failure not raised"
+        except ValueError as e:
+            assert "recorded" in str(e)
+        print("  Failed abstraction recorded and skipped")
+
+    print()
+
+
+if __name__ == "__main__":
+    print()
+
+    test_prompt_prefix_layout()
+    test_batch_translation_prompt()
+    test_yes_no_folding()
+    test_constraint_pruning()
+    test_translation_response_parsing()
+    test_query_pipeline()
+    test_translation_memo()
+    test_hypothesis_templates()
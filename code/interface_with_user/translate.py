@@ -51,18 +51,23 @@ if str(code_dir) not in sys.path:
 import json
 import argparse
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 # Reuse existing RAG infrastructure
 from baseline_rag.retriever import (
     load_sbert_model,
     encode_chunks,
     encode_query,
-    compute_cosine_similarity
+    compute_cosine_similarity,
+    top_k_indices,
+    reciprocal_rank_fusion
 )
+from baseline_rag.vector_index import INDEX_KINDS, load_or_build_index
+from baseline_rag.bm25 import load_or_build_bm25, texts_hash
+from interface_with_user.translation_memo import TranslationMemo, structure_hash
 
-# OpenAI client for LLM calls
-from openai import OpenAI
+from logic_solver import KBArtifact, artifact_path_for, FormulaParser
+from instrumentation import span, count, count_llm_usage, traced
 
 
 def extract_proposition_chunks(logified_structure: Dict[str, Any]) -> List[Dict]:
@@ -106,7 +111,10 @@ def retrieve_top_k_propositions(
     query: str,
     chunks: List[Dict],
     sbert_model,
-    k: int = 20
+    k: int = 20,
+    chunk_embeddings: Optional[np.ndarray] = None,
+    index=None,
+    bm25_index=None
 ) -> List[Dict]:
     """
     Retrieve top-K most relevant propositions for the query using SBERT.
@@ -116,32 +124,101 @@ def retrieve_top_k_propositions(
         chunks: List of proposition chunks (each with 'text' field)
         sbert_model: Loaded SBERT model
         k: Number of propositions to retrieve
+        chunk_embeddings: Precomputed chunk embeddings, e.g. from the compiled
+            KB artifact (default: encode the chunks now)
+        index: Nearest-neighbour index over the chunk embeddings (see
+            baseline_rag.vector_index); replaces the brute-force search
+        bm25_index: BM25 index over the propositions (see baseline_rag.bm25); if
+            given, the SBERT and BM25 rankings are fused by reciprocal rank fusion
 
     Returns:
-        List of top-K chunks sorted by relevance (most relevant first)
+        List of top-K chunks sorted by relevance (most relevant first), each
+        with a 'similarity' field (cosine similarity, or the fused rank score
+        when bm25_index is given)
     """
-    # Encode all chunks
-    chunk_embeddings = encode_chunks(chunks, sbert_model)
-
     # Encode query
     query_embedding = encode_query(query, sbert_model)
 
-    # Compute similarities
-    similarities = compute_cosine_similarity(query_embedding, chunk_embeddings)
+    # Rank deeper than k when fusing, so that the two rankings can overlap
+    depth = max(50, 4 * k) if bm25_index is not None else k
 
-    # Get top-K indices
-    top_k_indices = np.argsort(similarities)[::-1][:k]
+    if index is not None:
+        indices, scores = index.search(query_embedding, depth)
+    else:
+        # Encode all chunks (unless precomputed)
+        if chunk_embeddings is None:
+            chunk_embeddings = encode_chunks(chunks, sbert_model)
+        similarities = compute_cosine_similarity(query_embedding, chunk_embeddings)
+        indices = top_k_indices(similarities, depth)
+        scores = similarities[indices]
+
+    if bm25_index is not None:
+        lexical_scores = bm25_index.scores(query)
+        lexical_ranking = [idx for idx in top_k_indices(lexical_scores, depth) if lexical_scores[idx] > 0]
+        indices, scores = reciprocal_rank_fusion([indices, lexical_ranking], k)
 
     # Return top-K chunks with their similarity scores
     retrieved = []
-    for idx in top_k_indices:
+    for idx, score in zip(indices, scores):
         chunk = chunks[idx].copy()
-        chunk['similarity'] = float(similarities[idx])
+        chunk['similarity'] = float(score)
         retrieved.append(chunk)
 
     return retrieved
 
 
+def _proposition_index(json_path: str, chunks: List[Dict], sbert_model, sbert_model_name: str,
+                       chunk_embeddings: Optional[np.ndarray], kind: str):
+    """
+    Persisted nearest-neighbour index of the propositions, or None for exact search.
+
+    The stored index is validated by the hash of the proposition texts, so the
+    propositions are only encoded when the index has to be (re)built.
+    """
+    if kind == "exact":
+        return None
+    embeddings = chunk_embeddings if chunk_embeddings is not None else (lambda: encode_chunks(chunks, sbert_model))
+    return load_or_build_index(json_path, embeddings, kind, embedding_model=sbert_model_name,
+                               source_hash=texts_hash([chunk['text'] for chunk in chunks]))
+
+
+def _proposition_bm25(json_path: str, chunks: List[Dict]):
+    """Persisted BM25 index over the propositions' translations and evidence."""
+    return load_or_build_bm25(json_path, [f"{chunk['translation']} {chunk['evidence']}" for chunk in chunks])
+
+
+def load_artifact_embeddings(json_path: str, sbert_model_name: str, num_props: int) -> Optional[np.ndarray]:
+    """
+    Load the precomputed proposition embeddings of a logified JSON file.
+
+    They are read from the compiled KB artifact next to the JSON file (see
+    logic_solver.artifact), if it exists, matches the current JSON and was
+    built with the same SBERT model.
+
+    Args:
+        json_path: Path to logified JSON file
+        sbert_model_name: SBERT model used for the query embedding
+        num_props: Number of primitive propositions in the JSON file
+
+    Returns:
+        (num_props, dim) array, or None if no usable embeddings are stored
+    """
+    kb_path = artifact_path_for(json_path)
+    if not os.path.exists(kb_path):
+        return None
+
+    try:
+        artifact = KBArtifact(kb_path)
+        artifact.validate(json_path)
+    except ValueError:
+        return None
+
+    embeddings = artifact.prop_embeddings
+    if embeddings is None or artifact.embedding_model != sbert_model_name or len(embeddings) != num_props:
+        return None
+    return np.asarray(embeddings)
+
+
 def is_yes_no_question(query: str) -> bool:
     """
     Detect if a query is a Yes/No question.
@@ -168,6 +245,87 @@ def is_yes_no_question(query: str) -> bool:
     return False
 
 
+# Proposition retrieval: SBERT only, or SBERT fused with BM25
+RETRIEVAL_MODES = ("dense", "hybrid")
+
+# How translate_query handles Yes/No questions:
+#   "fold": one LLM call translates the question and returns the restated statement;
+#           retrieval uses rewrite_question_as_statement
+#   "llm":  a separate LLM call restates the question before retrieval
+YES_NO_MODES = ("fold", "llm")
+
+_DO_AUXILIARIES = {"do", "does", "did"}
+_PRONOUNS = {"i", "you", "he", "she", "it", "we", "they", "there", "this", "that"}
+_DETERMINERS = {
+    "the", "a", "an", "any", "all", "some", "each", "every", "no", "such",
+    "this", "that", "these", "those", "its", "their", "his", "her", "our", "your"
+}
+
+
+def _third_person(verb: str) -> str:
+    """Third person singular of a base-form verb ("allow" → "allows")."""
+    if verb == "have":
+        return "has"
+    if verb.endswith(("s", "sh", "ch", "x", "z", "o")):
+        return verb + "es"
+    if len(verb) > 1 and verb.endswith("y") and verb[-2] not in "aeiou":
+        return verb[:-1] + "ies"
+    return verb + "s"
+
+
+def _subject_length(words: List[str]) -> int:
+    """
+    Number of leading words that certainly form the subject, or 0 if unsure.
+
+    Recognized subjects: a pronoun, a run of capitalized words ("Receiving
+    Party", "Alice"), or a determiner followed by such a run ("the Agreement").
+    """
+    if not words:
+        return 0
+    if words[0].lower() in _PRONOUNS:
+        return 1
+    start = 1 if words[0].lower() in _DETERMINERS else 0
+    end = start
+    while end < len(words) and words[end][:1].isupper():
+        end += 1
+    return end if end > start else 0
+
+
+def rewrite_question_as_statement(query: str) -> str:
+    """
+    Rule-based rewrite of a Yes/No question into a declarative statement.
+
+    A cheap stand-in for convert_yes_no_to_statement, good enough for
+    retrieval: "Does the Agreement allow disclosure?" → "the Agreement allows
+    disclosure". When the subject cannot be delimited reliably the auxiliary is
+    dropped instead ("Can the receiving party share information?" → "the
+    receiving party share information"), which keeps the content words.
+
+    Args:
+        query: User query string
+
+    Returns:
+        The rewritten statement, or the query unchanged if it is not a Yes/No question
+    """
+    if not is_yes_no_question(query):
+        return query
+
+    words = query.strip().rstrip("?").strip().split()
+    auxiliary, rest = words[0].lower(), words[1:]
+    subject_len = _subject_length(rest)
+
+    if auxiliary in _DO_AUXILIARIES:
+        if auxiliary == "does" and 0 < subject_len < len(rest) and rest[subject_len].islower():
+            rest = rest[:subject_len] + [_third_person(rest[subject_len])] + rest[subject_len + 1:]
+        elif auxiliary == "did" and 0 < subject_len < len(rest):
+            rest = rest[:subject_len] + ["did"] + rest[subject_len:]
+        return " ".join(rest)
+
+    if 0 < subject_len < len(rest):
+        return " ".join(rest[:subject_len] + [auxiliary] + rest[subject_len:])
+    return " ".join(rest)
+
+
 def convert_yes_no_to_statement(
     query: str,
     api_key: str,
@@ -217,6 +375,8 @@ OUTPUT FORMAT (JSON only, no other text):
     "reasoning": "<1 sentence explanation>"
 }}"""
 
+    from openai import OpenAI
+
     # Detect OpenRouter keys and use appropriate base URL
     if api_key.startswith('sk-or-v1-') or api_key.startswith('sk-or-'):
         client = OpenAI(api_key=api_key, base_url='https://openrouter.ai/api/v1')
@@ -271,7 +431,9 @@ OUTPUT FORMAT (JSON only, no other text):
         }
 
     # Call the API
-    response = client.chat.completions.create(**api_params)
+    with span("translate.yes_no_llm", model=model):
+        response = client.chat.completions.create(**api_params)
+    count_llm_usage("translate.yes_no_llm", response)
 
     response_text = response.choices[0].message.content
     if response_text is None:
@@ -297,30 +459,52 @@ OUTPUT FORMAT (JSON only, no other text):
         raise ValueError(f"Failed to parse LLM response: {e}\nResponse: {response_text}")
 
 
-def build_prompt(query: str, retrieved_chunks: List[Dict], logified_structure: Dict = None) -> str:
-    """
-    Build the LLM prompt for translating query to propositional formula.
+# Prompt layouts of build_prompt
+PROMPT_LAYOUTS = ("default", "prefix_stable")
 
-    Args:
-        query: User query string
-        retrieved_chunks: List of relevant proposition chunks
-        logified_structure: Optional logified structure containing constraints
+_TRANSLATOR_INTRO = "You are a logic translator for Natural Language Inference (NLI). Given a hypothesis and a set of atomic propositions from a legal document, translate the hypothesis into a propositional formula."
 
-    Returns:
-        Formatted prompt string
-    """
-    # Format the propositions for the prompt
-    props_text = ""
-    prop_ids = []
-    for chunk in retrieved_chunks:
-        prop_id = chunk['id']
-        prop_ids.append(prop_id)
-        props_text += f"""
-{prop_id}: {chunk['translation']}
-  Evidence: {chunk['evidence']}
-"""
+_EVALUATION_TEXT = """The formula will be evaluated to determine:
+- TRUE: The hypothesis is entailed (follows from the document)
+- FALSE: The hypothesis is contradicted (negation follows from the document)
+- UNCERTAIN: Neither entailment nor contradiction can be determined"""
+
+_EXAMPLES_AND_GUIDELINES = """=== EXAMPLES ===
+
+Example 1 - Simple match:
+Hypothesis: "The receiving party shall keep information confidential"
+If P_6 states "The Receiving Party shall not disclose Confidential Information..."
+Output: {"formula": "P_6", "translation": "The receiving party shall not disclose confidential information", "reasoning": "P_6 directly captures the confidentiality obligation"}
+
+Example 2 - Negation:
+Hypothesis: "The receiving party shall not reverse engineer any information"
+If P_9 states "The Receiving Party shall not alter, modify, disassemble, reverse engineer..."
+Output: {"formula": "P_9", "translation": "The receiving party shall not reverse engineer information", "reasoning": "P_9 prohibits reverse engineering, matching the hypothesis"}
+
+Example 3 - Conjunction:
+Hypothesis: "All confidential information must be marked and returned"
+If P_4 = "Information shall be marked" and P_11 = "Information must be returned"
+Output: {"formula": "P_4 ∧ P_11", "translation": "Information is marked AND returned", "reasoning": "Both conditions must hold for 'all...must be marked and returned'"}
+
+Example 4 - Disjunction:
+Hypothesis: "Some information may be destroyed or returned"
+If P_11 = "must return information" and P_12 = "may destroy information"
+Output: {"formula": "P_11 ∨ P_12", "translation": "Information is returned OR destroyed", "reasoning": "'Some...may' suggests either option satisfies the hypothesis"}
+
+=== TRANSLATION GUIDELINES ===
+
+1. "Shall"/"Must" obligations → Use proposition directly: P_i
+2. "Shall not" prohibitions → The proposition already captures the negation, use: P_i (if P_i states "shall not X")
+3. "May"/"Can" permissions → Use proposition for the permission: P_i
+4. Conditionals "If A then B" → Use implication: P_a ⟹ P_b
+5. "Some"/"Any" (existential) → Use disjunction: P_1 ∨ P_2
+6. "All"/"Every" (universal) → Use conjunction: P_1 ∧ P_2
 
-    # Format constraints if available
+IMPORTANT: Choose the SIMPLEST formula. If one proposition captures the hypothesis, use just that proposition."""
+
+
+def _format_constraints(logified_structure: Optional[Dict]) -> str:
+    """Constraints section of the prompt (empty if there are no constraints)."""
     constraints_text = ""
     if logified_structure:
         hard_constraints = logified_structure.get("hard_constraints", [])
@@ -344,67 +528,195 @@ def build_prompt(query: str, retrieved_chunks: List[Dict], logified_structure: D
                     else:
                         constraints_text += f"- {formula}\n"
 
-    # Build constraints section if available
-    constraints_section = ""
-    if constraints_text:
-        constraints_section = f"""
+    if not constraints_text:
+        return ""
+    return f"""
 ESTABLISHED CONSTRAINTS:
 {constraints_text}
 """
 
+
+_PROP_ID_PATTERN = re.compile(r'P_\d+')
+
+
+def build_constraint_index(logified_structure: Dict) -> Dict[str, List[Tuple[str, int]]]:
+    """
+    Inverted index from propositions to the constraints that mention them.
+
+    Args:
+        logified_structure: Logified structure with hard/soft constraints
+
+    Returns:
+        Dict mapping proposition ID to a list of (constraint list key, position),
+        e.g. {"P_3": [("hard_constraints", 0), ("soft_constraints", 4)]}
+    """
+    index: Dict[str, List[Tuple[str, int]]] = {}
+    for key in ("hard_constraints", "soft_constraints"):
+        for position, constraint in enumerate(logified_structure.get(key, [])):
+            for prop_id in set(_PROP_ID_PATTERN.findall(constraint.get("formula", ""))):
+                index.setdefault(prop_id, []).append((key, position))
+    return index
+
+
+def select_constraints(logified_structure: Dict, prop_ids: List[str], hops: int = 0,
+                       constraint_index: Optional[Dict[str, List[Tuple[str, int]]]] = None) -> Dict:
+    """
+    Constraints in the neighbourhood of a set of propositions.
+
+    Args:
+        logified_structure: Logified structure with hard/soft constraints
+        prop_ids: Propositions of interest (e.g. the retrieved ones)
+        hops: Expansion steps: 0 keeps the constraints mentioning prop_ids, 1 also
+            those mentioning a proposition of a kept constraint, and so on
+        constraint_index: Index from build_constraint_index (default: built now)
+
+    Returns:
+        Dict with the selected "hard_constraints" and "soft_constraints", in
+        document order
+    """
+    if constraint_index is None:
+        constraint_index = build_constraint_index(logified_structure)
+
+    selected = set()
+    frontier = set(prop_ids)
+    seen_props = set(prop_ids)
+    for step in range(hops + 1):
+        new = {ref for prop_id in frontier for ref in constraint_index.get(prop_id, [])} - selected
+        selected |= new
+        if step == hops:
+            break
+        frontier = set()
+        for key, position in new:
+            frontier.update(_PROP_ID_PATTERN.findall(logified_structure[key][position].get("formula", "")))
+        frontier -= seen_props
+        seen_props |= frontier
+
+    return {
+        key: [constraint for position, constraint in enumerate(logified_structure.get(key, []))
+              if (key, position) in selected]
+        for key in ("hard_constraints", "soft_constraints")
+    }
+
+
+def build_prompt(query: str, retrieved_chunks: List[Dict], logified_structure: Dict = None,
+                 layout: str = "default", question: bool = False,
+                 constraint_hops: Optional[int] = None,
+                 constraint_index: Optional[Dict[str, List[Tuple[str, int]]]] = None) -> str:
+    """
+    Build the LLM prompt for translating query to propositional formula.
+
+    Layouts:
+        - "default": retrieved propositions, constraints, hypothesis, then the
+          instructions and examples
+        - "prefix_stable": static instructions and examples, then the document
+          catalogue (all propositions and constraints), then the retrieved
+          propositions and the hypothesis. Everything before the query-specific
+          part is identical for all queries on a document, so providers with
+          prompt caching only bill the first query of a document in full.
+
+    Args:
+        query: User query string
+        retrieved_chunks: List of relevant proposition chunks
+        logified_structure: Optional logified structure containing constraints
+            (and, for "prefix_stable", the proposition catalogue)
+        layout: Prompt layout, one of PROMPT_LAYOUTS (default: "default")
+        question: The query is a Yes/No question; the LLM restates it and returns
+            the statement in a "statement" field (the instruction is part of the
+            task, so the prefix_stable prefix is unchanged)
+        constraint_hops: If set, only the constraints around the retrieved
+            propositions are included (see select_constraints); with
+            "prefix_stable" they move from the document catalogue to the
+            query-specific part (default: None, all constraints)
+        constraint_index: Index from build_constraint_index, built once per document
+
+    Returns:
+        Formatted prompt string
+
+    Raises:
+        ValueError: If the layout is unknown
+    """
+    if layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Unknown prompt layout: {layout}. Available: {', '.join(PROMPT_LAYOUTS)}")
+
+    # Format the propositions for the prompt
+    props_text = ""
+    prop_ids = []
+    for chunk in retrieved_chunks:
+        prop_id = chunk['id']
+        prop_ids.append(prop_id)
+        props_text += f"""
+{prop_id}: {chunk['translation']}
+  Evidence: {chunk['evidence']}
+"""
+
+    # Build constraints section if available
+    if constraint_hops is not None and logified_structure:
+        constraints_section = _format_constraints(
+            select_constraints(logified_structure, prop_ids, constraint_hops, constraint_index)
+        )
+    else:
+        constraints_section = _format_constraints(logified_structure)
+
     # Create available IDs string for the prompt
     available_ids = ", ".join(prop_ids[:10])
     if len(prop_ids) > 10:
         available_ids += f", ... ({len(prop_ids)} total)"
 
-    prompt = f"""You are a logic translator for Natural Language Inference (NLI). Given a hypothesis and a set of atomic propositions from a legal document, translate the hypothesis into a propositional formula.
+    question_note = ""
+    if question:
+        question_note = (
+            "The hypothesis is phrased as a Yes/No question. First restate it as the declarative "
+            "statement it asks about (\"Is Alice a student?\" → \"Alice is a student\"), then translate "
+            "that statement. Add the restated statement to the JSON output as \"statement\".\n"
+        )
 
-=== AVAILABLE PROPOSITIONS ===
-{props_text}
-{constraints_section}
-=== HYPOTHESIS TO CHECK ===
-"{query}"
+    if layout == "prefix_stable":
+        catalogue_text = ""
+        if logified_structure:
+            for prop in logified_structure.get("primitive_props", []):
+                catalogue_text += f"{prop['id']}: {prop.get('translation', '')}\n"
 
-=== TASK ===
-Translate the above hypothesis into a propositional formula using ONLY these proposition IDs: {available_ids}
+        # Pruned constraints depend on the query, so they must not be in the shared prefix
+        if constraint_hops is None:
+            shared_constraints, query_constraints = constraints_section, ""
+        else:
+            shared_constraints, query_constraints = "", constraints_section
 
-The formula will be evaluated to determine:
-- TRUE: The hypothesis is entailed (follows from the document)
-- FALSE: The hypothesis is contradicted (negation follows from the document)
-- UNCERTAIN: Neither entailment nor contradiction can be determined
+        return f"""{_TRANSLATOR_INTRO}
 
-=== EXAMPLES ===
+{_EVALUATION_TEXT}
 
-Example 1 - Simple match:
-Hypothesis: "The receiving party shall keep information confidential"
-If P_6 states "The Receiving Party shall not disclose Confidential Information..."
-Output: {{"formula": "P_6", "translation": "The receiving party shall not disclose confidential information", "reasoning": "P_6 directly captures the confidentiality obligation"}}
+{_EXAMPLES_AND_GUIDELINES}
 
-Example 2 - Negation:
-Hypothesis: "The receiving party shall not reverse engineer any information"
-If P_9 states "The Receiving Party shall not alter, modify, disassemble, reverse engineer..."
-Output: {{"formula": "P_9", "translation": "The receiving party shall not reverse engineer information", "reasoning": "P_9 prohibits reverse engineering, matching the hypothesis"}}
+=== OUTPUT FORMAT ===
+Return ONLY a JSON object (no other text):
+{{"formula": "<formula using the proposition IDs given in the task>", "translation": "<plain English meaning>", "reasoning": "<brief explanation>"}}
 
-Example 3 - Conjunction:
-Hypothesis: "All confidential information must be marked and returned"
-If P_4 = "Information shall be marked" and P_11 = "Information must be returned"
-Output: {{"formula": "P_4 ∧ P_11", "translation": "Information is marked AND returned", "reasoning": "Both conditions must hold for 'all...must be marked and returned'"}}
+=== DOCUMENT PROPOSITIONS ===
+{catalogue_text}{shared_constraints}
+=== MOST RELEVANT PROPOSITIONS FOR THIS HYPOTHESIS ===
+{props_text}{query_constraints}
+=== HYPOTHESIS TO CHECK ===
+"{query}"
 
-Example 4 - Disjunction:
-Hypothesis: "Some information may be destroyed or returned"
-If P_11 = "must return information" and P_12 = "may destroy information"
-Output: {{"formula": "P_11 ∨ P_12", "translation": "Information is returned OR destroyed", "reasoning": "'Some...may' suggests either option satisfies the hypothesis"}}
+=== TASK ===
+Translate the above hypothesis into a propositional formula using ONLY these proposition IDs: {available_ids}
+{question_note}"""
 
-=== TRANSLATION GUIDELINES ===
+    prompt = f"""{_TRANSLATOR_INTRO}
 
-1. "Shall"/"Must" obligations → Use proposition directly: P_i
-2. "Shall not" prohibitions → The proposition already captures the negation, use: P_i (if P_i states "shall not X")
-3. "May"/"Can" permissions → Use proposition for the permission: P_i
-4. Conditionals "If A then B" → Use implication: P_a ⟹ P_b
-5. "Some"/"Any" (existential) → Use disjunction: P_1 ∨ P_2
-6. "All"/"Every" (universal) → Use conjunction: P_1 ∧ P_2
+=== AVAILABLE PROPOSITIONS ===
+{props_text}
+{constraints_section}
+=== HYPOTHESIS TO CHECK ===
+"{query}"
+
+=== TASK ===
+Translate the above hypothesis into a propositional formula using ONLY these proposition IDs: {available_ids}
+{question_note}
+{_EVALUATION_TEXT}
 
-IMPORTANT: Choose the SIMPLEST formula. If one proposition captures the hypothesis, use just that proposition.
+{_EXAMPLES_AND_GUIDELINES}
 
 === OUTPUT FORMAT ===
 Return ONLY a JSON object (no other text):
@@ -448,6 +760,92 @@ def extract_formula_from_text(response_text: str, available_prop_ids: List[str]
     return None
 
 
+def validate_formula(formula: Optional[str], prop_ids: List[str]) -> Optional[str]:
+    """
+    Check that a formula parses over the document's propositions.
+
+    Args:
+        formula: Formula returned by the LLM
+        prop_ids: Proposition IDs of the document
+
+    Returns:
+        None if the formula is valid, otherwise the reason it is not
+    """
+    if not formula or not formula.strip():
+        return "empty formula"
+    try:
+        FormulaParser({prop_id: i for i, prop_id in enumerate(prop_ids, start=1)}).parse(formula)
+    except Exception as e:
+        return f"formula '{formula}' is invalid: {e}"
+    return None
+
+
+def translation_response_format(with_statement: bool = False) -> Dict[str, Any]:
+    """
+    JSON schema response_format (structured output) of a single translation.
+
+    Args:
+        with_statement: Also require the restated "statement" (Yes/No questions,
+            see build_prompt(question=True))
+
+    Returns:
+        response_format value for the chat completions API
+    """
+    fields = ["formula", "translation", "reasoning"] + (["statement"] if with_statement else [])
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "hypothesis_translation",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {field: {"type": "string"} for field in fields},
+                "required": fields,
+                "additionalProperties": False
+            }
+        }
+    }
+
+
+def _parse_translation_response(response_text: str, allow_regex: bool = True):
+    """
+    Parse a translation response: JSON, then JSON inside extra text, then (if
+    allow_regex) a formula found by regex.
+
+    Returns:
+        Tuple of (result dict or None, error message)
+    """
+    try:
+        result = json.loads(response_text)
+        # Validate that we have a formula field
+        if isinstance(result, dict) and result.get('formula'):
+            return result, None
+        return None, "Response missing 'formula' field"
+    except json.JSONDecodeError as e:
+        # Try to extract JSON from response (LLM may have added extra text)
+        if "{" in response_text and "}" in response_text:
+            json_start = response_text.find("{")
+            json_end = response_text.rfind("}") + 1
+            json_text = response_text[json_start:json_end]
+            try:
+                result = json.loads(json_text)
+                if isinstance(result, dict) and result.get('formula'):
+                    return result, None
+            except json.JSONDecodeError:
+                pass
+
+        # Last resort: try to extract formula from raw text
+        extracted_formula = extract_formula_from_text(response_text) if allow_regex else None
+        if extracted_formula:
+            return {
+                "formula": extracted_formula,
+                "translation": "(extracted from non-JSON response)",
+                "reasoning": "(formula extracted via regex fallback)"
+            }, None
+
+        return None, f"Failed to parse LLM response as JSON: {e}"
+
+
 def call_llm(
     prompt: str,
     api_key: str,
@@ -456,7 +854,9 @@ def call_llm(
     reasoning_effort: str = "medium",
     max_tokens: int = 64000,
     max_retries: int = 2,
-    retry_delay: float = 1.0
+    retry_delay: float = 1.0,
+    response_format: Optional[Dict[str, Any]] = None,
+    valid_prop_ids: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Call LLM to translate query to propositional formula.
@@ -464,6 +864,13 @@ def call_llm(
     Uses same API pattern as logic_converter.py for consistency.
     Includes retry logic for transient failures.
 
+    With valid_prop_ids, the formula is checked locally (it must parse and use
+    only those propositions). An invalid formula is not retried blindly: the
+    parser error is sent back as a short follow-up message in the same
+    conversation and the model corrects its answer. With response_format or
+    valid_prop_ids, a response that is not the expected JSON object is
+    repaired the same way instead of guessing a formula by regex.
+
     Args:
         prompt: The formatted prompt
         api_key: OpenRouter API key
@@ -471,15 +878,24 @@ def call_llm(
         temperature: Sampling temperature (default: 0.1)
         reasoning_effort: For reasoning models (default: medium)
         max_tokens: Max response tokens (default: 64000)
-        max_retries: Number of retries on failure (default: 2)
+        max_retries: Number of retries or repairs on failure (default: 2)
         retry_delay: Seconds to wait between retries (default: 1.0)
+        response_format: Structured output format, e.g. translation_response_format()
+            (default: None, free text parsed as JSON)
+        valid_prop_ids: Proposition IDs of the document, to validate the formula
+            (default: None, no validation)
 
     Returns:
-        Parsed JSON response dict with at minimum a 'formula' field
+        Parsed JSON response dict with at minimum a 'formula' field, plus 'usage'
+        (prompt / completion / cached tokens, summed over all calls made) and
+        'attempts'. If the formula is still invalid after all repairs, the last
+        answer is returned with a 'validation_error' field.
 
     Raises:
         ValueError: If LLM response cannot be parsed after all retries
     """
+    from openai import OpenAI
+
     # Detect OpenRouter keys and use appropriate base URL
     if api_key.startswith('sk-or-v1-') or api_key.startswith('sk-or-'):
         client = OpenAI(api_key=api_key, base_url='https://openrouter.ai/api/v1')
@@ -533,13 +949,24 @@ def call_llm(
             "max_tokens": max_tokens
         }
 
+    if response_format is not None:
+        api_params["response_format"] = response_format
+
     last_error = None
     last_response_text = ""
+    invalid_result = None
+    total_usage: Dict[str, int] = {}
+    strict = response_format is not None or valid_prop_ids is not None
 
     for attempt in range(max_retries + 1):
+        repair_message = None
         try:
             # Call the API
-            response = client.chat.completions.create(**api_params)
+            with span("translate.llm", model=model, attempt=attempt):
+                response = client.chat.completions.create(**api_params)
+            usage = count_llm_usage("translate.llm", response)
+            for field, value in usage.items():
+                total_usage[field] = total_usage.get(field, 0) + value
 
             response_text = response.choices[0].message.content
             if response_text is None:
@@ -548,52 +975,56 @@ def call_llm(
             response_text = response_text.strip()
             last_response_text = response_text
 
-            # Parse JSON response
-            try:
-                result = json.loads(response_text)
-                # Validate that we have a formula field
-                if 'formula' in result and result['formula']:
+            result, parse_error = _parse_translation_response(response_text, allow_regex=not strict)
+            if result is None:
+                last_error = ValueError(parse_error)
+                if strict:
+                    repair_message = (
+                        f"Your answer could not be parsed: {parse_error}. "
+                        "Reply with the JSON object only, including the 'formula' field."
+                    )
+                    count("translate.repairs")
+            else:
+                result['usage'] = total_usage
+                result['attempts'] = attempt + 1
+                validation_error = validate_formula(result['formula'], valid_prop_ids) if valid_prop_ids else None
+                if validation_error is None:
                     return result
-                else:
-                    raise ValueError("Response missing 'formula' field")
-            except json.JSONDecodeError as e:
-                # Try to extract JSON from response (LLM may have added extra text)
-                if "{" in response_text and "}" in response_text:
-                    json_start = response_text.find("{")
-                    json_end = response_text.rfind("}") + 1
-                    json_text = response_text[json_start:json_end]
-                    try:
-                        result = json.loads(json_text)
-                        if 'formula' in result and result['formula']:
-                            return result
-                    except json.JSONDecodeError:
-                        pass
-
-                # Last resort: try to extract formula from raw text
-                extracted_formula = extract_formula_from_text(response_text)
-                if extracted_formula:
-                    return {
-                        "formula": extracted_formula,
-                        "translation": "(extracted from non-JSON response)",
-                        "reasoning": "(formula extracted via regex fallback)"
-                    }
 
-                last_error = ValueError(f"Failed to parse LLM response as JSON: {e}")
+                result['validation_error'] = validation_error
+                invalid_result = result
+                last_error = ValueError(validation_error)
+                repair_message = (
+                    f"Your formula is invalid: {validation_error}. Use only proposition IDs from the prompt and "
+                    "the operators ∧ ∨ ¬ ⟹ ⟺ with balanced parentheses. Reply with the corrected JSON object only."
+                )
+                count("translate.repairs")
 
         except Exception as e:
             last_error = e
 
-        # Retry with delay if not the last attempt
         if attempt < max_retries:
+            if repair_message is not None:
+                # Repair in the same conversation instead of starting over
+                api_params["messages"] = api_params["messages"] + [
+                    {"role": "assistant", "content": last_response_text},
+                    {"role": "user", "content": repair_message}
+                ]
+                continue
+            # Retry with delay if not the last attempt
             time_module.sleep(retry_delay)
             # Increase temperature slightly on retry to get different response
             if not is_reasoning_model and "temperature" in api_params:
                 api_params["temperature"] = min(0.5, api_params["temperature"] + 0.1)
 
+    if invalid_result is not None:
+        return invalid_result
+
     # All retries exhausted
     raise ValueError(f"Failed to get valid formula after {max_retries + 1} attempts. Last error: {last_error}\nLast response: {last_response_text[:500]}")
 
 
+@traced("translate")
 def translate_query(
     query: str,
     json_path: str,
@@ -604,13 +1035,21 @@ def translate_query(
     max_tokens: int = 64000,
     k: int = 20,
     sbert_model_name: str = "all-MiniLM-L6-v2",
-    verbose: bool = True
+    verbose: bool = True,
+    prompt_layout: str = "default",
+    yes_no_mode: str = "fold",
+    retrieval_index: str = "exact",
+    retrieval_mode: str = "dense",
+    constraint_hops: Optional[int] = None,
+    structured_output: bool = False,
+    memo: Optional[TranslationMemo] = None
 ) -> Dict[str, Any]:
     """
     Main function: Translate a natural language query to a propositional formula.
 
-    Handles Yes/No questions by first converting them to statements, then proceeds
-    with normal translation.
+    Yes/No questions are restated as declarative statements: by default in the
+    translation call itself (yes_no_mode="fold"), with a rule-based rewrite for
+    retrieval; with yes_no_mode="llm" by a separate LLM call before retrieval.
 
     Args:
         query: User query in natural language
@@ -623,14 +1062,76 @@ def translate_query(
         k: Number of propositions to retrieve (default: 20)
         sbert_model_name: SBERT model for retrieval (default: all-MiniLM-L6-v2)
         verbose: Print progress messages (default: True)
+        prompt_layout: Prompt layout (see build_prompt); "prefix_stable" keeps the
+            per-document part of the prompt identical across queries so that it is
+            served from the provider's prompt cache (default: "default")
+        yes_no_mode: How Yes/No questions are restated, one of YES_NO_MODES
+            (default: "fold")
+        retrieval_index: Proposition index, one of baseline_rag.vector_index.INDEX_KINDS;
+            "hnsw" and "ivf" are approximate indexes for very large KBs, built once
+            and stored next to the JSON file (default: "exact")
+        retrieval_mode: One of RETRIEVAL_MODES; "hybrid" fuses SBERT with a BM25
+            index over the propositions, which keeps rare legal terms in the top k
+            (default: "dense")
+        constraint_hops: Only put the constraints around the retrieved
+            propositions in the prompt: 0 for those mentioning a retrieved
+            proposition, 1 to expand by one hop (default: None, all constraints)
+        structured_output: Request a JSON schema response (response_format) instead
+            of parsing free text; the provider and model must support it
+            (default: False)
+        memo: Persistent translation memo (see translation_memo.py); a hit skips
+            the Yes/No conversion, retrieval and LLM calls, and valid new
+            translations are stored (default: None)
 
     Returns:
-        Dict with formula, translation, query, explanation, original_query (if converted)
+        Dict with formula, translation, query, explanation, usage (LLM tokens,
+        including cached_tokens), original_query (if converted), memo_hit (if
+        served from the memo)
+
+    Raises:
+        ValueError: If yes_no_mode, retrieval_index or retrieval_mode is unknown
     """
+    if yes_no_mode not in YES_NO_MODES:
+        raise ValueError(f"Unknown yes_no_mode: {yes_no_mode}. Available: {', '.join(YES_NO_MODES)}")
+    if retrieval_index not in INDEX_KINDS:
+        raise ValueError(f"Unknown retrieval_index: {retrieval_index}. Available: {', '.join(INDEX_KINDS)}")
+    if retrieval_mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval_mode: {retrieval_mode}. Available: {', '.join(RETRIEVAL_MODES)}")
+
+    # Load JSON file
+    if verbose:
+        print(f"\nLoading logified JSON from: {json_path}")
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        logified_structure = json.load(f)
+
+    # Translations of this (document, query, settings) from earlier runs
+    if memo is not None:
+        memo_structure = structure_hash(logified_structure)
+        memo_key = memo.make_key(memo_structure, query, model, k, translation="single",
+                                 prompt_layout=prompt_layout, yes_no_mode=yes_no_mode,
+                                 structured_output=structured_output, sbert_model=sbert_model_name,
+                                 retrieval_mode=retrieval_mode, retrieval_index=retrieval_index,
+                                 constraint_hops=constraint_hops)
+        cached = memo.get(memo_key)
+        if cached is not None:
+            count("translate.memo_hits")
+            if verbose:
+                print(f"Translation memo hit: {cached['formula']}")
+            return cached
+        count("translate.memo_misses")
+
     original_query = query
+    is_question = is_yes_no_question(query)
+    retrieval_query = query
 
     # Step 1: Check if this is a Yes/No question and convert to statement
-    if is_yes_no_question(query):
+    if is_question and yes_no_mode == "fold":
+        retrieval_query = rewrite_question_as_statement(query)
+        if verbose:
+            print(f"Detected Yes/No question: '{query}'")
+            print(f"  Retrieving with: '{retrieval_query}' (restated in the translation call)")
+    elif is_question:
         if verbose:
             print(f"Detected Yes/No question: '{query}'")
             print("Converting to declarative statement...")
@@ -652,19 +1153,14 @@ def translate_query(
                 print(f"  Warning: Could not convert question to statement: {e}")
                 print("  Proceeding with original query...")
             query = original_query
-
-    # Load JSON file
-    if verbose:
-        print(f"\nLoading logified JSON from: {json_path}")
-
-    with open(json_path, 'r', encoding='utf-8') as f:
-        logified_structure = json.load(f)
+        retrieval_query = query
 
     # Extract propositions as chunks
     if verbose:
         print("Extracting primitive propositions...")
 
     chunks = extract_proposition_chunks(logified_structure)
+    constraint_index = build_constraint_index(logified_structure) if constraint_hops is not None else None
 
     if verbose:
         print(f"  Found {len(chunks)} propositions")
@@ -678,28 +1174,41 @@ def translate_query(
     if verbose:
         print("Loading SBERT model for retrieval...")
 
-    sbert_model = load_sbert_model(sbert_model_name)
+    with span("translate.sbert_load"):
+        sbert_model = load_sbert_model(sbert_model_name)
 
     # Retrieve top-K propositions
     if verbose:
         print(f"Retrieving top-{actual_k} relevant propositions...")
 
-    retrieved = retrieve_top_k_propositions(query, chunks, sbert_model, k=actual_k)
+    with span("translate.retrieve", k=actual_k, index=retrieval_index, mode=retrieval_mode):
+        chunk_embeddings = load_artifact_embeddings(json_path, sbert_model_name, len(chunks))
+        if chunk_embeddings is not None and verbose:
+            print("  Using proposition embeddings from the compiled KB artifact")
+
+        index = _proposition_index(json_path, chunks, sbert_model, sbert_model_name, chunk_embeddings,
+                                   retrieval_index)
+        bm25_index = _proposition_bm25(json_path, chunks) if retrieval_mode == "hybrid" else None
+        retrieved = retrieve_top_k_propositions(retrieval_query, chunks, sbert_model, k=actual_k,
+                                                chunk_embeddings=chunk_embeddings, index=index,
+                                                bm25_index=bm25_index)
 
     if verbose:
         print(f"  Top 5 retrieved propositions:")
         for i, chunk in enumerate(retrieved[:5]):
-            print(f"    {i+1}. {chunk['id']} (sim={chunk['similarity']:.3f}): {chunk['translation'][:60]}...")
+            print(f"    {i+1}. {chunk['id']} (score={chunk['similarity']:.3f}): {chunk['translation'][:60]}...")
 
     # Validate we have propositions to work with
     if not retrieved:
         raise ValueError("No propositions retrieved - cannot translate query without available propositions")
 
-    # Get valid proposition IDs for validation
-    valid_prop_ids = {chunk['id'] for chunk in chunks}
+    # Valid proposition IDs: formulas are checked locally and repaired by the LLM
+    valid_prop_ids = [chunk['id'] for chunk in chunks]
 
     # Build prompt
-    prompt = build_prompt(query, retrieved, logified_structure)
+    fold_question = is_question and yes_no_mode == "fold"
+    prompt = build_prompt(query, retrieved, logified_structure, layout=prompt_layout, question=fold_question,
+                          constraint_hops=constraint_hops, constraint_index=constraint_index)
 
     # Call LLM
     if verbose:
@@ -711,24 +1220,28 @@ def translate_query(
         model=model,
         temperature=temperature,
         reasoning_effort=reasoning_effort,
-        max_tokens=max_tokens
+        max_tokens=max_tokens,
+        response_format=translation_response_format(fold_question) if structured_output else None,
+        valid_prop_ids=valid_prop_ids
     )
 
-    # Validate the formula contains valid proposition IDs
-    formula = result.get('formula', '')
-    if formula:
-        # Extract P_N patterns from formula
-        formula_props = re.findall(r'P_\d+', formula)
-        invalid_props = [p for p in formula_props if p not in valid_prop_ids]
-        if invalid_props and verbose:
-            print(f"  Warning: Formula contains proposition IDs not in document: {invalid_props}")
-            # Don't fail, just warn - the LLM might have hallucinated but formula may still be useful
+    if result.get('validation_error') and verbose:
+        # Don't fail, just warn - the solver reports the formula's error if it is used
+        print(f"  Warning: Formula still invalid after repairs: {result['validation_error']}")
+
+    # The folded call returns the restated question
+    if fold_question:
+        statement = result.pop('statement', None)
+        query = statement.strip() if isinstance(statement, str) and statement.strip() else retrieval_query
 
     # Add original query if it was converted
     if original_query != query:
         result['original_query'] = original_query
         result['query'] = query  # Update to show the converted statement
 
+    if memo is not None and result.get('formula') and not result.get('validation_error'):
+        memo.put(memo_key, result, memo_structure, source=json_path)
+
     if verbose:
         print("\nResult:")
         if 'original_query' in result:
@@ -737,10 +1250,395 @@ def translate_query(
         print(f"  Formula: {result.get('formula', 'N/A')}")
         print(f"  Translation: {result.get('translation', 'N/A')}")
         print(f"  Explanation: {result.get('explanation', result.get('reasoning', 'N/A'))}")
+        usage = result.get('usage')
+        if usage:
+            print(f"  LLM tokens: {usage['prompt_tokens']} prompt ({usage['cached_tokens']} cached), "
+                  f"{usage['completion_tokens']} completion")
 
     return result
 
 
+# JSON schema of the batch translation response (structured output)
+BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "hypothesis_translations",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "translations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "integer"},
+                            "statement": {"type": "string"},
+                            "formula": {"type": "string"},
+                            "translation": {"type": "string"},
+                            "reasoning": {"type": "string"}
+                        },
+                        "required": ["id", "statement", "formula", "translation", "reasoning"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["translations"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+def split_usage(usage: Dict[str, int], parts: int) -> List[Dict[str, int]]:
+    """
+    Split the token usage of one LLM call across the queries it translated.
+
+    Args:
+        usage: Usage dict (see llm_usage)
+        parts: Number of queries
+
+    Returns:
+        parts usage dicts summing to usage (the remainder goes to the first ones)
+    """
+    shares = [{} for _ in range(parts)]
+    for field, value in usage.items():
+        base, remainder = divmod(value, parts)
+        for position, share in enumerate(shares):
+            share[field] = base + (1 if position < remainder else 0)
+    return shares
+
+
+def build_batch_prompt(queries: Dict[int, str], retrieved: Dict[int, List[Dict]], logified_structure: Dict,
+                       previous_errors: Optional[Dict[int, str]] = None,
+                       constraint_hops: Optional[int] = None,
+                       constraint_index: Optional[Dict[str, List[Tuple[str, int]]]] = None,
+                       layout: str = "prefix_stable") -> str:
+    """
+    Build the prompt translating several hypotheses about one document at once.
+
+    Layouts (see build_prompt):
+        - "prefix_stable": instructions and the document catalogue come first,
+          then the numbered hypotheses with their most relevant propositions
+        - "default": the document propositions and the hypotheses come first,
+          then the instructions and the output format
+
+    Args:
+        queries: Hypotheses by ID
+        retrieved: Retrieved proposition chunks by hypothesis ID
+        logified_structure: Logified structure (proposition catalogue and constraints)
+        previous_errors: Why the previous formula of a hypothesis was rejected (retries)
+        constraint_hops: If set, only the constraints around the propositions
+            retrieved for any hypothesis are included (see select_constraints)
+        constraint_index: Index from build_constraint_index, built once per document
+        layout: Prompt layout, one of PROMPT_LAYOUTS (default: "prefix_stable")
+
+    Returns:
+        Formatted prompt string
+
+    Raises:
+        ValueError: If the layout is unknown
+    """
+    if layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Unknown prompt layout: {layout}. Available: {', '.join(PROMPT_LAYOUTS)}")
+
+    constraints = logified_structure
+    if constraint_hops is not None:
+        retrieved_ids = list(dict.fromkeys(chunk['id'] for chunks in retrieved.values() for chunk in chunks))
+        constraints = select_constraints(logified_structure, retrieved_ids, constraint_hops, constraint_index)
+
+    catalogue_text = ""
+    for prop in logified_structure.get("primitive_props", []):
+        catalogue_text += f"{prop['id']}: {prop.get('translation', '')}\n"
+
+    # Evidence of every retrieved proposition, listed once
+    evidence = {}
+    for chunks in retrieved.values():
+        for chunk in chunks:
+            if chunk.get('evidence'):
+                evidence.setdefault(chunk['id'], chunk['evidence'])
+    evidence_text = "".join(f"{prop_id}: {text}\n" for prop_id, text in evidence.items())
+
+    hypotheses_text = ""
+    for query_id, query in queries.items():
+        relevant = ", ".join(chunk['id'] for chunk in retrieved[query_id])
+        hypotheses_text += f"""
+[{query_id}] "{query}"
+  Most relevant propositions: {relevant}
+"""
+        if previous_errors and query_id in previous_errors:
+            hypotheses_text += f"  Previous answer was rejected: {previous_errors[query_id]}\n"
+
+    instructions = f"""{_EVALUATION_TEXT}
+
+{_EXAMPLES_AND_GUIDELINES}
+
+If a hypothesis is phrased as a Yes/No question ("Can...", "Is...", "Does..."), first restate it as the declarative statement it asks about ("Is Alice a student?" → "Alice is a student") and translate that statement.
+
+=== OUTPUT FORMAT ===
+Return ONLY a JSON object (no other text) with one entry per hypothesis, using the hypothesis numbers as ids:
+{{"translations": [{{"id": <hypothesis number>, "statement": "<the hypothesis as a declarative statement>", "formula": "<formula using the document's proposition IDs>", "translation": "<plain English meaning>", "reasoning": "<brief explanation>"}}]}}"""
+
+    document = f"""=== DOCUMENT PROPOSITIONS ===
+{catalogue_text}{_format_constraints(constraints)}
+=== EVIDENCE FOR THE RELEVANT PROPOSITIONS ===
+{evidence_text}
+=== HYPOTHESES TO TRANSLATE ===
+{hypotheses_text}"""
+
+    intro = f"{_TRANSLATOR_INTRO} Several hypotheses are translated at once; translate each one independently."
+    if layout == "prefix_stable":
+        return f"{intro}\n\n{instructions}\n\n{document}"
+    return f"{intro}\n\n{document}\n{instructions}\n"
+
+
+def _parse_batch_response(response_text: str) -> Dict[int, Dict[str, Any]]:
+    """Translations of a batch response by hypothesis ID (tolerates extra text around the JSON)."""
+    try:
+        data = json.loads(response_text)
+    except json.JSONDecodeError:
+        if "{" not in response_text or "}" not in response_text:
+            raise ValueError("Batch response is not JSON")
+        data = json.loads(response_text[response_text.find("{"):response_text.rfind("}") + 1])
+
+    items = data.get("translations", []) if isinstance(data, dict) else data
+    translations = {}
+    for item in items:
+        if isinstance(item, dict) and "id" in item:
+            try:
+                translations[int(item["id"])] = item
+            except (TypeError, ValueError):
+                continue
+    return translations
+
+
+def translate_queries_batch(
+    queries: List[str],
+    json_path: str,
+    api_key: str,
+    model: str = "gpt-5.2",
+    temperature: float = 0.1,
+    reasoning_effort: str = "medium",
+    max_tokens: int = 64000,
+    k: int = 20,
+    sbert_model_name: str = "all-MiniLM-L6-v2",
+    verbose: bool = True,
+    max_retries: int = 2,
+    retry_delay: float = 1.0,
+    retrieval_index: str = "exact",
+    retrieval_mode: str = "dense",
+    constraint_hops: Optional[int] = None,
+    memo: Optional[TranslationMemo] = None,
+    prompt_layout: str = "prefix_stable",
+    structured_output: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Translate several queries about one document in a single LLM call.
+
+    The document catalogue and constraints are sent once instead of once per
+    query, and Yes/No questions are restated in the same call instead of a
+    separate one. Each returned formula is validated (it must parse over the
+    document's propositions); only the queries that failed are sent again.
+
+    Args:
+        queries: User queries in natural language
+        json_path: Path to logified JSON file with primitive_props
+        api_key: OpenRouter API key
+        model: LLM model (default: gpt-5.2)
+        temperature: Sampling temperature (default: 0.1)
+        reasoning_effort: For reasoning models (default: medium)
+        max_tokens: Max response tokens (default: 64000)
+        k: Number of propositions to retrieve per query (default: 20)
+        sbert_model_name: SBERT model for retrieval (default: all-MiniLM-L6-v2)
+        verbose: Print progress messages (default: True)
+        max_retries: Retries for queries without a valid formula (default: 2)
+        retry_delay: Seconds to wait between retries (default: 1.0)
+        retrieval_index: Proposition index (see translate_query) (default: "exact")
+        retrieval_mode: "dense" or "hybrid" (see translate_query) (default: "dense")
+        constraint_hops: Constraint neighbourhood to include (see translate_query)
+            (default: None, all constraints)
+        memo: Persistent translation memo; only the queries it misses are sent
+            (default: None)
+        prompt_layout: Batch prompt layout (see build_batch_prompt)
+            (default: "prefix_stable")
+        structured_output: Request BATCH_RESPONSE_FORMAT (default: True)
+
+    Returns:
+        One dict per query, in order, as returned by translate_query (formula,
+        translation, reasoning, query, original_query if restated, usage);
+        queries that still have no valid formula get formula None and an
+        'error'. The LLM usage of the batch is split evenly across the queries
+        that were sent (memo hits have no usage)
+
+    Raises:
+        ValueError: If the prompt layout is unknown
+    """
+    from openai import OpenAI
+
+    if prompt_layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Unknown prompt layout: {prompt_layout}. Available: {', '.join(PROMPT_LAYOUTS)}")
+    if not queries:
+        return []
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        logified_structure = json.load(f)
+
+    chunks = extract_proposition_chunks(logified_structure)
+    constraint_index = build_constraint_index(logified_structure) if constraint_hops is not None else None
+    actual_k = min(k, len(chunks))
+    prop_ids = [chunk['id'] for chunk in chunks]
+
+    results: Dict[int, Dict[str, Any]] = {}
+    errors: Dict[int, str] = {}
+    pending = list(range(1, len(queries) + 1))
+
+    # Translations from earlier runs
+    if memo is not None:
+        memo_structure = structure_hash(logified_structure)
+        memo_keys = {
+            i: memo.make_key(memo_structure, queries[i - 1], model, k, translation="batch",
+                             prompt_layout=prompt_layout, structured_output=structured_output,
+                             sbert_model=sbert_model_name, retrieval_mode=retrieval_mode,
+                             retrieval_index=retrieval_index, constraint_hops=constraint_hops)
+            for i in pending
+        }
+        for i in pending:
+            cached = memo.get(memo_keys[i])
+            if cached is not None:
+                results[i] = cached
+        count("translate.memo_hits", len(results))
+        count("translate.memo_misses", len(pending) - len(results))
+        pending = [i for i in pending if i not in results]
+        if verbose and results:
+            print(f"  {len(results)}/{len(queries)} queries served from the translation memo")
+        if not pending:
+            return [results[i] for i in range(1, len(queries) + 1)]
+
+    # Retrieval for all queries with one SBERT model and one set of embeddings
+    with span("translate.sbert_load"):
+        sbert_model = load_sbert_model(sbert_model_name)
+    with span("translate.retrieve", k=actual_k, queries=len(pending)):
+        chunk_embeddings = load_artifact_embeddings(json_path, sbert_model_name, len(chunks))
+        if chunk_embeddings is None:
+            chunk_embeddings = encode_chunks(chunks, sbert_model)
+        index = _proposition_index(json_path, chunks, sbert_model, sbert_model_name, chunk_embeddings,
+                                   retrieval_index)
+        bm25_index = _proposition_bm25(json_path, chunks) if retrieval_mode == "hybrid" else None
+        retrieved = {
+            i: retrieve_top_k_propositions(rewrite_question_as_statement(queries[i - 1]), chunks, sbert_model,
+                                           k=actual_k, chunk_embeddings=chunk_embeddings, index=index,
+                                           bm25_index=bm25_index)
+            for i in pending
+        }
+
+    # Same API conventions as call_llm
+    is_openrouter = api_key.startswith('sk-or-v1-') or api_key.startswith('sk-or-')
+    if is_openrouter:
+        client = OpenAI(api_key=api_key, base_url='https://openrouter.ai/api/v1')
+        if not model.startswith('openai/'):
+            model = f'openai/{model}'
+    else:
+        client = OpenAI(api_key=api_key)
+    base_model = model.replace("openai/", "")
+    is_reasoning_model = base_model.startswith("gpt-5") or base_model.startswith("o1") or base_model.startswith("o3")
+
+    sent = list(pending)
+    total_usage: Dict[str, int] = {}
+    for attempt in range(max_retries + 1):
+        prompt = build_batch_prompt(
+            {i: queries[i - 1] for i in pending}, retrieved, logified_structure,
+            previous_errors={i: errors[i] for i in pending if i in errors},
+            constraint_hops=constraint_hops, constraint_index=constraint_index,
+            layout=prompt_layout
+        )
+        messages = [{"role": "user", "content": prompt}]
+        if is_reasoning_model:
+            api_params = {"model": model, "messages": messages}
+            if is_openrouter:
+                api_params["max_tokens"] = max_tokens
+                api_params["extra_body"] = {"reasoning": {"effort": reasoning_effort, "enabled": True}}
+            else:
+                api_params["reasoning_effort"] = reasoning_effort
+                api_params["max_completion_tokens"] = max_tokens
+        else:
+            api_params = {"model": model, "messages": messages, "temperature": temperature,
+                          "max_tokens": max_tokens}
+        if structured_output:
+            api_params["response_format"] = BATCH_RESPONSE_FORMAT
+
+        if verbose:
+            print(f"Translating {len(pending)} queries in one call ({model}, attempt {attempt + 1})...")
+
+        try:
+            with span("translate.batch_llm", model=model, queries=len(pending), attempt=attempt):
+                response = client.chat.completions.create(**api_params)
+            usage = count_llm_usage("translate.batch_llm", response)
+            for field, value in usage.items():
+                total_usage[field] = total_usage.get(field, 0) + value
+            response_text = response.choices[0].message.content
+            if response_text is None:
+                raise ValueError("LLM returned empty response")
+            translations = _parse_batch_response(response_text.strip())
+        except Exception as e:
+            translations = {}
+            for i in pending:
+                errors[i] = f"Request failed: {e}"
+
+        # Validate each formula on its own
+        still_pending = []
+        for i in pending:
+            item = translations.get(i)
+            if item is None:
+                if translations or i not in errors:
+                    errors[i] = "No translation returned for this hypothesis"
+                still_pending.append(i)
+                continue
+            formula = str(item.get('formula') or '').strip()
+            error = validate_formula(formula, prop_ids)
+            if error:
+                errors[i] = error
+                still_pending.append(i)
+                continue
+
+            result = {
+                "formula": formula,
+                "translation": item.get('translation', ''),
+                "reasoning": item.get('reasoning', ''),
+                "query": queries[i - 1]
+            }
+            statement = (item.get('statement') or '').strip()
+            if statement and statement != queries[i - 1] and is_yes_no_question(queries[i - 1]):
+                result['original_query'] = queries[i - 1]
+                result['query'] = statement
+            results[i] = result
+            errors.pop(i, None)
+            if memo is not None:
+                memo.put(memo_keys[i], result, memo_structure, source=json_path)
+
+        pending = still_pending
+        if not pending:
+            break
+        if verbose:
+            print(f"  {len(pending)} queries without a valid formula")
+        if attempt < max_retries:
+            time_module.sleep(retry_delay)
+
+    output = []
+    for i, query in enumerate(queries, start=1):
+        if i in results:
+            output.append(results[i])
+        else:
+            output.append({"formula": None, "query": query, "error": errors.get(i, "Translation failed")})
+    if total_usage:
+        for i, usage in zip(sent, split_usage(total_usage, len(sent))):
+            output[i - 1]['usage'] = usage
+
+    if verbose:
+        valid = sum(1 for result in output if result['formula'])
+        print(f"  {valid}/{len(queries)} queries translated")
+    return output
+
+
 def main():
     """Command-line interface for query translation."""
     parser = argparse.ArgumentParser(
@@ -789,6 +1687,47 @@ def main():
         default=20,
         help="Number of propositions to retrieve (default: 20)"
     )
+    parser.add_argument(
+        "--prompt-layout",
+        default="default",
+        choices=list(PROMPT_LAYOUTS),
+        help="Prompt layout; prefix_stable puts the per-document part first for prompt caching (default: default)"
+    )
+    parser.add_argument(
+        "--yes-no-mode",
+        default="fold",
+        choices=list(YES_NO_MODES),
+        help="Restate Yes/No questions in the translation call (fold) or in a separate LLM call (llm) (default: fold)"
+    )
+    parser.add_argument(
+        "--retrieval-index",
+        default="exact",
+        choices=list(INDEX_KINDS),
+        help="Proposition index; hnsw/ivf are approximate, for very large KBs (default: exact)"
+    )
+    parser.add_argument(
+        "--retrieval-mode",
+        default="dense",
+        choices=list(RETRIEVAL_MODES),
+        help="Proposition retrieval; hybrid fuses SBERT with BM25 (default: dense)"
+    )
+    parser.add_argument(
+        "--constraint-hops",
+        type=int,
+        default=None,
+        help="Only include constraints touching the retrieved propositions, expanded by this many hops "
+             "(default: all constraints)"
+    )
+    parser.add_argument(
+        "--structured-output",
+        action="store_true",
+        help="Request a JSON schema response instead of parsing free text"
+    )
+    parser.add_argument(
+        "--memo",
+        default=None,
+        help="Translation memo file (JSON lines); reuses and stores translations (default: none)"
+    )
     parser.add_argument(
         "--output",
         default=None,
@@ -817,7 +1756,14 @@ def main():
             reasoning_effort=args.reasoning_effort,
             max_tokens=args.max_tokens,
             k=args.k,
-            verbose=not args.quiet
+            verbose=not args.quiet,
+            prompt_layout=args.prompt_layout,
+            yes_no_mode=args.yes_no_mode,
+            retrieval_index=args.retrieval_index,
+            retrieval_mode=args.retrieval_mode,
+            constraint_hops=args.constraint_hops,
+            structured_output=args.structured_output,
+            memo=TranslationMemo(args.memo) if args.memo else None
         )
 
         # Output result
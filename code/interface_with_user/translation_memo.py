@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+translation_memo.py - Persistent memo of query translations
+
+ContractNLI asks the same 17 hypotheses about every document, and repeated
+experiment runs translate the same (document, hypothesis) pairs again each
+time. TranslationMemo stores validated translations on disk, keyed by:
+
+    - the content hash of the logified structure (structure_hash),
+    - the normalized query (normalize_query: Unicode NFKC, case, whitespace),
+    - the model and k,
+    - every other option that changes the prompt (prompt layout, Yes/No mode,
+      structured output, SBERT model, retrieval mode and index, constraint
+      hops), and whether the query was translated alone or in a batch prompt.
+
+A hit returns the stored formula without the Yes/No conversion, retrieval or
+any LLM call:
+
+    from interface_with_user.translation_memo import TranslationMemo
+
+    memo = TranslationMemo("cache/translation_memo.jsonl")
+    result = translate_query(query, json_path, api_key, memo=memo)
+
+Invalidation: the structure hash is part of the key, so a changed document
+(new propositions, constraints or weights) never hits old entries. Entries
+also record the JSON file they were made for; once a newer structure of the
+same file is stored, the older entries are dropped (and removed from the file
+on the next load). MEMO_VERSION is bumped when the translation prompt changes
+in a way that makes stored formulas obsolete; files of another version are
+ignored.
+
+The file is append-only JSON lines, so concurrent translations (e.g. from
+QueryPipeline) only append one line each.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from typing import Any, Dict, Optional
+
+
+MEMO_VERSION = 2
+
+
+def structure_hash(logified_structure: Dict[str, Any]) -> str:
+    """
+    Content hash of a logified structure (key order does not matter).
+
+    Args:
+        logified_structure: JSON structure with propositions and constraints
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(json.dumps(logified_structure, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalized form of a query: Unicode NFKC, casefolded, whitespace collapsed,
+    trailing periods removed (question marks are kept: they mark Yes/No
+    questions).
+
+    Args:
+        query: Query text
+
+    Returns:
+        Normalized text
+    """
+    text = " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+    return text.rstrip(". ")
+
+
+class TranslationMemo:
+    """Translations keyed by (structure hash, normalized query, model, k, options)."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the memo, loading the entries stored at path.
+
+        Args:
+            path: JSON lines file (created on the first store); None keeps the
+                memo in memory only
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._structures: Dict[str, str] = {}  # source -> latest structure hash
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def make_key(structure: str, query: str, model: str, k: int, **options) -> str:
+        """
+        Memo key of a translation.
+
+        Args:
+            structure: structure_hash() of the logified structure
+            query: Query as given by the user (normalized here)
+            model: LLM model (an "openai/" prefix is ignored)
+            k: Number of retrieved propositions
+            **options: Every other setting that changes the prompt (e.g.
+                translation="batch", prompt_layout="prefix_stable",
+                retrieval_mode="hybrid", constraint_hops=1)
+
+        Returns:
+            Key string
+        """
+        model = model[len("openai/"):] if model.startswith("openai/") else model
+        return json.dumps([structure, normalize_query(query), model, k, sorted(options.items())])
+
+    def _load(self):
+        """Read the stored entries, keeping the latest structure of each source."""
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Truncated last line (interrupted run)
+                if isinstance(record, dict) and record.get("version") == MEMO_VERSION:
+                    records.append(record)
+                    if record.get("source"):
+                        self._structures[record["source"]] = record["structure"]
+
+        stale = 0
+        for record in records:
+            source = record.get("source")
+            if source and self._structures[source] != record["structure"]:
+                stale += 1
+                continue
+            self._entries[record["key"]] = record
+        if stale:
+            self.compact()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a translation.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Copy of the stored result with memo_hit=True, or None
+        """
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        result = dict(record["result"])
+        result["memo_hit"] = True
+        return result
+
+    def put(self, key: str, result: Dict[str, Any], structure: str, source: Optional[str] = None):
+        """
+        Store a translation (only results with a valid formula should be stored).
+
+        Args:
+            key: Key from make_key
+            result: translate_query result; LLM usage and attempt counts are not stored
+            structure: structure_hash() used in the key
+            source: JSON file of the structure; entries of older structures of
+                the same file are dropped
+        """
+        stored = {name: value for name, value in result.items()
+                  if name not in ("usage", "attempts", "latency_sec", "memo_hit")}
+        record = {"version": MEMO_VERSION, "key": key, "structure": structure,
+                  "source": os.path.abspath(source) if source else None, "result": stored}
+
+        with self._lock:
+            if record["source"]:
+                previous = self._structures.get(record["source"])
+                if previous is not None and previous != structure:
+                    self._entries = {
+                        entry_key: entry for entry_key, entry in self._entries.items()
+                        if entry.get("source") != record["source"]
+                    }
+                self._structures[record["source"]] = structure
+            self._entries[key] = record
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def compact(self):
+        """Rewrite the file with the live entries only (drops stale and duplicate lines)."""
+        if not self.path:
+            return
+        with self._lock:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for record in self._entries.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(temp_path, self.path)
+
+    def clear(self):
+        """Drop all entries (and the file) and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._structures.clear()
+            self.hits = 0
+            self.misses = 0
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Memo statistics.
+
+        Returns:
+            Dict with hits, misses, hit_rate and entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries)
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
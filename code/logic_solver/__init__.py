@@ -5,7 +5,14 @@ This module provides SAT/MaxSAT-based reasoning over logified structures.
 """
 
 from .encoding import LogicEncoder, FormulaParser, encode_logified_structure
-from .maxsat import LogicSolver, SolverResult, solve_query
+from .maxsat import LogicSolver, SolverResult, SolverBudgetExceeded, solve_query
+from .backends import MAXSAT_BACKENDS, SAT_ORACLES, autotune_backend
+from .clause_store import ClauseStore
+from .compiled import CompiledKB, compiled_path_for
+from .wmc import WeightedModelCounter
+from .artifact import KBArtifact, write_kb_artifact, artifact_path_for
+from .federation import FederatedKB, namespace_formula
+from .result_cache import QueryResultCache, RESULT_CACHE, canonical_cnf
 
 __all__ = [
     'LogicEncoder',
@@ -13,5 +20,21 @@ __all__ = [
     'encode_logified_structure',
     'LogicSolver',
     'SolverResult',
-    'solve_query'
+    'SolverBudgetExceeded',
+    'solve_query',
+    'MAXSAT_BACKENDS',
+    'SAT_ORACLES',
+    'autotune_backend',
+    'ClauseStore',
+    'CompiledKB',
+    'compiled_path_for',
+    'WeightedModelCounter',
+    'KBArtifact',
+    'write_kb_artifact',
+    'artifact_path_for',
+    'FederatedKB',
+    'namespace_formula',
+    'QueryResultCache',
+    'RESULT_CACHE',
+    'canonical_cnf'
 ]
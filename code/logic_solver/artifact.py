@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+artifact.py - Binary compiled-KB artifact
+
+A `*_weighted.kb` file holds everything LogicSolver needs from a
+`*_weighted.json` file, already encoded: the proposition IDs (variable order),
+the flat hard/soft clause buffers, the integer soft weights, the
+clause-to-constraint maps, the constraint IDs and translations (for
+explanations), optional proposition embeddings for retrieval, and the SHA-256
+of the JSON file it was built from.
+
+Layout: an 8-byte magic, the header length (uint64), a JSON header, then the
+raw little-endian arrays, each aligned to 64 bytes. Loading memory-maps the
+file, so the arrays are not read or copied until used: the solver's clause
+stores wrap the mapped buffers directly (ClauseStore.from_buffers).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pysat.formula import WCNF
+
+from .clause_store import ClauseStore
+from .encoding import LogicEncoder
+
+
+ARTIFACT_MAGIC = b"LOGIKB\x00\x01"
+ARTIFACT_VERSION = 1
+_ALIGNMENT = 64
+
+
+def source_hash(json_path: str) -> str:
+    """
+    SHA-256 of a logified JSON file (its bytes, not its parsed content).
+
+    Args:
+        json_path: Path of the JSON file
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(json_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_path_for(weighted_json_path: str) -> str:
+    """
+    Path of the compiled-KB artifact stored next to a `*_weighted.json` file.
+
+    Args:
+        weighted_json_path: Path of the logified (weighted) JSON file
+
+    Returns:
+        Path with the `.json` suffix replaced by `.kb`
+    """
+    return str(Path(weighted_json_path).with_suffix(".kb"))
+
+
+def write_kb_artifact(logified_structure: Dict[str, Any], path: str,
+                      source_path: Optional[str] = None,
+                      prop_embeddings: Optional[np.ndarray] = None,
+                      embedding_model: Optional[str] = None) -> str:
+    """
+    Encode a logified structure and write it as a compiled-KB artifact.
+
+    Args:
+        logified_structure: JSON structure with propositions and constraints
+        path: Output path (see artifact_path_for)
+        source_path: JSON file the structure was loaded from; its hash is stored
+            so that stale artifacts can be detected
+        prop_embeddings: Optional (num_props, dim) embeddings of the proposition
+            translations, in primitive_props order
+        embedding_model: Name of the model that produced prop_embeddings
+
+    Returns:
+        The output path
+    """
+    encoder = LogicEncoder(logified_structure)
+    wcnf = encoder.encode()
+    hard = ClauseStore(wcnf.hard)
+    soft = ClauseStore(wcnf.soft, wcnf.wght)
+
+    arrays = {
+        "hard_literals": np.asarray(hard.literals, dtype='<i4'),
+        "hard_offsets": np.asarray(hard.offsets, dtype='<i8'),
+        "hard_clause_constraint": np.asarray(encoder.hard_clause_constraint, dtype='<i4'),
+        "soft_literals": np.asarray(soft.literals, dtype='<i4'),
+        "soft_offsets": np.asarray(soft.offsets, dtype='<i8'),
+        "soft_weights": np.asarray(soft.weights, dtype='<i8'),
+        "soft_clause_constraint": np.asarray(encoder.soft_clause_constraint, dtype='<i4'),
+    }
+    if prop_embeddings is not None:
+        arrays["prop_embeddings"] = np.ascontiguousarray(prop_embeddings, dtype='<f4')
+
+    header: Dict[str, Any] = {
+        "version": ARTIFACT_VERSION,
+        "source_hash": source_hash(source_path) if source_path is not None else None,
+        "prop_ids": [prop['id'] for prop in logified_structure.get('primitive_props', [])],
+        "nv": wcnf.nv,
+        "soft_constraint_weights": encoder.soft_constraint_weights,
+        "soft_constraint_probabilities": encoder.soft_constraint_probabilities,
+        "hard_constraints": _describe_constraints(logified_structure.get('hard_constraints', [])),
+        "soft_constraints": _describe_constraints(logified_structure.get('soft_constraints', [])),
+        "embedding_model": embedding_model if prop_embeddings is not None else None,
+        "arrays": {}
+    }
+
+    # Array offsets are relative to the end of the header block
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += _aligned(array.nbytes)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _aligned(len(ARTIFACT_MAGIC) + 8 + len(header_bytes))
+
+    with open(path, 'wb') as f:
+        f.write(ARTIFACT_MAGIC)
+        f.write(len(header_bytes).to_bytes(8, 'little'))
+        f.write(header_bytes)
+        f.write(b'\x00' * (data_start - f.tell()))
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+    return path
+
+
+def _describe_constraints(constraints: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """ID, formula and translation of each constraint (used to explain answers)."""
+    return [{key: constraint.get(key) for key in ('id', 'formula', 'translation')} for constraint in constraints]
+
+
+def _aligned(size: int) -> int:
+    """Round size up to the array alignment."""
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class KBArtifact:
+    """A memory-mapped compiled-KB artifact."""
+
+    def __init__(self, path: str):
+        """
+        Open an artifact (see write_kb_artifact).
+
+        Args:
+            path: Path of the `.kb` file
+
+        Raises:
+            ValueError: If the file is not a compiled-KB artifact of a supported version
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            magic = f.read(len(ARTIFACT_MAGIC))
+            header_length = int.from_bytes(f.read(8), 'little')
+            if magic != ARTIFACT_MAGIC:
+                raise ValueError(f"Not a compiled KB artifact: {path}")
+            self.header: Dict[str, Any] = json.loads(f.read(header_length).decode('utf-8'))
+
+        if self.header.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported compiled KB artifact version: {self.header.get('version')}")
+
+        data_start = _aligned(len(ARTIFACT_MAGIC) + 8 + header_length)
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+            start = data_start + spec["offset"]
+            self.arrays[name] = self._data[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    @property
+    def prop_ids(self) -> List[str]:
+        """Proposition IDs in variable order."""
+        return self.header["prop_ids"]
+
+    @property
+    def prop_embeddings(self) -> Optional[np.ndarray]:
+        """Proposition embeddings (memory-mapped), or None if not stored."""
+        return self.arrays.get("prop_embeddings")
+
+    @property
+    def embedding_model(self) -> Optional[str]:
+        """Name of the model that produced the proposition embeddings."""
+        return self.header.get("embedding_model")
+
+    def validate(self, json_path: str):
+        """
+        Check that the artifact was built from the current version of a JSON file.
+
+        Args:
+            json_path: Path of the logified JSON file
+
+        Raises:
+            ValueError: If the artifact has no source hash or the hashes differ
+        """
+        expected = self.header.get("source_hash")
+        if expected is None:
+            raise ValueError(f"Compiled KB artifact has no source hash: {self.path}")
+        if source_hash(json_path) != expected:
+            raise ValueError(f"Compiled KB artifact {self.path} is stale (source {json_path} changed)")
+
+    def stores(self):
+        """
+        Clause stores over the memory-mapped buffers.
+
+        Returns:
+            Tuple of (hard ClauseStore, soft ClauseStore)
+        """
+        arrays = self.arrays
+        nv = self.header["nv"]
+        hard = ClauseStore.from_buffers(arrays["hard_literals"], arrays["hard_offsets"], nv=nv)
+        soft = ClauseStore.from_buffers(arrays["soft_literals"], arrays["soft_offsets"], arrays["soft_weights"], nv=nv)
+        return hard, soft
+
+    def encoder(self) -> LogicEncoder:
+        """
+        Encoder of the stored KB.
+
+        Its wcnf reads the memory-mapped clause buffers: the clause lists are
+        only built if a MaxSAT backend or list-based check asks for them.
+
+        Returns:
+            LogicEncoder (see LogicEncoder.from_encoded)
+        """
+        hard, soft = self.stores()
+
+        return LogicEncoder.from_encoded(
+            self.prop_ids,
+            _BufferedWCNF(hard, soft, self.header["nv"]),
+            self.arrays["hard_clause_constraint"].tolist(),
+            self.arrays["soft_clause_constraint"].tolist(),
+            self.header["soft_constraint_weights"],
+            self.header["soft_constraint_probabilities"],
+            hard_constraints=self.header.get("hard_constraints"),
+            soft_constraints=self.header.get("soft_constraints")
+        )
+
+
+class _BufferedWCNF(WCNF):
+    """WCNF over clause stores whose hard/soft/wght lists are built on first access."""
+
+    def __init__(self, hard: ClauseStore, soft: ClauseStore, nv: int):
+        self.stores = (hard, soft)
+        self._lists: Dict[str, list] = {}
+        self.nv = nv
+        self.topw = 1 + int(soft.weights.sum())
+        self.comments = []
+
+    def _list(self, name: str) -> list:
+        if name not in self._lists:
+            hard, soft = self.stores
+            self._lists[name] = {"hard": hard.to_lists, "soft": soft.to_lists, "wght": soft.weights.tolist}[name]()
+        return self._lists[name]
+
+    hard = property(lambda self: self._list("hard"), lambda self, value: self._lists.__setitem__("hard", value))
+    soft = property(lambda self: self._list("soft"), lambda self, value: self._lists.__setitem__("soft", value))
+    wght = property(lambda self: self._list("wght"), lambda self, value: self._lists.__setitem__("wght", value))
@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+backends.py - Registry of MaxSAT algorithms and SAT oracles
+
+This module lets LogicSolver choose between the MaxSAT algorithms shipped with
+PySAT (RC2 and its stratified/exhaustive variants, LSU, FM) and between
+several SAT oracles (Glucose, CaDiCaL, MapleChrono, MiniSat). A small
+auto-tuner benchmarks the combinations on a loaded knowledge base and picks
+the fastest one.
+"""
+
+import time
+from threading import Timer
+from typing import Callable, Dict, List, Tuple, Any, Optional
+from pysat.formula import WCNF
+from pysat.examples.rc2 import RC2, RC2Stratified
+from pysat.examples.lsu import LSU
+from pysat.examples.fm import FM
+from pysat.solvers import Solver
+
+
+# SAT oracles: user-facing name -> PySAT solver name
+SAT_ORACLES: Dict[str, str] = {
+    'glucose3': 'g3',
+    'glucose4': 'g4',
+    'cadical': 'cd19',
+    'maplechrono': 'mcb',
+    'minisat': 'm22',
+}
+
+# Backends that are only exact when all soft clauses have the same weight
+UNWEIGHTED_ONLY_BACKENDS = {'lsu'}
+
+DEFAULT_MAXSAT_BACKEND = 'rc2'
+DEFAULT_SAT_ORACLE = 'glucose3'
+
+# Wall-clock limit in seconds for each combination benchmarked by autotune_backend
+AUTOTUNE_TIME_LIMIT = 10.0
+
+
+def resolve_oracle(name: str) -> str:
+    """
+    Resolve a SAT oracle name to the PySAT solver name.
+
+    Accepts both user-facing names ("cadical") and PySAT names ("cd19").
+
+    Args:
+        name: Oracle name
+
+    Returns:
+        PySAT solver name
+
+    Raises:
+        ValueError: If the oracle is unknown
+    """
+    if name in SAT_ORACLES:
+        return SAT_ORACLES[name]
+    if name in SAT_ORACLES.values():
+        return name
+    raise ValueError(f"Unknown SAT oracle: {name}. Available: {', '.join(SAT_ORACLES)}")
+
+
+def is_weighted(wcnf: WCNF) -> bool:
+    """Check whether soft clauses carry different weights."""
+    return len(set(wcnf.wght)) > 1
+
+
+def _copy_for_backend(wcnf: WCNF) -> WCNF:
+    """
+    Copy a WCNF for algorithms that modify the formula in place.
+
+    RC2 and LSU append selector literals directly to the soft clauses they are
+    given, so soft clauses are copied; hard clauses are only read and shared.
+    """
+    new_wcnf = WCNF()
+    new_wcnf.nv = wcnf.nv
+    new_wcnf.hard = list(wcnf.hard)
+    new_wcnf.soft = [list(clause) for clause in wcnf.soft]
+    new_wcnf.wght = list(wcnf.wght)
+    return new_wcnf
+
+
+def model_cost(wcnf: WCNF, model: List[int]) -> int:
+    """
+    Sum of the weights of the soft clauses falsified by a model.
+
+    Args:
+        wcnf: Weighted CNF formula
+        model: Assignment (list of signed literals)
+
+    Returns:
+        Cost of the model
+    """
+    model_set = set(model)
+    return sum(
+        weight for clause, weight in zip(wcnf.soft, wcnf.wght)
+        if not any(lit in model_set for lit in clause)
+    )
+
+
+def _start_timer(time_limit: Optional[float], interrupt: Callable[[], None]) -> Optional[Timer]:
+    """Start a timer calling `interrupt` after `time_limit` seconds (if any)."""
+    if time_limit is None:
+        return None
+
+    def _interrupt():
+        try:
+            interrupt()
+        except NotImplementedError:
+            pass  # Oracle without interrupt support (e.g. CaDiCaL)
+
+    timer = Timer(max(0.0, time_limit), _interrupt)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def greedy_maxsat(wcnf: WCNF, oracle: str, time_limit: Optional[float] = None
+                  ) -> Tuple[Optional[int], Optional[List[int]], bool]:
+    """
+    Anytime MaxSAT for bounded or failed runs: the best model found within the limit.
+
+    Starts from a model of the hard clauses, then adds the soft clauses
+    greedily, heaviest first: each one is kept if it is satisfiable together
+    with the hard clauses and the soft clauses kept so far. Every SAT call is
+    made with solve_limited and interrupted at the deadline, and the cheapest
+    model seen is returned. The result is an upper bound on the optimum, never
+    a proof of optimality.
+
+    Args:
+        wcnf: Weighted CNF formula (not modified)
+        oracle: PySAT solver name
+        time_limit: Wall-clock limit in seconds (None for no limit)
+
+    Returns:
+        Tuple of (cost, model, exact=False). (None, None, True) means the hard
+        part is UNSAT; (None, None, False) means no model within the limit.
+    """
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    with Solver(name=oracle, bootstrap_with=wcnf.hard) as solver:
+        # Soft clauses are added under selector literals (units are their own selector)
+        top = max([wcnf.nv] + [abs(lit) for clause in wcnf.soft for lit in clause])
+        selectors = []
+        for clause in wcnf.soft:
+            if len(clause) == 1:
+                selectors.append(clause[0])
+            else:
+                top += 1
+                solver.add_clause(list(clause) + [-top])
+                selectors.append(top)
+
+        def _solve(assumptions):
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                return None
+            timer = _start_timer(remaining, solver.interrupt)
+            try:
+                if timer is None:
+                    return solver.solve(assumptions=assumptions)
+                return solver.solve_limited(assumptions=assumptions, expect_interrupt=True)
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                    try:
+                        solver.clear_interrupt()
+                    except NotImplementedError:
+                        pass
+
+        status = _solve([])
+        if status is None:
+            return None, None, False
+        if not status:
+            return None, None, True
+
+        def _best(model):
+            model = [lit for lit in model if abs(lit) <= wcnf.nv]
+            return model_cost(wcnf, model), model
+
+        best_cost, best_model = _best(solver.get_model() or [])
+        model_set = set(best_model)
+        kept = []
+        for index in sorted(range(len(wcnf.soft)), key=lambda i: -wcnf.wght[i]):
+            if any(lit in model_set for lit in wcnf.soft[index]):
+                # Already satisfied by the current model: keeping it needs no SAT call
+                kept.append(selectors[index])
+                continue
+            status = _solve(kept + [selectors[index]])
+            if status is None:
+                break
+            if status:
+                kept.append(selectors[index])
+                cost, model = _best(solver.get_model() or [])
+                model_set = set(model)
+                if cost < best_cost:
+                    best_cost, best_model = cost, model
+
+        return best_cost, best_model, False
+
+
+# Share of the time limit of a bounded core-guided run (RC2, FM) held back for
+# greedy_maxsat, which provides the model when the run is interrupted (core-
+# guided algorithms only have a lower bound before the optimum); it also
+# absorbs the algorithm finishing its last core after the interrupt
+FALLBACK_SHARE = 0.2
+
+
+def _core_guided(solve_exact):
+    """
+    Build a backend function from a core-guided algorithm.
+
+    Without a time limit, solve_exact runs alone. With a limit, solve_exact
+    runs within all but FALLBACK_SHARE of it; only if it is interrupted
+    (signalled by returning None) does greedy_maxsat run, in the time left,
+    to provide a model.
+    """
+
+    def _solve(wcnf: WCNF, oracle: str, time_limit: Optional[float] = None
+               ) -> Tuple[Optional[int], Optional[List[int]], bool]:
+        if time_limit is None:
+            return solve_exact(wcnf, oracle, None)
+
+        # solve_exact appends selectors to the soft clauses it is given; greedy_maxsat needs them intact
+        start_time = time.perf_counter()
+        result = solve_exact(_copy_for_backend(wcnf), oracle, time_limit * (1 - FALLBACK_SHARE))
+        if result is not None:
+            return result
+
+        remaining = max(time_limit - (time.perf_counter() - start_time), 0.0)
+        return greedy_maxsat(wcnf, oracle, remaining)
+
+    return _solve
+
+
+class _Interrupted(Exception):
+    """Raised inside a bounded core-guided run (RC2, FM) when its deadline passes."""
+
+
+def _rc2_variant(rc2_class, **options):
+    """Build a backend function running an RC2 variant with the given options."""
+
+    class _BoundedRC2(rc2_class):
+        """
+        RC2 variant whose every oracle call stops at the deadline.
+
+        RC2 only makes its main-loop calls interruptible; core minimization and
+        exhaustion (exhaust/minz) would otherwise run past the deadline.
+        """
+
+        deadline_hit = False
+
+        def _call_oracle(self, assumptions=[], expect_interrupt=False):
+            if self.deadline_hit:
+                raise _Interrupted()
+            status = super()._call_oracle(assumptions=assumptions, expect_interrupt=True)
+            if status is None and self.deadline_hit:
+                raise _Interrupted()
+            return status
+
+    def _solve(wcnf: WCNF, oracle: str, time_limit: Optional[float] = None):
+        with (rc2_class if time_limit is None else _BoundedRC2)(wcnf, solver=oracle, **options) as solver:
+            def _interrupt():
+                solver.deadline_hit = True
+                solver.interrupt()
+
+            timer = _start_timer(time_limit, _interrupt)
+            try:
+                model = solver.compute(expect_interrupt=timer is not None)
+            except _Interrupted:
+                return None
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+            if model is not None:
+                return solver.cost, model, True
+            if getattr(solver, 'interrupted', False):
+                return None
+
+        return None, None, True
+
+    return _core_guided(_solve)
+
+
+def _solve_lsu(wcnf: WCNF, oracle: str, time_limit: Optional[float] = None
+               ) -> Tuple[Optional[int], Optional[List[int]], bool]:
+    # PySAT's LSU bounds the *number* of falsified soft clauses (totalizer),
+    # so it is only exact on unweighted formulas
+    if is_weighted(wcnf):
+        raise ValueError("LSU backend only supports unweighted soft clauses")
+
+    # Solve with unit weights (LSU also uses the weights to index the
+    # totalizer) and scale the cost back afterwards; the formula is the
+    # private copy made by solve_maxsat
+    weight = wcnf.wght[0]
+    wcnf.wght = [1] * len(wcnf.soft)
+
+    solver = LSU(wcnf, solver=oracle, expect_interrupt=time_limit is not None)
+    timer = _start_timer(time_limit, solver.interrupt)
+    try:
+        if not solver.solve():
+            if solver.oracle.get_status() is None:
+                # Interrupted before the first model was found
+                return None, None, False
+            return None, None, True
+        # LSU is anytime: on interruption, the last model is the best found so far
+        return solver.cost * weight, solver.model, solver.found_optimum()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        solver.delete()
+
+
+class _BoundedFM(FM):
+    """FM with a deadline: every SAT call is made with solve_limited and interrupted at the deadline."""
+
+    def __init__(self, formula: WCNF, solver: str, deadline: float):
+        self.deadline = deadline
+        super().__init__(formula, solver=solver, verbose=0)
+
+    def init(self, with_soft=True):
+        # FM creates a new oracle at every iteration and calls its solve()
+        super().init(with_soft)
+        oracle = self.oracle
+
+        def solve(assumptions=[]):
+            remaining = self.deadline - time.perf_counter()
+            if remaining <= 0:
+                raise _Interrupted()
+            timer = _start_timer(remaining, oracle.interrupt)
+            try:
+                status = oracle.solve_limited(assumptions=assumptions, expect_interrupt=True)
+            finally:
+                timer.cancel()
+            if status is None:
+                raise _Interrupted()
+            return status
+
+        oracle.solve = solve
+
+
+def _solve_fm(wcnf: WCNF, oracle: str, time_limit: Optional[float] = None):
+    if time_limit is None:
+        solver = FM(wcnf, solver=oracle, verbose=0)
+    else:
+        solver = _BoundedFM(wcnf, oracle, time.perf_counter() + time_limit)
+    try:
+        if not solver.compute():
+            return None, None, True
+        return solver.cost, solver.model, True
+    except _Interrupted:
+        return None
+    finally:
+        solver.delete()
+
+
+# MaxSAT algorithms: name -> function(wcnf, pysat_oracle_name, time_limit) -> (cost, model, exact)
+# (each function may modify the formula it receives, see solve_maxsat)
+MAXSAT_BACKENDS: Dict[str, Callable[..., Tuple[Optional[int], Optional[List[int]], bool]]] = {
+    'rc2': _rc2_variant(RC2),
+    'rc2-exhaust': _rc2_variant(RC2, exhaust=True, minz=True),
+    'rc2-stratified': _rc2_variant(RC2Stratified, blo='div'),
+    'rc2-stratified-exhaust': _rc2_variant(RC2Stratified, blo='div', exhaust=True, minz=True),
+    'lsu': _solve_lsu,
+    'fm': _core_guided(_solve_fm),
+}
+
+
+def solve_maxsat(wcnf: WCNF, backend: str = DEFAULT_MAXSAT_BACKEND,
+                 oracle: str = DEFAULT_SAT_ORACLE) -> Tuple[Optional[int], Optional[List[int]]]:
+    """
+    Solve a MaxSAT problem with the selected backend and SAT oracle.
+
+    Formulas without soft clauses are solved with a plain SAT call, since
+    some algorithms (e.g. RC2Stratified) do not handle that case. The input
+    formula is never modified.
+
+    Args:
+        wcnf: Weighted CNF formula
+        backend: Name of the MaxSAT algorithm (see MAXSAT_BACKENDS)
+        oracle: Name of the SAT oracle (see SAT_ORACLES)
+
+    Returns:
+        Tuple of (optimal cost, optimal model), or (None, None) if UNSAT
+
+    Raises:
+        ValueError: If the backend or oracle is unknown
+    """
+    cost, model, _ = solve_maxsat_bounded(wcnf, backend=backend, oracle=oracle)
+    return cost, model
+
+
+def solve_maxsat_bounded(wcnf: WCNF, backend: str = DEFAULT_MAXSAT_BACKEND,
+                         oracle: str = DEFAULT_SAT_ORACLE,
+                         time_limit: Optional[float] = None) -> Tuple[Optional[int], Optional[List[int]], bool]:
+    """
+    Solve a MaxSAT problem within a wall-clock limit.
+
+    When the limit is hit, the best model found so far is returned with its
+    cost (an upper bound on the optimum) and `exact` set to False. RC2 only
+    proves lower bounds while running, so when a bounded RC2 or FM run is
+    interrupted, greedy_maxsat finds a model in the time left (at least
+    FALLBACK_SHARE of the limit is held back for it); LSU returns its last
+    improving model.
+
+    Args:
+        wcnf: Weighted CNF formula
+        backend: Name of the MaxSAT algorithm (see MAXSAT_BACKENDS)
+        oracle: Name of the SAT oracle (see SAT_ORACLES)
+        time_limit: Wall-clock limit in seconds (None for no limit)
+
+    Returns:
+        Tuple of (cost, model, exact). (None, None, True) means UNSAT;
+        (None, None, False) means no model was found within the limit.
+
+    Raises:
+        ValueError: If the backend or oracle is unknown
+    """
+    if backend not in MAXSAT_BACKENDS:
+        raise ValueError(f"Unknown MaxSAT backend: {backend}. Available: {', '.join(MAXSAT_BACKENDS)}")
+
+    pysat_oracle = resolve_oracle(oracle)
+
+    if time_limit is not None and time_limit <= 0:
+        return None, None, False
+
+    if not wcnf.soft:
+        with Solver(name=pysat_oracle, bootstrap_with=wcnf.hard) as solver:
+            timer = _start_timer(time_limit, solver.interrupt)
+            try:
+                is_sat = solver.solve_limited(expect_interrupt=True) if timer else solver.solve()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+            if is_sat is None:
+                return None, None, False
+            if not is_sat:
+                return None, None, True
+            return 0, solver.get_model() or [], True
+
+    return MAXSAT_BACKENDS[backend](_copy_for_backend(wcnf), pysat_oracle, time_limit)
+
+
+def weight_spread(wcnf: WCNF) -> float:
+    """
+    Ratio between the largest and the smallest soft clause weight.
+
+    Large spreads are where stratification (RC2Stratified) pays off.
+
+    Args:
+        wcnf: Weighted CNF formula
+
+    Returns:
+        max(weight) / min(weight), or 1.0 if there are no soft clauses
+    """
+    if not wcnf.wght:
+        return 1.0
+    return max(wcnf.wght) / min(wcnf.wght)
+
+
+def autotune_backend(
+    wcnf: WCNF,
+    probe_clauses: Optional[List[List[List[int]]]] = None,
+    backends: Optional[List[str]] = None,
+    oracles: Optional[List[str]] = None,
+    repeats: int = 1,
+    time_limit: Optional[float] = AUTOTUNE_TIME_LIMIT
+) -> Dict[str, Any]:
+    """
+    Benchmark MaxSAT backend / SAT oracle combinations and pick the fastest.
+
+    Each combination solves the base formula plus one instance per probe
+    (base formula with the probe clauses added as hard clauses). Combinations
+    that fail, run out of time, or disagree with the reference RC2 cost are
+    discarded.
+
+    Args:
+        wcnf: Weighted CNF formula of the knowledge base
+        probe_clauses: Optional list of query encodings (each a list of clauses)
+        backends: MaxSAT backends to try (default: all)
+        oracles: SAT oracles to try (default: all)
+        repeats: Number of timing repetitions per instance (default: 1)
+        time_limit: Wall-clock limit in seconds for each combination (all
+            instances and repetitions), and for the reference solve
+            (default: AUTOTUNE_TIME_LIMIT; None for no limit)
+
+    Returns:
+        Dict with best backend, best oracle, weight spread and per-combination timings
+    """
+    backends = backends or list(MAXSAT_BACKENDS)
+    oracles = oracles or list(SAT_ORACLES)
+
+    instances = [wcnf]
+    for clauses in probe_clauses or []:
+        instance = WCNF()
+        instance.nv = wcnf.nv
+        instance.hard = list(wcnf.hard)
+        instance.soft = wcnf.soft
+        instance.wght = wcnf.wght
+        for clause in clauses:
+            instance.append(clause)
+        instances.append(instance)
+
+    def _solve_all(backend, oracle):
+        # Costs of all instances within the time limit
+        start_time = time.perf_counter()
+        costs = []
+        for instance in instances:
+            remaining = None if time_limit is None else time_limit - (time.perf_counter() - start_time)
+            cost, _, exact = solve_maxsat_bounded(instance, backend=backend, oracle=oracle, time_limit=remaining)
+            if not exact:
+                raise TimeoutError(f"time limit of {time_limit}s exceeded")
+            costs.append(cost)
+        return costs
+
+    report = {
+        "backend": DEFAULT_MAXSAT_BACKEND,
+        "oracle": DEFAULT_SAT_ORACLE,
+        "weight_spread": weight_spread(wcnf),
+        "num_instances": len(instances),
+        "timings": []
+    }
+
+    # Reference costs from the default backend
+    try:
+        reference = _solve_all(DEFAULT_MAXSAT_BACKEND, DEFAULT_SAT_ORACLE)
+    except TimeoutError as e:
+        report["error"] = f"reference solve: {e}"
+        return report
+
+    timings = report["timings"]
+    for backend in backends:
+        for oracle in oracles:
+            entry = {"backend": backend, "oracle": oracle, "time_sec": None, "error": None}
+            try:
+                start_time = time.perf_counter()
+                for _ in range(repeats):
+                    costs = _solve_all(backend, oracle)
+                    for cost, expected in zip(costs, reference):
+                        if cost != expected:
+                            raise ValueError(f"cost mismatch ({cost} != {expected})")
+                entry["time_sec"] = (time.perf_counter() - start_time) / repeats
+            except Exception as e:
+                entry["error"] = str(e)
+            timings.append(entry)
+
+    valid = [entry for entry in timings if entry["error"] is None]
+    if valid:
+        best = min(valid, key=lambda entry: entry["time_sec"])
+        report["backend"], report["oracle"] = best["backend"], best["oracle"]
+    return report
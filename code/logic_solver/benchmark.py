@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+benchmark.py - Performance benchmark for the logic solver
+
+Generates random logified structures (varying the number of propositions,
+the number of constraints, the formula depth and the width of OR-of-AND
+rules), then measures for each of them:
+  - LogicEncoder.encode time, clause and literal counts
+  - per solver mode: setup time, LogicSolver.query latency (mean / p50 /
+    p95 / max) and peak Python memory (tracemalloc)
+
+Results are written as JSON so that runs can be compared across commits
+(--compare previous.json prints the latency ratios).
+
+--imports instead measures the cold-start time of the pipeline modules and
+CLIs in fresh interpreters, and which heavy dependencies (torch,
+sentence_transformers, openai, stanza) each of them loads at import time.
+
+Usage (from the code directory):
+    python -m logic_solver.benchmark
+    python -m logic_solver.benchmark --props 50,200 --constraints 2 --depth 3 \\
+        --or-width 3 --modes maxsat,compiled --output bench.json
+    python -m logic_solver.benchmark --props 10,20 --modes wmc
+    python -m logic_solver.benchmark --imports
+"""
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .encoding import LogicEncoder
+from .maxsat import LogicSolver
+
+
+# Solver modes benchmarked (LogicSolver keyword arguments); the result cache is
+# disabled so that every query is actually solved
+SOLVER_MODES: Dict[str, Dict[str, Any]] = {
+    "maxsat": {},
+    "compiled": {"compile_kb": True},
+    "wmc": {"confidence_mode": "wmc"},
+}
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+
+# Cold-start targets of the import benchmark: modules and CLI invocations
+IMPORT_MODULES = [
+    "logic_solver",
+    "interface_with_user.translate",
+    "from_text_to_logic.weights",
+    "from_text_to_logic.logify",
+]
+CLI_COMMANDS = [
+    ["from_text_to_logic/logify.py", "--help"],
+    ["from_text_to_logic/weights.py", "--help"],
+    ["interface_with_user/translate.py", "--help"],
+]
+
+# Dependencies that must only be imported when they are actually used
+HEAVY_MODULES = ["torch", "sentence_transformers", "openai", "stanza"]
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def random_formula(rng: random.Random, prop_ids: List[str], depth: int, or_width: int = 2) -> str:
+    """
+    Random propositional formula.
+
+    Args:
+        rng: Random generator
+        prop_ids: Proposition IDs to use
+        depth: Nesting depth (0 gives a literal)
+        or_width: Number of disjuncts in OR-of-AND subformulas
+
+    Returns:
+        Formula string in the logified syntax
+    """
+    if depth <= 0:
+        prop_id = rng.choice(prop_ids)
+        return f"¬{prop_id}" if rng.random() < 0.3 else prop_id
+
+    kind = rng.choice(("and", "implies", "or_of_and"))
+    if kind == "and":
+        return f"({random_formula(rng, prop_ids, depth - 1, or_width)} ∧ " \
+               f"{random_formula(rng, prop_ids, depth - 1, or_width)})"
+    if kind == "implies":
+        return f"({random_formula(rng, prop_ids, depth - 1, or_width)} ⟹ " \
+               f"{random_formula(rng, prop_ids, depth - 1, or_width)})"
+    # Flat OR of pairwise ANDs of literals: nesting these would make the CNF
+    # produced by distribution grow doubly exponentially with the depth
+    terms = [
+        f"({random_formula(rng, prop_ids, 0)} ∧ {random_formula(rng, prop_ids, 0)})"
+        for _ in range(max(or_width, 1))
+    ]
+    return "(" + " ∨ ".join(terms) + ")"
+
+
+def generate_logified_structure(num_props: int, num_hard: int, num_soft: int, depth: int = 2,
+                                or_width: int = 2, seed: int = 0) -> Dict[str, Any]:
+    """
+    Random logified structure in the format produced by logify.
+
+    Constraints only use propositions from a small random neighbourhood, as in
+    real documents, so the KB stays satisfiable in most cases.
+
+    Args:
+        num_props: Number of primitive propositions
+        num_hard: Number of hard constraints
+        num_soft: Number of soft constraints
+        depth: Formula depth of the constraints
+        or_width: Width of OR-of-AND subformulas
+        seed: Random seed
+
+    Returns:
+        Logified structure (primitive_props, hard_constraints, soft_constraints)
+    """
+    rng = random.Random(seed)
+    prop_ids = [f"P_{i}" for i in range(1, num_props + 1)]
+
+    def local_props() -> List[str]:
+        start = rng.randrange(num_props)
+        return [prop_ids[(start + offset) % num_props] for offset in range(min(6, num_props))]
+
+    return {
+        "primitive_props": [
+            {"id": prop_id, "translation": f"Synthetic proposition {prop_id}"} for prop_id in prop_ids
+        ],
+        "hard_constraints": [
+            {"id": f"H_{i}", "formula": random_formula(rng, local_props(), depth, or_width),
+             "translation": f"Synthetic hard constraint {i}"}
+            for i in range(1, num_hard + 1)
+        ],
+        "soft_constraints": [
+            {"id": f"S_{i}", "formula": random_formula(rng, local_props(), depth, or_width),
+             "translation": f"Synthetic soft constraint {i}", "weight": round(rng.uniform(0.05, 0.95), 3)}
+            for i in range(1, num_soft + 1)
+        ],
+    }
+
+
+def _latency_stats(latencies: List[float]) -> Dict[str, float]:
+    """Mean / p50 / p95 / max of a list of latencies (seconds)."""
+    ordered = sorted(latencies)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+    }
+
+
+def benchmark_structure(structure: Dict[str, Any], queries: List[str],
+                        modes: List[str]) -> Dict[str, Any]:
+    """
+    Benchmark encoding and querying of one structure.
+
+    Args:
+        structure: Logified structure
+        queries: Query formulas
+        modes: Solver modes (keys of SOLVER_MODES)
+
+    Returns:
+        Measurements (see module docstring)
+    """
+    start = time.perf_counter()
+    wcnf = LogicEncoder(structure).encode()
+    encode_time = time.perf_counter() - start
+
+    result: Dict[str, Any] = {
+        "encode_time": encode_time,
+        "num_hard_clauses": len(wcnf.hard),
+        "num_soft_clauses": len(wcnf.soft),
+        "num_literals": sum(len(clause) for clause in wcnf.hard) + sum(len(clause) for clause in wcnf.soft),
+        "num_vars": wcnf.nv,
+        "modes": {}
+    }
+
+    for mode in modes:
+        kwargs = dict(SOLVER_MODES[mode], result_cache=None)
+
+        # Timing pass
+        start = time.perf_counter()
+        solver = LogicSolver(structure, **kwargs)
+        setup_time = time.perf_counter() - start
+        latencies = []
+        answers: Dict[str, int] = {}
+        for query in queries:
+            start = time.perf_counter()
+            answer = solver.query(query).answer
+            latencies.append(time.perf_counter() - start)
+            answers[answer] = answers.get(answer, 0) + 1
+
+        # Memory pass (tracemalloc slows execution down, so it is separate)
+        tracemalloc.start()
+        solver = LogicSolver(structure, **kwargs)
+        for query in queries:
+            solver.query(query)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result["modes"][mode] = {
+            "setup_time": setup_time,
+            "query_latency": _latency_stats(latencies),
+            "peak_memory_bytes": peak,
+            "answers": answers,
+            "compiled": solver.compile_report["status"] if solver.compile_report else None
+        }
+
+    return result
+
+
+def run_benchmark(props: List[int], constraints_per_prop: List[float], depths: List[int],
+                  or_widths: List[int], modes: List[str], num_queries: int = 20,
+                  seed: int = 0, verbose: bool = True) -> Dict[str, Any]:
+    """
+    Benchmark every combination of the generator parameters.
+
+    Args:
+        props: Proposition counts
+        constraints_per_prop: Constraint counts as multiples of the proposition
+            count (split 1/3 hard, 2/3 soft)
+        depths: Formula depths
+        or_widths: OR-of-AND widths
+        modes: Solver modes (keys of SOLVER_MODES)
+        num_queries: Random queries per structure
+        seed: Random seed
+        verbose: Print one line per measurement
+
+    Returns:
+        JSON-serializable report
+    """
+    unknown = [mode for mode in modes if mode not in SOLVER_MODES]
+    if unknown:
+        raise ValueError(f"Unknown solver modes: {', '.join(unknown)}. Available: {', '.join(SOLVER_MODES)}")
+
+    # Warm-up (lazy imports, first oracle creation) so it does not skew the first measurement
+    benchmark_structure(generate_logified_structure(5, 2, 3, seed=seed), ["P_1"], modes)
+
+    report: Dict[str, Any] = {
+        "config": {
+            "props": props, "constraints_per_prop": constraints_per_prop, "depths": depths,
+            "or_widths": or_widths, "modes": modes, "num_queries": num_queries, "seed": seed
+        },
+        "results": []
+    }
+
+    for num_props in props:
+        for ratio in constraints_per_prop:
+            num_constraints = max(1, int(num_props * ratio))
+            num_hard = num_constraints // 3
+            num_soft = num_constraints - num_hard
+            for depth in depths:
+                for or_width in or_widths:
+                    structure = generate_logified_structure(num_props, num_hard, num_soft, depth, or_width, seed)
+                    rng = random.Random(seed + 1)
+                    prop_ids = [prop['id'] for prop in structure['primitive_props']]
+                    queries = [random_formula(rng, prop_ids, rng.randint(0, 2), 2) for _ in range(num_queries)]
+
+                    measured = benchmark_structure(structure, queries, modes)
+                    measured["params"] = {
+                        "num_props": num_props, "num_hard": num_hard, "num_soft": num_soft,
+                        "depth": depth, "or_width": or_width
+                    }
+                    report["results"].append(measured)
+
+                    if verbose:
+                        print(f"props={num_props:5d} hard={num_hard:5d} soft={num_soft:5d} "
+                              f"depth={depth} or_width={or_width}: encode {measured['encode_time'] * 1000:8.1f} ms, "
+                              f"{measured['num_hard_clauses'] + measured['num_soft_clauses']} clauses")
+                        for mode, stats in measured["modes"].items():
+                            latency = stats["query_latency"]
+                            print(f"    {mode:9s} setup {stats['setup_time'] * 1000:8.1f} ms  "
+                                  f"query mean {latency['mean'] * 1000:7.2f} ms  p95 {latency['p95'] * 1000:7.2f} ms  "
+                                  f"peak {stats['peak_memory_bytes'] / 1e6:6.1f} MB")
+
+    return report
+
+
+def compare_reports(current: Dict[str, Any], previous: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Mean query latency ratios (current / previous) for matching measurements.
+
+    Args:
+        current: Report of this run
+        previous: Report of an earlier run
+
+    Returns:
+        List of {params, mode, ratio}
+    """
+    def key(entry):
+        return json.dumps(entry["params"], sort_keys=True)
+
+    previous_by_key = {key(entry): entry for entry in previous.get("results", [])}
+    ratios = []
+    for entry in current["results"]:
+        old = previous_by_key.get(key(entry))
+        if old is None:
+            continue
+        for mode, stats in entry["modes"].items():
+            old_stats = old["modes"].get(mode)
+            if old_stats and old_stats["query_latency"]["mean"] > 0:
+                ratios.append({
+                    "params": entry["params"],
+                    "mode": mode,
+                    "ratio": stats["query_latency"]["mean"] / old_stats["query_latency"]["mean"]
+                })
+    return ratios
+
+
+def benchmark_imports(modules: Optional[List[str]] = None, commands: Optional[List[List[str]]] = None,
+                      repeat: int = 3, verbose: bool = True) -> Dict[str, Any]:
+    """
+    Measure cold-start times in fresh interpreters (best of `repeat` runs).
+
+    Args:
+        modules: Modules to import (default: IMPORT_MODULES)
+        commands: Scripts with arguments, relative to the code directory (default: CLI_COMMANDS)
+        repeat: Runs per target
+        verbose: Print one line per target
+
+    Returns:
+        JSON-serializable report: "modules" (seconds, heavy modules loaded, error)
+        and "commands" (seconds, error)
+    """
+    modules = IMPORT_MODULES if modules is None else modules
+    commands = CLI_COMMANDS if commands is None else commands
+    report: Dict[str, Any] = {"python": sys.version.split()[0], "modules": {}, "commands": {}}
+
+    for module in modules:
+        entry: Dict[str, Any] = {"seconds": None, "heavy": [], "error": None}
+        probe = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+        for _ in range(repeat):
+            proc = subprocess.run([sys.executable, "-c", probe], cwd=CODE_DIR, capture_output=True, text=True)
+            if proc.returncode != 0:
+                entry["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+                break
+            measured = json.loads(proc.stdout.strip().splitlines()[-1])
+            if entry["seconds"] is None or measured["seconds"] < entry["seconds"]:
+                entry["seconds"] = measured["seconds"]
+            entry["heavy"] = measured["heavy"]
+        report["modules"][module] = entry
+        if verbose:
+            status = entry["error"] or f"{entry['seconds'] * 1000:8.1f} ms  heavy: {', '.join(entry['heavy']) or '-'}"
+            print(f"  import {module:36s} {status}")
+
+    for command in commands:
+        name = " ".join(command)
+        entry = {"seconds": None, "error": None}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable] + command, cwd=CODE_DIR, capture_output=True, text=True)
+            elapsed = time.perf_counter() - start
+            if proc.returncode != 0:
+                entry["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+                break
+            if entry["seconds"] is None or elapsed < entry["seconds"]:
+                entry["seconds"] = elapsed
+        report["commands"][name] = entry
+        if verbose:
+            status = entry["error"] or f"{entry['seconds'] * 1000:8.1f} ms"
+            print(f"  python {name:36s} {status}")
+
+    return report
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(item) for item in value.split(",") if item]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line interface."""
+    parser = argparse.ArgumentParser(description="Benchmark the logic solver on synthetic KBs")
+    parser.add_argument("--props", type=_int_list, default=[20, 100, 400],
+                        help="Comma-separated proposition counts (default: 20,100,400)")
+    parser.add_argument("--constraints", type=_float_list, default=[1.0],
+                        help="Comma-separated constraints-per-proposition ratios (default: 1)")
+    parser.add_argument("--depth", type=_int_list, default=[2],
+                        help="Comma-separated formula depths (default: 2)")
+    parser.add_argument("--or-width", type=_int_list, default=[2],
+                        help="Comma-separated OR-of-AND widths (default: 2)")
+    parser.add_argument("--modes", default="maxsat,compiled",
+                        help=f"Comma-separated solver modes (available: {', '.join(SOLVER_MODES)}; "
+                             f"wmc is exact model counting, only feasible for small KBs)")
+    parser.add_argument("--queries", type=int, default=20, help="Queries per KB (default: 20)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to compare query latencies with")
+    parser.add_argument("--imports", action="store_true",
+                        help="Measure module import / CLI start-up times instead of the solver")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        report = benchmark_imports()
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport saved to: {args.output}")
+        return 0
+
+    report = run_benchmark(
+        props=args.props,
+        constraints_per_prop=args.constraints,
+        depths=args.depth,
+        or_widths=args.or_width,
+        modes=[mode for mode in args.modes.split(",") if mode],
+        num_queries=args.queries,
+        seed=args.seed
+    )
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)
+        report["comparison"] = compare_reports(report, previous)
+        print("\nMean query latency vs. previous run:")
+        for item in report["comparison"]:
+            params = item["params"]
+            print(f"  props={params['num_props']} depth={params['depth']} or_width={params['or_width']} "
+                  f"{item['mode']}: x{item['ratio']:.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+clause_store.py - Compact clause storage and incremental SAT oracle
+
+This module stores CNF clauses as flat integer buffers (all literals in one
+array('i'), plus an offset array marking where each clause starts) instead of
+Python lists of lists, and provides a persistent SAT oracle that is bootstrapped
+once from a store and then answers many "base + query clauses" checks
+incrementally, without re-loading the base clauses for every query, and
+shrinks the unsatisfiable cores of those checks to minimal ones.
+"""
+
+import hashlib
+import sys
+import time
+from array import array
+from itertools import accumulate, chain
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+from pysat.formula import WCNF
+from pysat.solvers import Solver
+
+from instrumentation import TRACER
+
+from .backends import _start_timer
+
+
+class ClauseStore:
+    """Flat, array-backed storage for a list of clauses (optionally weighted)."""
+
+    def __init__(self, clauses: Iterable[Sequence[int]] = (), weights: Optional[Iterable[int]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            clauses: Initial clauses (lists of signed literals)
+            weights: Optional integer weight per clause (for soft clauses)
+        """
+        self.literals = array('i')
+        self.offsets = array('q', [0])  # offsets[i]:offsets[i + 1] is clause i
+        self.weights: Optional[array] = array('q') if weights is not None else None
+        self.nv = 0
+
+        self.extend(clauses, weights)
+
+    def append(self, clause: Sequence[int], weight: Optional[int] = None):
+        """
+        Append one clause.
+
+        Args:
+            clause: List of signed literals
+            weight: Clause weight (required iff the store is weighted)
+        """
+        self.literals.extend(clause)
+        self.offsets.append(len(self.literals))
+        if self.weights is not None:
+            self.weights.append(weight)
+        if clause:
+            self.nv = max(self.nv, max(abs(lit) for lit in clause))
+
+    def extend(self, clauses: Iterable[Sequence[int]], weights: Optional[Iterable[int]] = None):
+        """
+        Append several clauses.
+
+        Args:
+            clauses: Clauses to append
+            weights: Weight per clause (required iff the store is weighted)
+        """
+        clauses = list(clauses)
+        if weights is not None:
+            weights = list(weights)
+            if len(weights) != len(clauses):
+                raise ValueError("Expected one weight per clause")
+            self.weights.extend(weights)
+
+        start = len(self.literals)
+        self.literals.extend(chain.from_iterable(clauses))
+        self.offsets.extend(accumulate((len(clause) for clause in clauses), initial=self.offsets[-1]))
+        self.offsets.pop(len(self.offsets) - len(clauses) - 1)  # Drop the repeated initial offset
+        self.nv = max(self.nv, max(map(abs, self.literals[start:]), default=0))
+
+    @classmethod
+    def from_buffers(cls, literals, offsets, weights=None, nv: Optional[int] = None) -> "ClauseStore":
+        """
+        Wrap existing buffers (e.g. memory-mapped NumPy arrays) without copying.
+
+        The resulting store is read-only: append/extend need array('i') buffers.
+
+        Args:
+            literals: All literals, clause after clause (int32)
+            offsets: Clause boundaries, len(clauses) + 1 entries starting at 0 (int64)
+            weights: Optional weight per clause (int64)
+            nv: Highest variable (computed from the literals if not given)
+
+        Returns:
+            ClauseStore
+        """
+        store = cls.__new__(cls)
+        store.literals = literals
+        store.offsets = offsets
+        store.weights = weights
+        if nv is None:
+            import numpy as np
+
+            nv = int(np.abs(np.asarray(literals)).max()) if len(literals) else 0
+        store.nv = nv
+        return store
+
+    def to_lists(self) -> List[List[int]]:
+        """All clauses as Python lists (one conversion for the whole buffer)."""
+        literals = self.literals.tolist()
+        offsets = self.offsets.tolist()
+        return [literals[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> List[int]:
+        if index < 0:
+            index += len(self)
+        return self.literals[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def __iter__(self) -> Iterator[List[int]]:
+        literals, offsets = self.literals, self.offsets
+        for i in range(len(offsets) - 1):
+            yield literals[offsets[i]:offsets[i + 1]].tolist()
+
+    @property
+    def num_literals(self) -> int:
+        """Total number of literal occurrences."""
+        return len(self.literals)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the literal, offset and weight buffers."""
+        size = self.literals.itemsize * len(self.literals) + self.offsets.itemsize * len(self.offsets)
+        if self.weights is not None:
+            size += self.weights.itemsize * len(self.weights)
+        return size
+
+    def to_numpy(self):
+        """
+        Zero-copy NumPy views of the buffers.
+
+        Returns:
+            Tuple of (literals, offsets, weights) arrays; weights is None if unweighted
+        """
+        import numpy as np
+
+        literals = np.frombuffer(self.literals, dtype=np.int32) if len(self.literals) else np.zeros(0, dtype=np.int32)
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        weights = None
+        if self.weights is not None:
+            weights = np.frombuffer(self.weights, dtype=np.int64) if len(self.weights) else np.zeros(0, dtype=np.int64)
+        return literals, offsets, weights
+
+
+def list_clauses_nbytes(clauses: Iterable[Sequence[int]]) -> int:
+    """
+    Approximate memory held by clauses stored as Python lists of ints.
+
+    Small ints are cached by CPython, so only the list objects and the outer
+    list's pointer slots are counted (a lower bound).
+    """
+    total = sys.getsizeof([])
+    for clause in clauses:
+        total += sys.getsizeof(clause) + 8
+    return total
+
+
+def wcnf_fingerprint(wcnf: WCNF) -> str:
+    """
+    Content hash of a WCNF (hard clauses, soft clauses and weights).
+
+    Used to check that cached artifacts derived from a KB are still up to date.
+
+    Args:
+        wcnf: Weighted CNF formula
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return stores_fingerprint(ClauseStore(wcnf.hard), ClauseStore(wcnf.soft, wcnf.wght))
+
+
+def stores_fingerprint(hard: ClauseStore, soft: ClauseStore) -> str:
+    """
+    Content hash of a KB given as hard and soft clause stores (same value as
+    wcnf_fingerprint of the corresponding WCNF).
+
+    Args:
+        hard: Hard clauses
+        soft: Soft clauses with weights
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in (hard, soft):
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part.literals.tobytes())
+        digest.update(part.offsets.tobytes())
+        if part.weights is not None:
+            digest.update(part.weights.tobytes())
+    return digest.hexdigest()
+
+
+class IncrementalOracle:
+    """
+    Persistent SAT oracle over a fixed base clause set.
+
+    The base clauses are loaded once (in bulk via append_formula). Each check
+    adds its extra clauses guarded by a fresh selector literal s (clause ∨ ¬s),
+    solves under the assumption s, and then retires s with the unit clause ¬s,
+    so extra clauses never leak into later checks.
+
+    Base clauses can also be grouped (e.g. by source constraint): each group
+    is guarded by its own selector, assumed in every check, so that an
+    unsatisfiable check yields a core in terms of groups (last_core), which
+    minimal_core shrinks on the same solver.
+    """
+
+    def __init__(self, base: ClauseStore, oracle: str, nv: int = 0,
+                 clause_groups: Optional[Sequence[Hashable]] = None):
+        """
+        Initialize the oracle.
+
+        Args:
+            base: Base clauses
+            oracle: PySAT solver name
+            nv: Highest variable that checks may mention (selectors are allocated above it)
+            clause_groups: Optional group key per base clause (default: no groups,
+                the base clauses are added unguarded)
+        """
+        self.nv = max(nv, base.nv)
+        self.top = self.nv  # Last allocated selector
+        self.solver = Solver(name=oracle)
+        self.group_selectors: Dict[Hashable, int] = {}
+        self.selector_groups: Dict[int, Hashable] = {}
+        self.default_groups: List[Hashable] = []
+        self.last_core: Optional[List[Hashable]] = None
+
+        if clause_groups is None:
+            self.solver.append_formula(base)
+        else:
+            self.default_groups = self.add_groups(base, clause_groups)
+
+    def add_groups(self, clauses: Iterable[Sequence[int]], clause_groups: Sequence[Hashable]) -> List[Hashable]:
+        """
+        Add guarded clause groups.
+
+        Groups added after construction are not assumed by default; pass them
+        to check(groups=...) to activate them.
+
+        Args:
+            clauses: Clauses to add
+            clause_groups: Group key per clause
+
+        Returns:
+            The new group keys, in order of first appearance
+        """
+        new_groups = []
+        guarded = []
+        for clause, group in zip(clauses, clause_groups):
+            selector = self.group_selectors.get(group)
+            if selector is None:
+                self.top += 1
+                selector = self.top
+                self.group_selectors[group] = selector
+                self.selector_groups[selector] = group
+                new_groups.append(group)
+            guarded.append(list(clause) + [-selector])
+        self.solver.append_formula(guarded)
+        return new_groups
+
+    def accepts(self, clauses: Iterable[Sequence[int]]) -> bool:
+        """Whether the clauses only use variables below the selector range."""
+        return all(abs(lit) <= self.nv for clause in clauses for lit in clause)
+
+    def check(self, clauses: List[List[int]], time_limit: Optional[float] = None,
+              conflict_budget: Optional[int] = None,
+              groups: Optional[Sequence[Hashable]] = None) -> Tuple[Optional[bool], Optional[List[int]]]:
+        """
+        Check satisfiability of base ∧ clauses.
+
+        If unsatisfiable, last_core holds the groups of a (not necessarily
+        minimal) unsatisfiable core of base ∧ clauses.
+
+        Args:
+            clauses: Extra clauses for this check only
+            time_limit: Wall-clock limit in seconds (None for no limit)
+            conflict_budget: Conflict limit (None for no limit)
+            groups: Groups to activate (default: the groups given at construction)
+
+        Returns:
+            Tuple of (is_satisfiable, model restricted to the base variables);
+            is_satisfiable is None if the limits were hit
+        """
+        if groups is None:
+            groups = self.default_groups
+
+        selector = self._guard(clauses)
+        assumptions = [selector] + [self.group_selectors[group] for group in groups]
+        is_sat = solve_limited(self.solver, assumptions, time_limit, conflict_budget)
+        model = None
+        self.last_core = None
+        if is_sat:
+            model = [lit for lit in self.solver.get_model() if abs(lit) <= self.nv]
+        elif is_sat is False:
+            self.last_core = self._core_groups()
+
+        self.solver.add_clause([-selector])
+        return is_sat, model
+
+    def minimal_core(self, clauses: List[List[int]], core: Sequence[Hashable],
+                     time_limit: Optional[float] = None,
+                     conflict_budget: Optional[int] = None) -> List[Hashable]:
+        """
+        Shrink an unsatisfiable core of base ∧ clauses to a minimal one (MUS).
+
+        Deletion-based: each group is dropped in turn and kept out if the rest
+        is still unsatisfiable (the solver's core of that call then replaces
+        the remaining candidates). The extra clauses are always kept.
+
+        Args:
+            clauses: Extra clauses of the unsatisfiable check
+            core: Groups of an unsatisfiable core (e.g. last_core)
+            time_limit: Wall-clock limit in seconds for all calls (None for no limit)
+            conflict_budget: Conflict limit per call (None for no limit)
+
+        Returns:
+            Core groups; minimal unless the limits were hit (undecided groups are kept)
+        """
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        selector = self._guard(clauses)
+
+        core = list(core)
+        index = 0
+        while index < len(core):
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            candidate = core[:index] + core[index + 1:]
+            assumptions = [selector] + [self.group_selectors[group] for group in candidate]
+            is_sat = solve_limited(self.solver, assumptions, remaining, conflict_budget)
+            if is_sat is False:
+                # Keep only the candidates in the new core (its order is preserved)
+                used = set(self._core_groups())
+                core = [group for group in candidate if group in used]
+            else:
+                index += 1
+
+        self.solver.add_clause([-selector])
+        return core
+
+    def _guard(self, clauses: List[List[int]]) -> int:
+        """Add clauses guarded by a fresh selector and return the selector."""
+        self.top += 1
+        selector = self.top
+        for clause in clauses:
+            self.solver.add_clause(list(clause) + [-selector])
+        return selector
+
+    def _core_groups(self) -> List[Hashable]:
+        """Groups of the assumption core of the last unsatisfiable call."""
+        return [self.selector_groups[lit] for lit in (self.solver.get_core() or []) if lit in self.selector_groups]
+
+    def delete(self):
+        """Free the underlying solver."""
+        if self.solver is not None:
+            self.solver.delete()
+            self.solver = None
+
+
+def solve_limited(solver: Solver, assumptions: Sequence[int] = (), time_limit: Optional[float] = None,
+                  conflict_budget: Optional[int] = None) -> Optional[bool]:
+    """
+    Run a SAT call under optional wall-clock and conflict limits.
+
+    Args:
+        solver: PySAT solver
+        assumptions: Assumption literals
+        time_limit: Wall-clock limit in seconds (None for no limit)
+        conflict_budget: Conflict limit (None for no limit)
+
+    Returns:
+        True/False, or None if a limit was hit
+    """
+    TRACER.count("solver.sat_calls")
+    if time_limit is None and conflict_budget is None:
+        return solver.solve(assumptions=assumptions)
+
+    if conflict_budget is not None:
+        solver.conf_budget(conflict_budget)
+    timer = _start_timer(time_limit, solver.interrupt)
+    try:
+        return solver.solve_limited(assumptions=assumptions, expect_interrupt=timer is not None)
+    finally:
+        if timer is not None:
+            timer.cancel()
+            try:
+                solver.clear_interrupt()
+            except NotImplementedError:
+                pass
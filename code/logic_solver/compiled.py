@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+compiled.py - Knowledge compilation of logified KBs into an OBDD
+
+A logified KB is compiled once into a reduced ordered binary decision diagram
+(OBDD, a subclass of d-DNNF). Every soft clause c with weight w is compiled
+as (c ∨ r) with a fresh relaxation variable r of cost w (unit soft clauses
+put the cost directly on the falsifying value of their variable), so that:
+
+  - KB ∧ Q is satisfiable  iff  BDD ∧ Q is not the FALSE node
+  - MaxSAT cost of KB ∧ Q  =   cost of the cheapest path to TRUE in BDD ∧ Q
+
+Both answers take time linear in the size of BDD ∧ Q, with no SAT calls.
+Compilation is aborted when the diagram exceeds a node budget, in which case
+the caller falls back to SAT/MaxSAT solving. Compiled KBs can be saved as
+JSON next to the `*_weighted.json` file they come from.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pysat.formula import WCNF
+
+from .clause_store import wcnf_fingerprint
+
+
+DEFAULT_NODE_BUDGET = 200000
+
+COMPILED_FORMAT = "logic_solver.obdd"
+COMPILED_VERSION = 1
+
+FALSE, TRUE = 0, 1
+
+
+class CompilationBudgetExceeded(Exception):
+    """Raised when a BDD grows beyond its node budget."""
+
+
+class BDD:
+    """Minimal reduced ordered BDD manager (no complement edges)."""
+
+    def __init__(self, num_levels: int, node_budget: int = DEFAULT_NODE_BUDGET):
+        """
+        Initialize the manager with the two terminal nodes.
+
+        Args:
+            num_levels: Number of decision levels (variables in the order)
+            node_budget: Maximum number of nodes before CompilationBudgetExceeded
+        """
+        self.num_levels = num_levels
+        self.node_budget = node_budget
+        # Terminals sit below the last level
+        self.level: List[int] = [num_levels, num_levels]
+        self.low: List[int] = [FALSE, TRUE]
+        self.high: List[int] = [FALSE, TRUE]
+        self.unique: Dict[Tuple[int, int, int], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.level)
+
+    def mk(self, level: int, low: int, high: int) -> int:
+        """Get or create the node (level, low, high), applying the reduction rule."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            if len(self.level) >= self.node_budget:
+                raise CompilationBudgetExceeded(f"BDD exceeded {self.node_budget} nodes")
+            node = len(self.level)
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def clause(self, literals: Sequence[Tuple[int, bool]]) -> int:
+        """
+        Build the BDD of a clause.
+
+        Args:
+            literals: (level, positive) pairs
+
+        Returns:
+            Root node (TRUE for tautologies)
+        """
+        polarity: Dict[int, bool] = {}
+        for level, positive in literals:
+            if polarity.get(level, positive) != positive:
+                return TRUE  # x ∨ ¬x
+            polarity[level] = positive
+
+        node = FALSE
+        for level in sorted(polarity, reverse=True):
+            if polarity[level]:
+                node = self.mk(level, node, TRUE)
+            else:
+                node = self.mk(level, TRUE, node)
+        return node
+
+    def conjoin(self, u: int, v: int, memo: Optional[Dict[Tuple[int, int], int]] = None) -> int:
+        """Conjunction of two BDDs."""
+        if memo is None:
+            memo = {}
+        return self._conjoin(u, v, memo)
+
+    def _conjoin(self, u: int, v: int, memo: Dict[Tuple[int, int], int]) -> int:
+        if u == FALSE or v == FALSE:
+            return FALSE
+        if u == TRUE or u == v:
+            return v
+        if v == TRUE:
+            return u
+        key = (u, v) if u < v else (v, u)
+        result = memo.get(key)
+        if result is not None:
+            return result
+
+        level_u, level_v = self.level[u], self.level[v]
+        if level_u == level_v:
+            result = self.mk(level_u, self._conjoin(self.low[u], self.low[v], memo),
+                             self._conjoin(self.high[u], self.high[v], memo))
+        elif level_u < level_v:
+            result = self.mk(level_u, self._conjoin(self.low[u], v, memo),
+                             self._conjoin(self.high[u], v, memo))
+        else:
+            result = self.mk(level_v, self._conjoin(u, self.low[v], memo),
+                             self._conjoin(u, self.high[v], memo))
+
+        memo[key] = result
+        return result
+
+    def rollback(self, size: int):
+        """Drop every node created after the manager had `size` nodes."""
+        for node in range(size, len(self.level)):
+            del self.unique[(self.level[node], self.low[node], self.high[node])]
+        del self.level[size:]
+        del self.low[size:]
+        del self.high[size:]
+
+    def min_cost(self, root: int, cost_false: Sequence[float],
+                 cost_true: Sequence[float]) -> Tuple[Optional[float], Optional[List[bool]]]:
+        """
+        Cheapest assignment reaching TRUE.
+
+        Levels skipped by a path are free and take their cheaper value.
+
+        Args:
+            root: Root node
+            cost_false: Cost of assigning False, per level
+            cost_true: Cost of assigning True, per level
+
+        Returns:
+            Tuple of (cost, value per level), or (None, None) if root is FALSE
+        """
+        if root == FALSE:
+            return None, None
+
+        free = [min(f, t) for f, t in zip(cost_false, cost_true)]
+        prefix = [0.0]
+        for cost in free:
+            prefix.append(prefix[-1] + cost)
+
+        def skip(level_from: int, level_to: int) -> float:
+            return prefix[level_to] - prefix[level_from]
+
+        # Bottom-up over reachable nodes (children have larger levels than parents)
+        reachable = self._reachable(root)
+        best: Dict[int, Tuple[float, bool]] = {TRUE: (0.0, False)}
+        infinity = float('inf')
+        for node in sorted(reachable, key=lambda n: -self.level[n]):
+            if node in (FALSE, TRUE):
+                continue
+            level = self.level[node]
+            options = []
+            for child, value, cost in ((self.low[node], False, cost_false[level]),
+                                       (self.high[node], True, cost_true[level])):
+                if child == FALSE:
+                    options.append((infinity, value))
+                else:
+                    options.append((cost + skip(level + 1, self.level[child]) + best[child][0], value))
+            best[node] = min(options)
+
+        # Reconstruct the assignment
+        values = [t < f for f, t in zip(cost_false, cost_true)]
+        node = root
+        while node != TRUE:
+            level = self.level[node]
+            value = best[node][1]
+            values[level] = value
+            node = self.high[node] if value else self.low[node]
+
+        return skip(0, self.level[root]) + best[root][0], values
+
+    def _reachable(self, root: int) -> List[int]:
+        """Nodes reachable from root."""
+        seen = {root}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node in (FALSE, TRUE):
+                continue
+            for child in (self.low[node], self.high[node]):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return list(seen)
+
+
+class CompiledKB:
+    """A KB compiled into an OBDD, answering SAT and MaxSAT queries without oracles."""
+
+    def __init__(self, bdd: BDD, root: int, order: List[int], nv: int,
+                 cost_false: List[float], cost_true: List[float], fingerprint: str):
+        """
+        Wrap a compiled diagram (use CompiledKB.compile or CompiledKB.load).
+
+        Args:
+            bdd: BDD manager
+            root: Root node of the compiled KB
+            order: Variable at each level (variables above nv are relaxation variables)
+            nv: Number of KB variables
+            cost_false: Cost of assigning False, per level
+            cost_true: Cost of assigning True, per level
+            fingerprint: Fingerprint of the WCNF that was compiled
+        """
+        self.bdd = bdd
+        self.root = root
+        self.order = order
+        self.nv = nv
+        self.cost_false = cost_false
+        self.cost_true = cost_true
+        self.fingerprint = fingerprint
+        self.var_level = {var: level for level, var in enumerate(order)}
+
+    @classmethod
+    def compile(cls, wcnf: WCNF, nv: int, node_budget: int = DEFAULT_NODE_BUDGET) -> "CompiledKB":
+        """
+        Compile a WCNF into an OBDD.
+
+        Args:
+            wcnf: Weighted CNF of the KB
+            nv: Number of KB variables (propositions)
+            node_budget: Maximum number of BDD nodes
+
+        Returns:
+            CompiledKB
+
+        Raises:
+            CompilationBudgetExceeded: If the diagram exceeds the node budget
+        """
+        nv = max(nv, wcnf.nv)
+
+        # Soft clauses: units weigh on a value of their variable, others get a relaxation variable
+        var_costs = {var: [0.0, 0.0] for var in range(1, nv + 1)}  # [cost False, cost True]
+        relaxed: List[Tuple[List[int], int]] = []  # (clause ∨ r, r)
+        relax_cost: Dict[int, float] = {}
+        after_var: Dict[int, List[int]] = {}
+        for clause, weight in zip(wcnf.soft, wcnf.wght):
+            if len(clause) == 1:
+                lit = clause[0]
+                var_costs[abs(lit)][0 if lit > 0 else 1] += weight
+                continue
+            relax_var = nv + len(relaxed) + 1
+            relaxed.append((list(clause) + [relax_var], relax_var))
+            relax_cost[relax_var] = weight
+            after_var.setdefault(max(abs(lit) for lit in clause), []).append(relax_var)
+
+        # Order: KB variables by index, each relaxation variable right after its clause
+        order: List[int] = []
+        for var in range(1, nv + 1):
+            order.append(var)
+            order.extend(after_var.get(var, []))
+
+        cost_false = [var_costs[var][0] if var <= nv else 0.0 for var in order]
+        cost_true = [var_costs[var][1] if var <= nv else relax_cost[var] for var in order]
+
+        var_level = {var: level for level, var in enumerate(order)}
+        bdd = BDD(len(order), node_budget=node_budget)
+
+        clauses = [bdd.clause([(var_level[abs(lit)], lit > 0) for lit in clause])
+                   for clause in list(wcnf.hard) + [clause for clause, _ in relaxed]]
+
+        # Conjoin bottom-up (deepest clauses first) to keep intermediate diagrams small
+        root = TRUE
+        for node in sorted(clauses, key=lambda n: -bdd.level[n]):
+            root = bdd.conjoin(root, node)
+            if root == FALSE:
+                break
+
+        compiled = cls(bdd, root, order, nv, cost_false, cost_true, wcnf_fingerprint(wcnf))
+        return compiled.compact()
+
+    def compact(self) -> "CompiledKB":
+        """Drop the intermediate nodes of compilation (keeps only nodes reachable from the root)."""
+        bdd = self.bdd
+        new = BDD(bdd.num_levels, node_budget=bdd.node_budget)
+        mapping = {FALSE: FALSE, TRUE: TRUE}
+        for node in sorted(bdd._reachable(self.root), key=lambda n: -bdd.level[n]):
+            if node not in mapping:
+                mapping[node] = new.mk(bdd.level[node], mapping[bdd.low[node]], mapping[bdd.high[node]])
+        self.bdd = new
+        self.root = mapping[self.root]
+        return self
+
+    @property
+    def size(self) -> int:
+        """Number of nodes (including the two terminals)."""
+        return len(self.bdd)
+
+    def accepts(self, clauses: List[List[int]]) -> bool:
+        """Whether the clauses only use compiled KB variables."""
+        return all(0 < abs(lit) <= self.nv for clause in clauses for lit in clause)
+
+    def solve(self, clauses: List[List[int]]) -> Tuple[Optional[float], Optional[List[int]]]:
+        """
+        Optimal MaxSAT solution of KB ∧ clauses (clauses are hard).
+
+        Args:
+            clauses: Extra hard clauses over KB variables (e.g. an encoded query)
+
+        Returns:
+            Tuple of (cost, model over the KB variables), or (None, None) if UNSAT
+
+        Raises:
+            CompilationBudgetExceeded: If conditioning on the clauses exceeds the node budget
+        """
+        bdd = self.bdd
+        size = len(bdd)
+        try:
+            root = self.root
+            memo: Dict[Tuple[int, int], int] = {}
+            for clause in clauses:
+                node = bdd.clause([(self.var_level[abs(lit)], lit > 0) for lit in clause])
+                root = bdd.conjoin(root, node, memo)
+                if root == FALSE:
+                    break
+            cost, values = bdd.min_cost(root, self.cost_false, self.cost_true)
+        finally:
+            bdd.rollback(size)
+
+        if cost is None:
+            return None, None
+
+        model = [var if values[self.var_level[var]] else -var for var in range(1, self.nv + 1)]
+        return int(cost) if float(cost).is_integer() else cost, model
+
+    def save(self, path: str):
+        """
+        Save the compiled KB as JSON.
+
+        Args:
+            path: Output file path
+        """
+        data = {
+            "format": COMPILED_FORMAT,
+            "version": COMPILED_VERSION,
+            "fingerprint": self.fingerprint,
+            "nv": self.nv,
+            "order": self.order,
+            "cost_false": self.cost_false,
+            "cost_true": self.cost_true,
+            "root": self.root,
+            "nodes": [[self.bdd.level[n], self.bdd.low[n], self.bdd.high[n]] for n in range(2, len(self.bdd))]
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str, node_budget: int = DEFAULT_NODE_BUDGET) -> "CompiledKB":
+        """
+        Load a compiled KB saved with save().
+
+        Args:
+            path: Path of the JSON file
+            node_budget: Node budget for query-time conditioning
+
+        Returns:
+            CompiledKB
+
+        Raises:
+            ValueError: If the file is not a compiled KB of a supported version
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        if data.get("format") != COMPILED_FORMAT or data.get("version") != COMPILED_VERSION:
+            raise ValueError(f"Not a compiled KB (version {COMPILED_VERSION}): {path}")
+
+        order = data["order"]
+        bdd = BDD(len(order), node_budget=node_budget)
+        for level, low, high in data["nodes"]:
+            bdd.level.append(level)
+            bdd.low.append(low)
+            bdd.high.append(high)
+            bdd.unique[(level, low, high)] = len(bdd.level) - 1
+
+        return cls(bdd, data["root"], order, data["nv"],
+                   data["cost_false"], data["cost_true"], data["fingerprint"])
+
+
+def compiled_path_for(weighted_json_path: str) -> str:
+    """
+    Path of the compiled KB stored next to a `*_weighted.json` file.
+
+    Args:
+        weighted_json_path: Path of the logified (weighted) JSON file
+
+    Returns:
+        Path with the `.json` suffix replaced by `.bdd.json`
+    """
+    path = Path(weighted_json_path)
+    return str(path.with_name(path.stem + ".bdd.json"))
@@ -9,20 +9,30 @@ into a format suitable for PySAT's RC2 MaxSAT solver.
 import re
 from typing import Dict, List, Tuple, Any, Optional
 from pysat.formula import CNF, WCNF
-from pysat.card import CardEnc
+from pysat.card import CardEnc, EncType
+
+
+# Cardinality operators: atleast(k, F_1, ..., F_m), atmost(k, ...), exactly(k, ...)
+CARDINALITY_OPERATORS = ('atleast', 'atmost', 'exactly')
 
 
 class FormulaParser:
     """Parse propositional logic formulas and convert to CNF."""
 
-    def __init__(self, prop_to_var: Dict[str, int]):
+    def __init__(self, prop_to_var: Dict[str, int], card_encoding: int = EncType.seqcounter):
         """
         Initialize parser with proposition-to-variable mapping.
 
         Args:
             prop_to_var: Dictionary mapping proposition IDs (e.g., "P_1") to SAT variables (integers)
+            card_encoding: pysat.card encoding for cardinality constraints
+                (default: EncType.seqcounter; EncType.totalizer also works well)
         """
         self.prop_to_var = prop_to_var
+        self.card_encoding = card_encoding
+        # Last used variable; auxiliary variables of cardinality encodings are allocated above it
+        self.top = max(prop_to_var.values(), default=0)
+        self._definitions: List[List[int]] = []
 
     def parse(self, formula: str) -> List[List[int]]:
         """
@@ -30,6 +40,9 @@ class FormulaParser:
 
         Supports operators: ∧ (AND), ∨ (OR), ¬ (NOT), ⇒ (IMPLIES), ⟹ (IMPLIES), → (IMPLIES),
                            ⇔ (IFF), ⟺ (IFF), ↔ (IFF)
+        and cardinality constraints atleast(k, F_1, ..., F_m), atmost(k, ...) and
+        exactly(k, ...), which are encoded with pysat.card (polynomial size, using
+        auxiliary variables above self.top) instead of being expanded.
 
         Args:
             formula: String formula like "P_1 ∧ P_2" or "P_3 ⇒ P_4"
@@ -53,8 +66,10 @@ class FormulaParser:
         formula = formula.replace('⟸', '<=')  # Reverse implication
         formula = formula.replace('⇐', '<=')
 
-        # Parse and convert to CNF
-        return self._parse_and_convert_to_cnf(formula)
+        # Parse and convert to CNF (plus the definitions of auxiliary variables)
+        self._definitions = []
+        clauses = self._parse_and_convert_to_cnf(formula)
+        return clauses + self._definitions
 
     def _parse_and_convert_to_cnf(self, formula: str) -> List[List[int]]:
         """
@@ -67,7 +82,7 @@ class FormulaParser:
           or_expr := and_expr ('|' and_expr)*
           and_expr := not_expr ('&' not_expr)*
           not_expr := '~' not_expr | atom
-          atom := '(' formula ')' | prop_id
+          atom := '(' formula ')' | card_op '(' number (',' formula)+ ')' | prop_id
         """
         tokens = self._tokenize(formula)
         expr, remaining = self._parse_iff(tokens)
@@ -80,8 +95,8 @@ class FormulaParser:
 
     def _tokenize(self, formula: str) -> List[str]:
         """Tokenize the formula into operators, parentheses, and proposition IDs."""
-        # Pattern: proposition IDs (P_\d+), operators, parentheses
-        pattern = r'(P_\d+|<=>|=>|[&|~()])'
+        # Pattern: proposition IDs (P_\d+, optionally namespaced as doc::P_\d+), operators, parentheses
+        pattern = r'((?:[\w.\-]+::)?P_\d+|\b(?:atleast|atmost|exactly)\b|\d+|<=>|=>|[&|~(),])'
         tokens = re.findall(pattern, formula)
         return [t.strip() for t in tokens if t.strip()]
 
@@ -156,9 +171,12 @@ class FormulaParser:
             tokens = tokens[1:]  # consume ')'
             return expr, tokens
 
+        if tokens[0] in CARDINALITY_OPERATORS:
+            return self._parse_cardinality(tokens)
+
         # Must be a proposition ID
         prop_id = tokens[0]
-        if not prop_id.startswith('P_'):
+        if not re.fullmatch(r'(?:[\w.\-]+::)?P_\d+', prop_id):
             raise ValueError(f"Invalid proposition ID: {prop_id}")
 
         if prop_id not in self.prop_to_var:
@@ -166,6 +184,25 @@ class FormulaParser:
 
         return prop_id, tokens[1:]
 
+    def _parse_cardinality(self, tokens: List[str]) -> Tuple[Any, List[str]]:
+        """Parse atleast/atmost/exactly(k, F_1, ..., F_m)."""
+        op = tokens[0]
+        if len(tokens) < 3 or tokens[1] != '(' or not tokens[2].isdigit():
+            raise ValueError(f"Expected '{op}(k, formula, ...)'")
+        bound = int(tokens[2])
+        tokens = tokens[3:]
+
+        args = []
+        while tokens and tokens[0] == ',':
+            arg, tokens = self._parse_iff(tokens[1:])
+            args.append(arg)
+        if not args:
+            raise ValueError(f"'{op}' needs at least one formula")
+        if not tokens or tokens[0] != ')':
+            raise ValueError("Missing closing parenthesis")
+
+        return ('card', op, bound, tuple(args)), tokens[1:]
+
     def _to_cnf(self, expr) -> List[List[int]]:
         """
         Convert expression tree to CNF clauses.
@@ -196,6 +233,18 @@ class FormulaParser:
             # Push negation down
             return self._to_nnf(expr[1], positive=not positive)
 
+        elif op == 'card':
+            # Negation flips the bound: ~atleast(k) = atmost(k-1), ~atmost(k) = atleast(k+1),
+            # ~exactly(k) = atmost(k-1) | atleast(k+1)
+            _, card_op, bound, args = expr
+            if positive:
+                return expr
+            if card_op == 'atleast':
+                return ('card', 'atmost', bound - 1, args)
+            if card_op == 'atmost':
+                return ('card', 'atleast', bound + 1, args)
+            return ('|', ('card', 'atmost', bound - 1, args), ('card', 'atleast', bound + 1, args))
+
         elif op == '&':
             if positive:
                 # (A & B) stays as AND
@@ -234,6 +283,9 @@ class FormulaParser:
 
         op = nnf[0]
 
+        if op == 'card':
+            return self._cardinality_to_cnf(nnf)
+
         if op == '&':
             # Conjunction: concatenate clauses
             left_cnf = self._nnf_to_cnf(nnf[1])
@@ -241,9 +293,10 @@ class FormulaParser:
             return left_cnf + right_cnf
 
         elif op == '|':
-            # Disjunction: distribute over conjunction
-            left_cnf = self._nnf_to_cnf(nnf[1])
-            right_cnf = self._nnf_to_cnf(nnf[2])
+            # Disjunction: distribute over conjunction (a cardinality constraint is
+            # replaced by a fresh literal implying it, so its clauses are not distributed)
+            left_cnf = self._disjunct_to_cnf(nnf[1])
+            right_cnf = self._disjunct_to_cnf(nnf[2])
 
             # Distribute: (A1 & A2 & ...) | (B1 & B2 & ...) =
             # (A1 | B1) & (A1 | B2) & ... & (A2 | B1) & ...
@@ -258,6 +311,62 @@ class FormulaParser:
         else:
             raise ValueError(f"Unexpected operator in NNF: {op}")
 
+    def _new_var(self) -> int:
+        """Allocate an auxiliary variable."""
+        self.top += 1
+        return self.top
+
+    def _disjunct_to_cnf(self, nnf) -> List[List[int]]:
+        """CNF of one side of a disjunction."""
+        if isinstance(nnf, tuple) and nnf[0] == 'card':
+            # selector -> constraint; the selector stands for the constraint in the disjunction
+            selector = self._new_var()
+            self._definitions.extend(clause + [-selector] for clause in self._cardinality_to_cnf(nnf))
+            return [[selector]]
+        return self._nnf_to_cnf(nnf)
+
+    def _cardinality_to_cnf(self, nnf) -> List[List[int]]:
+        """
+        Encode a cardinality constraint with pysat.card.
+
+        Formulas that are not literals (or repeat a variable) are first replaced
+        by auxiliary variables defined as equivalent to them.
+        """
+        _, card_op, bound, args = nnf
+        lits = []
+        for arg in args:
+            lit = self._to_nnf(arg, positive=True)
+            if not isinstance(lit, int) or any(abs(lit) == abs(other) for other in lits):
+                lit = self._define(arg)
+            lits.append(lit)
+
+        # Trivial bounds
+        num = len(lits)
+        if card_op == 'atleast':
+            if bound <= 0:
+                return []
+            if bound > num:
+                return [[]]
+        elif card_op == 'atmost':
+            if bound < 0:
+                return [[]]
+            if bound >= num:
+                return []
+        elif bound < 0 or bound > num:
+            return [[]]
+
+        encode = {'atleast': CardEnc.atleast, 'atmost': CardEnc.atmost, 'exactly': CardEnc.equals}[card_op]
+        cnf = encode(lits=lits, bound=bound, top_id=self.top, encoding=self.card_encoding)
+        self.top = max(self.top, cnf.nv)
+        return [list(clause) for clause in cnf.clauses]
+
+    def _define(self, expr) -> int:
+        """Auxiliary variable equivalent to a formula (its defining clauses go to the definitions)."""
+        var = self._new_var()
+        self._definitions.extend(clause + [-var] for clause in self._nnf_to_cnf(self._to_nnf(expr, True)))
+        self._definitions.extend(clause + [var] for clause in self._nnf_to_cnf(self._to_nnf(expr, False)))
+        return var
+
 
 class LogicEncoder:
     """Encode logified structure as Weighted CNF for MaxSAT solving."""
@@ -274,6 +383,14 @@ class LogicEncoder:
         self.var_to_prop: Dict[int, str] = {}  # Reverse mapping
         self.wcnf = WCNF()
 
+        # Index of the source constraint of each hard/soft clause (filled by encode)
+        self.hard_clause_constraint: List[int] = []
+        self.soft_clause_constraint: List[int] = []
+
+        # Per soft constraint: weight as given (number or weights.py list) and as probability
+        self.soft_constraint_weights: List[Any] = []
+        self.soft_constraint_probabilities: List[float] = []
+
         # Build proposition mapping
         self._build_prop_mapping()
 
@@ -342,30 +459,40 @@ class LogicEncoder:
             WCNF object with hard and soft constraints
         """
         # Encode hard constraints - always as hard clauses (ignore weights)
-        for constraint in self.structure.get('hard_constraints', []):
+        for index, constraint in enumerate(self.structure.get('hard_constraints', [])):
             formula = constraint['formula']
             clauses = self.parser.parse(formula)
 
             # Always add as hard clause (infinite weight)
             for clause in clauses:
                 self.wcnf.append(clause)  # Hard clause
+                self.hard_clause_constraint.append(index)
 
         # Encode soft constraints (weighted)
-        for constraint in self.structure.get('soft_constraints', []):
+        for index, constraint in enumerate(self.structure.get('soft_constraints', [])):
             formula = constraint['formula']
             weight = self._extract_weight(constraint, default=0.5)
             int_weight = self._weight_to_int(weight)
+            self.soft_constraint_weights.append(constraint.get('weight', 0.5))
+            self.soft_constraint_probabilities.append(weight)
 
             clauses = self.parser.parse(formula)
             for clause in clauses:
                 self.wcnf.append(clause, weight=int_weight)
+                self.soft_clause_constraint.append(index)
 
+        # Auxiliary variables of cardinality constraints count as KB variables
+        self.wcnf.nv = max(self.wcnf.nv, self.parser.top)
         return self.wcnf
 
     def encode_query(self, query_formula: str, negate: bool = False) -> List[List[int]]:
         """
         Encode a query formula as CNF clauses.
 
+        Auxiliary variables (cardinality encodings) are numbered from the KB's
+        last variable + 1 for every query, so the same query always gets the
+        same clauses and the variable counter does not grow across queries.
+
         Args:
             query_formula: Propositional formula (e.g., "P_1 & P_2")
             negate: If True, encode ¬query (for entailment checking)
@@ -377,7 +504,52 @@ class LogicEncoder:
             # Wrap in negation
             query_formula = f"~({query_formula})"
 
-        return self.parser.parse(query_formula)
+        base = max(self.wcnf.nv, len(self.prop_to_var))
+        self.parser.top = base
+        try:
+            return self.parser.parse(query_formula)
+        finally:
+            self.parser.top = base
+
+    @classmethod
+    def from_encoded(cls, prop_ids: List[str], wcnf: WCNF,
+                     hard_clause_constraint: List[int], soft_clause_constraint: List[int],
+                     soft_constraint_weights: List[Any],
+                     soft_constraint_probabilities: List[float],
+                     hard_constraints: Optional[List[Dict[str, Any]]] = None,
+                     soft_constraints: Optional[List[Dict[str, Any]]] = None) -> "LogicEncoder":
+        """
+        Rebuild an encoder from an already encoded KB (e.g. a compiled artifact).
+
+        The encoder can encode queries; its `wcnf` is the given formula, so
+        encode() must not be called again.
+
+        Args:
+            prop_ids: Proposition IDs in variable order (P_1 -> variable 1, ...)
+            wcnf: Encoded KB
+            hard_clause_constraint: Source hard constraint index per hard clause
+            soft_clause_constraint: Source soft constraint index per soft clause
+            soft_constraint_weights: Weight as given per soft constraint
+            soft_constraint_probabilities: Weight as probability per soft constraint
+            hard_constraints: Optional descriptions (id, formula, translation) of the
+                hard constraints, kept in encoder.structure
+            soft_constraints: Same for the soft constraints
+
+        Returns:
+            LogicEncoder
+        """
+        encoder = cls({
+            'primitive_props': [{'id': prop_id} for prop_id in prop_ids],
+            'hard_constraints': list(hard_constraints or []),
+            'soft_constraints': list(soft_constraints or [])
+        })
+        encoder.wcnf = wcnf
+        encoder.parser.top = max(encoder.parser.top, wcnf.nv)  # Keep query auxiliary variables fresh
+        encoder.hard_clause_constraint = list(hard_clause_constraint)
+        encoder.soft_clause_constraint = list(soft_clause_constraint)
+        encoder.soft_constraint_weights = list(soft_constraint_weights)
+        encoder.soft_constraint_probabilities = list(soft_constraint_probabilities)
+        return encoder
 
     def get_prop_mapping(self) -> Tuple[Dict[str, int], Dict[int, str]]:
         """
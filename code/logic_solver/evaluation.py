@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+evaluation.py - Vectorized evaluation of soft constraints under models
+
+This module precompiles the soft constraints of a knowledge base into NumPy
+index arrays (one literal index per clause literal, clause offsets and
+clause-to-constraint groups), so the satisfied weight of one model, or of a
+whole batch of models, is computed with gather / reduce operations instead
+of Python loops over constraints and clauses.
+
+Soft constraints with auxiliary variables (cardinality encodings, subformula
+definitions) are judged on the propositions only: models do not assign the
+auxiliary variables of soft constraints consistently (nothing forces them), so
+such a constraint counts as satisfied iff its clauses are satisfiable with the
+model's propositions fixed.
+"""
+
+from numbers import Real
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from pysat.solvers import Solver
+
+from .clause_store import ClauseStore
+
+
+class SoftConstraintEvaluator:
+    """Precompiled soft constraints for fast model scoring."""
+
+    def __init__(self, soft_store: ClauseStore, clause_constraint: Sequence[int],
+                 constraint_weights: Sequence[Any], nv: int, num_props: Optional[int] = None,
+                 oracle: str = "g3"):
+        """
+        Compile the evaluation structure.
+
+        Args:
+            soft_store: Soft clauses (in constraint order)
+            clause_constraint: Index of the source soft constraint of each clause
+            constraint_weights: Weight of each soft constraint, as given in the
+                logified structure (see LogicEncoder.soft_constraint_weights)
+            nv: Highest variable index that may appear in models
+            num_props: Number of propositions; constraints using higher
+                (auxiliary) variables are judged on the propositions only
+                (default: None, every variable is a proposition)
+            oracle: PySAT solver for the constraints with auxiliary variables
+        """
+        self.nv = max(nv, soft_store.nv)
+        self.num_constraints = len(constraint_weights)
+
+        literals, offsets, _ = soft_store.to_numpy()
+        # Literal l is looked up at column 2*|l| (+1 if negative) of the assignment matrix
+        self.lit_index = 2 * np.abs(literals).astype(np.int64) + (literals < 0)
+
+        # Clauses: only non-empty ones can be reduced; empty clauses are never satisfied
+        lengths = np.diff(offsets)
+        self.nonempty_clauses = np.flatnonzero(lengths > 0)
+        self.clause_starts = offsets[:-1][self.nonempty_clauses]
+        self.num_clauses = len(lengths)
+
+        # Constraints: clauses of a constraint are contiguous; constraints without
+        # clauses are trivially satisfied
+        owner = np.asarray(clause_constraint, dtype=np.int64)
+        counts = np.bincount(owner, minlength=self.num_constraints) if len(owner) else \
+            np.zeros(self.num_constraints, dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1])) if self.num_constraints else counts
+        self.nonempty_constraints = np.flatnonzero(counts > 0)
+        self.constraint_starts = starts[self.nonempty_constraints]
+
+        # As before, constraints whose weight is not a number are left out
+        # (they count neither as satisfied nor in the total weight)
+        self.weights = np.array([
+            float(weight) if isinstance(weight, Real) else 0.0 for weight in constraint_weights
+        ], dtype=np.float64)
+        self.total_weight = float(self.weights.sum())
+
+        self.oracle = oracle
+        self.num_props = num_props
+        self.projected: Dict[int, List[List[int]]] = {}
+        if num_props is not None:
+            for clause, constraint in zip(soft_store, clause_constraint):
+                self.projected.setdefault(constraint, []).append(clause)
+            self.projected = {
+                constraint: clauses for constraint, clauses in self.projected.items()
+                if any(abs(lit) > num_props for clause in clauses for lit in clause)
+            }
+
+    def _assignment_matrix(self, models: Sequence[Sequence[int]]) -> np.ndarray:
+        """Boolean matrix (models x literal columns): True where the literal is in the model."""
+        matrix = np.zeros((len(models), 2 * (self.nv + 1)), dtype=bool)
+        for row, model in enumerate(models):
+            lits = np.asarray(model, dtype=np.int64)
+            lits = lits[np.abs(lits) <= self.nv]
+            matrix[row, 2 * np.abs(lits) + (lits < 0)] = True
+        return matrix
+
+    def satisfied_constraints(self, models: Sequence[Sequence[int]]) -> np.ndarray:
+        """
+        Which soft constraints each model satisfies.
+
+        A literal counts as true only if it appears in the model (variables
+        missing from a model satisfy neither polarity).
+
+        Args:
+            models: Models as lists of signed literals
+
+        Returns:
+            Boolean array of shape (len(models), num_constraints)
+        """
+        num_models = len(models)
+        lit_true = self._assignment_matrix(models)[:, self.lit_index]
+
+        clause_sat = np.zeros((num_models, self.num_clauses), dtype=bool)
+        if len(self.clause_starts):
+            clause_sat[:, self.nonempty_clauses] = np.logical_or.reduceat(lit_true, self.clause_starts, axis=1)
+
+        constraint_sat = np.ones((num_models, self.num_constraints), dtype=bool)
+        if len(self.constraint_starts):
+            constraint_sat[:, self.nonempty_constraints] = np.logical_and.reduceat(
+                clause_sat, self.constraint_starts, axis=1
+            )
+
+        for constraint, clauses in self.projected.items():
+            variables = {abs(lit) for clause in clauses for lit in clause if abs(lit) <= self.num_props}
+            with Solver(name=self.oracle, bootstrap_with=clauses) as solver:
+                for row, model in enumerate(models):
+                    constraint_sat[row, constraint] = solver.solve(
+                        assumptions=[lit for lit in model if abs(lit) in variables]
+                    )
+        return constraint_sat
+
+    def satisfied_weight(self, models: Sequence[Sequence[int]]) -> np.ndarray:
+        """
+        Total weight of the soft constraints satisfied by each model.
+
+        Args:
+            models: Models as lists of signed literals
+
+        Returns:
+            Float array of shape (len(models),)
+        """
+        return self.satisfied_constraints(models).astype(np.float64) @ self.weights
+
+    def confidence(self, models: Sequence[Sequence[int]]) -> np.ndarray:
+        """
+        Fraction of the soft constraint weight satisfied by each model.
+
+        Args:
+            models: Models as lists of signed literals
+
+        Returns:
+            Float array of shape (len(models),); 0.5 everywhere if there is no weight
+        """
+        if self.total_weight == 0:
+            return np.full(len(models), 0.5)
+        return self.satisfied_weight(models) / self.total_weight
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+federation.py - Multi-document knowledge bases
+
+A FederatedKB holds several logified documents (e.g. a master agreement and
+its amendments) under namespaced proposition IDs: proposition P_3 of document
+"master" is "master::P_3", its constraint H_1 is "master::H_1". Queries and
+cross-document linking constraints use the namespaced IDs:
+
+    kb = FederatedKB()
+    kb.add_document("master", master_structure)
+    kb.add_document("amend1", amendment_structure)
+    solver = kb.solver(links={"hard_constraints": [
+        {"id": "L_1", "formula": "amend1::P_2 ⟹ ¬master::P_5",
+         "translation": "Amendment 1 overrides clause 5"}
+    ]})
+    solver.query("master::P_3 ∧ amend1::P_1")
+
+Each document is encoded once, when added. A solver over any combination of
+documents is built by shifting the cached clause buffers of its documents to
+their variable ranges and concatenating them; only the linking constraints
+are encoded per combination.
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from pysat.formula import WCNF
+
+from .clause_store import ClauseStore
+from .encoding import LogicEncoder
+from .maxsat import LogicSolver
+
+
+NAMESPACE_SEPARATOR = "::"
+
+_NAMESPACE_PATTERN = re.compile(r'[\w.\-]+')
+_PROP_PATTERN = re.compile(r'(?<![\w:])P_(\d+)')
+
+
+def namespace_formula(formula: str, namespace: str) -> str:
+    """
+    Prefix the proposition IDs of a formula with a document namespace.
+
+    Args:
+        formula: Formula over local IDs (e.g. "P_1 ∧ P_2")
+        namespace: Document name
+
+    Returns:
+        Formula over namespaced IDs (e.g. "doc::P_1 ∧ doc::P_2")
+    """
+    return _PROP_PATTERN.sub(lambda match: f"{namespace}{NAMESPACE_SEPARATOR}{match.group(0)}", formula)
+
+
+class _Document:
+    """One encoded document: its encoder and flat clause buffers (local variables)."""
+
+    def __init__(self, name: str, structure: Dict[str, Any], encoder: LogicEncoder):
+        self.name = name
+        self.structure = structure
+        self.encoder = encoder
+        self.num_props = len(encoder.prop_to_var)
+        self.nv = max(encoder.wcnf.nv, self.num_props)
+
+        hard = ClauseStore(encoder.wcnf.hard)
+        soft = ClauseStore(encoder.wcnf.soft, encoder.wcnf.wght)
+        self.hard_literals, self.hard_offsets, _ = hard.to_numpy()
+        self.soft_literals, self.soft_offsets, self.soft_weights = soft.to_numpy()
+
+        self.prop_ids = [f"{name}{NAMESPACE_SEPARATOR}{prop_id}" for prop_id in encoder.prop_to_var]
+        self.props = [
+            dict(prop, id=f"{name}{NAMESPACE_SEPARATOR}{prop['id']}")
+            for prop in structure.get('primitive_props', [])
+        ]
+        self.hard_constraints = [self._describe(c) for c in structure.get('hard_constraints', [])]
+        self.soft_constraints = [self._describe(c) for c in structure.get('soft_constraints', [])]
+
+    def _describe(self, constraint: Dict[str, Any]) -> Dict[str, Any]:
+        """Constraint description with namespaced ID and formula."""
+        described = {key: constraint.get(key) for key in ('id', 'formula', 'translation')}
+        if described['id'] is not None:
+            described['id'] = f"{self.name}{NAMESPACE_SEPARATOR}{described['id']}"
+        if described['formula'] is not None:
+            described['formula'] = namespace_formula(described['formula'], self.name)
+        return described
+
+
+class FederatedKB:
+    """Several logified documents under namespaced proposition IDs."""
+
+    def __init__(self):
+        """Initialize an empty federation."""
+        self.documents: Dict[str, _Document] = {}
+        # Encodings by structure content hash: re-adding a document does not re-encode it
+        self._encodings: Dict[str, LogicEncoder] = {}
+        self._merged: Dict[str, LogicEncoder] = {}
+
+    def add_document(self, name: str, logified_structure: Dict[str, Any],
+                     encoder: Optional[LogicEncoder] = None):
+        """
+        Add (or replace) a document.
+
+        Args:
+            name: Document namespace (letters, digits, '_', '-', '.')
+            logified_structure: JSON structure with propositions and constraints
+            encoder: Encoder of the already encoded structure, e.g. from a compiled
+                KB artifact (default: None, encode it now unless cached)
+
+        Raises:
+            ValueError: If the name is not a valid namespace
+        """
+        if not _NAMESPACE_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid document name: {name!r}")
+
+        if encoder is None:
+            key = hashlib.sha256(json.dumps(logified_structure, sort_keys=True).encode('utf-8')).hexdigest()
+            encoder = self._encodings.get(key)
+            if encoder is None:
+                encoder = LogicEncoder(logified_structure)
+                encoder.encode()
+                self._encodings[key] = encoder
+
+        self.documents[name] = _Document(name, logified_structure, encoder)
+        self._merged = {key: merged for key, merged in self._merged.items() if name not in json.loads(key)[0]}
+
+    def remove_document(self, name: str):
+        """
+        Remove a document.
+
+        Args:
+            name: Document namespace
+        """
+        del self.documents[name]
+        self._merged = {key: merged for key, merged in self._merged.items() if name not in json.loads(key)[0]}
+
+    def encoder(self, documents: Optional[Sequence[str]] = None,
+                links: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> LogicEncoder:
+        """
+        Merged encoder over some documents plus linking constraints.
+
+        Variables are laid out document after document (propositions first, in
+        document order), followed by any auxiliary variables of the documents
+        and of the links. Merged encoders are cached per combination.
+
+        Args:
+            documents: Document names (default: all, in insertion order)
+            links: Linking constraints over namespaced IDs, as
+                {"hard_constraints": [...], "soft_constraints": [...]} in the
+                logified format (default: None)
+
+        Returns:
+            LogicEncoder (see LogicEncoder.from_encoded) whose structure lists the
+            namespaced propositions and constraints
+
+        Raises:
+            KeyError: If a document is unknown
+            ValueError: If a linking constraint cannot be parsed
+        """
+        names = list(documents) if documents is not None else list(self.documents)
+        links = links or {}
+        key = json.dumps([names, links], sort_keys=True)
+        merged = self._merged.get(key)
+        if merged is None:
+            merged = self._merge([self.documents[name] for name in names], links)
+            self._merged[key] = merged
+        return merged
+
+    def solver(self, documents: Optional[Sequence[str]] = None,
+               links: Optional[Dict[str, List[Dict[str, Any]]]] = None, **kwargs) -> LogicSolver:
+        """
+        LogicSolver over some documents plus linking constraints.
+
+        Args:
+            documents: Document names (default: all)
+            links: Linking constraints (see encoder)
+            **kwargs: Passed to LogicSolver.__init__
+
+        Returns:
+            LogicSolver answering queries over namespaced IDs
+        """
+        encoder = self.encoder(documents, links)
+        return LogicSolver(encoder.structure, encoder=encoder, **kwargs)
+
+    def _merge(self, documents: List[_Document], links: Dict[str, List[Dict[str, Any]]]) -> LogicEncoder:
+        """Concatenate the shifted clause buffers of the documents and encode the links."""
+        total_props = sum(document.num_props for document in documents)
+        prop_ids = [prop_id for document in documents for prop_id in document.prop_ids]
+
+        hard_literals, hard_lengths, hard_owner = [], [], []
+        soft_literals, soft_lengths, soft_owner, soft_weights = [], [], [], []
+        soft_constraint_weights, soft_constraint_probabilities = [], []
+        hard_constraints, soft_constraints = [], []
+
+        prop_offset = 0
+        aux_offset = total_props
+        for document in documents:
+            shift = _variable_shift(document.num_props, prop_offset, aux_offset)
+            encoder = document.encoder
+
+            hard_literals.append(shift(document.hard_literals))
+            hard_lengths.append(np.diff(document.hard_offsets))
+            hard_owner.append(np.asarray(encoder.hard_clause_constraint, dtype=np.int64) + len(hard_constraints))
+            soft_literals.append(shift(document.soft_literals))
+            soft_lengths.append(np.diff(document.soft_offsets))
+            soft_owner.append(np.asarray(encoder.soft_clause_constraint, dtype=np.int64) + len(soft_constraints))
+            soft_weights.append(document.soft_weights)
+
+            soft_constraint_weights.extend(encoder.soft_constraint_weights)
+            soft_constraint_probabilities.extend(encoder.soft_constraint_probabilities)
+            hard_constraints.extend(document.hard_constraints)
+            soft_constraints.extend(document.soft_constraints)
+
+            prop_offset += document.num_props
+            aux_offset += document.nv - document.num_props
+
+        # Linking constraints: encoded over the merged proposition order (so their
+        # proposition variables already match); their auxiliary variables are shifted
+        # above the documents' ones
+        if links.get('hard_constraints') or links.get('soft_constraints'):
+            link_encoder = LogicEncoder({
+                'primitive_props': [{'id': prop_id} for prop_id in prop_ids],
+                'hard_constraints': links.get('hard_constraints', []),
+                'soft_constraints': links.get('soft_constraints', [])
+            })
+            link_wcnf = link_encoder.encode()
+            shift = _variable_shift(total_props, 0, aux_offset)
+            link_hard = ClauseStore(link_wcnf.hard)
+            link_soft = ClauseStore(link_wcnf.soft, link_wcnf.wght)
+            for store, literals, lengths, owner, clause_owner, constraints in (
+                (link_hard, hard_literals, hard_lengths, hard_owner,
+                 link_encoder.hard_clause_constraint, hard_constraints),
+                (link_soft, soft_literals, soft_lengths, soft_owner,
+                 link_encoder.soft_clause_constraint, soft_constraints)
+            ):
+                store_literals, store_offsets, _ = store.to_numpy()
+                literals.append(shift(store_literals))
+                lengths.append(np.diff(store_offsets))
+                owner.append(np.asarray(clause_owner, dtype=np.int64) + len(constraints))
+            soft_weights.append(link_soft.to_numpy()[2])
+
+            soft_constraint_weights.extend(link_encoder.soft_constraint_weights)
+            soft_constraint_probabilities.extend(link_encoder.soft_constraint_probabilities)
+            hard_constraints.extend(_describe_links(links.get('hard_constraints', []), 'L_H'))
+            soft_constraints.extend(_describe_links(links.get('soft_constraints', []), 'L_S'))
+            aux_offset += max(link_wcnf.nv - total_props, 0)
+
+        hard = _store(hard_literals, hard_lengths)
+        soft = _store(soft_literals, soft_lengths, soft_weights)
+
+        wcnf = WCNF()
+        wcnf.hard = hard.to_lists()
+        wcnf.soft = soft.to_lists()
+        wcnf.wght = soft.weights.tolist()
+        wcnf.nv = max(aux_offset, hard.nv, soft.nv)
+        wcnf.topw = 1 + sum(wcnf.wght)
+
+        encoder = LogicEncoder.from_encoded(
+            prop_ids,
+            wcnf,
+            np.concatenate(hard_owner).tolist() if hard_owner else [],
+            np.concatenate(soft_owner).tolist() if soft_owner else [],
+            soft_constraint_weights,
+            soft_constraint_probabilities,
+            hard_constraints=hard_constraints,
+            soft_constraints=soft_constraints
+        )
+        encoder.structure['primitive_props'] = [prop for document in documents for prop in document.props]
+        return encoder
+
+
+def _variable_shift(num_props: int, prop_offset: int, aux_offset: int):
+    """
+    Map local variables to merged ones: propositions 1..num_props go to
+    prop_offset + 1.., auxiliary variables above num_props go to aux_offset + 1..
+    """
+    def shift(literals: np.ndarray) -> np.ndarray:
+        variables = np.abs(literals).astype(np.int64)
+        shifted = np.where(variables <= num_props, variables + prop_offset, variables - num_props + aux_offset)
+        return (np.sign(literals) * shifted).astype(np.int32)
+    return shift
+
+
+def _store(literals: List[np.ndarray], lengths: List[np.ndarray],
+           weights: Optional[List[np.ndarray]] = None) -> ClauseStore:
+    """Clause store over concatenated literal buffers."""
+    offsets = np.zeros(sum(len(part) for part in lengths) + 1, dtype=np.int64)
+    if len(offsets) > 1:
+        np.cumsum(np.concatenate(lengths), out=offsets[1:])
+    flat = np.concatenate(literals) if literals else np.zeros(0, dtype=np.int32)
+    flat_weights = None
+    if weights is not None:
+        flat_weights = np.concatenate(weights) if weights else np.zeros(0, dtype=np.int64)
+    return ClauseStore.from_buffers(flat, offsets, flat_weights)
+
+
+def _describe_links(constraints: List[Dict[str, Any]], prefix: str) -> List[Dict[str, Any]]:
+    """Descriptions of linking constraints (IDs default to L_H_1, L_S_1, ...)."""
+    return [
+        {
+            "id": constraint.get('id') or f"{prefix}_{index + 1}",
+            "formula": constraint.get('formula'),
+            "translation": constraint.get('translation')
+        }
+        for index, constraint in enumerate(constraints)
+    ]
@@ -1,24 +1,63 @@
 #!/usr/bin/env python3
 """
-maxsat.py - Interface to PySAT RC2 MaxSAT solver
+maxsat.py - Interface to PySAT MaxSAT solvers
 
 This module provides the interface for checking entailment and consistency
-using the RC2 MaxSAT solver from PySAT.
+using the MaxSAT solvers from PySAT (RC2 by default, see backends.py).
 """
 
+import copy
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
+import numpy as np
 from pysat.formula import WCNF
-from pysat.examples.rc2 import RC2
 from pysat.solvers import Solver
 
+from instrumentation import TRACER
+
 from .encoding import LogicEncoder, encode_logified_structure
+from .backends import (
+    DEFAULT_MAXSAT_BACKEND,
+    DEFAULT_SAT_ORACLE,
+    MAXSAT_BACKENDS,
+    UNWEIGHTED_ONLY_BACKENDS,
+    autotune_backend,
+    greedy_maxsat,
+    is_weighted,
+    resolve_oracle,
+    solve_maxsat_bounded
+)
+from .clause_store import (
+    ClauseStore,
+    IncrementalOracle,
+    list_clauses_nbytes,
+    solve_limited,
+    stores_fingerprint,
+    wcnf_fingerprint
+)
+from .evaluation import SoftConstraintEvaluator
+from .compiled import DEFAULT_NODE_BUDGET, CompilationBudgetExceeded, CompiledKB
+from .artifact import KBArtifact
+from .result_cache import QueryResultCache, canonical_cnf, structure_fingerprint
+from .wmc import WeightedModelCounter, WMCBudgetExceeded, estimate_probability
+
+
+CONFIDENCE_MODES = ('maxsat', 'wmc')
+
+
+class SolverBudgetExceeded(Exception):
+    """Raised when a solver call exhausts its time or conflict budget without an answer."""
 
 
 class SolverResult:
     """Result of a solver query."""
 
     def __init__(self, answer: str, confidence: float, model: Optional[List[int]] = None,
-                 explanation: Optional[str] = None):
+                 explanation: Optional[str] = None, bounded: bool = False,
+                 core: Optional[List[Dict[str, Any]]] = None):
         """
         Initialize solver result.
 
@@ -27,11 +66,18 @@ class SolverResult:
             confidence: Confidence score in [0, 1]
             model: Satisfying assignment (if SAT)
             explanation: Human-readable explanation
+            bounded: True if a time/conflict budget was exceeded, i.e. the result
+                relies on the best model found so far instead of a proven optimum
+            core: For TRUE/FALSE answers of queries made with explain=True, a
+                minimal set of constraints that forces the answer (dicts with id,
+                type, formula and translation)
         """
         self.answer = answer
         self.confidence = confidence
         self.model = model
         self.explanation = explanation
+        self.bounded = bounded
+        self.core = core
 
     def __repr__(self):
         return f"SolverResult(answer={self.answer}, confidence={self.confidence:.3f})"
@@ -41,26 +87,255 @@ class SolverResult:
         return {
             "answer": self.answer,
             "confidence": self.confidence,
-            "explanation": self.explanation
+            "explanation": self.explanation,
+            "bounded": self.bounded,
+            "core": self.core
         }
 
 
+def _with_core(explanation: str, core: Optional[List[Dict[str, Any]]]) -> str:
+    """Append the IDs of a core's constraints to an explanation."""
+    if not core:
+        return explanation
+    return f"{explanation}; because of {', '.join(constraint['id'] for constraint in core)}"
+
+
 class LogicSolver:
     """MaxSAT-based logic solver for entailment and consistency checking."""
 
-    def __init__(self, logified_structure: Dict[str, Any]):
+    def __init__(self, logified_structure: Dict[str, Any],
+                 maxsat_backend: str = DEFAULT_MAXSAT_BACKEND,
+                 sat_oracle: str = DEFAULT_SAT_ORACLE,
+                 time_budget: Optional[float] = None,
+                 conflict_budget: Optional[int] = None,
+                 compile_kb: bool = False,
+                 compiled_path: Optional[str] = None,
+                 compile_node_budget: int = DEFAULT_NODE_BUDGET,
+                 confidence_mode: str = 'maxsat',
+                 encoder: Optional[LogicEncoder] = None,
+                 result_cache: Optional[QueryResultCache] = None,
+                 stores: Optional[Tuple[ClauseStore, ClauseStore]] = None):
         """
         Initialize solver with logified structure.
 
         Args:
             logified_structure: JSON structure with propositions and constraints
+            maxsat_backend: MaxSAT algorithm (see backends.MAXSAT_BACKENDS), or "auto"
+                to benchmark all backends on this KB and keep the fastest (default: rc2)
+            sat_oracle: SAT oracle used by the MaxSAT algorithm and SAT checks
+                (see backends.SAT_ORACLES, default: glucose3)
+            time_budget: Wall-clock budget in seconds for a whole query, shared by
+                all SAT/MaxSAT calls it makes (default: None, unbounded)
+            conflict_budget: Conflict budget for each SAT call (default: None, unbounded)
+            compile_kb: Compile the KB into an OBDD and answer queries from it instead
+                of calling SAT/MaxSAT solvers (see compiled.py, default: False)
+            compiled_path: Where to load/save the compiled KB, e.g.
+                compiled_path_for("doc_weighted.json") (default: None, not persisted)
+            compile_node_budget: Node budget for compilation; beyond it the solver
+                falls back to SAT/MaxSAT (default: compiled.DEFAULT_NODE_BUDGET)
+            confidence_mode: How entailment confidence is computed: "maxsat" (ratio of
+                MaxSAT costs of KB ∧ ¬Q and KB ∧ Q) or "wmc" (P(Q | hard constraints) by
+                weighted model counting, soft constraint weights as probabilities)
+            encoder: Encoder of an already encoded KB (see LogicEncoder.from_encoded);
+                if given, logified_structure is not encoded again (default: None)
+            result_cache: Cache of query results keyed by KB content hash (clauses and
+                texts) and canonical query CNF, e.g. the process-wide
+                result_cache.RESULT_CACHE (default: None, no caching)
+            stores: Hard and soft clause stores of the encoded KB, e.g. over the
+                buffers of a compiled artifact (default: None, built from the wcnf)
         """
+        if confidence_mode not in CONFIDENCE_MODES:
+            raise ValueError(f"Unknown confidence mode: {confidence_mode}. Available: {', '.join(CONFIDENCE_MODES)}")
+
         self.structure = logified_structure
-        self.encoder = LogicEncoder(logified_structure)
-        self.base_wcnf = self.encoder.encode()
+        self.confidence_mode = confidence_mode
+        self.maxsat_backend = maxsat_backend
+        self.sat_oracle = sat_oracle
+        self.autotune_report: Optional[Dict[str, Any]] = None
+        self.time_budget = time_budget
+        self.conflict_budget = conflict_budget
+        self._deadline: Optional[float] = None
+        self._budget_depth = 0
+        self._budget_exceeded = False
+        if encoder is not None:
+            self.encoder = encoder
+            self.base_wcnf = encoder.wcnf
+        else:
+            with TRACER.span("solver.encode"):
+                self.encoder = LogicEncoder(logified_structure)
+                self.base_wcnf = self.encoder.encode()
+            TRACER.count("solver.clauses", len(self.base_wcnf.hard) + len(self.base_wcnf.soft))
         self.prop_to_var, self.var_to_prop = self.encoder.get_prop_mapping()
 
-    def check_entailment(self, query_formula: str) -> SolverResult:
+        # Flat copies of the KB clauses (see clause_store.py) and the persistent
+        # SAT oracle over the hard clauses (created on first use)
+        if stores is not None:
+            self.hard_store, self.soft_store = stores
+        else:
+            self.hard_store = ClauseStore(self.base_wcnf.hard)
+            self.soft_store = ClauseStore(self.base_wcnf.soft, self.base_wcnf.wght)
+        self._oracle: Optional[IncrementalOracle] = None
+        self._last_core: Optional[List[Tuple[str, int]]] = None  # Core of the last UNSAT oracle check
+        self._evaluator: Optional[SoftConstraintEvaluator] = None
+        self._counter: Optional[WeightedModelCounter] = None
+        self.artifact: Optional[KBArtifact] = None
+        self._oracle_setup_time = 0.0
+        self._setup_time = 0.0
+        self.last_query_stats: Dict[str, float] = {}
+        self.result_cache = result_cache
+        self._fingerprint: Optional[str] = None
+        self._canonical_queries: Dict[str, Tuple] = {}
+
+        # Query-independent MaxSAT optimum of the KB (computed lazily, see _get_kb_optimum)
+        self._kb_optimum_computed = False
+        self._kb_optimum_cost: Optional[int] = None
+        self._kb_optimum_model: Optional[List[int]] = None
+
+        # Compiled KB (see compiled.py); None means SAT/MaxSAT solving
+        self.compiled: Optional[CompiledKB] = None
+        self.compile_report: Optional[Dict[str, Any]] = None
+        if compile_kb:
+            self._load_or_compile(compiled_path, compile_node_budget)
+
+        if maxsat_backend == 'auto':
+            self.autotune()
+        else:
+            # Fail early on unknown or unsuitable backends / oracles
+            resolve_oracle(sat_oracle)
+            if maxsat_backend not in MAXSAT_BACKENDS:
+                raise ValueError(f"Unknown MaxSAT backend: {maxsat_backend}")
+            if maxsat_backend in UNWEIGHTED_ONLY_BACKENDS and is_weighted(self.base_wcnf):
+                raise ValueError(f"MaxSAT backend '{maxsat_backend}' does not support weighted soft constraints")
+
+    @classmethod
+    def from_compiled(cls, path: str, source_path: Optional[str] = None,
+                      allow_unchecked: bool = False, **kwargs) -> "LogicSolver":
+        """
+        Create a solver from a compiled-KB artifact (see artifact.py), without
+        parsing the logified JSON or encoding its formulas. The solver's clause
+        stores wrap the memory-mapped buffers.
+
+        Args:
+            path: Path of the `*_weighted.kb` artifact
+            source_path: Logified JSON the artifact must match (default: the
+                `.json` file next to the artifact, if it exists)
+            allow_unchecked: Load the artifact even if there is no JSON to check
+                it against (default: False, raise)
+            **kwargs: Passed to LogicSolver.__init__
+
+        Returns:
+            LogicSolver (with the artifact available as solver.artifact)
+
+        Raises:
+            ValueError: If the artifact is invalid or stale, or cannot be checked
+                and allow_unchecked is False
+        """
+        artifact = KBArtifact(path)
+
+        if source_path is None:
+            candidate = Path(path).with_suffix(".json")
+            if candidate.exists():
+                source_path = str(candidate)
+        if source_path is not None:
+            artifact.validate(source_path)
+        elif not allow_unchecked:
+            raise ValueError(f"Cannot check whether compiled KB artifact {path} is stale: "
+                             f"no source JSON found (pass source_path, or allow_unchecked=True)")
+
+        encoder = artifact.encoder()
+        solver = cls(encoder.structure, encoder=encoder, stores=encoder.wcnf.stores, **kwargs)
+        solver.artifact = artifact
+        return solver
+
+    def autotune(self, probe_formulas: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Benchmark MaxSAT backends and SAT oracles on this KB and keep the fastest.
+
+        Args:
+            probe_formulas: Query formulas used as probe instances
+                (default: the first few primitive propositions as unit queries)
+            **kwargs: Passed to backends.autotune_backend (backends, oracles, repeats,
+                time_limit)
+
+        Returns:
+            Auto-tuning report (best backend/oracle, weight spread, timings)
+        """
+        if probe_formulas is None:
+            probe_formulas = list(self.prop_to_var)[:4]
+
+        probe_clauses = [self.encoder.encode_query(formula) for formula in probe_formulas]
+        report = autotune_backend(self.base_wcnf, probe_clauses=probe_clauses, **kwargs)
+
+        self.maxsat_backend = report["backend"]
+        self.sat_oracle = report["oracle"]
+        self.autotune_report = report
+        return report
+
+    def _load_or_compile(self, compiled_path: Optional[str], node_budget: int):
+        """
+        Load the compiled KB from compiled_path if it is up to date, else compile it.
+
+        Args:
+            compiled_path: Path of the persisted compiled KB (or None)
+            node_budget: Node budget for compilation
+        """
+        start = time.perf_counter()
+        nv = max(self.base_wcnf.nv, len(self.prop_to_var))
+        fingerprint = wcnf_fingerprint(self.base_wcnf)
+
+        if compiled_path is not None and os.path.exists(compiled_path):
+            try:
+                compiled = CompiledKB.load(compiled_path, node_budget=node_budget)
+                if compiled.fingerprint == fingerprint and compiled.nv == nv:
+                    self.compiled = compiled
+                    self.compile_report = {
+                        "status": "loaded",
+                        "nodes": compiled.size,
+                        "time": time.perf_counter() - start
+                    }
+                    return
+            except (ValueError, KeyError, OSError):
+                pass  # Stale or unreadable file: recompile
+
+        try:
+            self.compiled = CompiledKB.compile(self.base_wcnf, nv, node_budget=node_budget)
+        except CompilationBudgetExceeded:
+            self.compile_report = {
+                "status": "budget_exceeded",
+                "nodes": None,
+                "time": time.perf_counter() - start
+            }
+            return
+
+        if compiled_path is not None:
+            self.compiled.save(compiled_path)
+
+        self.compile_report = {
+            "status": "compiled",
+            "nodes": self.compiled.size,
+            "time": time.perf_counter() - start
+        }
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Size of the loaded KB.
+
+        Returns:
+            Dict with clause/literal counts, bytes used by the flat clause store,
+            the estimated bytes of the same clauses as Python lists, and the
+            one-time setup time of the persistent SAT oracle
+        """
+        return {
+            "num_vars": max(self.base_wcnf.nv, len(self.prop_to_var)),
+            "num_hard_clauses": len(self.hard_store),
+            "num_soft_clauses": len(self.soft_store),
+            "num_literals": self.hard_store.num_literals + self.soft_store.num_literals,
+            "store_bytes": self.hard_store.nbytes + self.soft_store.nbytes,
+            "list_bytes": list_clauses_nbytes(self.base_wcnf.hard) + list_clauses_nbytes(self.base_wcnf.soft),
+            "oracle_setup_time": self._oracle_setup_time
+        }
+
+    def check_entailment(self, query_formula: str, explain: bool = False) -> SolverResult:
         """
         Check if query is entailed by the knowledge base.
 
@@ -68,42 +343,178 @@ class LogicSolver:
 
         Args:
             query_formula: Propositional formula (e.g., "P_1", "P_3 => P_4")
+            explain: Attach the minimal core of a TRUE/FALSE answer (see query)
 
         Returns:
             SolverResult with answer TRUE/FALSE/UNCERTAIN and confidence
         """
+        with self._query_budget():
+            return self._finish(self._check_entailment, query_formula, explain)
+
+    def check_consistency(self, query_formula: str, explain: bool = False) -> SolverResult:
+        """
+        Check if query is consistent with the knowledge base.
+
+        Consistency check: KB ∧ Q is SAT
+
+        Args:
+            query_formula: Propositional formula
+            explain: Attach the minimal core of a FALSE answer (see query)
+
+        Returns:
+            SolverResult with answer TRUE (consistent) / FALSE (inconsistent) / UNCERTAIN
+        """
+        with self._query_budget():
+            return self._finish(self._check_consistency, query_formula, explain)
+
+    def query(self, query_formula: str, explain: bool = False) -> SolverResult:
+        """
+        Main query interface: check if query follows from the knowledge base.
+
+        This combines entailment and consistency checking to provide a comprehensive answer.
+        With a time budget, the whole query (all of its solver calls) is bounded.
+
+        Args:
+            query_formula: Propositional formula
+            explain: Shrink the core of the SAT check behind a TRUE/FALSE answer
+                to a minimal set of constraints (result.core); this costs about
+                one oracle call per constraint in the core. Answers from a
+                compiled KB make no SAT check and get no core; explain() computes
+                one on request (default: False)
+
+        Returns:
+            SolverResult with TRUE (entailed) / FALSE (contradicted) / UNCERTAIN
+        """
+        with self._query_budget():
+            return self._finish(self._query, query_formula, explain)
+
+    @contextmanager
+    def _query_budget(self):
+        """
+        Open a budget scope for a public query call.
+
+        The outermost call sets the deadline and resets the budget flag; nested
+        calls (e.g. query -> check_entailment) share them.
+        """
+        if self._budget_depth == 0:
+            self._budget_exceeded = False
+            self._setup_time = 0.0
+            start = time.perf_counter()
+            if self.time_budget is not None:
+                self._deadline = start + self.time_budget
+        self._budget_depth += 1
+        try:
+            yield
+        finally:
+            self._budget_depth -= 1
+            if self._budget_depth == 0:
+                self._deadline = None
+                self.last_query_stats = {
+                    "setup_time": self._setup_time,
+                    "total_time": time.perf_counter() - start
+                }
+                TRACER.record("solver.query", self.last_query_stats["total_time"], start=start)
+
+    def _finish(self, method, query_formula: str, explain: bool = False) -> SolverResult:
+        """
+        Run a query method and flag its result if a budget was exceeded.
+
+        Results are looked up in / stored to the result cache; bounded and
+        error results are not cached.
+        """
+        key = self._result_key(method.__name__ + (":explain" if explain else ""), query_formula)
+        if key is not None:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                TRACER.count("solver.cache_hits")
+                return copy.copy(cached)
+            TRACER.count("solver.cache_misses")
+
         try:
-            # Create a copy of the base WCNF
-            wcnf = self._copy_wcnf(self.base_wcnf)
+            result = method(query_formula, explain)
+        except SolverBudgetExceeded:
+            result = SolverResult(
+                answer="UNCERTAIN",
+                confidence=0.5,
+                explanation="Solver budget exceeded before the query could be decided"
+            )
+        result.bounded = self._budget_exceeded
 
-            # Add ¬Q as hard clauses
-            negated_query_clauses = self.encoder.encode_query(query_formula, negate=True)
-            for clause in negated_query_clauses:
-                wcnf.append(clause)  # Hard clause
+        if key is not None and not result.bounded and not result.explanation.startswith("Error"):
+            self.result_cache.put(key, copy.copy(result))
+        return result
+
+    def _result_key(self, method_name: str, query_formula: str) -> Optional[Tuple]:
+        """
+        Result cache key: KB content hash, query type, solver configuration and
+        canonical query CNF (None if caching is disabled or the query does not parse).
+
+        The KB hash covers the clauses and the texts of the structure, since
+        cached results carry explanations and cores quoting those texts.
+        """
+        if self.result_cache is None:
+            return None
+
+        # Nested calls (query -> check_entailment -> ...) reuse the canonical form
+        canonical = self._canonical_queries.get(query_formula)
+        if canonical is None:
+            try:
+                canonical = canonical_cnf(self._encode_query(query_formula, negate=False))
+            except Exception:
+                return None
+            if len(self._canonical_queries) >= 1024:
+                self._canonical_queries.clear()
+            self._canonical_queries[query_formula] = canonical
+
+        if self._fingerprint is None:
+            self._fingerprint = (stores_fingerprint(self.hard_store, self.soft_store) + ":"
+                                 + structure_fingerprint(self.structure))
+        config = (self.confidence_mode, self.maxsat_backend, self.sat_oracle, self.compiled is not None,
+                  self.time_budget, self.conflict_budget)
+        return (self._fingerprint, method_name, config, canonical)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Statistics of the result cache (see result_cache.QueryResultCache.stats)."""
+        if self.result_cache is None:
+            return {"hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0}
+        return self.result_cache.stats()
+
+    def _remaining_time(self) -> Optional[float]:
+        """Seconds left before the current query's deadline (None if unbounded)."""
+        if self._deadline is None:
+            return None
+        return self._deadline - time.perf_counter()
+
+    def _check_entailment(self, query_formula: str, explain: bool = False) -> SolverResult:
+        """Entailment check (see check_entailment)."""
+        try:
+            # ¬Q as hard clauses
+            negated_query_clauses = self._encode_query(query_formula, negate=True)
 
             # Check satisfiability of KB ∧ ¬Q
             # If UNSAT, then KB ⊨ Q (query is entailed)
             # If SAT, then KB ⊭ Q (query is not entailed)
 
             # First check if it's SAT/UNSAT with hard constraints only
-            hard_only = self._extract_hard_clauses(wcnf)
-            is_sat, model = self._check_sat(hard_only)
+            is_sat, model = self._check_query_sat(negated_query_clauses)
 
             if not is_sat:
                 # UNSAT: Query is entailed by hard constraints alone
                 # Compute how strongly soft constraints support Q being true
+                core = self._minimal_core(negated_query_clauses, self._last_core) if explain else None
                 soft_confidence = self._compute_confidence_for_entailment(query_formula)
                 return SolverResult(
                     answer="TRUE",
                     confidence=soft_confidence,
                     model=None,
-                    explanation="Query is entailed by the hard constraints (KB ∧ ¬Q is unsatisfiable)"
+                    explanation=_with_core("Query is entailed by the hard constraints (KB ∧ ¬Q is unsatisfiable)", core),
+                    core=core
                 )
 
 
             # SAT with hard constraints: Check soft constraints
-            # Use RC2 to find optimal model considering soft constraints
-            optimal_cost = self._solve_maxsat(wcnf)
+            # Use the MaxSAT backend to find optimal model considering soft constraints
+            optimal_cost = self._solve_query_maxsat(negated_query_clauses)
 
             if optimal_cost is None:
                 # UNSAT even with soft constraints
@@ -116,7 +527,7 @@ class LogicSolver:
 
             # SAT: Query is not necessarily entailed
             # Now check if Q itself is consistent
-            consistency_result = self.check_consistency(query_formula)
+            consistency_result = self.check_consistency(query_formula, explain)
 
             if consistency_result.answer == "FALSE":
                 # Q is inconsistent with KB, so ¬Q is entailed
@@ -126,7 +537,8 @@ class LogicSolver:
                     answer="FALSE",
                     confidence=soft_confidence,
                     model=model,
-                    explanation="Query is contradicted by the knowledge base"
+                    explanation=_with_core("Query is contradicted by the knowledge base", consistency_result.core),
+                    core=consistency_result.core
                 )
 
 
@@ -141,6 +553,8 @@ class LogicSolver:
                 explanation="Query is neither entailed nor contradicted by the knowledge base"
             )
 
+        except SolverBudgetExceeded:
+            raise
         except Exception as e:
             return SolverResult(
                 answer="UNCERTAIN",
@@ -148,30 +562,14 @@ class LogicSolver:
                 explanation=f"Error during solving: {str(e)}"
             )
 
-    def check_consistency(self, query_formula: str) -> SolverResult:
-        """
-        Check if query is consistent with the knowledge base.
-
-        Consistency check: KB ∧ Q is SAT
-
-        Args:
-            query_formula: Propositional formula
-
-        Returns:
-            SolverResult with answer TRUE (consistent) / FALSE (inconsistent) / UNCERTAIN
-        """
+    def _check_consistency(self, query_formula: str, explain: bool = False) -> SolverResult:
+        """Consistency check (see check_consistency)."""
         try:
-            # Create a copy of the base WCNF
-            wcnf = self._copy_wcnf(self.base_wcnf)
-
-            # Add Q as hard clauses
-            query_clauses = self.encoder.encode_query(query_formula, negate=False)
-            for clause in query_clauses:
-                wcnf.append(clause)  # Hard clause
+            # Q as hard clauses
+            query_clauses = self._encode_query(query_formula, negate=False)
 
             # Check satisfiability of KB ∧ Q
-            hard_only = self._extract_hard_clauses(wcnf)
-            is_sat, model = self._check_sat(hard_only)
+            is_sat, model = self._check_query_sat(query_clauses)
 
             if is_sat:
                 # SAT: Query is consistent
@@ -186,13 +584,17 @@ class LogicSolver:
                 )
             else:
                 # UNSAT: Query is inconsistent
+                core = self._minimal_core(query_clauses, self._last_core) if explain else None
                 return SolverResult(
                     answer="FALSE",
                     confidence=0.0,  # Q cannot be true
                     model=None,
-                    explanation="Query is inconsistent with the knowledge base (KB ∧ Q is unsatisfiable)"
+                    explanation=_with_core("Query is inconsistent with the knowledge base (KB ∧ Q is unsatisfiable)", core),
+                    core=core
                 )
 
+        except SolverBudgetExceeded:
+            raise
         except Exception as e:
             return SolverResult(
                 answer="UNCERTAIN",
@@ -200,20 +602,10 @@ class LogicSolver:
                 explanation=f"Error during solving: {str(e)}"
             )
 
-    def query(self, query_formula: str) -> SolverResult:
-        """
-        Main query interface: check if query follows from the knowledge base.
-
-        This combines entailment and consistency checking to provide a comprehensive answer.
-
-        Args:
-            query_formula: Propositional formula
-
-        Returns:
-            SolverResult with TRUE (entailed) / FALSE (contradicted) / UNCERTAIN
-        """
+    def _query(self, query_formula: str, explain: bool = False) -> SolverResult:
+        """Combined entailment/consistency query (see query)."""
         # First check entailment
-        entailment_result = self.check_entailment(query_formula)
+        entailment_result = self.check_entailment(query_formula, explain)
 
         if entailment_result.answer == "TRUE":
             # Query is entailed
@@ -223,13 +615,13 @@ class LogicSolver:
             return entailment_result
         else:
             # UNCERTAIN: Query is neither entailed nor contradicted
-            # But first check if there was an error
-            if "Error" in entailment_result.explanation:
-                # Propagate the error
+            # But first check if there was an error or the budget ran out
+            if entailment_result.bounded or "Error" in entailment_result.explanation:
+                # Propagate the error / undecided result
                 return entailment_result
 
             # Check consistency to refine the answer
-            consistency_result = self.check_consistency(query_formula)
+            consistency_result = self.check_consistency(query_formula, explain)
 
             if consistency_result.answer == "FALSE":
                 # Query is inconsistent (contradicted)
@@ -238,12 +630,13 @@ class LogicSolver:
                 return SolverResult(
                     answer="FALSE",
                     confidence=soft_confidence,
-                    explanation="Query is contradicted by the knowledge base"
+                    explanation=_with_core("Query is contradicted by the knowledge base", consistency_result.core),
+                    core=consistency_result.core
                 )
 
             else:
-                # Check if consistency had an error
-                if "Error" in consistency_result.explanation:
+                # Check if consistency had an error or ran out of budget
+                if consistency_result.bounded or "Error" in consistency_result.explanation:
                     return consistency_result
 
                 # Query is consistent but not entailed
@@ -256,26 +649,184 @@ class LogicSolver:
                 )
 
     def _copy_wcnf(self, wcnf: WCNF) -> WCNF:
-        """Create a copy of a WCNF formula."""
+        """
+        Create a copy of a WCNF formula that clauses can be appended to.
+
+        Only the clause lists are copied; the clauses themselves are shared
+        (they are never modified, see backends._copy_for_backend).
+        """
         new_wcnf = WCNF()
+        new_wcnf.nv = wcnf.nv
+        new_wcnf.topw = wcnf.topw
+        new_wcnf.hard = list(wcnf.hard)
+        new_wcnf.soft = list(wcnf.soft)
+        new_wcnf.wght = list(wcnf.wght)
+        return new_wcnf
 
-        # Copy hard clauses
-        for clause in wcnf.hard:
-            new_wcnf.append(clause)
+    def _query_wcnf(self, query_clauses: List[List[int]]) -> WCNF:
+        """
+        Build the MaxSAT instance KB ∧ query (query clauses are hard).
 
-        # Copy soft clauses with weights
-        for clause, weight in zip(wcnf.soft, wcnf.wght):
-            if weight > 0:  # Only copy if weight is set
-                new_wcnf.append(clause, weight=weight)
+        Args:
+            query_clauses: CNF clauses of the (possibly negated) query
 
-        return new_wcnf
+        Returns:
+            WCNF sharing the KB clauses with the base formula
+        """
+        start = time.perf_counter()
+        wcnf = self._copy_wcnf(self.base_wcnf)
+        wcnf.hard.extend(query_clauses)
+        for clause in query_clauses:
+            wcnf.nv = max(wcnf.nv, max((abs(lit) for lit in clause), default=0))
+        self._setup_time += time.perf_counter() - start
+        return wcnf
+
+    def _encode_query(self, query_formula: str, negate: bool = False) -> List[List[int]]:
+        """Encode a query (see LogicEncoder.encode_query), counting it as setup time."""
+        start = time.perf_counter()
+        clauses = self.encoder.encode_query(query_formula, negate=negate)
+        self._setup_time += time.perf_counter() - start
+        return clauses
 
     def _extract_hard_clauses(self, wcnf: WCNF) -> List[List[int]]:
-        """Extract only hard clauses from WCNF."""
-        hard_clauses = []
-        for clause in wcnf.hard:
-            hard_clauses.append(clause)
-        return hard_clauses
+        """Extract only hard clauses from WCNF (shared, not copied)."""
+        return wcnf.hard
+
+    def _get_oracle(self) -> IncrementalOracle:
+        """
+        Persistent SAT oracle over the KB hard clauses (bootstrapped once).
+
+        Each hard constraint is a clause group ('hard', index), so unsatisfiable
+        checks yield cores in terms of constraints (see _minimal_core).
+        """
+        if self._oracle is None:
+            start = time.perf_counter()
+            self._oracle = IncrementalOracle(
+                self.hard_store,
+                resolve_oracle(self.sat_oracle),
+                nv=max(self.base_wcnf.nv, len(self.prop_to_var)),
+                clause_groups=[('hard', index) for index in self.encoder.hard_clause_constraint]
+            )
+            self._oracle_setup_time = time.perf_counter() - start
+        return self._oracle
+
+    def _check_query_sat(self, query_clauses: List[List[int]]) -> Tuple[bool, Optional[List[int]]]:
+        """
+        Check satisfiability of KB hard clauses ∧ query clauses.
+
+        Uses the persistent incremental oracle, so the KB is not re-loaded;
+        queries mentioning variables outside the KB use a fresh solver.
+
+        Args:
+            query_clauses: CNF clauses of the (possibly negated) query
+
+        Returns:
+            Tuple of (is_satisfiable, model)
+
+        Raises:
+            SolverBudgetExceeded: If the time or conflict budget runs out first
+        """
+        self._last_core = None
+        compiled_solution = self._solve_compiled(query_clauses)
+        if compiled_solution is not None:
+            cost, model = compiled_solution
+            return cost is not None, model
+
+        oracle = self._get_oracle()
+        if not oracle.accepts(query_clauses):
+            return self._check_sat(self.base_wcnf.hard + query_clauses)
+
+        remaining = self._remaining_time()
+        if remaining is not None and remaining <= 0:
+            self._budget_exceeded = True
+            raise SolverBudgetExceeded("Time budget exhausted before SAT check")
+
+        is_sat, model = oracle.check(query_clauses, time_limit=remaining, conflict_budget=self.conflict_budget)
+
+        if is_sat is None:
+            self._budget_exceeded = True
+            raise SolverBudgetExceeded("SAT check exceeded its budget")
+
+        self._last_core = oracle.last_core
+        return is_sat, model
+
+    def explain(self, query_formula: str, negate: bool = True,
+                include_soft: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """
+        Minimal set of constraints that makes KB ∧ ¬Q (or KB ∧ Q) unsatisfiable.
+
+        With negate=True this explains why Q is entailed, with negate=False why
+        it is contradicted. With include_soft=True the soft constraints are
+        treated as hard too, so the core may name the soft constraints (S_i)
+        that a likely-but-not-entailed answer relies on.
+
+        Args:
+            query_formula: Propositional formula
+            negate: Explain KB ⊨ Q (True) or KB ⊨ ¬Q (False)
+            include_soft: Also use the soft constraints
+
+        Returns:
+            List of constraints (see _describe_constraint), or None if there is
+            nothing to explain (the formula is satisfiable with the KB)
+        """
+        with self._query_budget():
+            query_clauses = self._encode_query(query_formula, negate=negate)
+            oracle = self._get_oracle()
+            if not oracle.accepts(query_clauses):
+                return None
+
+            groups = list(oracle.default_groups)
+            if include_soft and self.encoder.soft_clause_constraint:
+                soft_groups = [('soft', index) for index in self.encoder.soft_clause_constraint]
+                if soft_groups[0] not in oracle.group_selectors:
+                    oracle.add_groups(self.soft_store, soft_groups)
+                groups.extend(dict.fromkeys(soft_groups))
+
+            is_sat, _ = oracle.check(query_clauses, time_limit=self._remaining_time(),
+                                     conflict_budget=self.conflict_budget, groups=groups)
+            if is_sat is not False:
+                return None
+            return self._minimal_core(query_clauses, oracle.last_core)
+
+    def _minimal_core(self, query_clauses: List[List[int]],
+                      core: Optional[List[Tuple[str, int]]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Shrink the core of an unsatisfiable check to a MUS and describe its constraints.
+
+        The persistent oracle is reused (see IncrementalOracle.minimal_core),
+        starting from the core its check already found.
+
+        Args:
+            query_clauses: Query clauses of the unsatisfiable check
+            core: Clause groups of the core found by that check (None if the
+                answer did not come from the oracle, e.g. a compiled KB)
+
+        Returns:
+            List of constraints (see _describe_constraint), or None if no core can
+            be extracted (no oracle core, or query variables outside the KB)
+        """
+        if core is None:
+            return None  # Not worth an extra oracle check; explain() makes one on request
+        oracle = self._get_oracle()
+        if not oracle.accepts(query_clauses):
+            return None
+
+        core = oracle.minimal_core(query_clauses, core, time_limit=self._remaining_time(),
+                                   conflict_budget=self.conflict_budget)
+        return [self._describe_constraint(group) for group in sorted(core)]
+
+    def _describe_constraint(self, group: Tuple[str, int]) -> Dict[str, Any]:
+        """ID, type ("hard"/"soft"), formula and translation of a constraint."""
+        kind, index = group
+        constraints = self.structure.get(f'{kind}_constraints', [])
+        constraint = constraints[index] if index < len(constraints) else {}
+        prefix = 'H' if kind == 'hard' else 'S'
+        return {
+            "id": constraint.get('id') or f"{prefix}_{index + 1}",
+            "type": kind,
+            "formula": constraint.get('formula'),
+            "translation": constraint.get('translation')
+        }
 
     def _check_sat(self, clauses: List[List[int]]) -> Tuple[bool, Optional[List[int]]]:
         """
@@ -286,21 +837,69 @@ class LogicSolver:
 
         Returns:
             Tuple of (is_satisfiable, model)
+
+        Raises:
+            SolverBudgetExceeded: If the time or conflict budget runs out first
         """
         if not clauses:
             # Empty clause set is SAT
             return True, []
 
-        # Use a SAT solver (Glucose or MiniSat)
-        solver = Solver(name='g3', bootstrap_with=clauses)
+        remaining = self._remaining_time()
+        if remaining is not None and remaining <= 0:
+            self._budget_exceeded = True
+            raise SolverBudgetExceeded("Time budget exhausted before SAT check")
+
+        # Use the configured SAT oracle (Glucose by default), loading clauses in bulk
+        solver = Solver(name=resolve_oracle(self.sat_oracle))
+        solver.append_formula(clauses)
+
+        is_sat = solve_limited(solver, time_limit=remaining, conflict_budget=self.conflict_budget)
 
-        is_sat = solver.solve()
         model = solver.get_model() if is_sat else None
 
         solver.delete()
 
+        if is_sat is None:
+            self._budget_exceeded = True
+            raise SolverBudgetExceeded("SAT check exceeded its budget")
+
         return is_sat, model
 
+
+    def _solve_compiled(self, query_clauses: List[List[int]]) -> Optional[Tuple[Optional[int], Optional[List[int]]]]:
+        """
+        Optimal MaxSAT solution of KB ∧ query from the compiled KB.
+
+        Args:
+            query_clauses: CNF clauses of the (possibly negated) query
+
+        Returns:
+            Tuple of (cost, model) as CompiledKB.solve, or None if the KB is not
+            compiled or the query cannot be answered from it
+        """
+        if self.compiled is None or not self.compiled.accepts(query_clauses):
+            return None
+        try:
+            return self.compiled.solve(query_clauses)
+        except CompilationBudgetExceeded:
+            return None
+
+    def _solve_query_maxsat(self, query_clauses: List[List[int]]) -> Optional[int]:
+        """
+        Optimal MaxSAT cost of KB ∧ query (query clauses are hard).
+
+        Args:
+            query_clauses: CNF clauses of the (possibly negated) query
+
+        Returns:
+            Optimal cost, or None if UNSAT
+        """
+        compiled_solution = self._solve_compiled(query_clauses)
+        if compiled_solution is not None:
+            return compiled_solution[0]
+        return self._solve_maxsat(self._query_wcnf(query_clauses))
+
     def _solve_maxsat(self, wcnf: WCNF) -> Optional[int]:
         """
         Solve MaxSAT problem and return optimal cost.
@@ -312,25 +911,111 @@ class LogicSolver:
             Optimal cost (sum of unsatisfied soft clause weights), or None if UNSAT
         """
         try:
-            # Use RC2 solver
-            with RC2(wcnf) as solver:
-                # Compute optimal model
-                model = solver.compute()
+            # Use the configured backend; cost is the sum of weights of unsatisfied soft clauses
+            cost, _ = self._solve_maxsat_with_model(wcnf)
+            return cost
 
+        except SolverBudgetExceeded:
+            raise
+        except Exception:
+            # If the MaxSAT backend fails, fall back to the greedy anytime solver
+            # within the remaining budget; its cost is only an upper bound
+            cost, model, exact = greedy_maxsat(wcnf, resolve_oracle(self.sat_oracle), self._remaining_time())
+            if not exact:
+                self._budget_exceeded = True
                 if model is None:
-                    # UNSAT
-                    return None
+                    raise SolverBudgetExceeded("MaxSAT fallback exceeded its time budget")
+            return cost
 
-                # Get the cost (sum of weights of unsatisfied soft clauses)
-                cost = solver.cost
+    def _solve_maxsat_with_model(self, wcnf: WCNF) -> Tuple[Optional[int], Optional[List[int]]]:
+        """
+        Solve MaxSAT problem with the configured backend and return the optimal
+        cost together with the optimal model.
 
-                return cost
+        Args:
+            wcnf: Weighted CNF formula
 
-        except Exception:
-            # If RC2 fails, fall back to basic SAT check
-            hard_clauses = self._extract_hard_clauses(wcnf)
-            is_sat, _ = self._check_sat(hard_clauses)
-            return 0 if is_sat else None
+        Returns:
+            Tuple of (optimal cost, optimal model), or (None, None) if UNSAT
+        """
+        cost, model, _ = self._solve_maxsat_bounded(wcnf)
+        return cost, model
+
+    def _solve_maxsat_bounded(self, wcnf: WCNF) -> Tuple[Optional[int], Optional[List[int]], bool]:
+        """
+        Solve MaxSAT problem within the remaining time budget of the current query.
+
+        If the budget runs out, the best model found so far is used (its cost is
+        an upper bound on the optimum) and the query is flagged as bounded.
+
+        Args:
+            wcnf: Weighted CNF formula
+
+        Returns:
+            Tuple of (cost, model, exact), or (None, None, True) if UNSAT
+
+        Raises:
+            SolverBudgetExceeded: If no model was found within the budget
+        """
+        TRACER.count("solver.maxsat_calls")
+        cost, model, exact = solve_maxsat_bounded(
+            wcnf,
+            backend=self.maxsat_backend,
+            oracle=self.sat_oracle,
+            time_limit=self._remaining_time()
+        )
+
+        if not exact:
+            self._budget_exceeded = True
+            if model is None:
+                raise SolverBudgetExceeded("MaxSAT call exceeded its time budget")
+
+        return cost, model, exact
+
+    def _get_kb_optimum(self) -> Tuple[Optional[int], Optional[List[int]], bool]:
+        """
+        Get the MaxSAT optimum of the knowledge base alone (without any query).
+
+        The optimum is query-independent, so it is computed once and cached.
+        Every query Q splits the models of KB into those satisfying Q and those
+        satisfying ¬Q, hence min(cost(KB ∧ Q), cost(KB ∧ ¬Q)) equals the KB
+        optimum and the cached optimal model tells which side attains it.
+        A bounded (non-optimal) result is returned but not cached.
+
+        Returns:
+            Tuple of (cost, model, exact), or (None, None, True) if the KB is UNSAT
+        """
+        if self._kb_optimum_computed:
+            return self._kb_optimum_cost, self._kb_optimum_model, True
+
+        compiled_solution = self._solve_compiled([])
+        if compiled_solution is not None:
+            cost, model = compiled_solution
+            exact = True
+        else:
+            cost, model, exact = self._solve_maxsat_bounded(self.base_wcnf)
+        if exact:
+            self._kb_optimum_cost, self._kb_optimum_model = cost, model
+            self._kb_optimum_computed = True
+
+        return cost, model, exact
+
+    def _complete_model(self, model: List[int]) -> List[int]:
+        """
+        Extend a model to all proposition variables.
+
+        Variables that do not occur in the WCNF are absent from solver models;
+        they are unconstrained, so assigning them False keeps the model's cost.
+
+        Args:
+            model: Assignment (list of signed literals)
+
+        Returns:
+            Assignment covering every variable of the proposition mapping
+        """
+        assigned = {abs(lit) for lit in model}
+        missing = [-var for var in self.var_to_prop if var not in assigned]
+        return list(model) + missing
 
     def _compute_confidence_for_entailment(self, query_formula: str) -> float:
         """
@@ -338,28 +1023,45 @@ class LogicSolver:
 
         Higher confidence means the query is more likely to be true.
 
+        Only one MaxSAT call is needed per query: the cached KB optimum is the
+        cost of whichever side (Q or ¬Q) its optimal model satisfies, so only
+        the other side has to be solved.
+
+        In "wmc" confidence mode, the confidence is P(Q | hard constraints)
+        instead (see _compute_probability).
+
         Args:
             query_formula: Query formula
 
         Returns:
             Confidence score in [0, 1]
         """
-        try:
-            # Solve MaxSAT with Q
-            wcnf_with_q = self._copy_wcnf(self.base_wcnf)
-            query_clauses = self.encoder.encode_query(query_formula, negate=False)
-            for clause in query_clauses:
-                wcnf_with_q.append(clause)
-
-            cost_with_q = self._solve_maxsat(wcnf_with_q)
+        if self.confidence_mode == 'wmc':
+            return self._compute_probability(query_formula)
 
-            # Solve MaxSAT with ¬Q
-            wcnf_with_not_q = self._copy_wcnf(self.base_wcnf)
-            negated_query_clauses = self.encoder.encode_query(query_formula, negate=True)
-            for clause in negated_query_clauses:
-                wcnf_with_not_q.append(clause)
-
-            cost_with_not_q = self._solve_maxsat(wcnf_with_not_q)
+        try:
+            kb_cost, kb_model, kb_exact = self._get_kb_optimum()
+
+            if kb_cost is None:
+                return 0.5  # KB unsatisfiable: both KB ∧ Q and KB ∧ ¬Q are UNSAT
+
+            query_clauses = self._encode_query(query_formula, negate=False)
+            model_satisfies_q = self._model_satisfies_query(self._complete_model(kb_model), query_clauses)
+
+            if not kb_exact:
+                # Bounded KB solution: it is no optimum, so both sides are solved
+                negated_query_clauses = self._encode_query(query_formula, negate=True)
+                cost_with_q = self._solve_query_maxsat(query_clauses)
+                cost_with_not_q = self._solve_query_maxsat(negated_query_clauses)
+            elif model_satisfies_q:
+                # Optimum attained on the Q side: solve MaxSAT with ¬Q only
+                cost_with_q = kb_cost
+                negated_query_clauses = self._encode_query(query_formula, negate=True)
+                cost_with_not_q = self._solve_query_maxsat(negated_query_clauses)
+            else:
+                # Optimum attained on the ¬Q side: solve MaxSAT with Q only
+                cost_with_not_q = kb_cost
+                cost_with_q = self._solve_query_maxsat(query_clauses)
 
             if cost_with_q is None and cost_with_not_q is None:
                 return 0.5  # Both unsatisfiable, uncertain
@@ -381,13 +1083,78 @@ class LogicSolver:
 
             return confidence
 
+        except SolverBudgetExceeded:
+            raise
         except Exception:
             return 0.5  # Default to uncertain
 
+    def _compute_probability(self, query_formula: str) -> float:
+        """
+        P(Q | hard constraints) with soft constraint weights as probabilities.
+
+        Computed exactly by weighted model counting (see wmc.py); if the exact
+        count exceeds its budget, estimated from sampled models.
+
+        Args:
+            query_formula: Query formula
+
+        Returns:
+            Probability in [0, 1] (0.5 if the hard constraints are unsatisfiable)
+        """
+        try:
+            query_clauses = self._encode_query(query_formula, negate=False)
+            counter = self._get_counter()
+
+            probability = None
+            exact = counter.accepts(query_clauses)
+            if exact:
+                try:
+                    probability = counter.probability(query_clauses)
+                except WMCBudgetExceeded:
+                    exact = False
+
+            if not exact:
+                probability = estimate_probability(
+                    self.base_wcnf.hard,
+                    self._get_evaluator().satisfied_constraints,
+                    self.encoder.soft_constraint_probabilities,
+                    query_clauses,
+                    oracle=resolve_oracle(self.sat_oracle)
+                )
+
+            return 0.5 if probability is None else probability
+
+        except SolverBudgetExceeded:
+            raise
+        except Exception:
+            return 0.5  # Default to uncertain
+
+    def _get_counter(self) -> WeightedModelCounter:
+        """Weighted model counter over the KB (built on first use, caches persist across queries)."""
+        if self._counter is None:
+            soft_clauses: Dict[int, List[List[int]]] = {}
+            for clause, index in zip(self.base_wcnf.soft, self.encoder.soft_clause_constraint):
+                soft_clauses.setdefault(index, []).append(clause)
+
+            soft_factors = [
+                (soft_clauses.get(index, []), probability)
+                for index, probability in enumerate(self.encoder.soft_constraint_probabilities)
+            ]
+            # Only the propositions are counted; auxiliary variables are summed out
+            self._counter = WeightedModelCounter(
+                self.base_wcnf.hard,
+                soft_factors,
+                nv=len(self.prop_to_var),
+                oracle=resolve_oracle(self.sat_oracle)
+            )
+        return self._counter
+
     def _compute_confidence_for_consistency(self, query_formula: str, model: List[int]) -> float:
         """
         Compute confidence score for consistency based on soft constraints.
 
+        The confidence is the fraction of soft constraint weight satisfied by the model.
+
         Args:
             query_formula: Query formula
             model: Satisfying assignment
@@ -395,31 +1162,58 @@ class LogicSolver:
         Returns:
             Confidence score in [0, 1]
         """
-        # Count how many soft constraints are satisfied by the model
-        total_weight = 0.0
-        satisfied_weight = 0.0
+        return float(self._get_evaluator().confidence([model])[0])
 
-        for constraint in self.structure.get('soft_constraints', []):
-            weight = constraint.get('weight', 0.5)
-            formula = constraint['formula']
+    def score_models(self, models: List[List[int]]) -> np.ndarray:
+        """
+        Score a batch of models against the soft constraints in one pass.
 
-            try:
-                # Check if this soft constraint is satisfied by the model
-                clauses = self.encoder.encode_query(formula, negate=False)
-                is_satisfied = self._model_satisfies_clauses(model, clauses)
+        Args:
+            models: Models as lists of signed literals
 
-                total_weight += weight
-                if is_satisfied:
-                    satisfied_weight += weight
+        Returns:
+            Array with the fraction of soft constraint weight satisfied by each model
+        """
+        return self._get_evaluator().confidence(models)
+
+    def _get_evaluator(self) -> SoftConstraintEvaluator:
+        """Precompiled soft constraint evaluator (built on first use)."""
+        if self._evaluator is None:
+            self._evaluator = SoftConstraintEvaluator(
+                self.soft_store,
+                self.encoder.soft_clause_constraint,
+                self.encoder.soft_constraint_weights,
+                nv=max(self.base_wcnf.nv, len(self.prop_to_var)),
+                num_props=len(self.prop_to_var),
+                oracle=resolve_oracle(self.sat_oracle)
+            )
+        return self._evaluator
 
-            except Exception:
-                continue
+    def _model_satisfies_query(self, model: List[int], query_clauses: List[List[int]]) -> bool:
+        """
+        Check if a KB model satisfies a query.
+
+        Query clauses over KB variables are evaluated directly. Cardinality
+        queries also use auxiliary variables above the KB's variables, which the
+        model does not assign; the model satisfies the query iff the clauses are
+        satisfiable with the KB variables fixed to the model.
 
-        if total_weight == 0:
-            return 0.5  # No soft constraints
+        Args:
+            model: Assignment of the KB variables (list of signed literals)
+            query_clauses: CNF clauses of the query
 
-        confidence = satisfied_weight / total_weight
-        return confidence
+        Returns:
+            True if the model satisfies the query
+        """
+        nv = max(self.base_wcnf.nv, len(self.prop_to_var))
+        if all(abs(lit) <= nv for clause in query_clauses for lit in clause):
+            return self._model_satisfies_clauses(model, query_clauses)
+
+        solver = Solver(name=resolve_oracle(self.sat_oracle), bootstrap_with=query_clauses)
+        try:
+            return solver.solve(assumptions=[lit for lit in model if abs(lit) <= nv])
+        finally:
+            solver.delete()
 
     def _model_satisfies_clauses(self, model: List[int], clauses: List[List[int]]) -> bool:
         """
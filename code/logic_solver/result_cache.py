@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+result_cache.py - Memoised solver results keyed by canonical query CNF
+
+Equivalent query formulas often differ only syntactically ("P_3 ∧ P_5" vs
+"P_5 ∧ P_3", repeated LLM translations), and experiments create a new
+LogicSolver per query. Results can therefore be cached across solvers, keyed
+by the KB content hash (clauses and texts), the query type, the solver
+configuration and the query CNF in canonical form (sorted, duplicate-free
+literals and clauses). Caching is opt-in (LogicSolver(result_cache=...)).
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+
+DEFAULT_MAX_ENTRIES = 4096
+
+CanonicalCNF = Tuple[Tuple[int, ...], ...]
+
+
+def canonical_cnf(clauses: Sequence[Sequence[int]]) -> CanonicalCNF:
+    """
+    Canonical form of a CNF: literals sorted and deduplicated within each
+    clause, tautological clauses dropped, clauses sorted and deduplicated.
+
+    Args:
+        clauses: CNF clauses
+
+    Returns:
+        Hashable canonical CNF
+    """
+    canonical = set()
+    for clause in clauses:
+        literals = set(clause)
+        if any(-lit in literals for lit in literals):
+            continue  # Tautology
+        canonical.add(tuple(sorted(literals)))
+    return tuple(sorted(canonical))
+
+
+def structure_fingerprint(logified_structure: Dict[str, Any]) -> str:
+    """
+    Content hash of a logified structure, texts included.
+
+    Cached results quote the proposition and constraint texts (explanations,
+    unsatisfiable cores), so KBs with the same clauses but different texts
+    must not share entries.
+
+    Args:
+        logified_structure: JSON structure with propositions and constraints
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    text = json.dumps(logified_structure, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class QueryResultCache:
+    """LRU cache of solver results with hit/miss statistics."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of results kept (least recently used are evicted)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a result.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached result, or None
+        """
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: Hashable, result: Any):
+        """
+        Store a result.
+
+        Args:
+            key: Cache key
+            result: Result to store
+        """
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache statistics.
+
+        Returns:
+            Dict with hits, misses, hit_rate and entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries)
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Process-wide cache for the solvers that opt in with LogicSolver(result_cache=RESULT_CACHE);
+# clear it at the start of each experiment run
+RESULT_CACHE = QueryResultCache()
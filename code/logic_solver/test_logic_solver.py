@@ -5,7 +5,10 @@ Test script for the logic solver module.
 This script tests the logic solver with the example logified structure.
 """
 
+import itertools
 import json
+import random
+import tempfile
 import sys
 import os
 from pathlib import Path
@@ -19,7 +22,7 @@ CODE_DIR = SCRIPT_DIR.parent
 REPO_DIR = CODE_DIR.parent
 ARTIFACTS_DIR = REPO_DIR / "artifacts" / "code"
 
-from logic_solver import LogicSolver, solve_query
+from logic_solver import LogicSolver, solve_query, compiled_path_for
 
 
 def test_basic_queries():
@@ -160,6 +163,815 @@ def test_formula_parsing():
     print("=" * 80)
 
 
+def test_cached_kb_optimum_confidence():
+    """Test that confidence from the cached KB optimum matches solving both sides."""
+
+    print("=" * 80)
+    print("CACHED KB OPTIMUM TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    solver = LogicSolver(logified)
+
+    for formula in ["P_3", "~P_3", "P_3 & P_4", "P_5 | P_9", "P_1 => P_8"]:
+        # Reference: solve KB ∧ Q and KB ∧ ¬Q explicitly
+        costs = []
+        for negate in (False, True):
+            wcnf = solver._copy_wcnf(solver.base_wcnf)
+            for clause in solver.encoder.encode_query(formula, negate=negate):
+                wcnf.append(clause)
+            costs.append(solver._solve_maxsat(wcnf))
+
+        cost_with_q, cost_with_not_q = costs
+        total_cost = cost_with_q + cost_with_not_q
+        expected = 0.5 if total_cost == 0 else cost_with_not_q / total_cost
+
+        confidence = solver._compute_confidence_for_entailment(formula)
+        print(f"  {formula}: confidence={confidence:.3f} (expected {expected:.3f})")
+        assert abs(confidence - expected) < 1e-9
+
+    print()
+
+
+def test_query_budget():
+    """Test that an exhausted budget yields a bounded UNCERTAIN result."""
+
+    print("=" * 80)
+    print("QUERY BUDGET TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    # Generous budget: same answers as an unbounded solver
+    unbounded = LogicSolver(logified)
+    generous = LogicSolver(logified, time_budget=60.0, conflict_budget=10**6)
+    for formula in ["P_3", "P_3 & P_4"]:
+        expected = unbounded.query(formula)
+        result = generous.query(formula)
+        print(f"  {formula}: {result.answer} (bounded={result.bounded})")
+        assert result.answer == expected.answer
+        assert not result.bounded
+
+    # Zero budget: nothing can be decided
+    exhausted = LogicSolver(logified, time_budget=0.0)
+    result = exhausted.query("P_3")
+    print(f"  P_3 with zero budget: {result.answer} (bounded={result.bounded})")
+    assert result.answer == "UNCERTAIN"
+    assert result.bounded
+
+    # An entailed query over budget is reported as undecided, not as "consistent but not entailed"
+    assert unbounded.query("P_3 => P_4").answer == "TRUE"
+    result = exhausted.query("P_3 => P_4")
+    print(f"  P_3 => P_4 with zero budget: {result.answer} ({result.explanation})")
+    assert result.answer == "UNCERTAIN" and result.bounded and result.confidence == 0.5
+    assert "budget exceeded" in result.explanation
+
+    print()
+
+
+def test_budget_runs_out_mid_solve():
+    """Test that a nonzero budget interrupts a hard MaxSAT solve on time with a bounded result."""
+    import time
+    from pysat.formula import WCNF
+    from logic_solver.backends import model_cost, solve_maxsat_bounded
+
+    print("=" * 80)
+    print("MID-SOLVE BUDGET TEST")
+    print("=" * 80)
+    print()
+
+    # Random weighted Max-3-SAT, far beyond what RC2 proves optimal in the budget
+    rng = random.Random(0)
+    clauses = [
+        ([rng.choice([-1, 1]) * rng.randint(1, 60) for _ in range(3)], rng.randint(55, 95))
+        for _ in range(600)
+    ]
+    budget, slack = 0.5, 0.25
+
+    wcnf = WCNF()
+    for clause, weight in clauses:
+        wcnf.append(clause, weight=weight)
+    for backend, oracle in [("rc2", "glucose3"), ("rc2-stratified", "glucose3"),
+                            ("rc2-exhaust", "maplechrono"), ("fm", "glucose3")]:
+        start_time = time.perf_counter()
+        cost, model, exact = solve_maxsat_bounded(wcnf, backend=backend, oracle=oracle, time_limit=budget)
+        elapsed = time.perf_counter() - start_time
+        print(f"  {backend}: cost={cost} exact={exact} ({elapsed:.3f}s)")
+        assert elapsed < budget + slack
+        assert not exact
+        # Best model found so far, with its true cost; better than a random
+        # assignment (which falsifies 1/8 of the clauses on average)
+        assert model is not None and cost == model_cost(wcnf, model)
+        assert cost < sum(wcnf.wght) / 8
+
+    structure = {
+        "primitive_props": [{"id": f"P_{i}", "translation": f"Fact {i}"} for i in range(1, 61)],
+        "hard_constraints": [],
+        "soft_constraints": [
+            {"formula": " ∨ ".join(("" if lit > 0 else "¬") + f"P_{abs(lit)}" for lit in clause),
+             "weight": weight / 100}
+            for clause, weight in clauses
+        ]
+    }
+    solver = LogicSolver(structure, time_budget=budget, result_cache=None)
+    start_time = time.perf_counter()
+    result = solver.query("P_1")
+    elapsed = time.perf_counter() - start_time
+    print(f"  P_1: {result.answer} (bounded={result.bounded}, {elapsed:.3f}s)")
+    assert elapsed < budget + slack
+    assert result.bounded
+
+    print()
+
+
+def test_maxsat_backends():
+    """Test that every MaxSAT backend / SAT oracle combination finds the optimum."""
+    from pysat.formula import WCNF
+    from logic_solver.backends import (
+        DEFAULT_MAXSAT_BACKEND, MAXSAT_BACKENDS, SAT_ORACLES, UNWEIGHTED_ONLY_BACKENDS,
+        autotune_backend, model_cost, solve_maxsat
+    )
+
+    print("=" * 80)
+    print("MAXSAT BACKENDS TEST")
+    print("=" * 80)
+    print()
+
+    rng = random.Random(0)
+    hard = [[rng.choice([-1, 1]) * rng.randint(1, 8) for _ in range(3)] for _ in range(25)]
+    soft = [[rng.choice([-1, 1]) * rng.randint(1, 8) for _ in range(2)] for _ in range(30)]
+
+    instances = []
+    for weights in ([rng.randint(1, 5) for _ in soft], [3] * len(soft)):
+        wcnf = WCNF()
+        for clause in hard:
+            wcnf.append(clause)
+        for clause, weight in zip(soft, weights):
+            wcnf.append(clause, weight=weight)
+        instances.append(wcnf)
+
+        # Brute-force optimum
+        optimum = None
+        for values in itertools.product([False, True], repeat=8):
+            model = [var if value else -var for var, value in enumerate(values, start=1)]
+            if all(any(lit in model for lit in clause) for clause in hard):
+                cost = model_cost(wcnf, model)
+                optimum = cost if optimum is None else min(optimum, cost)
+
+        weighted = len(set(weights)) > 1
+        for backend in MAXSAT_BACKENDS:
+            for oracle in SAT_ORACLES:
+                if weighted and backend in UNWEIGHTED_ONLY_BACKENDS:
+                    try:
+                        solve_maxsat(wcnf, backend=backend, oracle=oracle)
+                        assert False, "LSU should reject weighted soft clauses"
+                    except ValueError:
+                        continue
+                cost, model = solve_maxsat(wcnf, backend=backend, oracle=oracle)
+                assert cost == optimum and model_cost(wcnf, model) == optimum, (backend, oracle, cost)
+        print(f"  {'Weighted' if weighted else 'Unweighted'}: all combinations find cost {optimum}")
+
+    # Auto-tuning on the weighted instance discards LSU; without time the default is kept
+    report = autotune_backend(instances[0], oracles=["glucose3", "minisat"], time_limit=10.0)
+    errors = {entry["backend"]: entry["error"] for entry in report["timings"]}
+    assert report["backend"] != "lsu" and errors["lsu"] and errors["rc2"] is None
+    report = autotune_backend(instances[0], backends=["rc2", "fm"], oracles=["glucose3"], time_limit=0.0)
+    print(f"  Autotune without time: {report}")
+    assert report["backend"] == DEFAULT_MAXSAT_BACKEND and "error" in report
+
+    print()
+
+
+def test_clause_store():
+    """Test the flat clause store and the incremental SAT oracle."""
+
+    print("=" * 80)
+    print("CLAUSE STORE TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    solver = LogicSolver(logified)
+
+    # Round trip: the store holds exactly the KB clauses
+    assert list(solver.hard_store) == solver.base_wcnf.hard
+    assert list(solver.soft_store) == solver.base_wcnf.soft
+    assert list(solver.soft_store.weights) == solver.base_wcnf.wght
+
+    # Incremental checks agree with fresh SAT calls, whatever the query order
+    for formula in ["P_3", "~P_3", "P_3 & ~P_3", "P_1 => P_8", "P_3"]:
+        for negate in (False, True):
+            clauses = solver.encoder.encode_query(formula, negate=negate)
+            is_sat, _ = solver._check_query_sat(clauses)
+            expected, _ = solver._check_sat(solver.base_wcnf.hard + clauses)
+            assert is_sat == expected
+
+    solver.query("P_3 & P_4")
+    stats = solver.memory_stats()
+    print(f"  Clauses: {stats['num_hard_clauses']} hard, {stats['num_soft_clauses']} soft")
+    print(f"  Memory: {stats['store_bytes']} bytes (lists: ~{stats['list_bytes']} bytes)")
+    print(f"  Last query setup: {solver.last_query_stats['setup_time'] * 1000:.2f} ms")
+    assert stats['store_bytes'] < stats['list_bytes']
+
+    print()
+
+
+def test_vectorized_consistency_confidence():
+    """Test that batch model scoring matches a per-constraint evaluation."""
+
+    print("=" * 80)
+    print("VECTORIZED SOFT CONSTRAINT EVALUATION TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    solver = LogicSolver(logified)
+    num_vars = len(solver.prop_to_var)
+
+    # Random models (some variables left unassigned)
+    rng = random.Random(0)
+    models = []
+    for _ in range(50):
+        models.append([v if rng.random() < 0.5 else -v for v in range(1, num_vars + 1) if rng.random() < 0.9])
+
+    scores = solver.score_models(models)
+
+    for model, score in zip(models, scores):
+        # Reference: loop over soft constraints and their clauses
+        model_set = set(model)
+        total_weight = satisfied_weight = 0.0
+        for constraint in logified['soft_constraints']:
+            clauses = solver.encoder.encode_query(constraint['formula'])
+            total_weight += constraint['weight']
+            if all(any(lit in model_set for lit in clause) for clause in clauses):
+                satisfied_weight += constraint['weight']
+        expected = satisfied_weight / total_weight if total_weight else 0.5
+        assert abs(score - expected) < 1e-9
+
+    print(f"  Scored {len(models)} models, mean confidence {scores.mean():.3f}")
+    print()
+
+
+def test_compiled_kb():
+    """Test the compiled (OBDD) backend against SAT/MaxSAT solving."""
+
+    print("=" * 80)
+    print("COMPILED KB TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    reference = LogicSolver(logified)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        compiled_path = compiled_path_for(os.path.join(tmp_dir, "demo_weighted.json"))
+
+        compiled = LogicSolver(logified, compile_kb=True, compiled_path=compiled_path)
+        print(f"  Compiled: {compiled.compile_report['nodes']} nodes")
+        assert compiled.compile_report['status'] == "compiled"
+        assert os.path.exists(compiled_path)
+
+        loaded = LogicSolver(logified, compile_kb=True, compiled_path=compiled_path)
+        assert loaded.compile_report['status'] == "loaded"
+
+        # Too small a budget: falls back to SAT/MaxSAT
+        fallback = LogicSolver(logified, compile_kb=True, compile_node_budget=3)
+        assert fallback.compile_report['status'] == "budget_exceeded"
+        assert fallback.compiled is None
+
+        for formula in ["P_3", "~P_3", "P_3 & P_4", "P_5 | P_9", "P_1 => P_8"]:
+            expected = reference.check_entailment(formula)
+            for solver in (compiled, loaded, fallback):
+                result = solver.check_entailment(formula)
+                assert result.answer == expected.answer
+                assert abs(result.confidence - expected.confidence) < 1e-9
+            print(f"  {formula}: {expected.answer} ({expected.confidence:.3f})")
+
+        # Decided answers come from the compiled KB alone (no core extraction on the SAT oracle)
+        from instrumentation import TRACER
+        TRACER.reset()
+        answers = [compiled.query(formula).answer for formula in ["P_3 => P_4", "P_3 & ~P_4", "~P_3 | P_4"]]
+        sat_calls = TRACER.summary()["counters"].get("solver.sat_calls", 0)
+        print(f"  {answers}: {sat_calls} SAT calls")
+        assert set(answers) == {"TRUE", "FALSE"} and sat_calls == 0
+
+    print()
+
+
+def test_wmc_confidence():
+    """Test weighted model counting against brute-force enumeration."""
+
+    print("=" * 80)
+    print("WEIGHTED MODEL COUNTING TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    solver = LogicSolver(logified, confidence_mode="wmc")
+    encoder = solver.encoder
+    num_vars = len(solver.prop_to_var)
+
+    def satisfies(assignment, formula):
+        return all(any(lit in assignment for lit in clause) for clause in encoder.encode_query(formula))
+
+    for formula in ["P_3", "~P_3", "P_3 & P_4", "P_5 | P_9", "P_1 => P_8"]:
+        # Reference: sum the weights of all assignments
+        total = with_query = 0.0
+        for bits in itertools.product([False, True], repeat=num_vars):
+            assignment = {v if bit else -v for v, bit in enumerate(bits, start=1)}
+            if not all(satisfies(assignment, c['formula']) for c in logified['hard_constraints']):
+                continue
+            weight = 1.0
+            for constraint in logified['soft_constraints']:
+                p = constraint['weight']
+                weight *= p if satisfies(assignment, constraint['formula']) else 1 - p
+            total += weight
+            if satisfies(assignment, formula):
+                with_query += weight
+        expected = with_query / total
+
+        probability = solver._compute_probability(formula)
+        print(f"  P({formula} | KB) = {probability:.4f} (expected {expected:.4f})")
+        assert abs(probability - expected) < 1e-9
+
+    # Approximate fallback when the exact count is over budget
+    solver._counter.max_decisions = 0
+    solver._counter.enum_threshold = 0
+    solver._counter.cache.clear()
+    solver._counter._kb_count = None
+    estimate = solver._compute_probability("P_3")
+    print(f"  Sampled estimate of P(P_3 | KB): {estimate:.4f}")
+    assert 0.0 <= estimate <= 1.0
+
+    print()
+
+
+def test_kb_artifact():
+    """Test writing and loading a memory-mapped compiled-KB artifact."""
+    import numpy as np
+    from logic_solver import write_kb_artifact, artifact_path_for
+    from logic_solver.clause_store import stores_fingerprint
+
+    print("=" * 80)
+    print("COMPILED KB ARTIFACT TEST")
+    print("=" * 80)
+    print()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = Path(tmpdir) / "demo_weighted.json"
+        json_path.write_text((ARTIFACTS_DIR / "logify2_full_demo.json").read_text())
+        with open(json_path, 'r') as f:
+            logified = json.load(f)
+
+        embeddings = np.random.default_rng(0).random((len(logified['primitive_props']), 8), dtype=np.float32)
+        kb_path = write_kb_artifact(logified, artifact_path_for(str(json_path)), source_path=str(json_path),
+                                    prop_embeddings=embeddings, embedding_model="test-model")
+        print(f"  Artifact: {Path(kb_path).name} ({os.path.getsize(kb_path)} bytes)")
+
+        reference = LogicSolver(logified)
+        loaded = LogicSolver.from_compiled(kb_path)
+        # The clause stores wrap the mapped buffers (no copy)
+        assert np.shares_memory(loaded.hard_store.literals, loaded.artifact.arrays["hard_literals"])
+        assert np.shares_memory(loaded.soft_store.weights, loaded.artifact.arrays["soft_weights"])
+        assert (stores_fingerprint(loaded.hard_store, loaded.soft_store)
+                == stores_fingerprint(reference.hard_store, reference.soft_store))
+        assert loaded.base_wcnf.hard == reference.base_wcnf.hard
+        assert loaded.base_wcnf.soft == reference.base_wcnf.soft
+        assert loaded.base_wcnf.wght == reference.base_wcnf.wght
+        assert np.array_equal(loaded.artifact.prop_embeddings, embeddings)
+        assert loaded.artifact.embedding_model == "test-model"
+
+        for formula in ["P_3", "~P_3", "P_3 & P_4", "P_5 | P_9", "P_1 => P_8"]:
+            expected = reference.query(formula)
+            result = loaded.query(formula)
+            print(f"  {formula:12s} -> {result.answer} ({result.confidence:.3f})")
+            assert (result.answer, result.confidence) == (expected.answer, expected.confidence)
+
+        # Editing the JSON makes the artifact stale
+        logified['soft_constraints'][0]['weight'] = 0.1
+        json_path.write_text(json.dumps(logified))
+        try:
+            LogicSolver.from_compiled(kb_path)
+            assert False, "Stale artifact was accepted"
+        except ValueError as e:
+            print(f"  Stale artifact rejected: {e}")
+
+        # Without a JSON to check against, loading needs allow_unchecked
+        json_path.unlink()
+        try:
+            LogicSolver.from_compiled(kb_path)
+            assert False, "Unchecked artifact was accepted"
+        except ValueError as e:
+            print(f"  Unchecked artifact rejected: {e}")
+        assert LogicSolver.from_compiled(kb_path, allow_unchecked=True).query("P_3").answer == reference.query("P_3").answer
+
+    print()
+
+
+def test_unsat_core_explanations():
+    """Test minimal unsatisfiable cores of TRUE/FALSE answers."""
+    from pysat.solvers import Solver
+
+    print("=" * 80)
+    print("UNSAT CORE EXPLANATION TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    solver = LogicSolver(logified)
+    hard_ids = [c['id'] for c in logified['hard_constraints']]
+
+    def clauses_of(ids):
+        return [clause for clause, index in zip(solver.base_wcnf.hard, solver.encoder.hard_clause_constraint)
+                if hard_ids[index] in ids]
+
+    def is_sat(clauses):
+        with Solver(bootstrap_with=clauses) as sat_solver:
+            return sat_solver.solve()
+
+    for formula in ["P_3 => P_4", "P_3 & ~P_4", "P_1 => P_8", "P_4"]:
+        assert solver.query(formula).core is None  # Cores are opt-in
+        result = solver.query(formula, explain=True)
+        print(f"  {formula:12s} -> {result.answer}: {result.explanation}")
+        if result.answer not in ("TRUE", "FALSE"):
+            assert result.core is None
+            continue
+
+        # The core is unsatisfiable with the query, and minimal
+        ids = {constraint['id'] for constraint in result.core}
+        query_clauses = solver.encoder.encode_query(formula, negate=result.answer == "TRUE")
+        assert not is_sat(clauses_of(ids) + query_clauses)
+        for constraint_id in ids:
+            assert is_sat(clauses_of(ids - {constraint_id}) + query_clauses)
+        assert all(constraint['translation'] for constraint in result.core)
+
+    # Soft constraints can be named too
+    core = solver.explain("P_4", include_soft=True)
+    print(f"  Soft support for P_4: {[constraint['id'] for constraint in core]}")
+    assert any(constraint['type'] == 'soft' for constraint in core)
+    assert solver.explain("P_4") is None
+
+    print()
+
+
+def test_federated_kb():
+    """Test a federation of documents with namespaced propositions."""
+    from logic_solver import FederatedKB, namespace_formula
+
+    print("=" * 80)
+    print("FEDERATED KB TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    kb = FederatedKB()
+    kb.add_document("master", logified)
+    kb.add_document("amend", logified)
+    assert len(kb._encodings) == 1  # Same content: encoded once
+
+    # Each document answers as it does on its own
+    reference = LogicSolver(logified)
+    federated = kb.solver()
+    for formula in ["P_3 => P_4", "P_3 & ~P_4", "P_5 | P_9"]:
+        expected = reference.query(formula).answer
+        for name in ("master", "amend"):
+            assert federated.query(namespace_formula(formula, name)).answer == expected
+        print(f"  {formula:12s} -> {expected} in both documents")
+
+    # Without links, the documents are independent; a link connects them
+    query = "amend::P_3 => master::P_4"
+    assert federated.query(query).answer != "TRUE"
+    links = {"hard_constraints": [{"id": "L_1", "formula": "amend::P_3 <=> master::P_3",
+                                   "translation": "The amendment keeps the study condition"}]}
+    linked = kb.solver(links=links)
+    result = linked.query(query, explain=True)
+    print(f"  {query} with link -> {result.answer}: {result.explanation}")
+    assert result.answer == "TRUE"
+    assert {c['id'] for c in result.core} == {"master::H_1", "L_1"}
+
+    print()
+
+
+def test_cardinality_constraints():
+    """Test atleast/atmost/exactly against their expanded propositional form."""
+    from logic_solver import FormulaParser
+
+    print("=" * 80)
+    print("CARDINALITY CONSTRAINT TEST")
+    print("=" * 80)
+    print()
+
+    structure = {
+        "primitive_props": [{"id": f"P_{i}", "translation": f"Exception {i} applies"} for i in range(1, 7)],
+        "hard_constraints": [
+            {"id": "H_1", "formula": "atleast(2, P_1, P_2, P_3, P_4) ⟹ P_5"},
+            {"id": "H_2", "formula": "exactly(1, P_5, P_6)"}
+        ],
+        "soft_constraints": [
+            {"id": "S_1", "formula": "atmost(1, P_1, P_2 ∧ P_3, ¬P_4)", "weight": 0.7}
+        ]
+    }
+    expanded = {
+        "P_1 & P_2": "~P_6", "P_3 & P_4": "~P_6", "atleast(2, P_1, P_3)": "P_5",
+        "P_6": "atmost(1, P_1, P_2, P_3, P_4)", "~exactly(1, P_5, P_6)": "P_5 & P_6"
+    }
+
+    solver = LogicSolver(structure)
+    for premise, conclusion in expanded.items():
+        result = solver.query(f"({premise}) => ({conclusion})")
+        print(f"  ({premise}) => ({conclusion}): {result.answer}")
+        assert result.answer == "TRUE"
+    assert solver.query("P_1 & P_2 & P_6").answer == "FALSE"
+
+    # Polynomial encoding: "at least 5 of 12" without enumerating subsets
+    props = {f"P_{i}": i for i in range(1, 13)}
+    clauses = FormulaParser(props).parse("atleast(5, " + ", ".join(props) + ")")
+    print(f"  atleast(5 of 12): {len(clauses)} clauses")
+    assert len(clauses) < 200
+
+    print()
+
+
+def test_cardinality_query_confidence():
+    """Test the cached-optimum confidence of cardinality queries the KB optimum satisfies."""
+    print("=" * 80)
+    print("CARDINALITY QUERY CONFIDENCE TEST")
+    print("=" * 80)
+    print()
+
+    structure = {
+        "primitive_props": [{"id": f"P_{i}", "translation": f"Fact {i}"} for i in range(1, 5)],
+        "hard_constraints": [],
+        "soft_constraints": [
+            {"formula": "P_1", "weight": 0.9},
+            {"formula": "P_2", "weight": 0.9},
+            {"formula": "P_3", "weight": 0.8},
+            {"formula": "¬P_4", "weight": 0.7}
+        ]
+    }
+    solver = LogicSolver(structure, result_cache=None)
+    nv = solver.encoder.parser.top
+
+    for query in ["atleast(2, P_1, P_2, P_3)", "atmost(3, P_1, P_2, P_3, P_4)", "exactly(3, P_1, P_2, P_3, P_4)"]:
+        # Reference: both sides solved with MaxSAT
+        with solver._query_budget():
+            cost_with_q = solver._solve_query_maxsat(solver._encode_query(query))
+            cost_with_not_q = solver._solve_query_maxsat(solver._encode_query(query, negate=True))
+            confidence = solver._compute_confidence_for_entailment(query)
+        expected = cost_with_not_q / (cost_with_q + cost_with_not_q)
+        print(f"  {query}: {confidence:.3f} (expected {expected:.3f})")
+        assert cost_with_q == 0 and abs(confidence - expected) < 1e-9
+
+        # Same auxiliary numbering every time, counter not growing
+        assert solver.encoder.encode_query(query) == solver.encoder.encode_query(query)
+        assert solver.encoder.parser.top == nv
+
+    print()
+
+
+def test_cardinality_wmc_and_consistency():
+    """Test that auxiliary variables of cardinality encodings are not counted or judged."""
+    print("=" * 80)
+    print("CARDINALITY WMC / CONSISTENCY TEST")
+    print("=" * 80)
+    print()
+
+    structure = {
+        "primitive_props": [{"id": f"P_{i}", "translation": f"Fact {i}"} for i in range(1, 6)],
+        "hard_constraints": [{"id": "H_1", "formula": "atmost(1, P_1, P_2, P_3, P_4)"}],
+        "soft_constraints": [
+            {"id": "S_1", "formula": "P_1", "weight": 0.9},
+            {"id": "S_2", "formula": "P_2 | P_5", "weight": 0.7},
+            {"id": "S_3", "formula": "atleast(2, P_3, P_4, P_5)", "weight": 0.6}
+        ]
+    }
+    hard = lambda p: p[1] + p[2] + p[3] + p[4] <= 1
+    soft = [(lambda p: p[1], 0.9), (lambda p: p[2] or p[5], 0.7), (lambda p: p[3] + p[4] + p[5] >= 2, 0.6)]
+    queries = {
+        "P_1": lambda p: p[1], "P_2": lambda p: p[2], "P_1 | P_5": lambda p: p[1] or p[5],
+        "exactly(1, P_3, P_5)": lambda p: p[3] + p[5] == 1
+    }
+
+    solver = LogicSolver(structure, confidence_mode="wmc", result_cache=None)
+    for query, holds in queries.items():
+        # Reference: sum the weights of all proposition assignments
+        total = with_query = 0.0
+        for bits in itertools.product([0, 1], repeat=5):
+            p = dict(enumerate(bits, start=1))
+            if not hard(p):
+                continue
+            weight = 1.0
+            for constraint, probability in soft:
+                weight *= probability if constraint(p) else 1 - probability
+            total += weight
+            if holds(p):
+                with_query += weight
+        expected = with_query / total
+        probability = solver._compute_probability(query)
+        print(f"  P({query} | KB) = {probability:.4f} (expected {expected:.4f})")
+        assert abs(probability - expected) < 1e-9
+
+    # A satisfied soft cardinality constraint counts as satisfied, whatever its auxiliary variables
+    structure = {
+        "primitive_props": [{"id": f"P_{i}", "translation": f"Fact {i}"} for i in range(1, 5)],
+        "hard_constraints": [],
+        "soft_constraints": [{"id": "S_1", "formula": "exactly(2, P_1, P_2, P_3, P_4)", "weight": 0.8}]
+    }
+    solver = LogicSolver(structure, result_cache=None)
+    satisfied = solver.check_consistency("P_1 & P_2 & ~P_3 & ~P_4")
+    violated = solver.check_consistency("P_1 & P_2 & P_3 & ~P_4")
+    print(f"  Consistency: satisfied {satisfied.confidence:.3f}, violated {violated.confidence:.3f}")
+    assert satisfied.answer == "TRUE" and satisfied.confidence == 1.0
+    assert violated.answer == "TRUE" and violated.confidence == 0.0
+
+    print()
+
+
+def test_result_cache():
+    """Test that equivalent query formulas share cached results."""
+    from logic_solver import QueryResultCache
+
+    print("=" * 80)
+    print("RESULT CACHE TEST")
+    print("=" * 80)
+    print()
+
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+
+    cache = QueryResultCache()
+    first = LogicSolver(logified, result_cache=cache).query("P_3 ∧ P_5")
+    before = cache.stats()
+
+    # Reordered / duplicated conjuncts, and a new solver over the same KB
+    for formula in ["P_5 ∧ P_3", "(P_3 & P_5) & P_3"]:
+        result = LogicSolver(logified, result_cache=cache).query(formula)
+        assert (result.answer, result.confidence) == (first.answer, first.confidence)
+    stats = cache.stats()
+    print(f"  Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+    assert stats['hits'] == before['hits'] + 2 and stats['misses'] == before['misses']
+
+    # Same clauses, different texts: the core must quote this KB's texts
+    renamed = json.loads(json.dumps(logified))
+    renamed['hard_constraints'][0]['translation'] = "Studying hard implies passing"
+    for structure in (logified, renamed):
+        result = LogicSolver(structure, result_cache=cache).query("P_3 & ~P_4", explain=True)
+        translations = [entry['translation'] for entry in result.core]
+        print(f"  Core: {translations}")
+        assert structure['hard_constraints'][0]['translation'] in translations
+
+    # A different KB does not share entries
+    stats = cache.stats()
+    logified['soft_constraints'][0]['weight'] = 0.1
+    LogicSolver(logified, result_cache=cache).query("P_3 ∧ P_5")
+    assert cache.stats()['misses'] > stats['misses']
+
+    # Caching is opt-in
+    assert LogicSolver(logified).result_cache is None
+
+    print()
+
+
+def test_benchmark_runner():
+    """Test the synthetic KB benchmark on a tiny configuration."""
+    from logic_solver import encode_logified_structure
+    from logic_solver.benchmark import generate_logified_structure, run_benchmark, compare_reports
+
+    print("=" * 80)
+    print("BENCHMARK RUNNER TEST")
+    print("=" * 80)
+    print()
+
+    structure = generate_logified_structure(10, 3, 5, depth=2, or_width=3, seed=1)
+    assert len(structure['primitive_props']) == 10
+    assert len(structure['hard_constraints']) == 3 and len(structure['soft_constraints']) == 5
+    encode_logified_structure(structure)  # Generated formulas parse
+
+    report = run_benchmark([10], [1.0], [1, 2], [2], ["maxsat", "compiled"], num_queries=3, verbose=False)
+    json.dumps(report)
+    assert len(report['results']) == 2
+    for entry in report['results']:
+        print(f"  {entry['params']}: {entry['num_hard_clauses'] + entry['num_soft_clauses']} clauses")
+        assert entry['encode_time'] >= 0 and entry['num_literals'] > 0
+        for stats in entry['modes'].values():
+            assert sum(stats['answers'].values()) == 3
+            assert stats['query_latency']['p50'] <= stats['query_latency']['max']
+            assert stats['peak_memory_bytes'] > 0
+
+    ratios = compare_reports(report, report)
+    assert len(ratios) == 4 and all(item['ratio'] == 1.0 for item in ratios)
+
+    print()
+
+
+def test_instrumentation():
+    """Test timing spans, counters and solver instrumentation."""
+    from instrumentation import Tracer, TRACER, merge_summaries
+
+    print("=" * 80)
+    print("INSTRUMENTATION TEST")
+    print("=" * 80)
+    print()
+
+    tracer = Tracer(max_spans=3)
+    with tracer.span("outer", doc="demo"):
+        with tracer.span("inner") as attrs:
+            attrs["items"] = 2
+        with tracer.span("inner"):
+            pass
+    tracer.count("tokens", 10)
+    tracer.count("tokens", 5)
+    with tracer.span("late"):
+        pass
+
+    trace = tracer.to_dict()
+    spans = {(entry["name"], entry["id"]): entry for entry in trace["spans"]}
+    outer = spans[("outer", 0)]
+    assert outer["parent"] is None and outer["attrs"] == {"doc": "demo"}
+    assert spans[("inner", 1)]["parent"] == 0 and spans[("inner", 1)]["attrs"] == {"items": 2}
+    assert trace["dropped_spans"] == 1 and trace["stages"]["late"]["count"] == 1
+    assert trace["stages"]["inner"]["count"] == 2 and trace["counters"]["tokens"] == 15
+    json.dumps(trace)
+
+    merged = merge_summaries([tracer.summary(), tracer.summary()])
+    assert merged["stages"]["inner"]["count"] == 4 and merged["counters"]["tokens"] == 30
+
+    # Solver stages and counters go to the process-wide tracer
+    demo_file = ARTIFACTS_DIR / "logify2_full_demo.json"
+    with open(demo_file, 'r') as f:
+        logified = json.load(f)
+    TRACER.reset()
+    solver = LogicSolver(logified, result_cache=None)
+    solver.query("P_3")
+    solver.query("P_3 ∧ P_5")
+    summary = TRACER.summary()
+    for stage in summary["stages"]:
+        stat = summary["stages"][stage]
+        print(f"  {stage}: {stat['count']} x {stat['mean_sec'] * 1000:.2f} ms")
+    print(f"  counters: {summary['counters']}")
+    assert summary["stages"]["solver.query"]["count"] == 2
+    assert summary["counters"]["solver.clauses"] == len(solver.base_wcnf.hard) + len(solver.base_wcnf.soft)
+    assert summary["counters"]["solver.sat_calls"] + summary["counters"].get("solver.maxsat_calls", 0) > 0
+
+    TRACER.enabled = False
+    try:
+        solver.query("P_5")
+    finally:
+        TRACER.enabled = True
+    assert TRACER.summary()["stages"]["solver.query"]["count"] == 2
+
+    print()
+
+
+def test_lazy_imports():
+    """Test that pipeline modules do not import heavy dependencies at load time."""
+    from logic_solver.benchmark import benchmark_imports
+
+    print("=" * 80)
+    print("LAZY IMPORTS TEST")
+    print("=" * 80)
+    print()
+
+    report = benchmark_imports(
+        modules=["interface_with_user.translate", "from_text_to_logic.weights", "from_text_to_logic.logify"],
+        commands=[["interface_with_user/translate.py", "--help"]],
+        repeat=1
+    )
+    for module, entry in report["modules"].items():
+        assert entry["error"] is None, f"{module}: {entry['error']}"
+        assert entry["heavy"] == [], f"{module} imports {entry['heavy']}"
+    for command, entry in report["commands"].items():
+        assert entry["error"] is None, f"{command}: {entry['error']}"
+
+    print()
+
+
 if __name__ == "__main__":
     print()
 
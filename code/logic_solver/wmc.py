@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+wmc.py - Weighted model counting for probabilistic query confidence
+
+Each soft constraint C_i with probability p_i is a factor weighing p_i on the
+assignments satisfying C_i and 1 - p_i on the others; hard constraints weigh
+1 / 0. The weight of an assignment is the product of all factors, and
+
+    P(Q | hard constraints) = WMC(KB ∧ Q) / WMC(KB)
+
+The exact counter is a DPLL search with connected-component decomposition
+and a component cache that persists across queries: conditioning on a query
+only touches the components sharing variables with it, the others (and
+WMC(KB) itself) are cache hits. Components with few variables are counted by
+vectorized enumeration. When the search exceeds its decision budget, the
+probability is estimated by weighting sampled models of the hard constraints.
+
+Only the propositions are counted. Auxiliary variables (cardinality encodings,
+definitions of subformulas) are numbered above them and are not determined by
+the propositions, so counting them would count a proposition assignment once
+per auxiliary assignment. They are summed out existentially instead: a factor
+is satisfied by a proposition assignment iff its clauses are satisfiable for
+some value of its auxiliary variables. Clauses sharing auxiliary variables
+(e.g. one cardinality constraint) therefore always stay in one factor.
+"""
+
+import functools
+import random
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pysat.solvers import Solver
+
+
+# Components with at most this many variables are counted by enumeration
+DEFAULT_ENUM_THRESHOLD = 12
+
+# Maximum number of branching decisions per count before falling back to sampling
+DEFAULT_MAX_DECISIONS = 20000
+
+DEFAULT_NUM_SAMPLES = 200
+
+# PySAT solver deciding factors over auxiliary variables
+DEFAULT_AUX_ORACLE = "g3"
+
+# A factor: (weight if satisfied, weight if violated, clauses)
+Factor = Tuple[float, float, Tuple[Tuple[int, ...], ...]]
+
+
+class WMCBudgetExceeded(Exception):
+    """Raised when exact weighted model counting exceeds its decision budget."""
+
+
+class WeightedModelCounter:
+    """Exact weighted model counter over hard and probabilistic soft constraints."""
+
+    def __init__(self, hard_clauses: List[List[int]], soft_factors: List[Tuple[List[List[int]], float]],
+                 nv: int, enum_threshold: int = DEFAULT_ENUM_THRESHOLD,
+                 max_decisions: int = DEFAULT_MAX_DECISIONS, oracle: str = DEFAULT_AUX_ORACLE):
+        """
+        Initialize the counter.
+
+        Args:
+            hard_clauses: CNF clauses of the hard constraints
+            soft_factors: (CNF clauses, probability) per soft constraint
+            nv: Number of propositions (1..nv are counted; higher variables are
+                auxiliary and summed out existentially)
+            enum_threshold: Largest component counted by enumeration
+            max_decisions: Decision budget per count
+            oracle: PySAT solver deciding factors over auxiliary variables
+        """
+        self.nv = nv
+        self.enum_threshold = enum_threshold
+        self.max_decisions = max_decisions
+        self.oracle = oracle
+        self.cache: Dict[Tuple[Factor, ...], float] = {}
+        self._decisions = 0
+
+        # One factor per hard clause (or group of clauses sharing auxiliary
+        # variables), so that hard clauses do not glue components together
+        factors = self._hard_factors(hard_clauses)
+        for clauses, probability in soft_factors:
+            probability = min(1.0, max(0.0, float(probability)))
+            factors.append(_make_factor(probability, 1.0 - probability, clauses))
+        self.factors = factors
+        self.top = max((abs(lit) for _, _, clauses in factors for clause in clauses for lit in clause),
+                       default=nv)
+        self._kb_count: Optional[float] = None
+
+    def _hard_factors(self, clauses: List[List[int]]) -> List[Factor]:
+        """Hard factors of clauses: one per clause, clauses sharing auxiliary variables together."""
+        return [_make_factor(1.0, 0.0, group) for group in _group_by_auxiliary(clauses, self.nv)]
+
+    def accepts(self, clauses: List[List[int]]) -> bool:
+        """Whether the clauses use propositions or auxiliary variables of their own (above the KB's)."""
+        return all(0 < abs(lit) <= self.nv or abs(lit) > self.top for clause in clauses for lit in clause)
+
+    def probability(self, query_clauses: List[List[int]]) -> Optional[float]:
+        """
+        P(Q | hard constraints) under the soft constraint probabilities.
+
+        Args:
+            query_clauses: CNF clauses of the query (over variables 1..nv)
+
+        Returns:
+            Probability in [0, 1], or None if the hard constraints are unsatisfiable
+
+        Raises:
+            WMCBudgetExceeded: If a count exceeds the decision budget
+        """
+        if self._kb_count is None:
+            self._kb_count = self.count([])
+        if self._kb_count == 0:
+            return None
+
+        with_query = self.count(self._hard_factors(query_clauses))
+        return min(1.0, with_query / self._kb_count)
+
+    def count(self, extra_factors: List[Factor]) -> float:
+        """
+        Weighted model count of the KB factors plus extra factors.
+
+        Args:
+            extra_factors: Additional factors (e.g. the query as a hard factor)
+
+        Returns:
+            Weighted model count over the propositions 1..nv
+        """
+        self._decisions = 0
+        constant, factors = _condition(self.factors + extra_factors, None, self.nv, self.oracle)
+        if constant == 0:
+            return 0.0
+        return constant * self._count(factors, self.nv)
+
+    def _count(self, factors: List[Factor], num_vars: int) -> float:
+        """Count over num_vars propositions, of which the factors constrain some."""
+        components = _components(factors, self.nv)
+        constrained = sum(len(variables) for _, variables in components)
+        result = 2.0 ** (num_vars - constrained)
+        for component, variables in components:
+            result *= self._count_component(component, variables)
+            if result == 0:
+                return 0.0
+        return result
+
+    def _count_component(self, factors: Tuple[Factor, ...], variables: FrozenSet[int]) -> float:
+        """Count a connected component (cached)."""
+        cached = self.cache.get(factors)
+        if cached is not None:
+            return cached
+
+        if len(variables) <= self.enum_threshold:
+            result = _enumerate(factors, sorted(variables), self.nv, self.oracle)
+        else:
+            self._decisions += 1
+            if self._decisions > self.max_decisions:
+                raise WMCBudgetExceeded(f"WMC exceeded {self.max_decisions} decisions")
+
+            var = _branch_variable(factors, self.nv)
+            result = 0.0
+            for lit in (var, -var):
+                constant, conditioned = _condition(list(factors), lit, self.nv, self.oracle)
+                if constant:
+                    result += constant * self._count(conditioned, len(variables) - 1)
+
+        self.cache[factors] = result
+        return result
+
+
+def _make_factor(weight_sat: float, weight_unsat: float, clauses: Sequence[Sequence[int]]) -> Factor:
+    """Build a factor with clauses in canonical (sorted) form."""
+    return (weight_sat, weight_unsat, tuple(sorted(tuple(sorted(set(clause))) for clause in clauses)))
+
+
+def _group_by_auxiliary(clauses: Sequence[Sequence[int]], nv: int) -> List[List[Sequence[int]]]:
+    """Split clauses into groups: one per clause, except that clauses sharing auxiliary variables (> nv) are grouped."""
+    groups: List[List[Sequence[int]]] = []
+    group_of_aux: Dict[int, int] = {}
+    for clause in clauses:
+        merged = sorted({group_of_aux[abs(l)] for l in clause if abs(l) > nv and abs(l) in group_of_aux})
+        if merged:
+            target = merged[0]
+            for other in merged[1:]:
+                groups[target].extend(groups[other])
+                groups[other] = []
+            group_of_aux.update((var, target) for var, group in group_of_aux.items() if group in merged)
+        else:
+            target = len(groups)
+            groups.append([])
+        groups[target].append(clause)
+        group_of_aux.update((abs(l), target) for l in clause if abs(l) > nv)
+    return [group for group in groups if group]
+
+
+@functools.lru_cache(maxsize=65536)
+def _satisfiable(clauses: Tuple[Tuple[int, ...], ...], oracle: str) -> bool:
+    """Whether clauses over auxiliary variables only have a model."""
+    with Solver(name=oracle, bootstrap_with=[list(clause) for clause in clauses]) as solver:
+        return solver.solve()
+
+
+@functools.lru_cache(maxsize=4096)
+def _projected_table(clauses: Tuple[Tuple[int, ...], ...], variables: Tuple[int, ...], oracle: str) -> np.ndarray:
+    """
+    Whether the clauses are satisfiable (for some auxiliary values) under each
+    assignment of variables; entry i assigns variables[j] the j-th bit of i.
+    """
+    table = np.zeros(2 ** len(variables), dtype=bool)
+    with Solver(name=oracle, bootstrap_with=[list(clause) for clause in clauses]) as solver:
+        for index in range(len(table)):
+            table[index] = solver.solve(assumptions=[
+                var if (index >> bit) & 1 else -var for bit, var in enumerate(variables)
+            ])
+    return table
+
+
+def _condition(factors: List[Factor], lit: Optional[int], nv: int,
+               oracle: str = DEFAULT_AUX_ORACLE) -> Tuple[float, List[Factor]]:
+    """
+    Condition factors on a literal (or just simplify them if lit is None).
+
+    Satisfied clauses are removed and the falsified literal is removed from the
+    others. Factors decided by this (all clauses satisfied, or one clause
+    falsified, or only auxiliary variables (> nv) left, decided by the oracle)
+    are dropped and their weight is moved into the returned constant.
+
+    Returns:
+        Tuple of (constant, remaining factors)
+    """
+    constant = 1.0
+    remaining: List[Factor] = []
+    for weight_sat, weight_unsat, clauses in factors:
+        if weight_sat == weight_unsat:
+            constant *= weight_sat  # Uninformative factor (e.g. probability 0.5)
+            if constant == 0:
+                return 0.0, []
+            continue
+
+        new_clauses = set()
+        violated = False
+        for clause in clauses:
+            if lit is not None:
+                if lit in clause:
+                    continue
+                if -lit in clause:
+                    clause = tuple(l for l in clause if l != -lit)
+            if not clause:
+                violated = True
+                break
+            if any(-l in clause for l in clause):
+                continue  # Tautology
+            new_clauses.add(clause)
+
+        if not violated and new_clauses and all(abs(l) > nv for clause in new_clauses for l in clause):
+            violated = not _satisfiable(tuple(sorted(new_clauses)), oracle)
+            if not violated:
+                new_clauses = set()
+
+        if violated:
+            constant *= weight_unsat
+        elif not new_clauses:
+            constant *= weight_sat
+        else:
+            remaining.append((weight_sat, weight_unsat, tuple(sorted(new_clauses))))
+
+        if constant == 0:
+            return 0.0, []
+
+    return constant, remaining
+
+
+def _components(factors: List[Factor], nv: int) -> List[Tuple[Tuple[Factor, ...], FrozenSet[int]]]:
+    """Split factors into connected components (factors sharing propositions 1..nv)."""
+    parent: Dict[int, int] = {}
+
+    def find(var: int) -> int:
+        while parent[var] != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    factor_vars = []
+    for _, _, clauses in factors:
+        variables = {abs(l) for clause in clauses for l in clause if abs(l) <= nv}
+        factor_vars.append(variables)
+        first = None
+        for var in variables:
+            parent.setdefault(var, var)
+            if first is None:
+                first = find(var)
+            else:
+                root = find(var)
+                if root != first:
+                    parent[root] = first
+
+    groups: Dict[int, List[Factor]] = {}
+    group_vars: Dict[int, set] = {}
+    for factor, variables in zip(factors, factor_vars):
+        root = find(next(iter(variables)))
+        groups.setdefault(root, []).append(factor)
+        group_vars.setdefault(root, set()).update(variables)
+
+    return [(tuple(sorted(groups[root])), frozenset(group_vars[root])) for root in groups]
+
+
+def _branch_variable(factors: Sequence[Factor], nv: int) -> int:
+    """Proposition (1..nv) occurring in the most clauses."""
+    occurrences: Dict[int, int] = {}
+    for _, _, clauses in factors:
+        for clause in clauses:
+            for lit in clause:
+                if abs(lit) <= nv:
+                    occurrences[abs(lit)] = occurrences.get(abs(lit), 0) + 1
+    return max(occurrences, key=lambda var: (occurrences[var], -var))
+
+
+def _enumerate(factors: Sequence[Factor], variables: List[int], nv: int,
+               oracle: str = DEFAULT_AUX_ORACLE) -> float:
+    """Count a small component by evaluating all assignments of its propositions at once."""
+    num_vars = len(variables)
+    column = {var: i for i, var in enumerate(variables)}
+    assignments = ((np.arange(2 ** num_vars)[:, None] >> np.arange(num_vars)) & 1).astype(bool)
+
+    weights = np.ones(2 ** num_vars)
+    for weight_sat, weight_unsat, clauses in factors:
+        factor_vars = sorted({abs(l) for clause in clauses for l in clause})
+        if factor_vars[-1] > nv:
+            # Auxiliary variables: look up the projected truth table of the factor's propositions
+            props = tuple(var for var in factor_vars if var <= nv)
+            index = np.zeros(2 ** num_vars, dtype=np.int64)
+            for bit, var in enumerate(props):
+                index |= assignments[:, column[var]].astype(np.int64) << bit
+            satisfied = _projected_table(clauses, props, oracle)[index]
+            weights *= np.where(satisfied, weight_sat, weight_unsat)
+            continue
+
+        satisfied = np.ones(2 ** num_vars, dtype=bool)
+        for clause in clauses:
+            clause_sat = np.zeros(2 ** num_vars, dtype=bool)
+            for lit in clause:
+                values = assignments[:, column[abs(lit)]]
+                clause_sat |= values if lit > 0 else ~values
+            satisfied &= clause_sat
+        weights *= np.where(satisfied, weight_sat, weight_unsat)
+
+    return float(weights.sum())
+
+
+def estimate_probability(hard_clauses: List[List[int]], satisfied_constraints, probabilities: Sequence[float],
+                         query_clauses: List[List[int]], oracle: str,
+                         num_samples: int = DEFAULT_NUM_SAMPLES, seed: int = 0) -> Optional[float]:
+    """
+    Approximate P(Q | hard constraints) from sampled models.
+
+    Models of the hard constraints are drawn with a SAT oracle under random
+    phases, each distinct model is weighted by its soft constraint factors,
+    and the probability is the weighted fraction of models satisfying Q. The
+    samples are not exactly uniform, so this is an estimate.
+
+    Args:
+        hard_clauses: CNF clauses of the hard constraints
+        satisfied_constraints: Function mapping a list of models to a boolean
+            (models x soft constraints) matrix (see SoftConstraintEvaluator)
+        probabilities: Probability of each soft constraint
+        query_clauses: CNF clauses of the query
+        oracle: PySAT solver name
+        num_samples: Number of SAT calls
+        seed: Random seed
+
+    Returns:
+        Estimated probability, or None if the hard constraints are unsatisfiable
+    """
+    rng = random.Random(seed)
+    models = {}
+    with Solver(name=oracle, bootstrap_with=hard_clauses) as solver:
+        variables = sorted({abs(l) for clause in hard_clauses for l in clause} |
+                           {abs(l) for clause in query_clauses for l in clause})
+        for _ in range(num_samples):
+            solver.set_phases([var if rng.random() < 0.5 else -var for var in variables])
+            if not solver.solve():
+                return None
+            model = solver.get_model()
+            models[tuple(model)] = model
+
+    models = list(models.values())
+    probabilities = np.clip(np.asarray(probabilities, dtype=np.float64), 1e-12, 1 - 1e-12)
+    satisfied = satisfied_constraints(models)
+    log_weights = np.where(satisfied, np.log(probabilities), np.log1p(-probabilities)).sum(axis=1)
+    weights = np.exp(log_weights - log_weights.max())
+
+    satisfies_query = np.array([
+        all(any(lit in model_set for lit in clause) for clause in query_clauses)
+        for model_set in (set(model) for model in models)
+    ])
+    return float(weights[satisfies_query].sum() / weights.sum())
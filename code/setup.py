@@ -42,6 +42,7 @@ setup(
     author='Logic AI Research Team',
     python_requires='>=3.8',
     packages=find_packages(),
+    py_modules=['instrumentation'],  # Pipeline tracer shared by all subpackages
     install_requires=all_requirements,
     extras_require={
         'experiments': [